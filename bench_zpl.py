@@ -0,0 +1,304 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Benchmark do ZplGenerator com baseline versionada
+Mede etiquetas/segundo, bytes/etiqueta e pico de memória de cada layout para
+1, 1.000 e 100.000 etiquetas e compara com bench_zpl_baseline.json; termina
+com código 1 se algum caso regredir além do limite
+
+Uso:
+    python bench_zpl.py                      # mede e compara com a baseline
+    python bench_zpl.py --sizes 1,1000       # rodada rápida
+    python bench_zpl.py --update-baseline    # grava a baseline (após otimização conferida)
+
+As taxas são normalizadas por uma calibração de CPU gravada em cada caso da
+baseline, para a comparação valer entre máquinas e rodadas diferentes
+"""
+
+import argparse
+import gc
+import json
+import os
+import platform
+import sys
+import time
+import tracemalloc
+from datetime import datetime
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), 'src'))
+
+from printer.zpl_generator import ZplGenerator
+from utils.metrics import get_metrics
+
+BASELINE_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'bench_zpl_baseline.json')
+DEFAULT_SIZES = (1, 1000, 100000)
+
+# Limites de regressão padrão (fração da baseline)
+RATE_THRESHOLD = 0.30      # etiquetas/s até 30% abaixo
+BYTES_THRESHOLD = 0.0      # bytes/etiqueta: qualquer aumento muda a saída enviada à impressora
+MEMORY_THRESHOLD = 0.50    # pico de memória até 50% acima (mais MEMORY_SLACK_KIB)
+MEMORY_SLACK_KIB = 64
+
+MIN_ROUND_TIME = 0.2       # segundos mínimos por rodada de medição
+
+INDICATORS = {'is_priority': True, 'requires_special_handling': True,
+              'expiration_date': '2025-12-31', 'handling_instructions': 'Manter refrigerado entre 2 e 8 graus'}
+CONSOLIDATOR_DATA = {'cargo_count': 12, 'total_weight': '340.5', 'total_volume': '2.75',
+                     'warehouse_name': 'Cotia 1', 'additional_text': 'Cliente ACME'}
+
+
+def _addresses():
+    return [{'full_address': f"COT001-A-01-{n:02d}-01", 'floor_name': f"Andar {n}"} for n in range(8)]
+
+
+def build_cases(gen, metrics):
+    """
+    Casos medidos: nome -> função(quantidade) que gera as etiquetas e retorna o total de bytes
+
+    Os layouts de uma etiqueta por chamada são descartados a cada etiqueta (como no
+    envio em streaming); build_batch_zpl monta o lote inteiro em uma string. Os
+    casos rodam com as métricas ligadas, como vêm no settings.json (a medição do
+    lote e do streaming entra na conta); iter_batch_zpl_metrics_off mede o mesmo
+    streaming com elas desligadas
+    """
+    addresses = _addresses()
+
+    def metrics_off(job):
+        def run_disabled(quantity):
+            metrics.enabled = False
+            try:
+                return job(quantity)
+            finally:
+                metrics.enabled = True
+        return run_disabled
+
+    def per_label(build):
+        def job(quantity):
+            total = 0
+            for i in range(quantity):
+                total += len(build(i))
+            return total
+        return job
+
+    return {
+        'build_zpl': per_label(lambda i: gen.build_zpl(gen.pad8(i))),
+        'build_zpl_indicators': per_label(lambda i: gen.build_zpl(gen.pad8(i), INDICATORS)),
+        'build_batch_zpl': lambda quantity: len(gen.build_batch_zpl(1, quantity, serialize=False)),
+        'iter_batch_zpl': lambda quantity: sum(len(chunk) for chunk in
+                                               gen.iter_batch_zpl(1, quantity, serialize=False)),
+        'iter_batch_zpl_metrics_off': metrics_off(lambda quantity: sum(
+            len(chunk) for chunk in gen.iter_batch_zpl(1, quantity, serialize=False))),
+        'build_consolidator_zpl': per_label(lambda i: gen.build_consolidator_zpl(str(900000 + i),
+                                                                                 CONSOLIDATOR_DATA)),
+        'build_floor_addresses_zpl': per_label(lambda i: gen.build_floor_addresses_zpl(
+            'COT001', 'Cotia 1', 'Prédio A', f"Andar {i % 10}", addresses)),
+        'build_block_addresses_zpl': per_label(lambda i: gen.build_block_addresses_zpl(
+            'COT001', 'Cotia 1', f"Prédio {i % 10}", addresses)),
+        'build_single_address_zpl': per_label(lambda i: gen.build_single_address_zpl(
+            f"COT001-A-01-01-{i}", "Palete 03", "Prédio A", "Térreo")),
+    }
+
+
+def calibrate():
+    """Operações/segundo de um laço fixo de formatação de strings (referência de CPU)"""
+    def loop():
+        parts = []
+        for i in range(20000):
+            parts.append(f"^FO{i % 800},{i % 1200}^A0N,30,30^FD{i:08d}^FS\n")
+        return len(''.join(parts))
+
+    best = float('inf')
+    for _ in range(5):
+        start = time.perf_counter()
+        loop()
+        best = min(best, time.perf_counter() - start)
+    return 20000 / best
+
+
+def measure(job, quantity, repeat=3):
+    """
+    Mede um caso
+
+    Returns:
+        Dict com labels_per_sec (melhor rodada), bytes_per_label e peak_kib
+    """
+    gc.collect()
+    gc.disable()
+    try:
+        best = float('inf')
+        total_bytes = 0
+        for _ in range(repeat):
+            runs = 0
+            start = time.perf_counter()
+            while True:
+                total_bytes = job(quantity)
+                runs += 1
+                elapsed = time.perf_counter() - start
+                if elapsed >= MIN_ROUND_TIME:
+                    break
+            best = min(best, elapsed / runs)
+    finally:
+        gc.enable()
+
+    # Pico de memória em rodada separada (tracemalloc deixa a execução mais lenta)
+    gc.collect()
+    tracemalloc.start()
+    try:
+        job(quantity)
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    return {'labels_per_sec': round(quantity / best, 1),
+            'bytes_per_label': round(total_bytes / quantity, 1),
+            'peak_kib': round(peak / 1024, 1)}
+
+
+def run(sizes=DEFAULT_SIZES, cases=None, repeat=3):
+    """
+    Executa o benchmark
+
+    Returns:
+        Dict com meta (python, máquina, calibração) e results {"caso@quantidade": medidas}
+    """
+    gen = ZplGenerator()
+    gen.templates  # compilação fora da medição (acontece uma vez por gerador)
+    # Métricas ligadas (padrão do settings.json): regressões da medição aparecem aqui
+    metrics = get_metrics()
+    metrics_enabled, metrics.enabled = metrics.enabled, True
+
+    all_cases = build_cases(gen, metrics)
+    selected = cases or list(all_cases)
+    unknown = [name for name in selected if name not in all_cases]
+    if unknown:
+        raise ValueError(f"Casos desconhecidos: {', '.join(unknown)} (disponíveis: {', '.join(all_cases)})")
+
+    try:
+        calibration = calibrate()
+        results = {}
+        for name in selected:
+            for quantity in sizes:
+                results[f"{name}@{quantity}"] = measure(all_cases[name], quantity, repeat)
+                row = results[f"{name}@{quantity}"]
+                print(f"  {name:<28}{quantity:>8}  {row['labels_per_sec']:>12,.0f} etq/s"
+                      f"  {row['bytes_per_label']:>8,.1f} B/etq  {row['peak_kib']:>10,.1f} KiB")
+    finally:
+        metrics.enabled = metrics_enabled
+        metrics.reset()  # as medições do benchmark não vão para a exportação da aplicação
+
+    return {'meta': {'python': platform.python_version(), 'machine': platform.machine(),
+                     'platform': platform.platform(), 'date': datetime.now().isoformat(timespec='seconds'),
+                     'calibration_ops_per_sec': round(calibration, 1)},
+            'results': results}
+
+
+def compare(current, baseline, rate_threshold=RATE_THRESHOLD, bytes_threshold=BYTES_THRESHOLD,
+            memory_threshold=MEMORY_THRESHOLD):
+    """
+    Compara uma execução com a baseline
+
+    Args:
+        current: Resultado de run()
+        baseline: Conteúdo de bench_zpl_baseline.json
+
+    Returns:
+        Lista de regressões (strings); vazia se tudo dentro dos limites
+    """
+    meta_cal = baseline.get('meta', {}).get('calibration_ops_per_sec')
+    cur_cal = current.get('meta', {}).get('calibration_ops_per_sec')
+
+    regressions = []
+    for key, row in current['results'].items():
+        base = baseline.get('results', {}).get(key)
+        if not base:
+            continue
+        # Cada caso da baseline guarda a calibração da rodada em que foi medido
+        base_cal = base.get('calibration_ops_per_sec', meta_cal)
+        scale = base_cal / cur_cal if base_cal and cur_cal else 1.0
+        rate = row['labels_per_sec'] * scale
+        if rate < base['labels_per_sec'] * (1 - rate_threshold):
+            regressions.append(f"{key}: {rate:,.0f} etq/s (normalizado) < baseline "
+                               f"{base['labels_per_sec']:,.0f} - {rate_threshold:.0%}")
+        if row['bytes_per_label'] > base['bytes_per_label'] * (1 + bytes_threshold):
+            regressions.append(f"{key}: {row['bytes_per_label']:,.1f} B/etq > baseline "
+                               f"{base['bytes_per_label']:,.1f}")
+        if row['peak_kib'] > base['peak_kib'] * (1 + memory_threshold) + MEMORY_SLACK_KIB:
+            regressions.append(f"{key}: pico {row['peak_kib']:,.1f} KiB > baseline "
+                               f"{base['peak_kib']:,.1f} + {memory_threshold:.0%}")
+    return regressions
+
+
+def merge_baseline(baseline, current):
+    """
+    Junta uma rodada (possivelmente parcial) à baseline
+
+    Casos/quantidades não medidos na rodada continuam com a medição anterior; cada
+    caso leva a calibração de CPU da sua rodada, porque rodadas diferentes só se
+    comparam depois de normalizadas
+
+    Returns:
+        Nova baseline
+    """
+    meta_cal = baseline.get('meta', {}).get('calibration_ops_per_sec')
+    merged = {key: dict(row, calibration_ops_per_sec=row.get('calibration_ops_per_sec', meta_cal))
+              for key, row in baseline.get('results', {}).items()}
+    calibration = current['meta']['calibration_ops_per_sec']
+    for key, row in current['results'].items():
+        merged[key] = dict(row, calibration_ops_per_sec=calibration)
+    meta = {key: value for key, value in current['meta'].items() if key != 'calibration_ops_per_sec'}
+    return {'meta': meta, 'results': dict(sorted(merged.items()))}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark do ZplGenerator com baseline")
+    parser.add_argument('--sizes', default=','.join(str(s) for s in DEFAULT_SIZES),
+                        help="Quantidades de etiquetas, separadas por vírgula")
+    parser.add_argument('--cases', default='', help="Casos a medir, separados por vírgula (padrão: todos)")
+    parser.add_argument('--repeat', type=int, default=3, help="Rodadas por medição (vale a melhor)")
+    parser.add_argument('--baseline', default=BASELINE_FILE, help="Arquivo de baseline")
+    parser.add_argument('--update-baseline', action='store_true', help="Grava o resultado como baseline")
+    parser.add_argument('--threshold', type=float, default=RATE_THRESHOLD,
+                        help="Queda de etiquetas/s tolerada (fração, padrão 0.30)")
+    parser.add_argument('--json', default='', help="Grava o resultado completo neste arquivo")
+    args = parser.parse_args(argv)
+
+    sizes = [int(s) for s in args.sizes.split(',') if s.strip()]
+    cases = [c.strip() for c in args.cases.split(',') if c.strip()] or None
+
+    print(f"📊 Benchmark ZplGenerator (Python {platform.python_version()}, quantidades {sizes})\n")
+    current = run(sizes, cases, max(1, args.repeat))
+    print(f"\n⚙️ Calibração de CPU: {current['meta']['calibration_ops_per_sec']:,.0f} op/s")
+
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump(current, f, ensure_ascii=False, indent=2)
+
+    if args.update_baseline:
+        baseline = {}
+        if os.path.exists(args.baseline):
+            with open(args.baseline, encoding='utf-8') as f:
+                baseline = json.load(f)
+        with open(args.baseline, 'w', encoding='utf-8') as f:
+            json.dump(merge_baseline(baseline, current), f, ensure_ascii=False, indent=2)
+            f.write('\n')
+        print(f"💾 Baseline gravada em {args.baseline}")
+        return 0
+
+    if not os.path.exists(args.baseline):
+        print(f"⚠️ Sem baseline em {args.baseline}; use --update-baseline")
+        return 0
+    with open(args.baseline, encoding='utf-8') as f:
+        baseline = json.load(f)
+
+    regressions = compare(current, baseline, rate_threshold=args.threshold)
+    if regressions:
+        print(f"\n❌ {len(regressions)} regressão(ões) em relação à baseline:")
+        for line in regressions:
+            print(f"  • {line}")
+        return 1
+    print("\n✅ Dentro dos limites da baseline")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
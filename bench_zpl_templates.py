@@ -0,0 +1,95 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Benchmark dos templates ZPL pré-compilados
+Compara etiquetas/segundo do ZplGenerator anterior aos templates (antes,
+lido do commit ORIGINAL_COMMIT pelo git) com a renderização do template
+compilado (depois). Sem o histórico do git só a coluna "depois" é medida
+
+Uso: python bench_zpl_templates.py [quantidade]
+"""
+
+import sys
+import os
+import subprocess
+import time
+import types
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), 'src'))
+
+from printer.zpl_generator import ZplGenerator
+
+# Último commit com o gerador que montava o layout a cada etiqueta
+ORIGINAL_COMMIT = '8fbd439'
+ORIGINAL_PATH = 'src/printer/zpl_generator.py'
+
+
+def _rate(func, quantity):
+    """Executa func(i) quantity vezes e retorna etiquetas/segundo"""
+    start = time.perf_counter()
+    for i in range(quantity):
+        func(i)
+    elapsed = time.perf_counter() - start
+    return quantity / elapsed if elapsed > 0 else float('inf')
+
+
+def _addresses(prefix):
+    return [{'full_address': f"{prefix}-A-01-{n:02d}-01", 'floor_name': f"Andar {n}"} for n in range(8)]
+
+
+def load_original_generator():
+    """
+    ZplGenerator do commit ORIGINAL_COMMIT (código anterior aos templates)
+
+    Returns:
+        Instância do gerador antigo ou None se o git/histórico não estiver disponível
+    """
+    try:
+        source = subprocess.run(['git', 'show', f'{ORIGINAL_COMMIT}:{ORIGINAL_PATH}'],
+                                cwd=os.path.dirname(os.path.abspath(__file__)), capture_output=True,
+                                check=True).stdout.decode('utf-8')
+    except (OSError, subprocess.CalledProcessError) as e:
+        print(f"⚠️ Gerador original indisponível ({e}); medindo só os templates\n")
+        return None
+    module = types.ModuleType('zpl_generator_original')
+    exec(compile(source, f'{ORIGINAL_COMMIT}:{ORIGINAL_PATH}', 'exec'), module.__dict__)
+    return module.ZplGenerator()
+
+
+def run(quantity=20000):
+    gen = ZplGenerator()
+    gen.templates  # compilação fora da medição (acontece uma vez por gerador)
+    original = load_original_generator()
+    addresses = _addresses('COT001')
+
+    # Mesma chamada nos dois geradores: (nome, função(gerador, i))
+    cases = [
+        ('Etiqueta sequencial', lambda g, i: g.build_zpl(g.pad8(i))),
+        ('Consolidador (sem dados)', lambda g, i: g.build_consolidator_zpl(str(900000 + i))),
+        ('Endereço individual',
+         lambda g, i: g.build_single_address_zpl(f"COT001-A-01-01-{i}", "Palete 03", "Prédio A", "Térreo")),
+        ('Andar (8 endereços)',
+         lambda g, i: g.build_floor_addresses_zpl('COT001', 'Cotia 1', 'Prédio A', 'Térreo', addresses)),
+        ('Bloco (8 endereços)',
+         lambda g, i: g.build_block_addresses_zpl('COT001', 'Cotia 1', 'Prédio A', addresses)),
+    ]
+
+    print(f"📊 Benchmark templates ZPL ({quantity} etiquetas por caso)\n")
+    print(f"{'Layout':<28}{'antes (etq/s)':>16}{'depois (etq/s)':>16}{'ganho':>9}")
+    for name, build in cases:
+        rate_after = _rate(lambda i: build(gen, i), quantity)
+        if original is None:
+            print(f"{name:<28}{'-':>16}{rate_after:>16,.0f}{'-':>9}")
+            continue
+        assert build(original, 1) == build(gen, 1), f"{name}: saída diferente do gerador original"
+        rate_before = _rate(lambda i: build(original, i), quantity)
+        print(f"{name:<28}{rate_before:>16,.0f}{rate_after:>16,.0f}{rate_after / rate_before:>8.1f}x")
+
+    start = time.perf_counter()
+    total = sum(len(chunk) for chunk in gen.iter_batch_zpl(1, quantity))
+    elapsed = time.perf_counter() - start
+    print(f"\n🖨️ iter_batch_zpl: {quantity / elapsed:,.0f} etq/s ({total / elapsed / 1024 / 1024:.1f} MiB/s)")
+
+
+if __name__ == "__main__":
+    run(int(sys.argv[1]) if len(sys.argv) > 1 else 20000)
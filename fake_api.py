@@ -0,0 +1,34 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Resposta HTTP falsa compartilhada pelos testes
+Imita o que o código usa de requests.Response (status_code, text, headers,
+json()); cada teste monta a sua API falsa devolvendo FakeResponse
+"""
+
+import json
+
+
+class FakeResponse:
+    """Resposta com corpo JSON em data ou texto bruto em text"""
+
+    def __init__(self, status_code, data=None, headers=None, text=None):
+        """
+        Args:
+            status_code: Código HTTP
+            data: Corpo devolvido por json() (None = decodifica text, se houver)
+            headers: Cabeçalhos da resposta
+            text: Corpo bruto (padrão: data serializado, ou '' sem corpo)
+        """
+        self.status_code = status_code
+        self._data = data
+        self.headers = headers or {}
+        if text is None:
+            text = '' if data is None else json.dumps(data, ensure_ascii=False, default=str)
+        self.text = text
+
+    def json(self):
+        if self._data is None and self.text:
+            return json.loads(self.text)
+        return self._data
@@ -4,26 +4,107 @@
 """
 Gerenciador de endereços de armazém para impressão de etiquetas
 Processa dados da API de warehouse e organiza paletes por andar
+
+A estrutura da API é convertida uma única vez em registros compactos
+(__slots__) com índices por id de prédio/andar/palete e listas por andar e
+por posição já montadas: as consultas não percorrem mais o warehouse inteiro
 """
 
 import sys
 import os
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
-from typing import Dict, List, Any, Tuple
+from bisect import bisect_left
+from typing import Dict, List, Any, Optional, Tuple
 from utils.logger import log_info, log_error
 
+
+def _text(value: Any) -> Any:
+    """Compartilha strings repetidas (status, códigos, nomes de palete) entre os registros"""
+    return sys.intern(value) if type(value) is str else value
+
+
+class BuildingRecord:
+    """Prédio do warehouse"""
+
+    __slots__ = ('id', 'code', 'name', 'total_floors', 'floors', 'positions')
+
+    def __init__(self, data: Dict[str, Any]):
+        self.id = data.get('id')
+        self.code = _text(data.get('code'))
+        self.name = _text(data.get('name'))
+        self.total_floors = data.get('total_floors', 0)
+        self.floors: List['FloorRecord'] = []  # Ordem da API
+        # positions[i]: palete da posição i de cada andar, do mais alto para o mais baixo
+        self.positions: List[Tuple['PalletRecord', ...]] = []
+
+
+class FloorRecord:
+    """Andar de um prédio"""
+
+    __slots__ = ('id', 'code', 'name', 'floor_number', 'building', 'pallets')
+
+    def __init__(self, data: Dict[str, Any], building: BuildingRecord):
+        self.id = data.get('id')
+        self.code = _text(data.get('code'))
+        self.name = _text(data.get('name'))
+        self.floor_number = data.get('floor_number', 0)
+        self.building = building
+        self.pallets: List['PalletRecord'] = []  # Ordem da API (posição)
+
+
+class PalletRecord:
+    """Posição de palete (endereço) de um andar"""
+
+    __slots__ = ('id', 'code', 'name', 'full_address', 'short_address', 'status', 'floor', 'position')
+
+    def __init__(self, data: Dict[str, Any], floor: FloorRecord, position: int):
+        self.id = data.get('id')
+        self.code = _text(data.get('code'))
+        self.name = _text(data.get('name'))
+        self.full_address = data.get('full_address', '')
+        self.short_address = data.get('short_address', '')
+        self.status = _text(data.get('status', 'LIVRE'))
+        self.floor = floor
+        self.position = position  # Índice em floor.pallets
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Formato de palete usado nas listas por andar"""
+        return {
+            'id': self.id,
+            'code': self.code,
+            'name': self.name,
+            'full_address': self.full_address,
+            'short_address': self.short_address,
+            'status': self.status
+        }
+
+
+def _or_empty(value: Any) -> Any:
+    return '' if value is None else value
+
+
 class AddressManager:
     """Gerencia endereços de warehouse e organiza para impressão"""
     
     def __init__(self):
         """Inicializa o gerenciador de endereços"""
-        self.warehouse_data = None
+        self.warehouse_data = None  # Dados do warehouse sem a árvore de prédios
+        self.buildings: List[BuildingRecord] = []
+        self._buildings_by_id: Dict[Any, BuildingRecord] = {}
+        self._floors_by_id: Dict[Any, FloorRecord] = {}
+        self._pallets_by_id: Dict[Any, PalletRecord] = {}
+        self._pallets_by_address: Dict[str, PalletRecord] = {}
+        self._sorted_addresses: List[str] = []  # Endereços em maiúsculas, ordenados
+        self._sorted_pallets: List[PalletRecord] = []  # Paletes na mesma ordem de _sorted_addresses
+        self._search_text: List[Tuple[str, PalletRecord]] = []  # ("ENDEREÇO NOME", palete)
         
     def load_warehouse_data(self, warehouse_data: Dict[str, Any]) -> bool:
         """
         Carrega dados do warehouse retornados pela API
         
+        Monta os registros e índices; a estrutura original não é mantida.
+        
         Args:
             warehouse_data: Dict com estrutura completa do warehouse da API
             
@@ -34,15 +115,127 @@ class AddressManager:
             if not warehouse_data or 'data' not in warehouse_data:
                 log_error("Dados de warehouse inválidos")
                 return False
-                
-            self.warehouse_data = warehouse_data['data']
-            log_info(f"Warehouse carregado: {self.warehouse_data.get('name', 'Unknown')}")
+            
+            data = warehouse_data['data']
+            buildings = data.get('buildings')
+            self._build_index(buildings or [])
+            self.warehouse_data = {key: value for key, value in data.items() if key != 'buildings'}
+            
+            log_info(f"Warehouse carregado: {self.warehouse_data.get('name', 'Unknown')} "
+                     f"({len(self.buildings)} prédios, {len(self._floors_by_id)} andares, "
+                     f"{len(self._pallets_by_id)} posições)")
             return True
             
         except Exception as e:
             log_error(f"Erro ao carregar warehouse: {str(e)}")
             return False
     
+    def _build_index(self, buildings_data: List[Dict[str, Any]]):
+        """Converte a árvore da API em registros indexados"""
+        buildings = []
+        buildings_by_id = {}
+        floors_by_id = {}
+        pallets_by_id = {}
+        pallets_by_address = {}
+        
+        for building_data in buildings_data:
+            building = BuildingRecord(building_data)
+            buildings.append(building)
+            buildings_by_id.setdefault(building.id, building)
+            
+            for floor_data in building_data.get('floors', []):
+                floor = FloorRecord(floor_data, building)
+                building.floors.append(floor)
+                floors_by_id.setdefault(floor.id, floor)
+                
+                for pallet_data in floor_data.get('pallets', []):
+                    pallet = PalletRecord(pallet_data, floor, len(floor.pallets))
+                    floor.pallets.append(pallet)
+                    pallets_by_id.setdefault(pallet.id, pallet)
+                    if pallet.full_address:
+                        pallets_by_address.setdefault(pallet.full_address, pallet)
+            
+            # Posições verticais (MODELO 03): do andar mais alto para o mais baixo
+            floors = sorted(building.floors, key=lambda f: f.floor_number, reverse=True)
+            max_positions = max((len(floor.pallets) for floor in floors), default=0)
+            building.positions = [
+                tuple(floor.pallets[pos_idx] for floor in floors if pos_idx < len(floor.pallets))
+                for pos_idx in range(max_positions)
+            ]
+        
+        self.buildings = buildings
+        self._buildings_by_id = buildings_by_id
+        self._floors_by_id = floors_by_id
+        self._pallets_by_id = pallets_by_id
+        self._pallets_by_address = pallets_by_address
+        
+        # Índice de busca: endereços ordenados (prefixo por bisect) e texto para substring
+        all_pallets = [pallet for building in buildings for floor in building.floors for pallet in floor.pallets]
+        self._search_text = [(f"{pallet.full_address or ''} {pallet.name or ''}".upper(), pallet)
+                             for pallet in all_pallets]
+        addressed = sorted(((pallet.full_address.upper(), pallet) for pallet in all_pallets
+                            if pallet.full_address), key=lambda item: item[0])
+        self._sorted_addresses = [address for address, _ in addressed]
+        self._sorted_pallets = [pallet for _, pallet in addressed]
+    
+    def get_building(self, building_id: int) -> Optional[BuildingRecord]:
+        """Prédio pelo id (O(1))"""
+        return self._buildings_by_id.get(building_id)
+    
+    def get_floor(self, building_id: int, floor_id: int) -> Optional[FloorRecord]:
+        """Andar pelo id, se pertencer ao prédio (O(1))"""
+        floor = self._floors_by_id.get(floor_id)
+        if floor is None or floor.building.id != building_id:
+            return None
+        return floor
+    
+    def get_pallet(self, building_id: int, floor_id: int, pallet_id: int) -> Optional[PalletRecord]:
+        """Palete pelo id, se pertencer ao andar e prédio (O(1))"""
+        pallet = self._pallets_by_id.get(pallet_id)
+        if pallet is None or pallet.floor.id != floor_id or pallet.floor.building.id != building_id:
+            return None
+        return pallet
+    
+    def get_pallet_by_address(self, full_address: str) -> Optional[PalletRecord]:
+        """Palete pelo endereço completo (O(1))"""
+        return self._pallets_by_address.get(full_address)
+    
+    def search_pallets(self, query: str, limit: int = 200) -> List[PalletRecord]:
+        """
+        Busca paletes por endereço ou nome (sem diferenciar maiúsculas)
+        
+        Endereços que começam com o texto vêm primeiro (em ordem de endereço),
+        seguidos dos que o contêm em qualquer ponto (endereço ou nome).
+        
+        Args:
+            query: Texto da busca
+            limit: Máximo de resultados
+            
+        Returns:
+            Lista de até 'limit' paletes
+        """
+        query = query.strip().upper()
+        if not query or limit <= 0:
+            return []
+        
+        results = []
+        seen = set()
+        index = bisect_left(self._sorted_addresses, query)
+        while (index < len(self._sorted_addresses) and len(results) < limit
+               and self._sorted_addresses[index].startswith(query)):
+            pallet = self._sorted_pallets[index]
+            results.append(pallet)
+            seen.add(id(pallet))
+            index += 1
+        
+        for text, pallet in self._search_text:
+            if len(results) >= limit:
+                break
+            if query in text and id(pallet) not in seen:
+                results.append(pallet)
+        
+        return results
+    
     def get_warehouse_info(self) -> Dict[str, str]:
         """
         Retorna informações básicas do warehouse
@@ -66,19 +259,12 @@ class AddressManager:
         Returns:
             Lista de dicts com informações dos prédios
         """
-        if not self.warehouse_data or 'buildings' not in self.warehouse_data:
-            return []
-            
-        buildings = []
-        for building in self.warehouse_data['buildings']:
-            buildings.append({
-                'id': building.get('id'),
-                'code': building.get('code'),
-                'name': building.get('name'),
-                'floors_count': building.get('total_floors', 0)
-            })
-            
-        return buildings
+        return [{
+            'id': building.id,
+            'code': building.code,
+            'name': building.name,
+            'floors_count': building.total_floors
+        } for building in self.buildings]
     
     def get_floors_by_building(self, building_id: int) -> List[Dict[str, Any]]:
         """
@@ -90,22 +276,16 @@ class AddressManager:
         Returns:
             Lista de dicts com informações dos andares
         """
-        if not self.warehouse_data or 'buildings' not in self.warehouse_data:
+        building = self.get_building(building_id)
+        if building is None:
             return []
             
-        for building in self.warehouse_data['buildings']:
-            if building.get('id') == building_id:
-                floors = []
-                for floor in building.get('floors', []):
-                    floors.append({
-                        'id': floor.get('id'),
-                        'code': floor.get('code'),
-                        'name': floor.get('name'),
-                        'pallets_count': len(floor.get('pallets', []))
-                    })
-                return floors
-                
-        return []
+        return [{
+            'id': floor.id,
+            'code': floor.code,
+            'name': floor.name,
+            'pallets_count': len(floor.pallets)
+        } for floor in building.floors]
     
     def get_pallets_by_floor(self, building_id: int, floor_id: int) -> List[Dict[str, Any]]:
         """
@@ -118,26 +298,11 @@ class AddressManager:
         Returns:
             Lista de dicts com informações dos paletes
         """
-        if not self.warehouse_data or 'buildings' not in self.warehouse_data:
+        floor = self.get_floor(building_id, floor_id)
+        if floor is None:
             return []
             
-        for building in self.warehouse_data['buildings']:
-            if building.get('id') == building_id:
-                for floor in building.get('floors', []):
-                    if floor.get('id') == floor_id:
-                        pallets = []
-                        for pallet in floor.get('pallets', []):
-                            pallets.append({
-                                'id': pallet.get('id'),
-                                'code': pallet.get('code'),
-                                'name': pallet.get('name'),
-                                'full_address': pallet.get('full_address', ''),
-                                'short_address': pallet.get('short_address', ''),
-                                'status': pallet.get('status', 'LIVRE')
-                            })
-                        return pallets
-                        
-        return []
+        return [pallet.to_dict() for pallet in floor.pallets]
     
     def organize_addresses_by_floor(self) -> List[Dict[str, Any]]:
         """
@@ -160,44 +325,25 @@ class AddressManager:
                 ]
             }
         """
-        if not self.warehouse_data or 'buildings' not in self.warehouse_data:
+        if not self.warehouse_data:
             return []
             
         organized = []
         warehouse_info = self.get_warehouse_info()
         
-        for building in self.warehouse_data['buildings']:
-            building_id = building.get('id')
-            building_code = building.get('code', '')
-            building_name = building.get('name', '')
-            
-            for floor in building.get('floors', []):
-                floor_id = floor.get('id')
-                floor_code = floor.get('code', '')
-                floor_name = floor.get('name', '')
-                
-                pallets = []
-                for pallet in floor.get('pallets', []):
-                    pallets.append({
-                        'id': pallet.get('id'),
-                        'code': pallet.get('code'),
-                        'name': pallet.get('name'),
-                        'full_address': pallet.get('full_address', ''),
-                        'short_address': pallet.get('short_address', ''),
-                        'status': pallet.get('status', 'LIVRE')
-                    })
-                
-                if pallets:  # Só adicionar se houver paletes
+        for building in self.buildings:
+            for floor in building.floors:
+                if floor.pallets:  # Só adicionar se houver paletes
                     organized.append({
                         'warehouse_code': warehouse_info['code'],
                         'warehouse_name': warehouse_info['name'],
-                        'building_id': building_id,
-                        'building_code': building_code,
-                        'building_name': building_name,
-                        'floor_id': floor_id,
-                        'floor_code': floor_code,
-                        'floor_name': floor_name,
-                        'pallets': pallets
+                        'building_id': building.id,
+                        'building_code': _or_empty(building.code),
+                        'building_name': _or_empty(building.name),
+                        'floor_id': floor.id,
+                        'floor_code': _or_empty(floor.code),
+                        'floor_name': _or_empty(floor.name),
+                        'pallets': [pallet.to_dict() for pallet in floor.pallets]
                     })
         
         return organized
@@ -216,43 +362,26 @@ class AddressManager:
             - header_info: Dict com warehouse_code, warehouse_name, building_name, floor_name
             - groups_of_pallets: Lista de grupos, cada grupo com até 8 paletes
         """
-        if not self.warehouse_data or 'buildings' not in self.warehouse_data:
+        floor = self.get_floor(building_id, floor_id)
+        if floor is None:
             return ({}, [])
             
         warehouse_info = self.get_warehouse_info()
         
-        for building in self.warehouse_data['buildings']:
-            if building.get('id') == building_id:
-                building_name = building.get('name', '')
-                
-                for floor in building.get('floors', []):
-                    if floor.get('id') == floor_id:
-                        floor_name = floor.get('name', '')
-                        
-                        # Informações do header
-                        header = {
-                            'warehouse_code': warehouse_info['code'],
-                            'warehouse_name': warehouse_info['name'],
-                            'building_name': building_name,
-                            'floor_name': floor_name
-                        }
-                        
-                        # Paletes para impressão
-                        pallets = []
-                        for pallet in floor.get('pallets', []):
-                            pallets.append({
-                                'full_address': pallet.get('full_address', ''),
-                                'name': pallet.get('name', '')
-                            })
-                        
-                        # Dividir em grupos de 8
-                        groups = []
-                        for i in range(0, len(pallets), 8):
-                            groups.append(pallets[i:i+8])
-                        
-                        return (header, groups)
+        # Informações do header
+        header = {
+            'warehouse_code': warehouse_info['code'],
+            'warehouse_name': warehouse_info['name'],
+            'building_name': _or_empty(floor.building.name),
+            'floor_name': _or_empty(floor.name)
+        }
+        
+        # Paletes para impressão, divididos em grupos de 8
+        pallets = [{'full_address': pallet.full_address, 'name': _or_empty(pallet.name)}
+                   for pallet in floor.pallets]
+        groups = [pallets[i:i+8] for i in range(0, len(pallets), 8)]
         
-        return ({}, [])
+        return (header, groups)
     
     def get_pallet_label_data(self, building_id: int, floor_id: int, pallet_id: int) -> Dict[str, str]:
         """
@@ -266,27 +395,16 @@ class AddressManager:
         Returns:
             Dict com full_address, pallet_name, building_name, floor_name
         """
-        if not self.warehouse_data or 'buildings' not in self.warehouse_data:
+        pallet = self.get_pallet(building_id, floor_id, pallet_id)
+        if pallet is None:
             return {}
             
-        for building in self.warehouse_data['buildings']:
-            if building.get('id') == building_id:
-                building_name = building.get('name', '')
-                
-                for floor in building.get('floors', []):
-                    if floor.get('id') == floor_id:
-                        floor_name = floor.get('name', '')
-                        
-                        for pallet in floor.get('pallets', []):
-                            if pallet.get('id') == pallet_id:
-                                return {
-                                    'full_address': pallet.get('full_address', ''),
-                                    'pallet_name': pallet.get('name', ''),
-                                    'building_name': building_name,
-                                    'floor_name': floor_name
-                                }
-        
-        return {}
+        return {
+            'full_address': pallet.full_address,
+            'pallet_name': _or_empty(pallet.name),
+            'building_name': _or_empty(pallet.floor.building.name),
+            'floor_name': _or_empty(pallet.floor.name)
+        }
     
     def organize_addresses_by_block(self) -> List[Dict[str, Any]]:
         """
@@ -311,65 +429,28 @@ class AddressManager:
                 ]
             }
         """
-        if not self.warehouse_data or 'buildings' not in self.warehouse_data:
+        if not self.warehouse_data:
             return []
             
         organized = []
         warehouse_info = self.get_warehouse_info()
         
-        for building in self.warehouse_data['buildings']:
-            building_id = building.get('id')
-            building_code = building.get('code', '')
-            building_name = building.get('name', '')
-            
-            # Coletar todos os andares e ordenar do mais alto para o mais baixo
-            floors = sorted(
-                building.get('floors', []),
-                key=lambda f: f.get('floor_number', 0),
-                reverse=True  # Andar mais alto primeiro
-            )
-            
-            if not floors:
-                continue
-            
-            # Encontrar número máximo de posições em qualquer andar deste prédio
-            max_positions = 0
-            for floor in floors:
-                pallets = floor.get('pallets', [])
-                if pallets:
-                    # Assumindo que pallet.code ou position_number indica a posição
-                    # Vamos usar o tamanho da lista como indicativo
-                    max_positions = max(max_positions, len(pallets))
-            
-            # Iterar por cada número de posição (1, 2, 3, etc.)
-            for pos_idx in range(max_positions):
-                block_addresses = []
-                
-                # Coletar a posição pos_idx de cada andar (do mais alto para o mais baixo)
-                for floor in floors:
-                    floor_name = floor.get('name', '')
-                    pallets = floor.get('pallets', [])
-                    
-                    # Se este andar tem palete nesta posição
-                    if pos_idx < len(pallets):
-                        pallet = pallets[pos_idx]
-                        block_addresses.append({
-                            'full_address': pallet.get('full_address', ''),
-                            'floor_name': floor_name,
-                            'position_number': pos_idx + 1  # Posição baseada em 1
-                        })
-                
-                # Se encontrou endereços para esta posição, adicionar ao resultado
-                if block_addresses:
-                    organized.append({
-                        'warehouse_code': warehouse_info['code'],
-                        'warehouse_name': warehouse_info['name'],
-                        'building_id': building_id,
-                        'building_code': building_code,
-                        'building_name': building_name,
-                        'position_group': pos_idx + 1,  # Número da posição (1-based)
-                        'addresses': block_addresses
-                    })
+        for building in self.buildings:
+            # Posições já agrupadas do andar mais alto para o mais baixo
+            for pos_idx, position in enumerate(building.positions):
+                organized.append({
+                    'warehouse_code': warehouse_info['code'],
+                    'warehouse_name': warehouse_info['name'],
+                    'building_id': building.id,
+                    'building_code': _or_empty(building.code),
+                    'building_name': _or_empty(building.name),
+                    'position_group': pos_idx + 1,  # Número da posição (1-based)
+                    'addresses': [{
+                        'full_address': pallet.full_address,
+                        'floor_name': _or_empty(pallet.floor.name),
+                        'position_number': pos_idx + 1  # Posição baseada em 1
+                    } for pallet in position]
+                })
         
         return organized
     
@@ -381,38 +462,30 @@ class AddressManager:
         Returns:
             Lista de dicts com informações completas de cada palete
         """
-        if not self.warehouse_data or 'buildings' not in self.warehouse_data:
+        if not self.warehouse_data:
             return []
             
         all_pallets = []
         warehouse_info = self.get_warehouse_info()
         
-        for building in self.warehouse_data['buildings']:
-            building_id = building.get('id')
-            building_code = building.get('code', '')
-            building_name = building.get('name', '')
-            
-            for floor in building.get('floors', []):
-                floor_id = floor.get('id')
-                floor_code = floor.get('code', '')
-                floor_name = floor.get('name', '')
-                
-                for pallet in floor.get('pallets', []):
+        for building in self.buildings:
+            for floor in building.floors:
+                for pallet in floor.pallets:
                     all_pallets.append({
                         'warehouse_code': warehouse_info['code'],
                         'warehouse_name': warehouse_info['name'],
-                        'building_id': building_id,
-                        'building_code': building_code,
-                        'building_name': building_name,
-                        'floor_id': floor_id,
-                        'floor_code': floor_code,
-                        'floor_name': floor_name,
-                        'pallet_id': pallet.get('id'),
-                        'pallet_code': pallet.get('code'),
-                        'pallet_name': pallet.get('name'),
-                        'full_address': pallet.get('full_address', ''),
-                        'short_address': pallet.get('short_address', ''),
-                        'status': pallet.get('status', 'LIVRE')
+                        'building_id': building.id,
+                        'building_code': _or_empty(building.code),
+                        'building_name': _or_empty(building.name),
+                        'floor_id': floor.id,
+                        'floor_code': _or_empty(floor.code),
+                        'floor_name': _or_empty(floor.name),
+                        'pallet_id': pallet.id,
+                        'pallet_code': pallet.code,
+                        'pallet_name': pallet.name,
+                        'full_address': pallet.full_address,
+                        'short_address': pallet.short_address,
+                        'status': pallet.status
                     })
         
         return all_pallets
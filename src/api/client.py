@@ -1,7 +1,19 @@
 import requests
 import json
 import os
+import re
+import time
 from utils.config import load_config
+from utils.metrics import get_metrics
+from api.session import get_session_pool, resolve_timeout
+
+# Segmentos numéricos (IDs, códigos de carga) viram {id} no rótulo das métricas
+_ID_SEGMENT_RE = re.compile(r'/\d+(?=/|$)')
+
+
+def metric_endpoint(endpoint):
+    """Endpoint normalizado para rótulo de métricas (ex: /cargos/{id}/receive-physically)"""
+    return _ID_SEGMENT_RE.sub('/{id}', '/' + endpoint.split('?')[0].strip('/'))
 
 class APIClient:
     def __init__(self):
@@ -12,6 +24,12 @@ class APIClient:
         self.base_url = config.get('api_base', 'http://localhost:8000/api')
         self.timeout = config.get('timeout', 30)
         self.debug_mode = config.get('debug_mode', False)
+        
+        # Sessão compartilhada com pool de conexões keep-alive
+        http_config = config.get('http', {})
+        self.timeouts = http_config.get('timeouts', {})
+        self.session = get_session_pool(http_config)
+        
         self.headers = {
             'Content-Type': 'application/json',
             'Accept': 'application/json'
@@ -26,18 +44,22 @@ class APIClient:
         if headers:
             request_headers.update(headers)
         
+        method = method.upper()
+        if method not in ('GET', 'POST', 'PUT', 'DELETE'):
+            raise ValueError(f"Unsupported HTTP method: {method}")
+        
+        # Timeout (connect, read) por endpoint, configurável em settings.json
+        timeout = kwargs.pop('timeout', None) or self.get_timeout(endpoint)
+        
+        start = time.perf_counter()
+        status = 'error'
         try:
-            if method.upper() == 'GET':
-                response = requests.get(url, headers=request_headers, timeout=self.timeout, **kwargs)
-            elif method.upper() == 'POST':
-                response = requests.post(url, json=data, headers=request_headers, timeout=self.timeout, **kwargs)
-            elif method.upper() == 'PUT':
-                response = requests.put(url, json=data, headers=request_headers, timeout=self.timeout, **kwargs)
-            elif method.upper() == 'DELETE':
-                response = requests.delete(url, headers=request_headers, timeout=self.timeout, **kwargs)
+            if method in ('POST', 'PUT'):
+                response = self.session.request(method, url, json=data, headers=request_headers, timeout=timeout, **kwargs)
             else:
-                raise ValueError(f"Unsupported HTTP method: {method}")
+                response = self.session.request(method, url, headers=request_headers, timeout=timeout, **kwargs)
 
+            status = f"{response.status_code // 100}xx"
             return response
             
         except requests.exceptions.Timeout:
@@ -46,6 +68,17 @@ class APIClient:
             raise Exception("Erro de conexão - verifique a conectividade com a API")
         except requests.exceptions.RequestException as e:
             raise Exception(f"Erro na requisição: {str(e)}")
+        finally:
+            get_metrics().observe('api_request', (time.perf_counter() - start) * 1000, status == 'error',
+                                  endpoint=metric_endpoint(endpoint), method=method, status=status)
+
+    def get_timeout(self, endpoint):
+        """Retorna o timeout (connect, read) configurado para o endpoint"""
+        return resolve_timeout(endpoint, self.timeouts, default_read=self.timeout)
+
+    def get_connection_stats(self):
+        """Retorna os contadores de reaproveitamento de conexões do pool HTTP"""
+        return self.session.get_stats()
 
     def get(self, endpoint, headers=None, **kwargs):
         """Realiza uma requisição GET"""
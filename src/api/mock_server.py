@@ -0,0 +1,792 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Servidor local que imita a API do WMS (desenvolvimento e benchmarks)
+Atende login, cargas, recebimento físico, labels, consolidadores e estrutura
+de galpões com fixtures geradas a partir de uma semente. Latência, erros HTTP
+e quedas de conexão podem ser injetados por rota para medir concorrência,
+cache e retentativas do cliente sem o backend real
+
+Por padrão só existem os endpoints e cabeçalhos da API real. As extensões que
+o cliente usa quando a API oferece ficam atrás de opções: --with-reserve
+(POST /labels/{id}/reserve e /release), --with-batch (recebimento em lote),
+--idempotency (Idempotency-Key) e --etag (ETag/If-Match nas labels e
+ETag/Last-Modified nos galpões)
+
+Uso: python src/api/mock_server.py --port 8000 --pallets 100000 --latency lognormal:40,0.5 --error-rate 0.02
+"""
+
+import hashlib
+import json
+import math
+import os
+import random
+import re
+import socket
+import sys
+import threading
+import time
+import uuid
+from datetime import datetime, timedelta
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Callable, Dict, List, Optional, Tuple
+from urllib.parse import parse_qs, urlsplit
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from api.client import metric_endpoint
+from utils.logger import log_info, log_warning
+
+API_PREFIX = '/api'
+
+# Status das cargas nas fixtures
+PENDING_RECEIPT = 'PENDING_RECEIPT'
+RECEIVED = 'RECEIVED'
+CHECKED = 'CHECKED'
+REJECTED = 'REJECTED'
+CONSOLIDATED = 'CONSOLIDATED'
+
+RECEIVE_ACTIONS = ('accept', 'accept_with_remarks', 'reject')
+CONSOLIDATION_STATUSES = (RECEIVED, CHECKED)
+
+
+class LatencyModel:
+    """
+    Distribuição de latência a partir de uma especificação em texto
+
+    Formatos: "0" (sem atraso), "20" ou "fixed:20", "uniform:10,50",
+    "normal:30,10" (média, desvio), "lognormal:30,0.5" (mediana, sigma).
+    Valores em milissegundos.
+    """
+
+    def __init__(self, spec: str = '0', rng: Optional[random.Random] = None):
+        self.spec = str(spec).strip() or '0'
+        self.rng = rng or random.Random()
+        kind, _, args = self.spec.partition(':')
+        if not args:
+            kind, args = 'fixed', kind
+        try:
+            self.params = [float(value) for value in args.split(',')]
+        except ValueError:
+            raise ValueError(f"Latência inválida: {spec}")
+        expected = {'fixed': 1, 'uniform': 2, 'normal': 2, 'lognormal': 2}
+        if kind not in expected or len(self.params) != expected[kind]:
+            raise ValueError(f"Latência inválida: {spec} (use fixed:MS, uniform:MIN,MAX, normal:MEDIA,DESVIO "
+                             f"ou lognormal:MEDIANA,SIGMA)")
+        self.kind = kind
+
+    def sample(self) -> float:
+        """Atraso sorteado em milissegundos (nunca negativo)"""
+        if self.kind == 'fixed':
+            value = self.params[0]
+        elif self.kind == 'uniform':
+            value = self.rng.uniform(*self.params)
+        elif self.kind == 'normal':
+            value = self.rng.gauss(*self.params)
+        else:
+            value = self.rng.lognormvariate(math.log(max(self.params[0], 0.001)), self.params[1])
+        return max(0.0, value)
+
+
+class FaultProfile:
+    """Latência e falhas injetadas em uma rota (ou em todas)"""
+
+    def __init__(self, latency: str = '0', error_rate: float = 0.0, drop_rate: float = 0.0,
+                 error_status: int = 503, rng: Optional[random.Random] = None):
+        """
+        Args:
+            latency: Especificação do LatencyModel
+            error_rate: Fração das requisições respondidas com error_status
+            drop_rate: Fração das requisições com a conexão fechada sem resposta
+            error_status: Status HTTP dos erros simulados
+        """
+        self.latency = LatencyModel(latency, rng)
+        self.error_rate = float(error_rate)
+        self.drop_rate = float(drop_rate)
+        self.error_status = int(error_status)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {'latency': self.latency.spec, 'error_rate': self.error_rate, 'drop_rate': self.drop_rate,
+                'error_status': self.error_status}
+
+
+class MockWmsData:
+    """Fixtures da API simulada (determinísticas para a mesma semente)"""
+
+    def __init__(self, cargos: int = 1000, warehouses: int = 3, pallets: int = 2000, customers: int = 20,
+                 labels: int = 3, seed: int = 1, password: str = '123456'):
+        """
+        Args:
+            cargos: Quantidade de cargas (códigos 010000001 em diante)
+            warehouses: Quantidade de galpões
+            pallets: Posições de palete por galpão (estrutura gerada no primeiro acesso)
+            customers: Quantidade de clientes
+            labels: Quantidade de labels (contadores de numeração)
+            seed: Semente das fixtures
+            password: Senha aceita no login (qualquer CPF com 11 dígitos)
+        """
+        self.password = password
+        self.pallets_per_warehouse = int(pallets)
+        self.lock = threading.RLock()
+        rng = random.Random(seed)
+
+        self.customers = [{'id': n, 'name': f"Cliente {n:03d}", 'document': f"{rng.randrange(10 ** 13, 10 ** 14)}"}
+                          for n in range(1, customers + 1)]
+        self.warehouses = [{'id': n, 'code': f"GLP{n:03d}", 'name': f"Galpão {n}"}
+                           for n in range(1, warehouses + 1)]
+        self.areas = {w['id']: [{'id': w['id'] * 100 + n, 'name': f"Área {n}", 'type': 'RECEIVING',
+                                 'available': rng.randrange(10, 500)} for n in range(1, 4)]
+                      for w in self.warehouses}
+        self.cargo_types = [{'id': 1, 'name': 'Caixa'}, {'id': 2, 'name': 'Palete'}, {'id': 3, 'name': 'Fardo'}]
+
+        self.cargos: Dict[int, Dict[str, Any]] = {}
+        self.cargos_by_code: Dict[str, Dict[str, Any]] = {}
+        start = datetime(2025, 1, 1)
+        for n in range(1, cargos + 1):
+            roll = rng.random()
+            status = PENDING_RECEIPT if roll < 0.6 else RECEIVED if roll < 0.9 else CHECKED
+            special = rng.random() < 0.1
+            cargo = {
+                'id': n,
+                'code': f"{10000000 + n:09d}",
+                'code_client': f"CLI{rng.randrange(10 ** 6):06d}",
+                'invoice_number': str(rng.randrange(10 ** 5, 10 ** 6)),
+                'status': status,
+                'customer': self.customers[rng.randrange(len(self.customers))] if self.customers else {},
+                'cargo_type': self.cargo_types[rng.randrange(len(self.cargo_types))],
+                'weight': round(rng.uniform(0.5, 900), 2),
+                'volume': round(rng.uniform(0.01, 3), 3),
+                'warehouse_id': self.warehouses[rng.randrange(len(self.warehouses))]['id'] if self.warehouses else None,
+                'current_address': None,
+                'is_priority': rng.random() < 0.05,
+                'requires_special_handling': special,
+                'expiration_date': (start + timedelta(days=rng.randrange(30, 400))).date().isoformat()
+                if rng.random() < 0.2 else None,
+                'handling_instructions': 'Manter refrigerado entre 2 e 8 graus' if special else None,
+            }
+            self.cargos[n] = cargo
+            self.cargos_by_code[cargo['code']] = cargo
+
+        self.labels = {n: {'id': n, 'name': f"Etiquetas {n}", 'user_id': 1, 'last_number': 0, 'version': 1}
+                       for n in range(1, labels + 1)}
+        self.consolidators: List[Dict[str, Any]] = []
+        self.warehouse_versions = {w['id']: 1 for w in self.warehouses}
+        self._structures: Dict[Tuple[int, int], bytes] = {}
+
+    def warehouse_structure(self, warehouse_id: int) -> Optional[bytes]:
+        """Resposta JSON (já codificada) de GET /warehouses/{id}, gerada uma vez por versão"""
+        with self.lock:
+            warehouse = next((w for w in self.warehouses if w['id'] == warehouse_id), None)
+            if not warehouse:
+                return None
+            key = (warehouse_id, self.warehouse_versions[warehouse_id])
+            if key not in self._structures:
+                self._structures = {k: v for k, v in self._structures.items() if k[0] != warehouse_id}
+                self._structures[key] = json.dumps(self._build_structure(warehouse, key[1])).encode('utf-8')
+            return self._structures[key]
+
+    def touch_warehouse(self, warehouse_id: int):
+        """Nova versão da estrutura (invalida ETag/cópias dos clientes)"""
+        with self.lock:
+            self.warehouse_versions[warehouse_id] += 1
+
+    def _build_structure(self, warehouse: Dict[str, Any], version: int) -> Dict[str, Any]:
+        total = self.pallets_per_warehouse
+        floors_per_building = 5
+        buildings = max(1, min(26, math.ceil(total / 1000)))
+        per_floor = max(1, math.ceil(total / (buildings * floors_per_building)))
+        wid = warehouse['id']
+
+        pallet_id = wid * 10 ** 7
+        remaining = total
+        buildings_data = []
+        for b in range(buildings):
+            letter = chr(ord('A') + b)
+            floors = []
+            for f in range(floors_per_building):
+                count = min(per_floor, remaining)
+                remaining -= count
+                pallets = []
+                for p in range(1, count + 1):
+                    pallet_id += 1
+                    address = f"{warehouse['code']}-{letter}-{f:02d}-{p:04d}"
+                    pallets.append({'id': pallet_id, 'code': f"P{p:04d}", 'name': f"Palete {p:02d}",
+                                    'full_address': address, 'short_address': f"{letter}-{f:02d}-{p:04d}",
+                                    'status': 'LIVRE'})
+                floors.append({'id': wid * 10 ** 4 + b * 100 + f, 'code': f"{letter}{f:02d}",
+                               'name': 'Térreo' if f == 0 else f"Andar {f}", 'floor_number': f,
+                               'pallets': pallets})
+            buildings_data.append({'id': wid * 100 + b, 'code': letter, 'name': f"Prédio {letter}",
+                                   'total_floors': floors_per_building, 'floors': floors})
+        return {'success': True,
+                'data': dict(warehouse, version=version, updated_at=f"2025-01-01T00:00:{version % 60:02d}",
+                             buildings=buildings_data)}
+
+
+class _Request:
+    """Requisição já interpretada, entregue às rotas"""
+
+    def __init__(self, method: str, path: str, query: Dict[str, str], headers, body: Any, params: Tuple):
+        self.method = method
+        self.path = path
+        self.query = query
+        self.headers = headers
+        self.json = body
+        self.params = params
+
+
+Response = Tuple[int, Any, Dict[str, str]]
+
+
+class MockWmsServer:
+    """API do WMS simulada em uma thread (HTTP/1.1 com keep-alive)"""
+
+    def __init__(self, host: str = '127.0.0.1', port: int = 8000, data: Optional[MockWmsData] = None,
+                 latency: str = '0', error_rate: float = 0.0, drop_rate: float = 0.0,
+                 require_auth: bool = True, seed: Optional[int] = None, with_reserve: bool = False,
+                 with_batch: bool = False, idempotency: bool = False, etag: bool = False):
+        """
+        Args:
+            host: Interface de escuta
+            port: Porta (0 = porta livre escolhida pelo sistema; ver self.port)
+            data: Fixtures (padrão: MockWmsData())
+            latency: Latência padrão de todas as rotas (ver LatencyModel)
+            error_rate: Fração de respostas 503 simuladas
+            drop_rate: Fração de conexões fechadas sem resposta
+            require_auth: Exigir Bearer token emitido pelo /login
+            seed: Semente do sorteio de latência e falhas
+            with_reserve: Extensão: POST /labels/{id}/reserve e /labels/{id}/release
+            with_batch: Extensão: POST /cargos/receive-physically/batch
+            idempotency: Extensão: Idempotency-Key repete a resposta gravada
+            etag: Extensão: ETag/If-Match nas labels e ETag/Last-Modified nos galpões
+        """
+        self.data = data or MockWmsData()
+        self.require_auth = require_auth
+        self.with_reserve = with_reserve
+        self.with_batch = with_batch
+        self.idempotency_enabled = idempotency
+        self.etag = etag
+        self.rng = random.Random(seed)
+        self._rng_lock = threading.Lock()
+        self.default_profile = FaultProfile(latency, error_rate, drop_rate, rng=self.rng)
+        self.route_profiles: Dict[str, FaultProfile] = {}
+        self.tokens = set()
+        self.idempotency: Dict[str, Tuple[int, Any]] = {}
+        self._stats_lock = threading.Lock()
+        self._stats: Dict[str, Dict[str, int]] = {}
+
+        self.routes: List[Tuple[str, Any, Callable[[_Request], Response]]] = [
+            ('POST', re.compile(r'^/login$'), self._login),
+            ('GET', re.compile(r'^/cargos/pending-physical-receipt$'), self._pending_receipt),
+            ('GET', re.compile(r'^/cargos/code/(\d+)$'), self._cargo_by_code),
+            ('POST', re.compile(r'^/cargos/(\d+)/receive-physically$'), self._receive),
+            ('GET', re.compile(r'^/labels$'), self._list_labels),
+            ('POST', re.compile(r'^/labels$'), self._create_label),
+            ('GET', re.compile(r'^/labels/(\d+)$'), self._get_label),
+            ('PUT', re.compile(r'^/labels/(\d+)$'), self._update_label),
+            ('GET', re.compile(r'^/warehouses/select$'), self._warehouses),
+            ('GET', re.compile(r'^/warehouses/(\d+)/areas$'), self._areas),
+            ('GET', re.compile(r'^/warehouses/(\d+)$'), self._warehouse),
+            ('GET', re.compile(r'^/customers$'), self._customers),
+            ('POST', re.compile(r'^/consolidators$'), self._create_consolidator),
+        ]
+        # Extensões ausentes na API real: sem a opção, respondem 404 como ela
+        if with_batch:
+            self.routes.append(('POST', re.compile(r'^/cargos/receive-physically/batch$'), self._receive_batch))
+        if with_reserve:
+            self.routes += [('POST', re.compile(r'^/labels/(\d+)/reserve$'), self._reserve_label),
+                            ('POST', re.compile(r'^/labels/(\d+)/release$'), self._release_label)]
+
+        server = self
+
+        class _Handler(BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'
+
+            def do_GET(self):
+                server._dispatch(self, 'GET')
+
+            def do_POST(self):
+                server._dispatch(self, 'POST')
+
+            def do_PUT(self):
+                server._dispatch(self, 'PUT')
+
+            def do_DELETE(self):
+                server._dispatch(self, 'DELETE')
+
+            def log_message(self, format, *args):
+                pass
+
+        self._httpd = ThreadingHTTPServer((host, port), _Handler)
+        self._httpd.daemon_threads = True
+        self.host = host
+        self.port = self._httpd.server_address[1]
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def url(self) -> str:
+        """Base da API para o api_base / APIClient.base_url"""
+        return f"http://{self.host}:{self.port}{API_PREFIX}"
+
+    def start(self) -> 'MockWmsServer':
+        self._thread = threading.Thread(target=self._httpd.serve_forever, name=f'mock-wms-{self.port}', daemon=True)
+        self._thread.start()
+        log_info(f"API WMS simulada em {self.url} ({len(self.data.cargos)} cargas, "
+                 f"{self.data.pallets_per_warehouse} paletes/galpão, latência {self.default_profile.latency.spec})")
+        return self
+
+    def stop(self):
+        self._httpd.shutdown()
+        self._httpd.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+    def set_faults(self, route: Optional[str] = None, latency: Optional[str] = None,
+                   error_rate: Optional[float] = None, drop_rate: Optional[float] = None,
+                   error_status: Optional[int] = None):
+        """
+        Altera latência/falhas em tempo de execução
+
+        Args:
+            route: Prefixo do caminho sem /api (ex: '/cargos', '/warehouses/1'); None = padrão
+            latency, error_rate, drop_rate, error_status: Novos valores (None = mantém)
+        """
+        base = self.route_profiles.get(route) if route else self.default_profile
+        base = base or self.default_profile
+        profile = FaultProfile(latency if latency is not None else base.latency.spec,
+                               error_rate if error_rate is not None else base.error_rate,
+                               drop_rate if drop_rate is not None else base.drop_rate,
+                               error_status if error_status is not None else base.error_status,
+                               rng=self.rng)
+        if route:
+            self.route_profiles[route] = profile
+        else:
+            self.default_profile = profile
+
+    def clear_faults(self):
+        """Remove as falhas por rota e zera a padrão"""
+        self.route_profiles = {}
+        self.default_profile = FaultProfile(rng=self.rng)
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Contadores por rota: requests, errors (injetados), dropped"""
+        with self._stats_lock:
+            routes = {key: dict(value) for key, value in self._stats.items()}
+        return {'routes': routes, 'requests': sum(row['requests'] for row in routes.values()),
+                'injected_errors': sum(row['errors'] for row in routes.values()),
+                'dropped': sum(row['dropped'] for row in routes.values())}
+
+    def reset_stats(self):
+        with self._stats_lock:
+            self._stats = {}
+
+    # ----- Despacho -----
+
+    def _profile(self, path: str) -> FaultProfile:
+        best = ''
+        for prefix in self.route_profiles:
+            if path.startswith(prefix) and len(prefix) > len(best):
+                best = prefix
+        return self.route_profiles[best] if best else self.default_profile
+
+    def _count(self, key: str, field: str):
+        with self._stats_lock:
+            row = self._stats.setdefault(key, {'requests': 0, 'errors': 0, 'dropped': 0})
+            row[field] += 1
+
+    def _dispatch(self, handler: BaseHTTPRequestHandler, method: str):
+        parts = urlsplit(handler.path)
+        path = parts.path
+        if path.startswith(API_PREFIX + '/'):
+            path = path[len(API_PREFIX):]
+        query = {key: values[0] for key, values in parse_qs(parts.query).items()}
+
+        length = int(handler.headers.get('Content-Length') or 0)
+        raw = handler.rfile.read(length) if length else b''
+
+        if path.startswith('/__mock/'):
+            self._send(handler, *self._control(method, path, raw))
+            return
+
+        key = f"{method} {metric_endpoint(path)}"
+        self._count(key, 'requests')
+        profile = self._profile(path)
+        with self._rng_lock:
+            delay = profile.latency.sample()
+            roll = self.rng.random()
+        if delay:
+            time.sleep(delay / 1000)
+
+        if roll < profile.drop_rate:
+            self._count(key, 'dropped')
+            handler.close_connection = True
+            try:
+                handler.connection.shutdown(socket.SHUT_RDWR)
+            except OSError:
+                pass
+            return
+        if roll < profile.drop_rate + profile.error_rate:
+            self._count(key, 'errors')
+            self._send(handler, profile.error_status, {'success': False, 'message': 'Erro simulado pelo servidor'})
+            return
+
+        for route_method, pattern, route in self.routes:
+            match = pattern.match(path)
+            if not match or route_method != method:
+                continue
+            if self.require_auth and route != self._login and not self._authorized(handler):
+                self._send(handler, 401, {'success': False, 'message': 'Não autenticado'})
+                return
+            try:
+                body = json.loads(raw.decode('utf-8')) if raw else {}
+            except ValueError:
+                self._send(handler, 400, {'success': False, 'message': 'JSON inválido'})
+                return
+            request = _Request(method, path, query, handler.headers, body, match.groups())
+            self._send(handler, *route(request))
+            return
+        self._send(handler, 404, {'success': False, 'message': f"Rota não encontrada: {method} {path}"})
+
+    def _authorized(self, handler: BaseHTTPRequestHandler) -> bool:
+        auth = handler.headers.get('Authorization') or ''
+        return auth.startswith('Bearer ') and auth[7:] in self.tokens
+
+    @staticmethod
+    def _send(handler: BaseHTTPRequestHandler, status: int, body: Any = None, headers: Optional[Dict] = None):
+        if body is None:
+            payload = b''
+        elif isinstance(body, bytes):
+            payload = body
+        else:
+            payload = json.dumps(body, ensure_ascii=False).encode('utf-8')
+        try:
+            handler.send_response(status)
+            if payload:
+                handler.send_header('Content-Type', 'application/json; charset=utf-8')
+            handler.send_header('Content-Length', str(len(payload)))
+            for name, value in (headers or {}).items():
+                handler.send_header(name, value)
+            handler.end_headers()
+            handler.wfile.write(payload)
+        except OSError:
+            handler.close_connection = True
+
+    def _control(self, method: str, path: str, raw: bytes) -> Response:
+        """GET /__mock/stats e POST /__mock/faults (ajuste externo, ex: scripts de benchmark)"""
+        if path == '/__mock/stats' and method == 'GET':
+            stats = self.get_stats()
+            stats['faults'] = {'default': self.default_profile.to_dict(),
+                               'routes': {route: p.to_dict() for route, p in self.route_profiles.items()}}
+            return 200, stats, {}
+        if path == '/__mock/faults' and method == 'POST':
+            try:
+                options = json.loads(raw.decode('utf-8') or '{}')
+                if options.pop('clear', False):
+                    self.clear_faults()
+                self.set_faults(**options)
+            except (TypeError, ValueError) as e:
+                return 400, {'success': False, 'message': str(e)}, {}
+            return 200, {'success': True}, {}
+        return 404, {'success': False, 'message': 'Controle desconhecido'}, {}
+
+    # ----- Rotas -----
+
+    def _login(self, request: _Request) -> Response:
+        cpf = str(request.json.get('cpf') or '')
+        if not (cpf.isdigit() and len(cpf) == 11) or request.json.get('password') != self.data.password:
+            return 401, {'success': False, 'message': 'Credenciais inválidas'}, {}
+        token = f"mock-{uuid.uuid4().hex}"
+        self.tokens.add(token)
+        user = {'id': int(cpf[-4:]) or 1, 'name': f"Usuário {cpf[-4:]}", 'cpf': cpf, 'email': f"{cpf}@mock.local",
+                'registration': int(cpf[:4]), 'company_id': 1, 'hr_company_id': 1, 'active': True}
+        return 200, {'token': token, 'user': user}, {}
+
+    def _cargo_by_code(self, request: _Request) -> Response:
+        with self.data.lock:
+            cargo = self.data.cargos_by_code.get(request.params[0])
+            if not cargo:
+                return 404, {'success': False, 'message': 'Carga não encontrada'}, {}
+            return 200, {'success': True, 'data': dict(cargo)}, {}
+
+    def _pending_receipt(self, request: _Request) -> Response:
+        per_page = max(1, min(int(request.query.get('per_page', 15)), 500))
+        page = max(1, int(request.query.get('page', 1)))
+        code = request.query.get('code')
+        with self.data.lock:
+            if code:
+                cargo = self.data.cargos_by_code.get(code)
+                pending = [cargo] if cargo and cargo['status'] == PENDING_RECEIPT else []
+            else:
+                pending = [c for c in self.data.cargos.values() if c['status'] == PENDING_RECEIPT]
+            rows = [dict(c) for c in pending[(page - 1) * per_page:page * per_page]]
+        return 200, {'success': True, 'data': rows,
+                     'meta': {'total': len(pending), 'page': page, 'per_page': per_page}}, {}
+
+    def _idempotent(self, request: _Request, handler: Callable[[], Tuple[int, Any]]) -> Response:
+        """Mesma Idempotency-Key devolve a resposta gravada sem aplicar a ação de novo (com a extensão)"""
+        key = request.headers.get('Idempotency-Key') if self.idempotency_enabled else None
+        with self.data.lock:
+            if key and key in self.idempotency:
+                status, body = self.idempotency[key]
+                return status, body, {'Idempotent-Replayed': 'true'}
+            status, body = handler()
+            if key and status < 500:
+                self.idempotency[key] = (status, body)
+        return status, body, {}
+
+    def _apply_receive(self, cargo_id: int, payload: Dict[str, Any]) -> Tuple[int, Dict[str, Any]]:
+        cargo = self.data.cargos.get(cargo_id)
+        if not cargo:
+            return 404, {'success': False, 'message': 'Carga não encontrada'}
+        action = payload.get('action')
+        if action not in RECEIVE_ACTIONS:
+            return 422, {'success': False, 'message': f"Ação inválida: {action}"}
+        if cargo['status'] != PENDING_RECEIPT:
+            return 422, {'success': False, 'message': f"Carga {cargo['code']} não está pendente de recebimento "
+                                                      f"(status {cargo['status']})"}
+
+        now = datetime.now().isoformat(timespec='seconds')
+        if action == 'reject':
+            cargo['status'] = REJECTED
+            return 200, {'success': True, 'message': 'Carga rejeitada',
+                         'data': {'cargo_code': cargo['code'], 'status': REJECTED, 'rejected_by': 'Usuário mock',
+                                  'rejected_at': now, 'remarks': payload.get('remarks')}}
+        cargo['status'] = RECEIVED
+        if payload.get('warehouse_id'):
+            cargo['warehouse_id'] = payload['warehouse_id']
+        cargo['current_address'] = f"AREA-{payload.get('area_id') or 'RECEBIMENTO'}"
+        return 200, {'success': True, 'message': 'Carga recebida',
+                     'data': {'cargo': dict(cargo), 'received_by': 'Usuário mock', 'received_at': now}}
+
+    def _receive(self, request: _Request) -> Response:
+        return self._idempotent(request, lambda: self._apply_receive(int(request.params[0]), request.json))
+
+    def _receive_batch(self, request: _Request) -> Response:
+        items = request.json.get('items')
+        if not isinstance(items, list) or not items:
+            return 422, {'success': False, 'message': 'Informe items'}, {}
+
+        def apply():
+            results = []
+            for item in items:
+                try:
+                    cargo_id = int(item.get('cargo_id'))
+                except (TypeError, ValueError):
+                    results.append({'cargo_id': item.get('cargo_id'), 'success': False, 'message': 'cargo_id inválido'})
+                    continue
+                status, body = self._apply_receive(cargo_id, item)
+                results.append({'cargo_id': cargo_id, 'success': status == 200, 'message': body.get('message')})
+            accepted = sum(1 for row in results if row['success'])
+            return 200, {'success': True, 'data': {'results': results, 'accepted': accepted,
+                                                   'rejected': len(results) - accepted}}
+        return self._idempotent(request, apply)
+
+    def _label_headers(self, label: Dict[str, Any]) -> Dict[str, str]:
+        return {'ETag': f'"{label["version"]}"'} if self.etag else {}
+
+    @staticmethod
+    def _public_label(label: Dict[str, Any]) -> Dict[str, Any]:
+        return {key: value for key, value in label.items() if key != 'version'}
+
+    def _list_labels(self, request: _Request) -> Response:
+        user_id = request.query.get('user_id')
+        with self.data.lock:
+            labels = [self._public_label(label) for label in self.data.labels.values()
+                      if not user_id or str(label['user_id']) == user_id]
+        return 200, labels, {}
+
+    def _create_label(self, request: _Request) -> Response:
+        if not request.json.get('name'):
+            return 422, {'success': False, 'message': 'Informe name'}, {}
+        with self.data.lock:
+            label_id = max(self.data.labels, default=0) + 1
+            label = {'id': label_id, 'name': request.json['name'], 'user_id': request.json.get('user_id'),
+                     'last_number': int(request.json.get('last_number') or 0), 'version': 1}
+            self.data.labels[label_id] = label
+            return 201, self._public_label(label), self._label_headers(label)
+
+    def _get_label(self, request: _Request) -> Response:
+        with self.data.lock:
+            label = self.data.labels.get(int(request.params[0]))
+            if not label:
+                return 404, {'success': False, 'message': 'Label não encontrada'}, {}
+            return 200, self._public_label(label), self._label_headers(label)
+
+    def _update_label(self, request: _Request) -> Response:
+        with self.data.lock:
+            label = self.data.labels.get(int(request.params[0]))
+            if not label:
+                return 404, {'success': False, 'message': 'Label não encontrada'}, {}
+            # Sem a extensão o If-Match é ignorado, como na API real
+            expected = request.headers.get('If-Match') if self.etag else None
+            if expected and expected != self._label_headers(label)['ETag']:
+                return 412, {'success': False, 'message': 'Label alterada por outra estação'}, {}
+            if 'last_number' in request.json:
+                label['last_number'] = int(request.json['last_number'])
+            if request.json.get('name'):
+                label['name'] = request.json['name']
+            label['version'] += 1
+            return 200, self._public_label(label), self._label_headers(label)
+
+    def _reserve_label(self, request: _Request) -> Response:
+        quantity = int(request.json.get('quantity') or 0)
+        if quantity <= 0:
+            return 422, {'success': False, 'message': 'Quantidade inválida'}, {}
+        with self.data.lock:
+            label = self.data.labels.get(int(request.params[0]))
+            if not label:
+                return 404, {'success': False, 'message': 'Label não encontrada'}, {}
+            start = label['last_number'] + 1
+            label['last_number'] += quantity
+            label['version'] += 1
+            return 200, {'success': True, 'data': {'start': start, 'end': label['last_number']}}, {}
+
+    def _release_label(self, request: _Request) -> Response:
+        with self.data.lock:
+            label = self.data.labels.get(int(request.params[0]))
+            if not label:
+                return 404, {'success': False, 'message': 'Label não encontrada'}, {}
+            start, end = int(request.json.get('start', 0)), int(request.json.get('end', 0))
+            if label['last_number'] != end or start < 1 or start > end:
+                return 409, {'success': False, 'message': 'Faixa não é a última reservada'}, {}
+            label['last_number'] = start - 1
+            label['version'] += 1
+            return 200, {'success': True, 'data': self._public_label(label)}, {}
+
+    def _warehouses(self, request: _Request) -> Response:
+        return 200, {'success': True, 'data': list(self.data.warehouses)}, {}
+
+    def _customers(self, request: _Request) -> Response:
+        return 200, {'success': True, 'data': list(self.data.customers)}, {}
+
+    def _areas(self, request: _Request) -> Response:
+        warehouse_id = int(request.params[0])
+        if warehouse_id not in self.data.areas:
+            return 404, {'success': False, 'message': 'Galpão não encontrado'}, {}
+        return 200, {'success': True, 'data': {'warehouse_id': warehouse_id,
+                                               'areas': self.data.areas[warehouse_id]}}, {}
+
+    def _warehouse(self, request: _Request) -> Response:
+        warehouse_id = int(request.params[0])
+        body = self.data.warehouse_structure(warehouse_id)
+        if body is None:
+            return 404, {'success': False, 'message': 'Galpão não encontrado'}, {}
+        if not self.etag:
+            return 200, body, {}
+        version = self.data.warehouse_versions[warehouse_id]
+        etag = '"' + hashlib.sha1(f"{warehouse_id}:{version}".encode('ascii')).hexdigest()[:16] + '"'
+        headers = {'ETag': etag, 'Last-Modified': f"Wed, 01 Jan 2025 00:00:{version % 60:02d} GMT"}
+        if request.headers.get('If-None-Match') == etag:
+            return 304, None, headers
+        return 200, body, headers
+
+    def _create_consolidator(self, request: _Request) -> Response:
+        cargo_ids = request.json.get('cargo_ids') or []
+        warehouse_id = request.json.get('warehouse_id')
+        warehouse = next((w for w in self.data.warehouses if w['id'] == warehouse_id), None)
+        if not warehouse or not cargo_ids:
+            return 422, {'success': False, 'message': 'Informe warehouse_id válido e cargo_ids'}, {}
+
+        with self.data.lock:
+            valid, skipped = [], []
+            for cargo_id in cargo_ids:
+                cargo = self.data.cargos.get(cargo_id)
+                if not cargo:
+                    skipped.append({'cargo_id': cargo_id, 'errors': [{'type': 'not_found',
+                                                                      'message': 'Carga não encontrada'}]})
+                elif cargo['status'] not in CONSOLIDATION_STATUSES:
+                    skipped.append({'cargo_id': cargo_id, 'cargo_code': cargo['code'],
+                                    'errors': [{'type': 'invalid_status',
+                                                'message': f"Status {cargo['status']} não permite consolidação"}]})
+                else:
+                    valid.append(cargo)
+
+            if not valid:
+                return 422, {'success': False, 'message': 'Nenhuma carga válida para consolidação',
+                             'invalid_cargos': skipped}, {}
+
+            for cargo in valid:
+                cargo['status'] = CONSOLIDATED
+            consolidator = {
+                'id': len(self.data.consolidators) + 1,
+                'code': f"{900000 + len(self.data.consolidators) + 1}",
+                'cargo_count': len(valid),
+                'total_weight': f"{sum(c['weight'] for c in valid):.2f}",
+                'total_volume': f"{sum(c['volume'] for c in valid):.3f}",
+                'warehouse': warehouse,
+                'customer_id': request.json.get('customer_id'),
+                'status': 'OPEN',
+                'created_at': datetime.now().isoformat(timespec='seconds'),
+            }
+            self.data.consolidators.append(consolidator)
+
+        result = {'success': True, 'data': consolidator, 'consolidated_count': len(valid),
+                  'total_requested': len(cargo_ids)}
+        if skipped:
+            result['warnings'] = {'message': f"{len(skipped)} carga(s) não incluída(s)", 'skipped_cargos': skipped}
+        return 201, result, {}
+
+
+def main(argv=None):
+    import argparse
+
+    parser = argparse.ArgumentParser(description="API do WMS simulada (desenvolvimento e benchmarks)")
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8000)
+    parser.add_argument('--cargos', type=int, default=1000, help="Quantidade de cargas")
+    parser.add_argument('--warehouses', type=int, default=3)
+    parser.add_argument('--pallets', type=int, default=2000, help="Posições de palete por galpão")
+    parser.add_argument('--seed', type=int, default=1, help="Semente das fixtures")
+    parser.add_argument('--password', default='123456', help="Senha aceita no login")
+    parser.add_argument('--latency', default='0', help="Ex: 20, uniform:10,50, lognormal:40,0.5 (ms)")
+    parser.add_argument('--error-rate', type=float, default=0.0, help="Fração de respostas 503")
+    parser.add_argument('--drop-rate', type=float, default=0.0, help="Fração de conexões derrubadas")
+    parser.add_argument('--route', action='append', default=[],
+                        help="Falhas por rota: PREFIXO=LATENCIA[;ERRO[;QUEDA]] (ex: /warehouses=lognormal:300,0.3;0.05)")
+    parser.add_argument('--no-auth', action='store_true', help="Não exigir token")
+    parser.add_argument('--with-reserve', action='store_true',
+                        help="Extensão: POST /labels/{id}/reserve e /release")
+    parser.add_argument('--with-batch', action='store_true',
+                        help="Extensão: POST /cargos/receive-physically/batch")
+    parser.add_argument('--idempotency', action='store_true', help="Extensão: Idempotency-Key")
+    parser.add_argument('--etag', action='store_true',
+                        help="Extensão: ETag/If-Match nas labels, ETag/Last-Modified nos galpões")
+    args = parser.parse_args(argv)
+
+    data = MockWmsData(cargos=args.cargos, warehouses=args.warehouses, pallets=args.pallets, seed=args.seed,
+                       password=args.password)
+    server = MockWmsServer(args.host, args.port, data, latency=args.latency, error_rate=args.error_rate,
+                           drop_rate=args.drop_rate, require_auth=not args.no_auth, with_reserve=args.with_reserve,
+                           with_batch=args.with_batch, idempotency=args.idempotency, etag=args.etag)
+    for spec in args.route:
+        prefix, _, values = spec.partition('=')
+        latency, *rates = values.split(';')
+        server.set_faults(prefix, latency=latency,
+                          error_rate=float(rates[0]) if rates else None,
+                          drop_rate=float(rates[1]) if len(rates) > 1 else None)
+
+    server.start()
+    pending = sum(1 for c in data.cargos.values() if c['status'] == PENDING_RECEIPT)
+    print(f"🌐 API WMS simulada em {server.url} - login com qualquer CPF de 11 dígitos e senha '{args.password}'")
+    print(f"   {len(data.cargos)} cargas ({pending} pendentes de recebimento, códigos a partir de 010000001), "
+          f"{args.pallets} paletes por galpão")
+    print("   Ctrl+C para encerrar; contadores em GET /__mock/stats")
+    try:
+        while True:
+            time.sleep(10)
+            stats = server.get_stats()
+            if stats['requests']:
+                print(f"  {stats['requests']} requisição(ões), {stats['injected_errors']} erro(s) e "
+                      f"{stats['dropped']} queda(s) simulados")
+    except KeyboardInterrupt:
+        log_warning("API WMS simulada encerrada")
+        server.stop()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,252 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Dados de referência compartilhados entre as janelas (galpões, clientes, áreas)
+Cada recurso tem TTL próprio; cargas simultâneas da mesma chave viram uma
+única requisição (single-flight) e a pré-carga roda em segundo plano logo
+após o login
+"""
+
+import threading
+import time
+from typing import Any, Dict, Iterable, Optional, Tuple
+
+from utils.logger import log_info, log_warning
+
+# Recursos padrão: nome -> (endpoint, TTL em segundos)
+DEFAULT_RESOURCES = {
+    'warehouses': ('/warehouses/select', 600),
+    'customers': ('/customers', 600),
+    'warehouse_areas': ('/warehouses/{warehouse_id}/areas', 60)
+}
+
+
+class ReferenceDataError(Exception):
+    """Falha ao carregar um recurso (status_code preenchido para erros HTTP)"""
+
+    def __init__(self, message: str, status_code: Optional[int] = None):
+        super().__init__(message)
+        self.status_code = status_code
+
+
+class _Flight:
+    """Carga em andamento de uma chave (os demais chamadores esperam o resultado)"""
+
+    def __init__(self):
+        self.event = threading.Event()
+        self.result = None
+        self.error: Optional[BaseException] = None
+
+
+class ReferenceDataStore:
+    """Cache em memória de recursos de consulta da API"""
+
+    def __init__(self, api_client=None, resources: Optional[Dict[str, Tuple[str, float]]] = None):
+        """
+        Inicializa o store
+
+        Args:
+            api_client: APIClient usado nas cargas (criado no primeiro uso se None)
+            resources: Dict nome -> (endpoint, TTL); padrão DEFAULT_RESOURCES
+        """
+        self._api_client = api_client
+        self.resources: Dict[str, Tuple[str, float]] = dict(resources or DEFAULT_RESOURCES)
+        self._token: Optional[str] = None
+        self._entries: Dict[tuple, Tuple[float, Any]] = {}  # chave -> (expira_em, resultado)
+        self._flights: Dict[tuple, _Flight] = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.loads = 0
+
+    @property
+    def api_client(self):
+        if self._api_client is None:
+            from api.client import APIClient
+            self._api_client = APIClient()
+        return self._api_client
+
+    def set_token(self, token: Optional[str]):
+        """Define o usuário das cargas; trocar de usuário descarta todo o cache"""
+        with self._lock:
+            if token != self._token:
+                self._token = token
+                self._entries.clear()
+
+    def get(self, name: str, token: Optional[str] = None, **params) -> Any:
+        """
+        Retorna o recurso, do cache ou carregando da API
+
+        Args:
+            name: Nome do recurso (ex: 'warehouses', 'customers', 'warehouse_areas')
+            token: Token do usuário (troca de usuário descarta o cache)
+            **params: Parâmetros do endpoint (ex: warehouse_id=3)
+
+        Returns:
+            JSON da resposta (compartilhado entre as janelas: não alterar)
+
+        Raises:
+            ReferenceDataError: Recurso desconhecido, resposta HTTP diferente de 200 ou success: false
+        """
+        if token is not None:
+            self.set_token(token)
+        key = self._key(name, params)
+
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry and entry[0] > time.monotonic():
+                self.hits += 1
+                return entry[1]
+            flight = self._flights.get(key)
+            leader = flight is None
+            if leader:
+                flight = self._flights[key] = _Flight()
+            token_at_start = self._token
+
+        if not leader:
+            flight.event.wait()
+            if flight.error is not None:
+                raise flight.error
+            return flight.result
+
+        try:
+            flight.result = self._load(name, params, token_at_start)
+            with self._lock:
+                # Resultado de um usuário anterior não entra no cache do atual
+                if self._token == token_at_start:
+                    ttl = self.resources[name][1]
+                    self._entries[key] = (time.monotonic() + ttl, flight.result)
+            return flight.result
+        except BaseException as e:
+            flight.error = e
+            raise
+        finally:
+            with self._lock:
+                self._flights.pop(key, None)
+            flight.event.set()
+
+    def invalidate(self, name: Optional[str] = None, **params):
+        """
+        Descarta entradas do cache
+
+        Args:
+            name: Recurso (None = todos)
+            **params: Parâmetros de uma entrada específica (vazio = todas do recurso)
+        """
+        with self._lock:
+            if name is None:
+                self._entries.clear()
+            elif params:
+                self._entries.pop(self._key(name, params), None)
+            else:
+                for key in [key for key in self._entries if key[0] == name]:
+                    del self._entries[key]
+
+    def prefetch(self, token: Optional[str] = None, names: Iterable[str] = ('warehouses', 'customers'),
+                 areas_limit: int = 20) -> threading.Thread:
+        """
+        Pré-carrega recursos em segundo plano
+
+        Args:
+            token: Token do usuário
+            names: Recursos sem parâmetros a carregar
+            areas_limit: Galpões que também têm as áreas pré-carregadas (0 = nenhum)
+
+        Returns:
+            Thread da pré-carga
+        """
+        if token is not None:
+            self.set_token(token)
+
+        def run():
+            started = time.monotonic()
+            for name in names:
+                try:
+                    self.get(name)
+                except Exception as e:
+                    log_warning(f"Pré-carga de {name} falhou: {e}")
+            if areas_limit and 'warehouse_areas' in self.resources:
+                try:
+                    warehouses = (self.get('warehouses') or {}).get('data') or []
+                except Exception:
+                    warehouses = []
+                for warehouse in warehouses[:areas_limit]:
+                    try:
+                        self.get('warehouse_areas', warehouse_id=warehouse.get('id'))
+                    except Exception as e:
+                        log_warning(f"Pré-carga das áreas do galpão {warehouse.get('id')} falhou: {e}")
+            log_info(f"Dados de referência pré-carregados em {time.monotonic() - started:.2f}s")
+
+        thread = threading.Thread(target=run, name='reference-prefetch', daemon=True)
+        thread.start()
+        return thread
+
+    def get_stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {'hits': self.hits, 'loads': self.loads, 'entries': len(self._entries)}
+
+    def _key(self, name: str, params: Dict[str, Any]) -> tuple:
+        if name not in self.resources:
+            raise ReferenceDataError(f"Recurso de referência desconhecido: {name}")
+        return (name,) + tuple(sorted(params.items()))
+
+    def _load(self, name: str, params: Dict[str, Any], token: Optional[str]) -> Any:
+        endpoint = self.resources[name][0].format(**params)
+        headers = {'Accept': 'application/json'}
+        if token:
+            headers['Authorization'] = f'Bearer {token}'
+
+        with self._lock:
+            self.loads += 1
+        response = self.api_client.get(endpoint, headers=headers)
+        if response.status_code != 200:
+            raise ReferenceDataError(f"Erro HTTP {response.status_code} ao carregar {endpoint}",
+                                     response.status_code)
+        result = response.json()
+        if isinstance(result, dict) and result.get('success') is False:
+            # Erro da API com HTTP 200 não pode ficar em cache até o fim do TTL
+            raise ReferenceDataError(f"API recusou {endpoint}: {result.get('message') or 'sem mensagem'}")
+        return result
+
+
+_store: Optional[ReferenceDataStore] = None
+_store_lock = threading.Lock()
+
+
+def get_reference_store() -> ReferenceDataStore:
+    """
+    Retorna o store de dados de referência do processo
+
+    Returns:
+        ReferenceDataStore com os TTLs da seção 'reference_data' do settings.json
+    """
+    global _store
+    with _store_lock:
+        if _store is None:
+            from utils.config import load_config
+
+            ttls = load_config().get('reference_data', {}).get('ttl', {})
+            resources = {name: (endpoint, float(ttls.get(name, ttl)))
+                         for name, (endpoint, ttl) in DEFAULT_RESOURCES.items()}
+            _store = ReferenceDataStore(resources=resources)
+        return _store
+
+
+def prefetch_reference_data(token: Optional[str]) -> Optional[threading.Thread]:
+    """
+    Dispara a pré-carga após o login conforme a seção 'reference_data' do settings.json
+
+    Args:
+        token: Token do usuário logado
+
+    Returns:
+        Thread da pré-carga ou None se a pré-carga estiver desabilitada
+    """
+    from utils.config import load_config
+
+    reference_config = load_config().get('reference_data', {})
+    store = get_reference_store()
+    store.set_token(token)
+    if not reference_config.get('prefetch', True):
+        return None
+    return store.prefetch(areas_limit=int(reference_config.get('prefetch_areas', 20)))
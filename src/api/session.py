@@ -0,0 +1,167 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Camada de sessão HTTP com pool de conexões keep-alive
+Compartilhada entre todas as instâncias de APIClient do processo
+"""
+
+import threading
+from typing import Dict, Any, Optional, Tuple
+
+import requests
+from requests.adapters import HTTPAdapter
+
+
+class _CountingAdapter(HTTPAdapter):
+    """HTTPAdapter que preserva os contadores de conexões de pools descartados"""
+
+    def __init__(self, *args, **kwargs):
+        self.disposed_connections = 0
+        super().__init__(*args, **kwargs)
+
+    def init_poolmanager(self, *args, **kwargs):
+        super().init_poolmanager(*args, **kwargs)
+        # O PoolManager descarta pools por host quando excede pool_connections;
+        # acumular as conexões abertas antes de fechar para não perder a contagem
+        self.poolmanager.pools.dispose_func = self._dispose_pool
+
+    def _dispose_pool(self, pool):
+        self.disposed_connections += getattr(pool, 'num_connections', 0)
+        pool.close()
+
+    def connections_opened(self) -> int:
+        """Total de conexões TCP abertas por este adapter"""
+        pools = self.poolmanager.pools
+        opened = self.disposed_connections
+        for key in list(pools.keys()):
+            pool = pools.get(key)
+            if pool is not None:
+                opened += getattr(pool, 'num_connections', 0)
+        return opened
+
+
+class SessionPool:
+    """Sessão requests compartilhada com pool de conexões por host"""
+
+    def __init__(self, pool_connections: int = 4, pool_maxsize: int = 16,
+                 keep_alive: bool = True, max_retries: int = 0):
+        """
+        Inicializa o pool
+
+        Args:
+            pool_connections: Quantidade de hosts mantidos em cache
+            pool_maxsize: Conexões simultâneas mantidas por host
+            keep_alive: Se False, envia 'Connection: close' em toda requisição
+            max_retries: Tentativas automáticas de reconexão do urllib3
+        """
+        self.pool_connections = pool_connections
+        self.pool_maxsize = pool_maxsize
+        self.keep_alive = keep_alive
+
+        self._lock = threading.Lock()
+        self._requests = 0
+
+        self._adapter = _CountingAdapter(pool_connections=pool_connections,
+                                         pool_maxsize=pool_maxsize,
+                                         max_retries=max_retries)
+        self._session = requests.Session()
+        self._session.mount('http://', self._adapter)
+        self._session.mount('https://', self._adapter)
+        if not keep_alive:
+            self._session.headers['Connection'] = 'close'
+
+    def request(self, method: str, url: str, **kwargs) -> requests.Response:
+        """Executa a requisição reaproveitando conexões do pool"""
+        with self._lock:
+            self._requests += 1
+        return self._session.request(method, url, **kwargs)
+
+    def get_stats(self) -> Dict[str, Any]:
+        """
+        Retorna contadores de reaproveitamento de conexões
+
+        Returns:
+            Dict com requests, connections_opened, connections_reused e reuse_ratio
+        """
+        with self._lock:
+            total = self._requests
+        opened = self._adapter.connections_opened()
+        reused = max(0, total - opened)
+        return {
+            'requests': total,
+            'connections_opened': opened,
+            'connections_reused': reused,
+            'reuse_ratio': round(reused / total, 4) if total else 0.0,
+            'pool_connections': self.pool_connections,
+            'pool_maxsize': self.pool_maxsize,
+            'keep_alive': self.keep_alive
+        }
+
+    def close(self):
+        """Fecha todas as conexões do pool"""
+        self._session.close()
+
+
+_pools: Dict[Tuple, SessionPool] = {}
+_pools_lock = threading.Lock()
+
+
+def get_session_pool(http_config: Optional[Dict[str, Any]] = None) -> SessionPool:
+    """
+    Retorna o pool compartilhado para a configuração informada
+
+    Args:
+        http_config: Seção 'http' do settings.json
+
+    Returns:
+        SessionPool único por combinação de parâmetros
+    """
+    http_config = http_config or {}
+    key = (
+        int(http_config.get('pool_connections', 4)),
+        int(http_config.get('pool_maxsize', 16)),
+        bool(http_config.get('keep_alive', True)),
+        int(http_config.get('max_retries', 0))
+    )
+    with _pools_lock:
+        pool = _pools.get(key)
+        if pool is None:
+            pool = SessionPool(*key)
+            _pools[key] = pool
+        return pool
+
+
+def resolve_timeout(endpoint: str, timeouts: Optional[Dict[str, Any]],
+                    default_read: float = 30) -> Tuple[float, float]:
+    """
+    Resolve o timeout (connect, read) de um endpoint pelo prefixo mais longo
+
+    Args:
+        endpoint: Caminho do endpoint (ex: /cargos/code/080000004)
+        timeouts: Mapa prefixo -> {'connect': s, 'read': s}, com chave 'default'
+        default_read: Timeout de leitura usado quando nada é configurado
+
+    Returns:
+        Tupla (connect_timeout, read_timeout)
+    """
+    timeouts = timeouts or {}
+    default = timeouts.get('default', {})
+    connect = float(default.get('connect', min(10, default_read)))
+    read = float(default.get('read', default_read))
+
+    path = '/' + endpoint.lstrip('/')
+    best = None
+    for prefix in timeouts:
+        if prefix == 'default':
+            continue
+        normalized = '/' + prefix.lstrip('/')
+        if path.startswith(normalized) and (best is None or len(normalized) > len('/' + best.lstrip('/'))):
+            best = prefix
+
+    if best is not None:
+        match = timeouts[best]
+        connect = float(match.get('connect', connect))
+        read = float(match.get('read', read))
+
+    return connect, read
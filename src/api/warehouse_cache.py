@@ -0,0 +1,224 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Cache em disco da estrutura de galpões (/warehouses/{id})
+Cada galpão fica em um arquivo binário (pickle) por empresa e id, com os
+metadados de validação (ETag, Last-Modified, versão) em um JSON ao lado; a
+cópia é revalidada na API com If-None-Match / If-Modified-Since e
+reaproveitada quando a API responde 304 ou quando a versão do galpão não mudou.
+Só o 304 evita o download: a comparação de versão acontece depois de receber
+a estrutura inteira e economiza apenas a regravação em disco
+"""
+
+import hashlib
+import json
+import os
+import pickle
+import threading
+import time
+from typing import Any, Dict, Optional, Tuple
+
+from utils.logger import log_info, log_warning
+
+# Versão do formato dos arquivos de cache (arquivos de outra versão são ignorados)
+CACHE_FORMAT = 1
+
+# Campos do galpão usados como versão quando a API não envia ETag/Last-Modified
+# (comparados após o download completo: não reduzem a transferência)
+VERSION_FIELDS = ('version', 'updated_at')
+
+
+class WarehouseCache:
+    """Cache da estrutura de galpões com revalidação condicional"""
+
+    def __init__(self, cache_dir: str, fresh_for: float = 0):
+        """
+        Inicializa o cache
+
+        Args:
+            cache_dir: Diretório dos arquivos de cache
+            fresh_for: Segundos em que a cópia é usada sem consultar a API (0 = sempre revalidar)
+        """
+        self.cache_dir = cache_dir
+        self.fresh_for = fresh_for
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def fetch(self, api_client, warehouse_id: Any, company_id: Any = None,
+              headers: Optional[Dict[str, str]] = None) -> Tuple[int, Optional[Dict[str, Any]], str]:
+        """
+        Busca a estrutura do galpão, usando o cache quando possível
+
+        Args:
+            api_client: APIClient usado na revalidação
+            warehouse_id: ID do galpão
+            company_id: Empresa do usuário (parte da chave do cache)
+            headers: Headers da requisição (ex: Authorization)
+
+        Returns:
+            Tupla (status_code, resultado JSON, origem) onde origem é 'cache'
+            (sem consultar a API), 'not_modified' (304 ou mesma versão),
+            'network' (baixado) ou 'stale' (API indisponível, cópia antiga)
+        """
+        path = self._path(warehouse_id, company_id)
+        entry = self._load_meta(path)
+
+        if entry and self.fresh_for and time.time() - entry['validated_at'] < self.fresh_for:
+            payload = self._load_payload(path)
+            if payload is not None:
+                self.hits += 1
+                return 200, payload, 'cache'
+            entry = None
+
+        request_headers = dict(headers or {})
+        if entry:
+            if entry.get('etag'):
+                request_headers['If-None-Match'] = entry['etag']
+            if entry.get('last_modified'):
+                request_headers['If-Modified-Since'] = entry['last_modified']
+
+        try:
+            response = api_client.get(f'/warehouses/{warehouse_id}', headers=request_headers)
+        except Exception as e:
+            payload = self._load_payload(path) if entry else None
+            if payload is not None:
+                log_warning(f"API indisponível ({e}), usando cópia em cache do galpão {warehouse_id}")
+                self.hits += 1
+                return 200, payload, 'stale'
+            raise
+
+        if response.status_code == 304 and entry:
+            payload = self._load_payload(path)
+            if payload is not None:
+                self.hits += 1
+                entry['validated_at'] = time.time()
+                self._save_meta(path, entry)
+                log_info(f"Estrutura do galpão {warehouse_id} sem alterações (304), usando cache")
+                return 200, payload, 'not_modified'
+            # Cópia perdida: baixar sem cabeçalhos condicionais
+            response = api_client.get(f'/warehouses/{warehouse_id}', headers=dict(headers or {}))
+
+        if response.status_code != 200:
+            return response.status_code, None, 'network'
+
+        result = response.json()
+        if not result.get('success'):
+            return response.status_code, result, 'network'
+
+        version = self._version(result)
+        meta = {
+            'format': CACHE_FORMAT,
+            'warehouse_id': warehouse_id,
+            'company_id': company_id,
+            'etag': response.headers.get('ETag'),
+            'last_modified': response.headers.get('Last-Modified'),
+            'version': version,
+            'validated_at': time.time()
+        }
+        if entry and version is not None and entry.get('version') == version:
+            # Sem suporte a requisição condicional: a estrutura já foi baixada,
+            # mesma versão só evita regravar a cópia
+            self.hits += 1
+            self._save_meta(path, meta)
+            return 200, result, 'not_modified'
+
+        self.misses += 1
+        self._save(path, meta, result)
+        return 200, result, 'network'
+
+    def invalidate(self, warehouse_id: Any, company_id: Any = None):
+        """Remove a cópia do galpão (o próximo acesso baixa de novo)"""
+        path = self._path(warehouse_id, company_id)
+        for file_path in (path + '.json', path + '.bin'):
+            try:
+                os.remove(file_path)
+            except OSError:
+                pass
+
+    def get_stats(self) -> Dict[str, int]:
+        return {'hits': self.hits, 'misses': self.misses}
+
+    def _path(self, warehouse_id: Any, company_id: Any) -> str:
+        key = hashlib.sha1(f"{company_id}:{warehouse_id}".encode('utf-8')).hexdigest()[:16]
+        return os.path.join(self.cache_dir, f"warehouse_{key}")
+
+    @staticmethod
+    def _version(result: Dict[str, Any]) -> Optional[str]:
+        data = result.get('data') or {}
+        for field in VERSION_FIELDS:
+            if data.get(field) is not None:
+                return f"{field}:{data[field]}"
+        return None
+
+    def _load_meta(self, path: str) -> Optional[Dict[str, Any]]:
+        try:
+            with open(path + '.json', 'r', encoding='utf-8') as f:
+                meta = json.load(f)
+        except FileNotFoundError:
+            return None
+        except (OSError, ValueError) as e:
+            log_warning(f"Metadados do cache de galpão ilegíveis ({path}): {e}")
+            return None
+        if not isinstance(meta, dict) or meta.get('format') != CACHE_FORMAT:
+            return None
+        return meta
+
+    def _load_payload(self, path: str) -> Optional[Dict[str, Any]]:
+        try:
+            with open(path + '.bin', 'rb') as f:
+                return pickle.load(f)
+        except FileNotFoundError:
+            return None
+        except Exception as e:
+            log_warning(f"Cache de galpão ilegível ({path}.bin): {e}")
+            return None
+
+    def _save(self, path: str, meta: Dict[str, Any], payload: Dict[str, Any]):
+        """Grava a cópia e depois os metadados (metadados sem cópia nunca ficam válidos)"""
+        self._write_atomic(path + '.bin', pickle.dumps(payload, protocol=pickle.HIGHEST_PROTOCOL))
+        self._save_meta(path, meta)
+
+    def _save_meta(self, path: str, meta: Dict[str, Any]):
+        self._write_atomic(path + '.json', json.dumps(meta, default=str).encode('utf-8'))
+
+    def _write_atomic(self, file_path: str, data: bytes):
+        with self._lock:
+            try:
+                os.makedirs(self.cache_dir, exist_ok=True)
+                temp_path = f"{file_path}.{threading.get_ident()}.tmp"
+                with open(temp_path, 'wb') as f:
+                    f.write(data)
+                os.replace(temp_path, file_path)
+            except OSError as e:
+                log_warning(f"Não foi possível gravar o cache do galpão: {e}")
+
+
+_cache: Optional[WarehouseCache] = None
+_cache_lock = threading.Lock()
+
+
+def get_warehouse_cache() -> Optional[WarehouseCache]:
+    """
+    Retorna o cache de galpões do processo
+
+    Returns:
+        WarehouseCache configurado pela seção 'warehouse_cache' do settings.json,
+        ou None se o cache estiver desabilitado
+    """
+    global _cache
+    from utils.config import load_config
+
+    cache_config = load_config().get('warehouse_cache', {})
+    if not cache_config.get('enabled', False):
+        return None
+
+    with _cache_lock:
+        if _cache is None:
+            project_root = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+            cache_dir = cache_config.get('directory', 'cache/warehouses')
+            if not os.path.isabs(cache_dir):
+                cache_dir = os.path.join(project_root, cache_dir)
+            _cache = WarehouseCache(cache_dir, fresh_for=float(cache_config.get('fresh_for', 0)))
+        return _cache
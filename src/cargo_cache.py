@@ -0,0 +1,117 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Cache local de cargas consultadas pelo código
+LRU limitado a max_entries registros, cada um válido por ttl segundos; um
+registro vencido não é entregue como atual, mas pode ser usado quando a API
+estiver fora do ar
+"""
+
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Optional, Tuple
+
+
+class CargoCache:
+    """Cargas por código, em ordem de uso (a menos usada sai primeiro)"""
+
+    def __init__(self, max_entries: int = 500, ttl: float = 300):
+        """
+        Inicializa o cache
+
+        Args:
+            max_entries: Limite de cargas guardadas
+            ttl: Segundos em que uma carga é considerada atual
+        """
+        self.max_entries = max(1, int(max_entries))
+        self.ttl = float(ttl)
+        self._entries: 'OrderedDict[str, Tuple[float, Dict[str, Any]]]' = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.stale_hits = 0
+
+    def get(self, code: str) -> Optional[Dict[str, Any]]:
+        """
+        Retorna a carga se ainda estiver dentro do TTL
+
+        Args:
+            code: Código da carga
+
+        Returns:
+            Cópia dos dados da carga ou None
+        """
+        with self._lock:
+            entry = self._entries.get(code)
+            if entry is None or time.monotonic() - entry[0] > self.ttl:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(code)
+            self.hits += 1
+            return dict(entry[1])
+
+    def get_stale(self, code: str) -> Optional[Tuple[Dict[str, Any], float]]:
+        """
+        Retorna a carga mesmo vencida (usado quando a API não responde)
+
+        Returns:
+            Tupla (cópia da carga, idade em segundos) ou None
+        """
+        with self._lock:
+            entry = self._entries.get(code)
+            if entry is None:
+                return None
+            self.stale_hits += 1
+            return dict(entry[1]), time.monotonic() - entry[0]
+
+    def put(self, code: str, cargo: Dict[str, Any]):
+        """Guarda a carga como a mais recente, descartando a menos usada se passar do limite"""
+        with self._lock:
+            self._entries[code] = (time.monotonic(), dict(cargo))
+            self._entries.move_to_end(code)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def invalidate(self, code: Optional[str] = None):
+        """Descarta uma carga (após uma alteração) ou todo o cache"""
+        with self._lock:
+            if code is None:
+                self._entries.clear()
+            else:
+                self._entries.pop(code, None)
+
+    def get_stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {'entries': len(self._entries), 'max_entries': self.max_entries,
+                    'hits': self.hits, 'misses': self.misses, 'stale_hits': self.stale_hits}
+
+
+_cache: Optional[CargoCache] = None
+_cache_lock = threading.Lock()
+
+
+def get_cargo_cache() -> CargoCache:
+    """
+    Retorna o cache de cargas do processo
+
+    Returns:
+        CargoCache com max_entries e ttl da seção 'cargo_cache' do settings.json
+    """
+    global _cache
+    with _cache_lock:
+        if _cache is None:
+            from utils.config import load_config
+
+            cache_config = load_config().get('cargo_cache', {})
+            _cache = CargoCache(max_entries=int(cache_config.get('max_entries', 500)),
+                                ttl=float(cache_config.get('ttl', 300)))
+        return _cache
+
+
+def cargo_cache_enabled() -> bool:
+    """True se a seção 'cargo_cache' do settings.json habilita o cache"""
+    from utils.config import load_config
+
+    return bool(load_config().get('cargo_cache', {}).get('enabled', True))
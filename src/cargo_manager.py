@@ -6,24 +6,37 @@ Gerenciador de Cargos da API para reimpressão
 Baseado no código PHP/PowerShell original
 """
 
-from typing import Dict, Any, Optional
+import logging
+import re
+import traceback
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import Dict, Any, Optional, List, Callable
 from api.client import APIClient
-from utils.logger import log_info, log_error
+from utils.logger import log_info, log_warning, log_error, log_debug, log_throttled
+from utils.metrics import timed
+
+# Faixa de códigos na lista colada (ex: 080000001-080000050)
+_RANGE_RE = re.compile(r'^(\d{8,9})-(\d{8,9})$')
 
 class CargoManager:
     """Gerenciador de cargos da API"""
     
-    def __init__(self, api_client: APIClient, token: str):
+    def __init__(self, api_client: APIClient, token: str, cache=None, print_history=None):
         """
         Inicializa o gerenciador
         
         Args:
             api_client: Cliente da API
             token: Token de autenticação
+            cache: CargoCache para consultas repetidas (None = sempre consulta a API)
+            print_history: PrintHistory usado quando a API não responde
         """
         self.api_client = api_client
         self.token = token
+        self.cache = cache
+        self.print_history = print_history
     
+    @timed('cargo_lookup')
     def get_cargo_by_code(self, code: str) -> Optional[Dict[str, Any]]:
         """
         Busca cargo por código
@@ -32,40 +45,311 @@ class CargoManager:
             code: Código da etiqueta (8 ou 9 dígitos)
             
         Returns:
-            Dados do cargo ou None se não encontrado
+            Dados do cargo ou None se não encontrado; com a API fora do ar,
+            a última cópia local marcada com '_source'
         """
+        # Validar formato do código
+        if not self.validate_code_format(code):
+            raise ValueError("Código inválido. Use 8 ou 9 dígitos numéricos.")
+        
+        if self.cache:
+            cargo = self.cache.get(code)
+            if cargo:
+                log_debug(f"Cargo encontrado no cache local: código {code}", cargo_code=code)
+                return cargo
+        
         try:
-            # Validar formato do código
-            if not self.validate_code_format(code):
-                raise ValueError("Código inválido. Use 8 ou 9 dígitos numéricos.")
-            
             headers = {'Authorization': f'Bearer {self.token}'}
             response = self.api_client.get(f'/cargos/code/{code}', headers=headers)
+        except Exception as e:
+            # APIClient converte falhas de conexão/timeout em Exception
+            log_error(f"Erro ao buscar cargo {code}: {str(e)}")
+            cargo = self._offline_cargo(code)
+            if cargo:
+                return cargo
+            raise
+        
+        if response.status_code == 200:
+            cargo_response = response.json()
+            cargo = cargo_response.get('data')
             
-            if response.status_code == 200:
-                cargo_response = response.json()
-                cargo = cargo_response.get('data')
+            if cargo:
+                log_debug(f"Cargo encontrado: código {code}", cargo_code=code)
+                if self.cache:
+                    self.cache.put(code, cargo)
+                return cargo
+            else:
+                log_info(f"Cargo não encontrado: código {code}")
+                return None
                 
+        elif response.status_code == 404:
+            log_info(f"Cargo não encontrado: código {code}")
+            return None
+        elif response.status_code == 422:
+            log_error(f"Código inválido ou não encontrado: {code}")
+            return None
+        else:
+            log_error(f"Erro ao buscar cargo {code}: HTTP {response.status_code}")
+            if response.status_code >= 500:
+                cargo = self._offline_cargo(code)
                 if cargo:
-                    log_info(f"Cargo encontrado: código {code}")
                     return cargo
-                else:
-                    log_info(f"Cargo não encontrado: código {code}")
-                    return None
-                    
-            elif response.status_code == 404:
-                log_info(f"Cargo não encontrado: código {code}")
-                return None
-            elif response.status_code == 422:
-                log_error(f"Código inválido ou não encontrado: {code}")
-                return None
-            else:
-                log_error(f"Erro ao buscar cargo {code}: HTTP {response.status_code}")
-                raise RuntimeError(f"Erro ao buscar cargo. HTTP {response.status_code}")
+            raise RuntimeError(f"Erro ao buscar cargo. HTTP {response.status_code}")
+    
+    def _offline_cargo(self, code: str) -> Optional[Dict[str, Any]]:
+        """
+        Última cópia conhecida da carga quando a API não responde
+        
+        Returns:
+            Dados do cargo com '_source' ('cache' ou 'history') ou None
+        """
+        if self.cache:
+            stale = self.cache.get_stale(code)
+            if stale:
+                cargo, age = stale
+                log_warning(f"API indisponível: usando cópia do cache de {age:.0f}s para o código {code}")
+                cargo['_source'] = 'cache'
+                return cargo
+        if self.print_history:
+            record = self.print_history.lookup(code)
+            if record:
+                log_warning(f"API indisponível: usando histórico de impressão para o código {code}")
+                cargo = record['cargo']
+                cargo['_source'] = 'history'
+                return cargo
+        return None
+    
+    def record_print(self, code: str, cargo: Dict[str, Any], quantity: int,
+                     printer: Optional[str] = None, source: str = 'reprint'):
+        """
+        Registra a impressão no histórico local (falhas só vão para o log)
+        
+        Args:
+            code: Código impresso
+            cargo: Dados da carga
+            quantity: Etiquetas impressas
+            printer: Impressora usada
+            source: Tela que imprimiu
+        """
+        if not self.print_history or not cargo:
+            return
+        try:
+            self.print_history.record_print(code, cargo, quantity, printer, source)
+        except Exception as e:
+            log_warning(f"Não foi possível registrar a impressão de {code} no histórico: {e}")
+    
+    def lookup_cargo(self, code: str) -> Dict[str, Any]:
+        """
+        Busca cargo por código sem lançar exceções (usado nas buscas em lote)
+        
+        Args:
+            code: Código da carga
+            
+        Returns:
+            Dict com code, cargo (None se não encontrado), error e full_response
+        """
+        result = {'code': code, 'cargo': None, 'error': None, 'full_response': None}
+        
+        if self.cache:
+            cargo = self.cache.get(code)
+            if cargo:
+                result['cargo'] = cargo
+                return result
+        
+        api_unavailable = False
+        try:
+            headers = {'Authorization': f'Bearer {self.token}'}
+            response = self.api_client.get(f'/cargos/code/{code}', headers=headers)
+            
+            if response.status_code == 200:
+                result['cargo'] = response.json().get('data')
+                if self.cache and result['cargo']:
+                    self.cache.put(code, result['cargo'])
+            elif response.status_code != 404:
+                error_detail = f"HTTP {response.status_code}"
+                try:
+                    error_json = response.json()
+                    error_detail += f": {error_json.get('message', response.text[:100])}"
+                except Exception:
+                    error_detail += f": {response.text[:100]}"
+                
+                log_throttled('cargo-lookup-error', f"Erro ao buscar carga {code}: {error_detail}",
+                              level=logging.ERROR, cargo_code=code, status=response.status_code)
+                result['error'] = error_detail
+                result['full_response'] = response.text[:500]
+                api_unavailable = response.status_code >= 500
                 
         except Exception as e:
-            log_error(f"Erro ao buscar cargo {code}: {str(e)}")
-            raise
+            log_throttled('cargo-lookup-error', f"Erro ao buscar carga {code}: {e}",
+                          level=logging.ERROR, cargo_code=code)
+            result['error'] = f"Exceção: {str(e)}"
+            result['full_response'] = traceback.format_exc()
+            api_unavailable = True
+        
+        # Cópia local só com a API fora do ar (como em get_cargo_by_code); 401/403/422 seguem como erro
+        if result['error'] and api_unavailable and (self.cache or self.print_history):
+            cargo = self._offline_cargo(code)
+            if cargo:
+                result.update(cargo=cargo, error=None, full_response=None)
+        
+        return result
+    
+    def resolve_codes(self, codes: List[str], max_workers: int = 8,
+                      on_progress: Callable[[int, int, Dict[str, Any]], None] = None) -> List[Dict[str, Any]]:
+        """
+        Busca vários códigos em paralelo com um pool limitado de workers
+        
+        Args:
+            codes: Códigos a buscar (duplicados são buscados uma única vez)
+            max_workers: Limite de requisições simultâneas
+            on_progress: Callback (concluídos, total, resultado) chamado na thread
+                         que invocou este método, à medida que cada busca termina
+            
+        Returns:
+            Lista de resultados de lookup_cargo na mesma ordem de codes
+        """
+        unique_codes = list(dict.fromkeys(codes))
+        total = len(unique_codes)
+        results = {}
+        
+        if not unique_codes:
+            return []
+        
+        workers = max(1, min(int(max_workers), total))
+        with ThreadPoolExecutor(max_workers=workers, thread_name_prefix='cargo-lookup') as executor:
+            futures = {executor.submit(self.lookup_cargo, code): code for code in unique_codes}
+            for done, future in enumerate(as_completed(futures), start=1):
+                result = future.result()
+                results[futures[future]] = result
+                if on_progress:
+                    on_progress(done, total, result)
+        
+        return [results[code] for code in codes]
+    
+    def group_lookup_results(self, results: List[Dict[str, Any]],
+                             accepted_statuses: List[str]) -> Dict[str, List]:
+        """
+        Agrupa resultados de resolve_codes em buckets
+        
+        Args:
+            results: Resultados na ordem de entrada
+            accepted_statuses: Status de carga aceitos (ex: RECEIVED, CHECKED)
+            
+        Returns:
+            Dict com cargo_ids, not_found, wrong_status e errors (ordem de entrada preservada)
+        """
+        groups = {'cargo_ids': [], 'not_found': [], 'wrong_status': [], 'errors': []}
+        
+        for result in results:
+            code = result['code']
+            cargo = result['cargo']
+            
+            if result['error']:
+                groups['errors'].append({
+                    'code': code,
+                    'error': result['error'],
+                    'full_response': result['full_response']
+                })
+            elif not cargo:
+                log_debug(f"  ✗ Carga {code} não encontrada", cargo_code=code)
+                groups['not_found'].append(code)
+            elif cargo.get('status') in accepted_statuses:
+                groups['cargo_ids'].append(cargo.get('id'))
+            else:
+                log_debug(f"  ✗ Carga {code} com status inválido: {cargo.get('status')}",
+                          cargo_code=code, status=cargo.get('status'))
+                groups['wrong_status'].append({
+                    'code': code,
+                    'status': cargo.get('status')
+                })
+        
+        return groups
+    
+    def parse_code_list(self, text: str, max_codes: int = 500) -> Dict[str, List[str]]:
+        """
+        Extrai códigos de uma lista colada (linhas, vírgulas, espaços) com faixas
+        
+        Args:
+            text: Texto com códigos e faixas no formato INICIO-FIM (mesmo número de dígitos)
+            max_codes: Limite de códigos após expandir as faixas
+            
+        Returns:
+            Dict com codes (sem duplicados, na ordem digitada) e invalid
+            
+        Raises:
+            ValueError: Lista passa de max_codes códigos
+        """
+        codes = []
+        invalid = []
+        for token in re.split(r'[\n,;\s]+', text.strip()):
+            if not token:
+                continue
+            match = _RANGE_RE.match(token)
+            if match and len(match.group(1)) == len(match.group(2)):
+                first, last = int(match.group(1)), int(match.group(2))
+                if first > last:
+                    invalid.append(token)
+                    continue
+                if len(codes) + last - first + 1 > max_codes:
+                    raise ValueError(f"A lista passa de {max_codes} códigos.")
+                width = len(match.group(1))
+                codes.extend(f"{number:0{width}d}" for number in range(first, last + 1))
+            elif self.validate_code_format(token):
+                codes.append(token)
+            else:
+                invalid.append(token)
+        
+        codes = list(dict.fromkeys(codes))
+        if len(codes) > max_codes:
+            raise ValueError(f"A lista passa de {max_codes} códigos.")
+        return {'codes': codes, 'invalid': invalid}
+    
+    def plan_reprint(self, results: List[Dict[str, Any]]) -> Dict[str, List]:
+        """
+        Separa o resultado de resolve_codes em etiquetas a reimprimir e pendências
+        
+        Args:
+            results: Resultados de resolve_codes
+            
+        Returns:
+            Dict com items [(código impresso, indicadores, cargo)], not_found,
+            errors [{code, error}] e offline (códigos com dados locais)
+        """
+        plan = {'items': [], 'not_found': [], 'errors': [], 'offline': []}
+        for result in results:
+            cargo = result['cargo']
+            if result['error']:
+                plan['errors'].append({'code': result['code'], 'error': result['error']})
+            elif not cargo:
+                plan['not_found'].append(result['code'])
+            else:
+                try:
+                    code_to_print = self.get_code_to_print(cargo)
+                except ValueError as e:
+                    plan['errors'].append({'code': result['code'], 'error': str(e)})
+                    continue
+                if cargo.get('_source'):
+                    plan['offline'].append(result['code'])
+                plan['items'].append((code_to_print, self.get_indicator_data(cargo), cargo))
+        return plan
+    
+    @staticmethod
+    def get_indicator_data(cargo: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Dados da carga usados nos indicadores especiais da etiqueta (build_zpl)
+        
+        Args:
+            cargo: Dados do cargo
+            
+        Returns:
+            Dict com is_priority, requires_special_handling, expiration_date e handling_instructions
+        """
+        return {
+            'is_priority': cargo.get('is_priority', False),
+            'requires_special_handling': cargo.get('requires_special_handling', False),
+            'expiration_date': cargo.get('expiration_date'),
+            'handling_instructions': cargo.get('handling_instructions')
+        }
     
     def validate_code_format(self, code: str) -> bool:
         """
@@ -119,4 +403,34 @@ class CargoManager:
             details.append(f"Volume: {label_data.get('volume', 'N/A')} m³")
             details.append(f"Criado em: {label_data.get('created_at', 'N/A')}")
         
-        return "\n".join(f"  - {detail}" for detail in details)
\ No newline at end of file
+        return "\n".join(f"  - {detail}" for detail in details)
+    
+    def format_reprint_report(self, report: Dict[str, Any]) -> str:
+        """
+        Formata o relatório da reimpressão em lote para exibição
+        
+        Args:
+            report: Relatório com requested, printed, labels, quantity, printer, not_found,
+                    errors, offline, invalid e elapsed
+            
+        Returns:
+            String formatada com o resumo e as pendências
+        """
+        lines = ["📋 REIMPRESSÃO EM LOTE", "=" * 50, ""]
+        lines.append(f"  - Códigos solicitados: {report['requested']}")
+        lines.append(f"  - Reimpressos: {report['printed']} ({report['labels']} etiqueta(s), "
+                     f"{report['quantity']} por código)")
+        lines.append(f"  - Impressora: {report.get('printer') or 'N/A'}")
+        lines.append(f"  - Tempo: {report.get('elapsed', 0):.1f}s")
+        
+        if report.get('offline'):
+            lines.append(f"\n⚠️ Dados locais (API indisponível): {', '.join(report['offline'])}")
+        if report['not_found']:
+            lines.append(f"\n❌ Não encontrados ({len(report['not_found'])}): {', '.join(report['not_found'])}")
+        if report['errors']:
+            lines.append(f"\n🔥 Erros ({len(report['errors'])}):")
+            lines.extend(f"  • {error['code']}: {error['error']}" for error in report['errors'])
+        if report.get('invalid'):
+            lines.append(f"\n⚠️ Ignorados (formato inválido): {', '.join(report['invalid'])}")
+        
+        return "\n".join(lines)
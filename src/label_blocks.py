@@ -0,0 +1,241 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Blocos de numeração reservados por estação para as sequências de labels
+A estação reserva na API uma faixa de números (ex: 1000) e distribui os lotes
+localmente; cada reserva, entrega e devolução é gravada em um journal local
+que permite retomar a faixa após reinício e detectar sobreposição de faixas
+(números que seriam impressos em duplicidade)
+"""
+
+import os
+import threading
+import time
+from typing import Any, Dict, List, Optional, Tuple
+
+from printer.spooler import SpoolJournal
+from utils.logger import log_info, log_error
+
+# Journal reescrito (compactado) ao abrir quando passar deste número de registros
+COMPACT_AFTER = 1000
+
+
+class LabelBlockError(Exception):
+    """Faixa reservada inconsistente com o journal local (risco de duplicidade)"""
+
+
+class LabelBlock:
+    """Faixa de números reservada para uma label"""
+
+    __slots__ = ('label_id', 'start', 'end', 'next')
+
+    def __init__(self, label_id: str, start: int, end: int, next_number: Optional[int] = None):
+        self.label_id = label_id
+        self.start = start
+        self.end = end
+        self.next = start if next_number is None else next_number
+
+    @property
+    def remaining(self) -> int:
+        return self.end - self.next + 1
+
+
+class LabelBlockLedger:
+    """Blocos ativos e histórico de faixas por label, persistidos no journal"""
+
+    def __init__(self, journal_path: Optional[str] = None):
+        """
+        Inicializa o registro e recupera os blocos do journal
+
+        Args:
+            journal_path: Arquivo do journal (None = apenas em memória)
+        """
+        self._lock = threading.Lock()
+        self._blocks: Dict[str, List[LabelBlock]] = {}
+        self._history: Dict[str, List[List[int]]] = {}  # faixas já reservadas: [início, fim]
+        self.journal = SpoolJournal(journal_path) if journal_path else None
+        if self.journal:
+            records = self.journal.replay()
+            self._replay(records)
+            self.journal.open()
+            if len(records) > COMPACT_AFTER:
+                self._compact()
+
+    def record_lease(self, label_id: Any, start: int, end: int):
+        """
+        Registra uma faixa reservada na API
+
+        Raises:
+            LabelBlockError: Faixa sobrepõe outra já reservada por esta estação
+        """
+        label_id = str(label_id)
+        with self._lock:
+            self._add_lease(label_id, start, end)
+            self._append({'op': 'lease', 'label_id': label_id, 'start': start, 'end': end})
+        log_info(f"Label {label_id}: bloco {start}-{end} reservado ({end - start + 1} números)")
+
+    def take(self, label_id: Any, quantity: int) -> Optional[Tuple[int, int]]:
+        """
+        Entrega uma sequência contínua de um bloco ativo
+
+        Args:
+            label_id: ID da label
+            quantity: Quantidade de números
+
+        Returns:
+            Tupla (início, fim) ou None se nenhum bloco tem números suficientes
+        """
+        label_id = str(label_id)
+        with self._lock:
+            for block in self._blocks.get(label_id, []):
+                if block.remaining >= quantity:
+                    start, end = block.next, block.next + quantity - 1
+                    block.next = end + 1
+                    self._append({'op': 'issue', 'label_id': label_id, 'start': start, 'end': end})
+                    if not block.remaining:
+                        self._blocks[label_id].remove(block)
+                    return start, end
+        return None
+
+    def unused_blocks(self, label_id: Any = None) -> List[LabelBlock]:
+        """Blocos com números ainda não entregues (de uma label ou de todas)"""
+        with self._lock:
+            if label_id is not None:
+                return list(self._blocks.get(str(label_id), []))
+            return [block for blocks in self._blocks.values() for block in blocks]
+
+    def record_release(self, block: LabelBlock):
+        """
+        Registra que o restante do bloco foi devolvido à API
+
+        Os números devolvidos saem do histórico: podem voltar em uma reserva futura.
+        """
+        with self._lock:
+            blocks = self._blocks.get(block.label_id, [])
+            if block in blocks:
+                blocks.remove(block)
+            start, end = block.next, block.end
+            self._release(block.label_id, start, end)
+            self._append({'op': 'release', 'label_id': block.label_id, 'start': start, 'end': end})
+        log_info(f"Label {block.label_id}: números {start}-{end} devolvidos")
+
+    def get_status(self) -> Dict[str, List[Dict[str, int]]]:
+        """Blocos ativos por label"""
+        with self._lock:
+            return {label_id: [{'start': b.start, 'end': b.end, 'next': b.next} for b in blocks]
+                    for label_id, blocks in self._blocks.items() if blocks}
+
+    def close(self):
+        if self.journal:
+            self.journal.close()
+
+    # ----- Estado interno (chamado com self._lock adquirido) -----
+
+    def _add_lease(self, label_id: str, start: int, end: int):
+        if start > end:
+            raise LabelBlockError(f"Faixa inválida para a label {label_id}: {start}-{end}")
+        for used_start, used_end in self._history.get(label_id, []):
+            if start <= used_end and used_start <= end:
+                raise LabelBlockError(
+                    f"Faixa {start}-{end} da label {label_id} sobrepõe a faixa {used_start}-{used_end} "
+                    f"já reservada por esta estação")
+        self._history.setdefault(label_id, []).append([start, end])
+        self._blocks.setdefault(label_id, []).append(LabelBlock(label_id, start, end))
+
+    def _release(self, label_id: str, start: int, end: int):
+        # Números devolvidos podem ser reservados de novo sem acusar sobreposição
+        for used in self._history.get(label_id, []):
+            if used[0] <= start <= used[1] and end == used[1]:
+                used[1] = start - 1
+        self._history[label_id] = [used for used in self._history.get(label_id, []) if used[0] <= used[1]]
+
+    def _append(self, record: Dict[str, Any]):
+        if self.journal:
+            record['ts'] = time.time()
+            self.journal.append(record)
+
+    def _replay(self, records: List[Dict[str, Any]]):
+        for record in records:
+            op = record.get('op')
+            label_id = str(record.get('label_id'))
+            start, end = record.get('start'), record.get('end')
+            try:
+                if op == 'lease':
+                    self._add_lease(label_id, start, end)
+                elif op == 'issue':
+                    block = self._find_block(label_id, start)
+                    if block is None or block.next != start or end > block.end:
+                        raise LabelBlockError(f"Entrega {start}-{end} da label {label_id} fora de um bloco ativo")
+                    block.next = end + 1
+                    if not block.remaining:
+                        self._blocks[label_id].remove(block)
+                elif op == 'release':
+                    block = self._find_block(label_id, start)
+                    if block is not None:
+                        self._blocks[label_id].remove(block)
+                    self._release(label_id, start, end)
+            except LabelBlockError as e:
+                log_error(f"Journal de blocos de labels inconsistente: {e}")
+        active = sum(len(blocks) for blocks in self._blocks.values())
+        if active:
+            log_info(f"Blocos de labels recuperados do journal: {active} bloco(s) ativo(s)")
+
+    def _find_block(self, label_id: str, number: int) -> Optional[LabelBlock]:
+        for block in self._blocks.get(label_id, []):
+            if block.start <= number <= block.end:
+                return block
+        return None
+
+    def _compact(self):
+        """Reescreve o journal só com o histórico de faixas e o estado dos blocos ativos"""
+        with self._lock:
+            records = []
+            for label_id, history in self._history.items():
+                active = {(b.start, b.end): b for b in self._blocks.get(label_id, [])}
+                for start, end in history:
+                    records.append({'op': 'lease', 'label_id': label_id, 'start': start, 'end': end})
+                    block = active.get((start, end))
+                    issued_end = end if block is None else block.next - 1
+                    if issued_end >= start:
+                        records.append({'op': 'issue', 'label_id': label_id, 'start': start, 'end': issued_end})
+            self.journal.rewrite(records)
+
+
+_ledger: Optional[LabelBlockLedger] = None
+_ledger_lock = threading.Lock()
+
+
+def get_block_ledger() -> LabelBlockLedger:
+    """
+    Retorna o registro de blocos do processo
+
+    Returns:
+        LabelBlockLedger com o journal da seção 'label_blocks' do settings.json
+    """
+    global _ledger
+    with _ledger_lock:
+        if _ledger is None:
+            from utils.config import load_config
+
+            blocks_config = load_config().get('label_blocks', {})
+            project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+            journal_file = blocks_config.get('journal_file', 'spool/label_blocks.log')
+            if not os.path.isabs(journal_file):
+                journal_file = os.path.join(project_root, journal_file)
+            _ledger = LabelBlockLedger(journal_file)
+        return _ledger
+
+
+def block_reservation_enabled() -> bool:
+    """True se a seção 'label_blocks' do settings.json habilita a reserva de blocos"""
+    from utils.config import load_config
+
+    return bool(load_config().get('label_blocks', {}).get('enabled', False))
+
+
+def block_size() -> int:
+    """Tamanho do bloco reservado por vez (seção 'label_blocks')"""
+    from utils.config import load_config
+
+    return max(1, int(load_config().get('label_blocks', {}).get('block_size', 1000)))
@@ -6,23 +6,36 @@ Gerenciador de Labels da API
 Baseado no código PHP original
 """
 
+import random
+import time
 from typing import List, Dict, Any, Optional, Tuple
 from api.client import APIClient
-from utils.logger import log_info, log_error
+from utils.logger import log_info, log_error, log_warning
+from label_blocks import (LabelBlockLedger, LabelBlockError, get_block_ledger, block_reservation_enabled,
+                          block_size)
+
+# Tentativas de reserva quando outra estação altera o contador ao mesmo tempo
+LEASE_ATTEMPTS = 8
+LEASE_RETRY_DELAY = 0.05  # Espera máxima (s) antes da 1ª nova tentativa, com variação aleatória
 
 class LabelManager:
     """Gerenciador de labels da API"""
     
-    def __init__(self, api_client: APIClient, token: str):
+    def __init__(self, api_client: APIClient, token: str,
+                 block_ledger: Optional[LabelBlockLedger] = None, block_size: int = 1000):
         """
         Inicializa o gerenciador
         
         Args:
             api_client: Cliente da API
             token: Token de autenticação
+            block_ledger: Registro de blocos reservados (None = reservar só a quantidade de cada lote)
+            block_size: Números reservados por vez quando há registro de blocos
         """
         self.api_client = api_client
         self.token = token
+        self.block_ledger = block_ledger
+        self.block_size = block_size
     
     def list_labels(self, user_id: Optional[int] = None) -> List[Dict[str, Any]]:
         """
@@ -220,6 +233,159 @@ class LabelManager:
         
         return last, start, end
     
+    def reserve_sequence(self, label: Dict[str, Any], quantity: int) -> Tuple[int, int, int]:
+        """
+        Reserva a sequência de um lote
+        
+        Sem registro de blocos (padrão) é o fluxo original: calculate_sequence a
+        partir do last_number da label e update_last_number com o fim do lote.
+        Com registro de blocos, os números saem do bloco reservado pela estação e
+        a API só é consultada quando o bloco acaba (lease_block, que exige
+        POST /labels/{id}/reserve ou ETag na label).
+        
+        Args:
+            label: Dados da label
+            quantity: Quantidade a imprimir
+            
+        Returns:
+            Tupla (last_number, start, end), como calculate_sequence
+            
+        Raises:
+            LabelBlockError: Faixa reservada sobrepõe outra já usada por esta estação, ou
+                a API não permite reservar blocos com segurança (sem /reserve e sem ETag)
+        """
+        label_id = label['id']
+        if self.block_ledger is None:
+            last, start, end = self.calculate_sequence(label, quantity)
+            self.update_last_number(label_id, end)
+            return last, start, end
+        
+        sequence = self.block_ledger.take(label_id, quantity)
+        if sequence is None:
+            start, end = self.lease_block(label_id, max(self.block_size, quantity))
+            self.block_ledger.record_lease(label_id, start, end)
+            sequence = self.block_ledger.take(label_id, quantity)
+        
+        start, end = sequence
+        return start - 1, start, end
+    
+    def lease_block(self, label_id: int, size: int) -> Tuple[int, int]:
+        """
+        Reserva na API uma faixa de números da label
+        
+        Usa POST /labels/{id}/reserve (incremento atômico no servidor). Se a API
+        não tiver esse endpoint, lê o contador e grava o novo valor com If-Match;
+        sem ETag não há como garantir a faixa e a reserva é recusada.
+        
+        Args:
+            label_id: ID da label
+            size: Quantidade de números
+            
+        Returns:
+            Tupla (início, fim) da faixa reservada
+            
+        Raises:
+            LabelBlockError: API sem /reserve e sem ETag (reserva sujeita a duplicidade)
+        """
+        headers = {'Authorization': f'Bearer {self.token}'}
+        response = self.api_client.post(f'/labels/{label_id}/reserve', data={'quantity': size}, headers=headers)
+        
+        if response.status_code in (200, 201):
+            result = response.json()
+            result = result.get('data', result)
+            start, end = int(result['start']), int(result['end'])
+            if end - start + 1 != size:
+                raise RuntimeError(f"Reserva da label {label_id} retornou {start}-{end} para {size} números")
+            log_info(f"Label {label_id}: números {start}-{end} reservados na API")
+            return start, end
+        if response.status_code not in (404, 405, 501):
+            log_error(f"Erro ao reservar números da label {label_id}: HTTP {response.status_code}")
+            raise RuntimeError(f"Falha ao reservar números. HTTP {response.status_code}")
+        
+        for attempt in range(1, LEASE_ATTEMPTS + 1):
+            if attempt > 1:
+                # Espera aleatória crescente: estações em disputa não colidem de novo
+                time.sleep(random.uniform(0, LEASE_RETRY_DELAY * attempt))
+            last, etag = self._read_last_number(label_id)
+            if not etag:
+                # Ler e gravar sem If-Match não detecta outra estação gravando no meio
+                log_error(f"Label {label_id}: API sem reserva atômica nem ETag, reserva recusada")
+                raise LabelBlockError(f"A API não permite reservar números da label {label_id} com segurança "
+                                      f"(sem /reserve e sem ETag); impressão bloqueada para evitar duplicidade")
+            end = last + size
+            put_headers = dict(headers, **{'If-Match': etag})
+            response = self.api_client.put(f'/labels/{label_id}', data={'last_number': end}, headers=put_headers)
+            if response.status_code == 412:
+                log_warning(f"Label {label_id}: contador alterado por outra estação, tentando de novo ({attempt})")
+                continue
+            if response.status_code != 200:
+                log_error(f"Erro ao atualizar label {label_id}: HTTP {response.status_code}")
+                raise RuntimeError(f"Falha ao atualizar last_number. HTTP {response.status_code}")
+            
+            log_info(f"Label {label_id}: last_number atualizado para {end} (faixa {last + 1}-{end})")
+            return last + 1, end
+        
+        raise RuntimeError(f"Não foi possível reservar números da label {label_id}: "
+                           f"contador alterado por outra estação em {LEASE_ATTEMPTS} tentativas")
+    
+    def release_unused(self, label_id: Optional[int] = None) -> int:
+        """
+        Devolve à API os números não usados dos blocos desta estação
+        
+        A devolução só é possível enquanto o bloco é o último reservado da label
+        (contador da API igual ao fim do bloco); senão o bloco continua com esta
+        estação e é usado na próxima sessão.
+        
+        Args:
+            label_id: Label específica (None = todas)
+            
+        Returns:
+            Quantidade de números devolvidos
+        """
+        if self.block_ledger is None:
+            return 0
+        
+        returned_total = 0
+        headers = {'Authorization': f'Bearer {self.token}'}
+        for block in self.block_ledger.unused_blocks(label_id):
+            try:
+                response = self.api_client.post(f'/labels/{block.label_id}/release',
+                                                data={'start': block.next, 'end': block.end}, headers=headers)
+                if response.status_code in (404, 405, 501):
+                    # API sem o endpoint: devolver só se ninguém reservou depois deste bloco
+                    # (com If-Match; sem ETag outra estação poderia reservar entre a leitura e a gravação)
+                    last, etag = self._read_last_number(block.label_id)
+                    if last != block.end or not etag:
+                        response = None
+                    else:
+                        put_headers = dict(headers, **{'If-Match': etag})
+                        response = self.api_client.put(f'/labels/{block.label_id}',
+                                                       data={'last_number': block.next - 1}, headers=put_headers)
+                returned = response is not None and response.status_code in (200, 204)
+            except Exception as e:
+                log_error(f"Erro ao devolver números da label {block.label_id}: {str(e)}")
+                continue
+            
+            if returned:
+                returned_total += block.remaining
+                self.block_ledger.record_release(block)
+            else:
+                log_info(f"Label {block.label_id}: números {block.next}-{block.end} mantidos "
+                         f"nesta estação (outra estação reservou depois)")
+        
+        return returned_total
+    
+    def _read_last_number(self, label_id: Any) -> Tuple[int, Optional[str]]:
+        """Contador atual da label na API e ETag da resposta (se houver)"""
+        headers = {'Authorization': f'Bearer {self.token}'}
+        response = self.api_client.get(f'/labels/{label_id}', headers=headers)
+        if response.status_code != 200:
+            log_error(f"Erro ao buscar label {label_id}: HTTP {response.status_code}")
+            raise RuntimeError(f"Erro ao buscar label. HTTP {response.status_code}")
+        label = response.json()
+        label = label.get('data', label) if isinstance(label.get('data'), dict) else label
+        return int(label.get('last_number', 0)), response.headers.get('ETag')
+    
     def format_label_display(self, labels: List[Dict[str, Any]]) -> str:
         """
         Formata labels para exibição
@@ -240,4 +406,23 @@ class LabelManager:
             user_id = label.get('user_id', 'N/A')
             lines.append(f"[{i+1}] {name}\t(last: {last_number}, user_id: {user_id})")
         
-        return "\n".join(lines)
\ No newline at end of file
+        return "\n".join(lines)
+
+
+def create_label_manager(api_client: APIClient, token: str) -> LabelManager:
+    """
+    LabelManager conforme a seção 'label_blocks' do settings.json
+
+    Com label_blocks.enabled os números saem de blocos reservados por esta
+    estação; senão (padrão) vale o fluxo original de last_number.
+
+    Args:
+        api_client: Cliente da API
+        token: Token de autenticação
+
+    Returns:
+        LabelManager configurado
+    """
+    if block_reservation_enabled():
+        return LabelManager(api_client, token, block_ledger=get_block_ledger(), block_size=block_size())
+    return LabelManager(api_client, token)
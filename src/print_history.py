@@ -0,0 +1,174 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Histórico das etiquetas de carga impressas nesta estação (SQLite)
+Guarda o último registro conhecido de cada carga impressa, permitindo
+reimprimir sem consultar a API quando ela estiver fora do ar
+"""
+
+import json
+import os
+import sqlite3
+import threading
+import time
+from typing import Any, Dict, List, Optional
+
+from utils.logger import log_info, log_warning
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS printed_cargo (
+    code TEXT PRIMARY KEY,
+    cargo_id TEXT,
+    cargo_code TEXT,
+    cargo TEXT NOT NULL,
+    first_printed_at REAL NOT NULL,
+    last_printed_at REAL NOT NULL,
+    print_count INTEGER NOT NULL DEFAULT 0,
+    labels_printed INTEGER NOT NULL DEFAULT 0,
+    last_printer TEXT,
+    last_source TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_printed_cargo_last ON printed_cargo (last_printed_at);
+CREATE INDEX IF NOT EXISTS idx_printed_cargo_code ON printed_cargo (cargo_code);
+"""
+
+
+class PrintHistory:
+    """Índice persistente das cargas impressas, por código"""
+
+    def __init__(self, db_path: str = ':memory:', keep_days: float = 90):
+        """
+        Abre (ou cria) o banco do histórico
+
+        Args:
+            db_path: Arquivo SQLite (':memory:' = apenas em memória)
+            keep_days: Registros sem impressão há mais dias são apagados ao abrir (0 = manter)
+        """
+        if db_path != ':memory:':
+            os.makedirs(os.path.dirname(os.path.abspath(db_path)), exist_ok=True)
+        self.db_path = db_path
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(db_path, check_same_thread=False)
+        self._conn.row_factory = sqlite3.Row
+        with self._lock, self._conn:
+            if db_path != ':memory:':
+                self._conn.execute('PRAGMA journal_mode=WAL')
+            self._conn.executescript(SCHEMA)
+        if keep_days:
+            self.prune(keep_days)
+
+    def record_print(self, code: str, cargo: Dict[str, Any], quantity: int = 1,
+                     printer: Optional[str] = None, source: str = 'reprint'):
+        """
+        Registra uma impressão e atualiza os dados guardados da carga
+
+        Args:
+            code: Código impresso
+            cargo: Dados da carga no momento da impressão
+            quantity: Etiquetas impressas
+            printer: Impressora usada
+            source: Tela que imprimiu (reprint, receive...)
+        """
+        now = time.time()
+        cargo = {key: value for key, value in cargo.items() if not key.startswith('_')}
+        with self._lock, self._conn:
+            self._conn.execute(
+                """
+                INSERT INTO printed_cargo (code, cargo_id, cargo_code, cargo, first_printed_at, last_printed_at,
+                                           print_count, labels_printed, last_printer, last_source)
+                VALUES (?, ?, ?, ?, ?, ?, 1, ?, ?, ?)
+                ON CONFLICT(code) DO UPDATE SET
+                    cargo_id = excluded.cargo_id,
+                    cargo_code = excluded.cargo_code,
+                    cargo = excluded.cargo,
+                    last_printed_at = excluded.last_printed_at,
+                    print_count = print_count + 1,
+                    labels_printed = labels_printed + excluded.labels_printed,
+                    last_printer = excluded.last_printer,
+                    last_source = excluded.last_source
+                """,
+                (str(code), None if cargo.get('id') is None else str(cargo.get('id')),
+                 None if cargo.get('code') is None else str(cargo.get('code')),
+                 json.dumps(cargo, ensure_ascii=False, default=str), now, now,
+                 int(quantity), printer, source))
+
+    def lookup(self, code: str) -> Optional[Dict[str, Any]]:
+        """
+        Busca a carga pelo código impresso (ou pelo código da carga)
+
+        Returns:
+            Dict com cargo, last_printed_at, print_count, labels_printed, last_printer
+            e last_source, ou None se o código nunca foi impresso aqui
+        """
+        with self._lock:
+            row = self._conn.execute("SELECT * FROM printed_cargo WHERE code = ?", (str(code),)).fetchone()
+            if row is None:
+                # Reimpressão imprime label_code; a busca pode ter usado o code da carga
+                row = self._conn.execute(
+                    "SELECT * FROM printed_cargo WHERE cargo_code = ? "
+                    "ORDER BY last_printed_at DESC LIMIT 1", (str(code),)).fetchone()
+        return self._row_to_dict(row) if row else None
+
+    def recent(self, limit: int = 50) -> List[Dict[str, Any]]:
+        """Últimas cargas impressas, da mais recente para a mais antiga"""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT * FROM printed_cargo ORDER BY last_printed_at DESC LIMIT ?", (int(limit),)).fetchall()
+        return [self._row_to_dict(row) for row in rows]
+
+    def prune(self, keep_days: float) -> int:
+        """Apaga cargas sem impressão há mais de keep_days dias"""
+        cutoff = time.time() - keep_days * 86400
+        with self._lock, self._conn:
+            removed = self._conn.execute("DELETE FROM printed_cargo WHERE last_printed_at < ?",
+                                         (cutoff,)).rowcount
+        if removed:
+            log_info(f"Histórico de impressão: {removed} registro(s) com mais de {keep_days:g} dias removido(s)")
+        return removed
+
+    def count(self) -> int:
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM printed_cargo").fetchone()[0]
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+    @staticmethod
+    def _row_to_dict(row: sqlite3.Row) -> Dict[str, Any]:
+        record = dict(row)
+        record['cargo'] = json.loads(record['cargo'])
+        return record
+
+
+_history: Optional[PrintHistory] = None
+_history_lock = threading.Lock()
+
+
+def get_print_history() -> Optional[PrintHistory]:
+    """
+    Retorna o histórico de impressão do processo
+
+    Returns:
+        PrintHistory com o banco da seção 'print_history' do settings.json,
+        ou None se desabilitado ou se o banco não pôde ser aberto
+    """
+    global _history
+    with _history_lock:
+        if _history is None:
+            from utils.config import load_config
+
+            history_config = load_config().get('print_history', {})
+            if not history_config.get('enabled', True):
+                return None
+            project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+            database = history_config.get('database', 'cache/print_history.db')
+            if not os.path.isabs(database):
+                database = os.path.join(project_root, database)
+            try:
+                _history = PrintHistory(database, keep_days=float(history_config.get('keep_days', 90)))
+            except (OSError, sqlite3.Error) as e:
+                log_warning(f"Histórico de impressão indisponível ({database}): {e}")
+                return None
+        return _history
@@ -0,0 +1,256 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Pool de conexões TCP persistentes para impressoras Zebra de rede (porta 9100)
+Mantém um socket aberto por impressora, com timeout de ociosidade,
+verificação de saúde antes do uso e reconexão automática
+"""
+
+import select
+import socket
+import threading
+import time
+from typing import Any, Dict, Iterable, Optional, Tuple
+
+from utils.logger import log_info, log_warning
+
+
+class PartialSendError(ConnectionError):
+    """Conexão perdida depois de parte do job entregue (reenviar duplicaria etiquetas)"""
+
+
+class PrinterConnection:
+    """Conexão persistente com uma impressora"""
+
+    def __init__(self, host: str, port: int = 9100, timeout: float = 10,
+                 idle_timeout: float = 30):
+        """
+        Inicializa a conexão (o socket é aberto no primeiro envio)
+
+        Args:
+            host: IP da impressora
+            port: Porta RAW (normalmente 9100)
+            timeout: Timeout de conexão e envio (segundos)
+            idle_timeout: Tempo ocioso até fechar o socket (segundos)
+        """
+        self.host = host
+        self.port = port
+        self.timeout = timeout
+        self.idle_timeout = idle_timeout
+
+        self.lock = threading.Lock()
+        self._sock: Optional[socket.socket] = None
+        self._last_used = 0.0
+
+        self.connections_opened = 0
+        self.sends = 0
+        self.reconnects = 0
+
+    def send(self, data: bytes):
+        """
+        Envia dados reaproveitando o socket aberto
+
+        Se o socket reaproveitado estiver quebrado, reconecta e reenvia uma vez.
+        Falhas em um socket recém-aberto são repassadas ao chamador.
+        """
+        self.send_stream((data,))
+
+    def send_stream(self, chunks: Iterable[bytes]):
+        """
+        Envia uma sequência de blocos pelo mesmo socket, sem intercalar outros jobs
+
+        Só o primeiro bloco é reenviado após reconexão: uma falha no meio do
+        fluxo vira PartialSendError para o chamador não duplicar etiquetas já enviadas.
+        """
+        with self.lock:
+            reused = self._ensure_open()
+            first = True
+            for data in chunks:
+                try:
+                    self._sock.sendall(data)
+                except (ConnectionError, socket.timeout, OSError) as e:
+                    self._close_locked()
+                    if not first:
+                        raise PartialSendError(f"conexão com {self.host}:{self.port} perdida "
+                                               f"no meio do envio: {e}") from e
+                    if not reused or isinstance(e, socket.timeout):
+                        raise
+                    log_warning(f"Conexão com {self.host}:{self.port} perdida ({e}), reconectando")
+                    self.reconnects += 1
+                    self._ensure_open()
+                    try:
+                        self._sock.sendall(data)
+                    except Exception:
+                        self._close_locked()
+                        raise
+                first = False
+                self._last_used = time.monotonic()
+            self.sends += 1
+            self._last_used = time.monotonic()
+
+    def close_if_idle(self, now: Optional[float] = None) -> bool:
+        """Fecha o socket se passou do timeout de ociosidade"""
+        now = time.monotonic() if now is None else now
+        if not self.lock.acquire(blocking=False):
+            return False
+        try:
+            if self._sock is not None and now - self._last_used >= self.idle_timeout:
+                log_info(f"Fechando conexão ociosa com {self.host}:{self.port}")
+                self._close_locked()
+                return True
+            return False
+        finally:
+            self.lock.release()
+
+    def close(self):
+        with self.lock:
+            self._close_locked()
+
+    @property
+    def is_open(self) -> bool:
+        return self._sock is not None
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            'host': self.host,
+            'port': self.port,
+            'open': self.is_open,
+            'connections_opened': self.connections_opened,
+            'sends': self.sends,
+            'reconnects': self.reconnects
+        }
+
+    def _ensure_open(self) -> bool:
+        """Garante um socket saudável; retorna True se reaproveitou o existente"""
+        if self._sock is not None:
+            idle = time.monotonic() - self._last_used
+            if idle >= self.idle_timeout or not self._is_healthy():
+                self._close_locked()
+            else:
+                return True
+
+        sock = socket.create_connection((self.host, self.port), timeout=self.timeout)
+        sock.setsockopt(socket.SOL_SOCKET, socket.SO_KEEPALIVE, 1)
+        self._sock = sock
+        self._last_used = time.monotonic()
+        self.connections_opened += 1
+        log_info(f"Conexão aberta com impressora {self.host}:{self.port}")
+        return False
+
+    def _is_healthy(self) -> bool:
+        """
+        Verifica se a impressora não fechou o socket
+
+        A porta RAW não envia nada sem ser consultada: se o socket estiver
+        legível, é EOF (fechado pela impressora) ou erro.
+        """
+        try:
+            readable, _, errored = select.select([self._sock], [], [self._sock], 0)
+            if errored:
+                return False
+            if readable:
+                return self._sock.recv(1, socket.MSG_PEEK) != b''
+            return True
+        except (OSError, ValueError):
+            return False
+
+    def _close_locked(self):
+        if self._sock is not None:
+            try:
+                self._sock.close()
+            except OSError:
+                pass
+            self._sock = None
+
+
+class PrinterConnectionPool:
+    """Conexões persistentes por impressora (host, porta)"""
+
+    def __init__(self, idle_timeout: float = 30, keep_alive: bool = True,
+                 reaper_interval: Optional[float] = None):
+        """
+        Inicializa o pool
+
+        Args:
+            idle_timeout: Tempo ocioso até fechar cada socket (segundos)
+            keep_alive: Se False, os chamadores devem abrir um socket por job
+            reaper_interval: Intervalo da verificação de ociosidade (padrão: idle_timeout / 2)
+        """
+        self.idle_timeout = idle_timeout
+        self.keep_alive = keep_alive
+        self.reaper_interval = reaper_interval or max(1.0, idle_timeout / 2)
+        self._connections: Dict[Tuple[str, int], PrinterConnection] = {}
+        self._lock = threading.Lock()
+        self._reaper: Optional[threading.Thread] = None
+        self._stop = threading.Event()
+
+    def get(self, host: str, port: int = 9100, timeout: float = 10) -> PrinterConnection:
+        """Retorna a conexão da impressora, criando-a se necessário"""
+        key = (host, int(port))
+        with self._lock:
+            conn = self._connections.get(key)
+            if conn is None:
+                conn = PrinterConnection(host, int(port), timeout, self.idle_timeout)
+                self._connections[key] = conn
+            conn.timeout = timeout
+            self._start_reaper()
+            return conn
+
+    def send(self, host: str, port: int, data: bytes, timeout: float = 10):
+        """Envia dados pela conexão persistente da impressora"""
+        self.get(host, port, timeout).send(data)
+
+    def send_stream(self, host: str, port: int, chunks: Iterable[bytes], timeout: float = 10):
+        """Envia blocos em sequência pela conexão persistente da impressora"""
+        self.get(host, port, timeout).send_stream(chunks)
+
+    def get_stats(self) -> Dict[str, Dict[str, Any]]:
+        """Contadores por impressora ('host:porta')"""
+        with self._lock:
+            return {f"{host}:{port}": conn.get_stats()
+                    for (host, port), conn in self._connections.items()}
+
+    def close_all(self):
+        """Fecha todas as conexões e encerra a verificação de ociosidade"""
+        self._stop.set()
+        with self._lock:
+            connections = list(self._connections.values())
+        for conn in connections:
+            conn.close()
+
+    def _start_reaper(self):
+        if self._reaper is None or not self._reaper.is_alive():
+            self._stop.clear()
+            self._reaper = threading.Thread(target=self._reap_loop, name='printer-conn-reaper',
+                                            daemon=True)
+            self._reaper.start()
+
+    def _reap_loop(self):
+        while not self._stop.wait(self.reaper_interval):
+            with self._lock:
+                connections = list(self._connections.values())
+            for conn in connections:
+                conn.close_if_idle()
+
+
+_pool: Optional[PrinterConnectionPool] = None
+_pool_lock = threading.Lock()
+
+
+def get_connection_pool() -> PrinterConnectionPool:
+    """
+    Retorna o pool de conexões de impressoras do processo
+
+    Returns:
+        PrinterConnectionPool configurado pela seção 'printer_connections' do settings.json
+    """
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            from utils.config import load_config
+
+            pool_config = load_config().get('printer_connections', {})
+            _pool = PrinterConnectionPool(idle_timeout=float(pool_config.get('idle_timeout', 30)),
+                                          keep_alive=bool(pool_config.get('keep_alive', True)))
+        return _pool
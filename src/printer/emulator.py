@@ -0,0 +1,329 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Emulador de impressora Zebra na porta RAW (TCP 9100)
+Recebe ZPL, separa os formatos ^XA...^XZ, "imprime" cada etiqueta no tempo da
+velocidade configurada (polegadas por segundo) e responde ~HS. O buffer de
+recepção é limitado: com ele cheio (ex: sem papel) o emulador para de ler e o
+envio fica retido no TCP, como em uma impressora real
+
+Uso: python src/printer/emulator.py --port 9100 --ips 6 --buffer 65536
+"""
+
+import os
+import re
+import socket
+import sys
+import threading
+import time
+from collections import deque
+from typing import Any, Dict, List, Optional
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.logger import log_info, log_warning
+
+_PQ_RE = re.compile(r'\^PQ(\d+)')
+_LL_RE = re.compile(r'\^LL(\d+)')
+_DF_RE = re.compile(r'\^DF([^\^~]+)')
+_XF_RE = re.compile(r'\^XF([^\^~]+)')
+
+
+class ZebraEmulator:
+    """Impressora ZPL simulada para testes de carga sem hardware"""
+
+    def __init__(self, host: str = '127.0.0.1', port: int = 9100, ips: float = 6.0, dpi: int = 203,
+                 label_length_dots: int = 400, buffer_size: int = 64 * 1024, paper_labels: Optional[int] = None,
+                 keep_labels: int = 10000):
+        """
+        Args:
+            host: Interface de escuta
+            port: Porta (0 = porta livre escolhida pelo sistema; ver self.port)
+            ips: Velocidade de impressão em polegadas por segundo
+            dpi: Resolução (converte ^LL em polegadas)
+            label_length_dots: Comprimento da etiqueta quando o formato não traz ^LL
+            buffer_size: Bytes de ZPL aguardando impressão antes de parar de ler da rede
+            paper_labels: Etiquetas no rolo (None = infinito); ao acabar, fica sem papel
+            keep_labels: Últimas etiquetas impressas mantidas em self.labels
+        """
+        self.host = host
+        self.ips = float(ips)
+        self.dpi = int(dpi)
+        self.label_length_dots = int(label_length_dots)
+        self.buffer_size = int(buffer_size)
+        self.paper_labels = paper_labels
+
+        self.paper_out = False
+        self.head_open = False
+        self.paused = False
+        self.labels: deque = deque(maxlen=keep_labels)
+        self.stored_formats: Dict[str, str] = {}
+        self.stats = {'connections': 0, 'bytes_received': 0, 'formats': 0, 'labels_printed': 0,
+                      'status_queries': 0, 'cancelled': 0}
+
+        self._cond = threading.Condition()
+        self._queue: deque = deque()  # [formato, etiquetas restantes]
+        self._buffered = 0
+        self._partial = False
+        self._running = True
+        self._clients: List[socket.socket] = []
+
+        self._server = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        self._server.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        # Janela TCP pequena: o buffer que vale é o da impressora, não o do sistema operacional
+        self._server.setsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF, max(4096, min(self.buffer_size, 65536)))
+        self._server.bind((host, port))
+        self._server.listen(16)
+        self.port = self._server.getsockname()[1]
+
+        self._threads = [threading.Thread(target=self._accept_loop, name=f'zebra-emu-{self.port}', daemon=True),
+                         threading.Thread(target=self._print_loop, name=f'zebra-emu-print-{self.port}',
+                                          daemon=True)]
+        for thread in self._threads:
+            thread.start()
+        log_info(f"Emulador Zebra ouvindo em {host}:{self.port} ({self.ips} ips, buffer {self.buffer_size} bytes)")
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    # ----- Controle do teste -----
+
+    def set_state(self, paper_out: Optional[bool] = None, head_open: Optional[bool] = None,
+                  paused: Optional[bool] = None, paper_labels: Optional[int] = None):
+        """Altera o estado físico simulado (None = mantém)"""
+        with self._cond:
+            if paper_labels is not None:
+                self.paper_labels = paper_labels
+            if paper_out is not None:
+                self.paper_out = paper_out
+            if head_open is not None:
+                self.head_open = head_open
+            if paused is not None:
+                self.paused = paused
+            self._cond.notify_all()
+
+    def wait_printed(self, count: int, timeout: float = 10.0) -> bool:
+        """Aguarda até count etiquetas impressas no total"""
+        deadline = time.time() + timeout
+        with self._cond:
+            while self.stats['labels_printed'] < count:
+                remaining = deadline - time.time()
+                if remaining <= 0:
+                    return False
+                self._cond.wait(remaining)
+            return True
+
+    def get_status(self) -> Dict[str, Any]:
+        """Estado atual (o mesmo que o ~HS informa)"""
+        with self._cond:
+            return {'paper_out': self.paper_out, 'head_open': self.head_open, 'paused': self.paused,
+                    'formats_in_buffer': len(self._queue), 'buffered_bytes': self._buffered,
+                    'buffer_full': self._buffered >= self.buffer_size, 'partial_format': self._partial,
+                    'labels_remaining': self._queue[0][1] if self._queue else 0,
+                    **self.stats}
+
+    def drop_connections(self):
+        """Derruba as conexões abertas (cabo/rede caindo no meio de um job); a porta continua aceitando"""
+        with self._cond:
+            clients, self._clients = self._clients, []
+            self._cond.notify_all()
+        self._close_clients(clients)
+
+    def close(self):
+        with self._cond:
+            self._running = False
+            self._cond.notify_all()
+            clients, self._clients = self._clients, []
+        try:
+            self._server.close()
+        except OSError:
+            pass
+        self._close_clients(clients)
+
+    @staticmethod
+    def _close_clients(clients: List[socket.socket]):
+        for client in clients:
+            try:
+                client.shutdown(socket.SHUT_RDWR)
+            except OSError:
+                pass
+            client.close()
+
+    # ----- Rede -----
+
+    def _accept_loop(self):
+        while self._running:
+            try:
+                client, _ = self._server.accept()
+            except OSError:
+                return
+            with self._cond:
+                self.stats['connections'] += 1
+                self._clients.append(client)
+            threading.Thread(target=self._read_loop, args=(client,), daemon=True).start()
+
+    def _read_loop(self, client: socket.socket):
+        pending = ''
+        sends_formats = False  # conexões só com comandos ~ (ex: ~HS) não esperam o buffer
+        try:
+            while True:
+                with self._cond:
+                    # Buffer cheio: para de ler até a impressão liberar espaço
+                    while self._running and sends_formats and self._buffered >= self.buffer_size:
+                        self._cond.wait(0.5)
+                    if not self._running:
+                        return
+                chunk = client.recv(4096)
+                if not chunk:
+                    return
+                with self._cond:
+                    self.stats['bytes_received'] += len(chunk)
+                text = chunk.decode('latin-1')
+                sends_formats = sends_formats or '^XA' in text.upper()
+                pending = self._consume(client, pending + text)
+        except OSError:
+            return
+        finally:
+            with self._cond:
+                self._partial = False
+                if client in self._clients:
+                    self._clients.remove(client)
+            client.close()
+
+    def _consume(self, client: socket.socket, data: str) -> str:
+        """Processa comandos e formatos completos; retorna o que sobrou (formato incompleto)"""
+        while data:
+            upper = data.upper()
+            start = upper.find('^XA')
+            tilde = upper.find('~')
+            if tilde != -1 and (start == -1 or tilde < start):
+                # Comando de controle fora de formato
+                if len(data) < tilde + 3:
+                    return data[tilde:]
+                self._control(client, upper[tilde + 1:tilde + 3])
+                data = data[tilde + 3:]
+                continue
+            if start == -1:
+                return ''
+            end = upper.find('^XZ', start)
+            if end == -1:
+                with self._cond:
+                    self._partial = True
+                return data[start:]
+            self._enqueue(data[start:end + 3])
+            data = data[end + 3:]
+        with self._cond:
+            self._partial = False
+        return ''
+
+    def _control(self, client: socket.socket, command: str):
+        if command == 'HS':
+            with self._cond:
+                self.stats['status_queries'] += 1
+            client.sendall(self._host_status())
+        elif command == 'JA':
+            # Cancela todos os formatos no buffer
+            with self._cond:
+                self.stats['cancelled'] += len(self._queue)
+                self._queue.clear()
+                self._buffered = 0
+                self._cond.notify_all()
+        elif command == 'PS':
+            self.set_state(paused=False)
+        elif command == 'PP':
+            self.set_state(paused=True)
+
+    def _host_status(self) -> bytes:
+        status = self.get_status()
+        first = (f"030,{int(status['paper_out'])},{int(status['paused'])},{self.label_length_dots:04d},"
+                 f"{min(status['formats_in_buffer'], 999):03d},{int(status['buffer_full'])},0,"
+                 f"{int(status['partial_format'])},000,0,0,0")
+        second = (f"001,0,{int(status['head_open'])},0,0,2,6,0,{min(status['labels_remaining'], 99999999):08d},"
+                  f"1,{len(self.stored_formats):03d}")
+        third = "1234,0"
+        return b''.join(b'\x02' + line.encode('ascii') + b'\x03\r\n' for line in (first, second, third))
+
+    # ----- Impressão -----
+
+    def _enqueue(self, zpl: str):
+        name = _DF_RE.search(zpl)
+        with self._cond:
+            self.stats['formats'] += 1
+            if name:
+                # Formato gravado na memória da impressora: não imprime
+                self.stored_formats[name.group(1).strip()] = zpl
+                return
+            quantity = _PQ_RE.search(zpl)
+            copies = max(1, int(quantity.group(1))) if quantity else 1
+            self._queue.append([zpl, copies])
+            self._buffered += len(zpl)
+            self._cond.notify_all()
+
+    def _label_seconds(self, zpl: str) -> float:
+        length = _LL_RE.search(zpl)
+        recalled = _XF_RE.search(zpl)
+        if not length and recalled:
+            length = _LL_RE.search(self.stored_formats.get(recalled.group(1).strip(), ''))
+        dots = int(length.group(1)) if length else self.label_length_dots
+        return dots / self.dpi / self.ips if self.ips > 0 else 0.0
+
+    def _print_loop(self):
+        while True:
+            with self._cond:
+                while self._running and (not self._queue or self.paper_out or self.head_open or self.paused):
+                    self._cond.wait()
+                if not self._running:
+                    return
+                zpl = self._queue[0][0]
+            time.sleep(self._label_seconds(zpl))
+
+            with self._cond:
+                if not self._queue or self._queue[0][0] is not zpl:
+                    continue  # cancelado (~JA) durante a impressão
+                if self.paper_out or self.head_open:
+                    continue  # etiqueta não saiu; volta a imprimir quando o estado normalizar
+                self._queue[0][1] -= 1
+                self.stats['labels_printed'] += 1
+                self.labels.append(zpl)
+                if self._queue[0][1] <= 0:
+                    self._queue.popleft()
+                    self._buffered -= len(zpl)
+                if self.paper_labels is not None:
+                    self.paper_labels -= 1
+                    if self.paper_labels <= 0:
+                        self.paper_out = True
+                        log_warning(f"Emulador Zebra {self.port}: sem papel")
+                self._cond.notify_all()
+
+
+def main(argv=None):
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Emulador de impressora Zebra (RAW 9100)")
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=9100)
+    parser.add_argument('--ips', type=float, default=6.0, help="Velocidade em polegadas por segundo")
+    parser.add_argument('--dpi', type=int, default=203)
+    parser.add_argument('--buffer', type=int, default=64 * 1024, help="Buffer de recepção em bytes")
+    parser.add_argument('--paper', type=int, default=None, help="Etiquetas no rolo (padrão: infinito)")
+    args = parser.parse_args(argv)
+
+    emulator = ZebraEmulator(args.host, args.port, ips=args.ips, dpi=args.dpi, buffer_size=args.buffer,
+                             paper_labels=args.paper)
+    print(f"🖨️ Emulador Zebra em {args.host}:{emulator.port} - Ctrl+C para encerrar")
+    try:
+        while True:
+            time.sleep(5)
+            status = emulator.get_status()
+            print(f"  {status['labels_printed']} etiqueta(s) impressa(s), {status['formats_in_buffer']} formato(s) "
+                  f"no buffer{' | SEM PAPEL' if status['paper_out'] else ''}")
+    except KeyboardInterrupt:
+        emulator.close()
+
+
+if __name__ == "__main__":
+    main()
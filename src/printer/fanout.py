@@ -0,0 +1,327 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Distribuição de um lote de etiquetas entre várias impressoras
+Cada impressora tem uma thread e uma fila curta; a próxima etiqueta vai para
+a impressora com menos etiquetas pendentes, então impressoras mais rápidas
+recebem mais trabalho. Etiqueta que falha é reenviada a outra impressora e
+o manifesto registra quem imprimiu cada endereço
+"""
+
+import json
+import os
+import threading
+import time
+import uuid
+from collections import deque
+from datetime import datetime
+from typing import Any, Callable, Dict, Iterable, List, Optional
+
+from utils.logger import log_info, log_warning
+
+# Estados de uma etiqueta no manifesto
+PRINTED = 'printed'
+FAILED = 'failed'
+CANCELLED = 'cancelled'
+
+
+class PrintUnit:
+    """Uma etiqueta do lote: ZPL e endereços que ela contém"""
+
+    __slots__ = ('seq', 'zpl', 'addresses', 'description', 'printer', 'status',
+                 'attempts', 'failed_on', 'last_error')
+
+    def __init__(self, seq: int, zpl: str, addresses: List[str], description: str = ''):
+        self.seq = seq
+        self.zpl = zpl
+        self.addresses = addresses
+        self.description = description
+        self.printer: Optional[str] = None
+        self.status: Optional[str] = None
+        self.attempts = 0
+        self.failed_on: set = set()
+        self.last_error: Optional[str] = None
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Registro da etiqueta no manifesto"""
+        return {
+            'seq': self.seq,
+            'description': self.description,
+            'addresses': self.addresses,
+            'printer': self.printer,
+            'status': self.status,
+            'attempts': self.attempts,
+            'error': self.last_error
+        }
+
+
+class _Lane:
+    """Fila e contadores de uma impressora"""
+
+    def __init__(self, name: str, send: Callable[[str], bool]):
+        self.name = name
+        self.send = send
+        self.queue: deque = deque()
+        self.in_flight = 0
+        self.assigned = 0
+        self.labels = 0
+        self.errors = 0
+        self.bytes_sent = 0
+        self.busy_time = 0.0
+        self.consecutive_failures = 0
+        self.down = False
+        self.addresses: List[str] = []
+
+    @property
+    def depth(self) -> int:
+        return len(self.queue) + self.in_flight
+
+    def rate(self) -> float:
+        """Etiquetas por segundo de envio (0 antes da primeira etiqueta)"""
+        return self.labels / self.busy_time if self.busy_time else 0.0
+
+
+class FanOutPrinter:
+    """Envia um lote de etiquetas em paralelo para um conjunto de impressoras"""
+
+    def __init__(self, senders: Dict[str, Callable[[str], bool]], queue_depth: int = 2,
+                 max_failures: int = 3, manifest_dir: Optional[str] = None):
+        """
+        Inicializa a distribuição
+
+        Args:
+            senders: Dict nome da impressora -> send(zpl) que retorna True se imprimiu
+            queue_depth: Etiquetas pendentes por impressora (incluindo a em envio)
+            max_failures: Falhas seguidas até tirar a impressora do lote
+            manifest_dir: Diretório do manifesto JSON (None = não gravar)
+        """
+        if not senders:
+            raise ValueError("Nenhuma impressora selecionada para distribuição")
+        self.lanes = [_Lane(name, send) for name, send in senders.items()]
+        self.queue_depth = max(1, queue_depth)
+        self.max_failures = max(1, max_failures)
+        self.manifest_dir = manifest_dir
+        self._cond = threading.Condition()
+        self._retry: deque = deque()
+        self._finished = 0
+        self._stopping = False
+        self._on_progress: Optional[Callable[[int, int], None]] = None
+        self._total = 0
+
+    def run(self, units: Iterable[PrintUnit], on_progress: Optional[Callable[[int, int], None]] = None,
+            should_cancel: Optional[Callable[[], bool]] = None, description: str = '') -> Dict[str, Any]:
+        """
+        Imprime o lote e aguarda o fim
+
+        Args:
+            units: Etiquetas do lote
+            on_progress: Callback(concluídas, total), chamado pelas threads das impressoras
+            should_cancel: Função consultada entre etiquetas; True interrompe a distribuição
+            description: Descrição do lote no manifesto
+
+        Returns:
+            Manifesto (dict) com totais, estatísticas por impressora e cada etiqueta;
+            'manifest_path' indica o arquivo gravado
+        """
+        units = list(units)
+        total = len(units)
+        pending = deque(units)
+        self._on_progress = on_progress
+        self._total = total
+        started_at = datetime.now()
+        start = time.perf_counter()
+
+        threads = [threading.Thread(target=self._worker_loop, args=(lane,),
+                                    name=f'fanout-{lane.name}', daemon=True) for lane in self.lanes]
+        for thread in threads:
+            thread.start()
+
+        cancelled = False
+        try:
+            with self._cond:
+                while self._finished < total:
+                    if should_cancel and should_cancel():
+                        cancelled = True
+                        break
+                    live = [lane for lane in self.lanes if not lane.down]
+                    if not live:
+                        break
+
+                    unit = self._retry[0] if self._retry else (pending[0] if pending else None)
+                    if unit is None:
+                        self._cond.wait(0.1)
+                        continue
+
+                    candidates = [lane for lane in live if lane.name not in unit.failed_on]
+                    if not candidates:
+                        # Todas as impressoras disponíveis já falharam com esta etiqueta
+                        self._take(unit, pending)
+                        unit.status = FAILED
+                        self._finished += 1
+                        continue
+
+                    free = [lane for lane in candidates if lane.depth < self.queue_depth]
+                    if not free:
+                        self._cond.wait(0.1)
+                        continue
+
+                    lane = min(free, key=lambda l: (l.depth, -l.rate(), l.assigned))
+                    self._take(unit, pending)
+                    lane.queue.append(unit)
+                    lane.assigned += 1
+                    self._cond.notify_all()
+        finally:
+            with self._cond:
+                self._stopping = True
+                for lane in self.lanes:
+                    pending.extend(lane.queue)
+                    lane.queue.clear()
+                self._cond.notify_all()
+            for thread in threads:
+                thread.join()
+            # Etiquetas aguardando reenvio (inclusive falhas das que estavam em envio)
+            pending.extend(self._retry)
+            self._retry.clear()
+
+        for unit in pending:
+            if unit.status is None:
+                unit.status = CANCELLED if cancelled else FAILED
+
+        manifest = self._manifest(units, description, started_at, time.perf_counter() - start, cancelled)
+        if self.manifest_dir:
+            manifest['manifest_path'] = write_manifest(manifest, self.manifest_dir)
+        return manifest
+
+    def _take(self, unit: PrintUnit, pending: deque):
+        if self._retry and self._retry[0] is unit:
+            self._retry.popleft()
+        else:
+            pending.popleft()
+
+    def _worker_loop(self, lane: _Lane):
+        while True:
+            with self._cond:
+                while not lane.queue and not self._stopping and not lane.down:
+                    self._cond.wait()
+                if not lane.queue or lane.down:
+                    return
+                unit = lane.queue.popleft()
+                lane.in_flight = 1
+
+            started = time.perf_counter()
+            try:
+                error = None if lane.send(unit.zpl) else "impressora não confirmou o envio"
+            except Exception as e:
+                error = str(e)
+            elapsed = time.perf_counter() - started
+
+            with self._cond:
+                lane.in_flight = 0
+                lane.busy_time += elapsed
+                unit.attempts += 1
+                if error is None:
+                    lane.labels += 1
+                    lane.bytes_sent += len(unit.zpl.encode('utf-8'))
+                    lane.addresses.extend(unit.addresses)
+                    lane.consecutive_failures = 0
+                    unit.printer = lane.name
+                    unit.status = PRINTED
+                    self._finished += 1
+                    done = self._finished
+                else:
+                    lane.errors += 1
+                    lane.consecutive_failures += 1
+                    unit.failed_on.add(lane.name)
+                    unit.last_error = error
+                    self._retry.append(unit)
+                    if lane.consecutive_failures >= self.max_failures:
+                        lane.down = True
+                        self._retry.extend(lane.queue)
+                        lane.queue.clear()
+                        log_warning(f"Distribuição: {lane.name} retirada do lote após "
+                                    f"{lane.consecutive_failures} falha(s) seguidas ({error})")
+                    done = None
+                self._cond.notify_all()
+
+            if done is not None and self._on_progress:
+                self._on_progress(done, self._total)
+
+    def _manifest(self, units: List[PrintUnit], description: str, started_at: datetime,
+                  elapsed: float, cancelled: bool) -> Dict[str, Any]:
+        printers = {}
+        for lane in self.lanes:
+            printers[lane.name] = {
+                'labels': lane.labels,
+                'errors': lane.errors,
+                'bytes_sent': lane.bytes_sent,
+                'busy_seconds': round(lane.busy_time, 3),
+                'labels_per_minute': round(lane.labels / elapsed * 60, 1) if elapsed else 0.0,
+                'removed': lane.down,
+                'addresses': lane.addresses
+            }
+        printed = sum(1 for unit in units if unit.status == PRINTED)
+        failed = sum(1 for unit in units if unit.status == FAILED)
+
+        log_info(f"Distribuição concluída: {printed}/{len(units)} etiqueta(s) em {elapsed:.1f}s - " +
+                 ", ".join(f"{name}: {stats['labels']} ({stats['labels_per_minute']}/min)"
+                           for name, stats in printers.items()))
+        return {
+            'description': description,
+            'started_at': started_at.isoformat(timespec='seconds'),
+            'elapsed_seconds': round(elapsed, 3),
+            'total': len(units),
+            'printed': printed,
+            'failed': failed,
+            'cancelled': cancelled,
+            'printers': printers,
+            'units': [unit.to_dict() for unit in units]
+        }
+
+
+def write_manifest(manifest: Dict[str, Any], directory: str) -> Optional[str]:
+    """
+    Grava o manifesto de distribuição em JSON
+
+    Args:
+        manifest: Manifesto retornado por FanOutPrinter.run
+        directory: Diretório dos manifestos
+
+    Returns:
+        Caminho do arquivo ou None se não foi possível gravar
+    """
+    try:
+        os.makedirs(directory, exist_ok=True)
+        file_name = f"fanout_{datetime.now().strftime('%Y%m%d_%H%M%S')}_{uuid.uuid4().hex[:6]}.json"
+        path = os.path.join(directory, file_name)
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(manifest, f, indent=2, ensure_ascii=False)
+        log_info(f"Manifesto de distribuição gravado em {path}")
+        return path
+    except OSError as e:
+        log_warning(f"Não foi possível gravar o manifesto de distribuição: {e}")
+        return None
+
+
+def create_fanout_printer(senders: Dict[str, Callable[[str], bool]]) -> FanOutPrinter:
+    """
+    Cria a distribuição com a seção 'fanout' do settings.json
+
+    Args:
+        senders: Dict nome da impressora -> send(zpl)
+
+    Returns:
+        FanOutPrinter configurado
+    """
+    from utils.config import load_config
+
+    fanout_config = load_config().get('fanout', {})
+    project_root = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    manifest_dir = fanout_config.get('manifest_dir', 'spool/manifests')
+    if manifest_dir and not os.path.isabs(manifest_dir):
+        manifest_dir = os.path.join(project_root, manifest_dir)
+
+    return FanOutPrinter(senders,
+                         queue_depth=int(fanout_config.get('queue_depth', 2)),
+                         max_failures=int(fanout_config.get('max_failures', 3)),
+                         manifest_dir=manifest_dir or None)
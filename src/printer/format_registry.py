@@ -0,0 +1,154 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Registro local dos formatos ZPL gravados em cada impressora (^DF)
+Guarda qual versão de cada layout está na memória de cada impressora para
+que os jobs enviem só a chamada (^XF); versão diferente força o reenvio do
+formato. Formatos em memória volátil (R:) só valem na sessão que os gravou
+"""
+
+import json
+import os
+import threading
+import time
+from typing import Any, Dict, Optional, Set, Tuple
+
+from utils.logger import log_info, log_warning
+
+# Memórias apagadas quando a impressora desliga
+VOLATILE_DEVICES = ('R:',)
+
+
+class StoredFormatRegistry:
+    """Versões dos formatos armazenados por impressora, persistidas em JSON"""
+
+    def __init__(self, path: Optional[str] = None):
+        """
+        Inicializa o registro
+
+        Args:
+            path: Arquivo JSON do registro (None = apenas em memória)
+        """
+        self.path = path
+        self._lock = threading.Lock()
+        self._entries: Dict[str, Dict[str, Dict[str, Any]]] = self._load()
+        # Formatos gravados por esta sessão (os de R: só valem aqui)
+        self._session: Set[Tuple[str, str]] = set()
+
+    def is_current(self, printer_key: str, name: str, version: str) -> bool:
+        """
+        Verifica se a impressora já tem a versão do formato
+
+        Args:
+            printer_key: Identificação da impressora física (ex: '192.168.0.10:9100')
+            name: Nome do layout
+            version: Versão esperada (StoredZplFormat.version)
+
+        Returns:
+            True se o formato gravado pode ser chamado com ^XF
+        """
+        with self._lock:
+            entry = self._entries.get(printer_key, {}).get(name)
+            recorded_now = (printer_key, name) in self._session
+        if not entry or entry.get('version') != version:
+            return False
+        if str(entry.get('path', '')).upper().startswith(VOLATILE_DEVICES) and not recorded_now:
+            # A impressora pode ter sido desligada desde a gravação
+            return False
+        return True
+
+    def record(self, printer_key: str, name: str, version: str, path: str):
+        """Registra que a impressora recebeu a versão do formato"""
+        with self._lock:
+            self._entries.setdefault(printer_key, {})[name] = {
+                'version': version,
+                'path': path,
+                'stored_at': time.time()
+            }
+            self._session.add((printer_key, name))
+            self._save_locked()
+        log_info(f"Formato {name} ({version}) gravado em {printer_key} como {path}")
+
+    def forget(self, printer_key: str, name: Optional[str] = None):
+        """
+        Descarta o registro (o formato será reenviado no próximo job)
+
+        Args:
+            printer_key: Identificação da impressora física
+            name: Layout específico (None = todos da impressora)
+        """
+        with self._lock:
+            formats = self._entries.get(printer_key)
+            if not formats:
+                return
+            if name is None:
+                del self._entries[printer_key]
+                self._session = {item for item in self._session if item[0] != printer_key}
+            elif formats.pop(name, None) is None:
+                return
+            else:
+                self._session.discard((printer_key, name))
+            self._save_locked()
+
+    def get_status(self) -> Dict[str, Dict[str, Dict[str, Any]]]:
+        """Cópia do registro: impressora -> layout -> versão/objeto/data"""
+        with self._lock:
+            return {key: {name: dict(entry) for name, entry in formats.items()}
+                    for key, formats in self._entries.items()}
+
+    def _load(self) -> Dict[str, Dict[str, Dict[str, Any]]]:
+        if not self.path or not os.path.exists(self.path):
+            return {}
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+            return data if isinstance(data, dict) else {}
+        except (OSError, ValueError) as e:
+            log_warning(f"Registro de formatos ilegível ({e}), todos os formatos serão reenviados")
+            return {}
+
+    def _save_locked(self):
+        if not self.path:
+            return
+        try:
+            os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+            temp_path = self.path + '.tmp'
+            with open(temp_path, 'w', encoding='utf-8') as f:
+                json.dump(self._entries, f, indent=2, ensure_ascii=False)
+            os.replace(temp_path, self.path)
+        except OSError as e:
+            log_warning(f"Não foi possível gravar o registro de formatos: {e}")
+
+
+_registry: Optional[StoredFormatRegistry] = None
+_registry_lock = threading.Lock()
+
+
+def get_format_registry() -> StoredFormatRegistry:
+    """
+    Retorna o registro de formatos do processo
+
+    Returns:
+        StoredFormatRegistry configurado pela seção 'stored_formats' do settings.json
+    """
+    global _registry
+    with _registry_lock:
+        if _registry is None:
+            from utils.config import load_config
+
+            formats_config = load_config().get('stored_formats', {})
+            project_root = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+            registry_file = formats_config.get('registry_file', 'spool/stored_formats.json')
+            if not os.path.isabs(registry_file):
+                registry_file = os.path.join(project_root, registry_file)
+
+            _registry = StoredFormatRegistry(registry_file)
+        return _registry
+
+
+def stored_formats_enabled() -> bool:
+    """True se a seção 'stored_formats' do settings.json habilita os formatos armazenados"""
+    from utils.config import load_config
+
+    return bool(load_config().get('stored_formats', {}).get('enabled', False))
@@ -0,0 +1,75 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Consulta de status (~HS) de impressoras Zebra pela porta RAW
+A resposta tem três linhas delimitadas por STX/ETX com as flags de papel,
+pausa, cabeça aberta, buffer cheio e etiquetas restantes do lote
+"""
+
+import socket
+from typing import Any, Dict
+
+STX = b'\x02'
+ETX = b'\x03'
+
+
+def parse_host_status(raw: bytes) -> Dict[str, Any]:
+    """
+    Interpreta a resposta do ~HS
+
+    Args:
+        raw: Bytes recebidos (três strings STX...ETX)
+
+    Returns:
+        Dict com paper_out, paused, label_length_dots, formats_in_buffer, buffer_full,
+        partial_format, head_open, ribbon_out, labels_remaining e ready
+
+    Raises:
+        ValueError: Resposta incompleta ou fora do formato
+    """
+    strings = []
+    for part in raw.split(STX)[1:]:
+        if ETX in part:
+            strings.append(part.split(ETX)[0].decode('ascii', errors='replace').split(','))
+    if len(strings) < 2 or len(strings[0]) < 8 or len(strings[1]) < 9:
+        raise ValueError(f"Resposta ~HS inválida: {raw!r}")
+
+    first, second = strings[0], strings[1]
+    status = {
+        'paper_out': first[1] == '1',
+        'paused': first[2] == '1',
+        'label_length_dots': int(first[3]),
+        'formats_in_buffer': int(first[4]),
+        'buffer_full': first[5] == '1',
+        'partial_format': first[7] == '1',
+        'head_open': second[2] == '1',
+        'ribbon_out': second[3] == '1',
+        'labels_remaining': int(second[8]),
+    }
+    status['ready'] = not (status['paper_out'] or status['paused'] or status['head_open']
+                           or status['ribbon_out'])
+    return status
+
+
+def query_host_status(host: str, port: int = 9100, timeout: float = 3.0) -> Dict[str, Any]:
+    """
+    Envia ~HS à impressora e interpreta a resposta
+
+    Args:
+        host: IP da impressora
+        port: Porta RAW
+        timeout: Limite de conexão e leitura (segundos)
+
+    Returns:
+        Status (ver parse_host_status)
+    """
+    with socket.create_connection((host, port), timeout=timeout) as sock:
+        sock.sendall(b'~HS')
+        raw = b''
+        while raw.count(ETX) < 3:
+            chunk = sock.recv(1024)
+            if not chunk:
+                break
+            raw += chunk
+    return parse_host_status(raw)
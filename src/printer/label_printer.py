@@ -6,14 +6,37 @@ Módulo para impressão de etiquetas em diferentes modos
 Integrado com sistema de configuração de impressoras Zebra GK420t
 """
 
+import itertools
 import socket
 import os
-import tempfile
-import subprocess
+import time
 from datetime import datetime
-from typing import Optional
-from utils.logger import log_info, log_error, log_warning
+from typing import Iterable, Iterator, Optional, Union
+from utils.logger import log_info, log_error, log_warning, log_debug
+from utils.metrics import timer
 from utils.printer_config import printer_config
+from printer.connection_pool import get_connection_pool, PartialSendError
+from printer.raw_backends import select_backend
+from printer.zpl_template import StoredZplFormat
+
+ZplData = Union[str, bytes, Iterable[Union[str, bytes]]]
+
+
+def iter_zpl_bytes(data: ZplData) -> Iterator[bytes]:
+    """
+    Normaliza os dados de um job para blocos de bytes
+    
+    Aceita uma string/bytes única ou um iterável de blocos (ex: o gerador
+    ZplGenerator.iter_batch_zpl), que é consumido sob demanda.
+    """
+    if isinstance(data, str):
+        yield data.encode('utf-8')
+    elif isinstance(data, (bytes, bytearray)):
+        yield bytes(data)
+    else:
+        for chunk in data:
+            yield chunk.encode('utf-8') if isinstance(chunk, str) else chunk
+
 
 class LabelPrinter:
     """Classe para impressão de etiquetas ZPL com suporte a impressoras configuradas"""
@@ -27,6 +50,7 @@ class LabelPrinter:
             config: Configurações de impressão (opcional, sobrescreve configurações salvas)
         """
         self.printer_id = printer_id
+        self.last_job_latency: Optional[float] = None  # Latência do último job RAW (segundos)
         
         # Inicializar config primeiro para compatibilidade
         self.config = {}
@@ -104,6 +128,7 @@ class LabelPrinter:
             'printer_host': host,
             'printer_port': port,
             'windows_printer_share': connection.get('device_name'),
+            'raw_backend': connection.get('backend', 'auto'),
             'output_dir': './out',
             'timeout': timeout
         }
@@ -158,26 +183,46 @@ class LabelPrinter:
         
         return printer_config.test_connection(self.printer_id or 'fallback')
     
-    def send_to_socket_printer(self, host: str, port: int, data: str) -> bool:
+    def send_to_socket_printer(self, host: str, port: int, data: ZplData) -> bool:
         """
         Envia ZPL para impressora via socket TCP
         
         Args:
             host: IP da impressora
             port: Porta da impressora (normalmente 9100)
-            data: Dados ZPL para imprimir
+            data: Dados ZPL para imprimir (str ou iterável de blocos)
             
         Returns:
             True se enviado com sucesso
         """
+        timeout = self.legacy_config.get('timeout', 10)
         try:
+            pool = get_connection_pool()
+            if pool.keep_alive:
+                # Reaproveita o socket aberto da impressora (reconecta se necessário)
+                pool.send_stream(host, port, iter_zpl_bytes(data), timeout)
+                log_info(f"ZPL enviado para impressora {host}:{port}")
+                return True
+            
             with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as sock:
-                sock.settimeout(self.legacy_config.get('timeout', 10))
+                sock.settimeout(timeout)
                 sock.connect((host, port))
-                sock.sendall(data.encode('utf-8'))
+                sent = 0
+                for chunk in iter_zpl_bytes(data):
+                    try:
+                        sock.sendall(chunk)
+                    except OSError as e:
+                        if sent:
+                            raise PartialSendError(f"conexão com {host}:{port} perdida no meio do envio: {e}") from e
+                        raise
+                    sent += 1
                 log_info(f"ZPL enviado para impressora {host}:{port}")
                 return True
                 
+        except PartialSendError as e:
+            # Parte das etiquetas já está na impressora: quem chamou decide se reenvia
+            log_error(str(e))
+            raise
         except socket.timeout:
             log_error(f"Timeout ao conectar na impressora {host}:{port}")
             raise RuntimeError(f"Timeout ao conectar na impressora {host}:{port}")
@@ -188,37 +233,23 @@ class LabelPrinter:
             log_error(f"Erro ao enviar para impressora {host}:{port}: {str(e)}")
             raise RuntimeError(f"Erro ao enviar para impressora: {str(e)}")
     
-    def send_to_windows_printer(self, printer_share: str, data: str) -> bool:
+    def send_to_windows_printer(self, printer_share: str, data: ZplData) -> bool:
         """
-        Envia ZPL para impressora Windows compartilhada
+        Envia ZPL para impressora local (USB/fila do sistema) por um backend RAW
+        
+        O backend vem de 'raw_backend' na configuração (padrão 'auto': API de
+        spool do Windows, fila CUPS ou /dev/usb/lp*, conforme o sistema).
         
         Args:
-            printer_share: Caminho da impressora compartilhada (ex: \\\\localhost\\Zebra)
-            data: Dados ZPL para imprimir
+            printer_share: Impressora/fila do sistema (ex: \\\\localhost\\Zebra) ou dispositivo
+            data: Dados ZPL para imprimir (str ou iterável de blocos)
             
         Returns:
             True se enviado com sucesso
         """
         try:
-            # Criar arquivo temporário
-            with tempfile.NamedTemporaryFile(mode='w', suffix='.zpl', delete=False) as tmp_file:
-                tmp_file.write(data)
-                tmp_path = tmp_file.name
-            
-            # Usar comando copy /b para enviar para fila de impressão
-            cmd = ['cmd', '/c', 'copy', '/b', f'"{tmp_path}"', f'"{printer_share}"']
-            result = subprocess.run(cmd, capture_output=True, text=True, shell=True)
-            
-            # Limpar arquivo temporário
-            try:
-                os.unlink(tmp_path)
-            except:
-                pass
-            
-            if result.returncode != 0:
-                log_error(f"Erro ao enviar para impressora Windows: {result.stderr}")
-                raise RuntimeError(f"Erro ao enviar para impressora Windows (exit {result.returncode})")
-            
+            backend = select_backend(printer_share, self.legacy_config.get('raw_backend', 'auto'))
+            self.last_job_latency = backend.send(printer_share, iter_zpl_bytes(data))
             log_info(f"ZPL enviado para impressora Windows: {printer_share}")
             return True
             
@@ -226,14 +257,14 @@ class LabelPrinter:
             log_error(f"Erro ao enviar para impressora Windows: {str(e)}")
             raise RuntimeError(f"Erro ao enviar para impressora Windows: {str(e)}")
     
-    def save_to_file(self, output_dir: str, filename: str, data: str) -> str:
+    def save_to_file(self, output_dir: str, filename: str, data: ZplData) -> str:
         """
         Salva ZPL em arquivo
         
         Args:
             output_dir: Diretório de saída
             filename: Nome do arquivo
-            data: Dados ZPL
+            data: Dados ZPL (str ou iterável de blocos)
             
         Returns:
             Caminho completo do arquivo salvo
@@ -245,8 +276,9 @@ class LabelPrinter:
             filename = f"label_{datetime.now().strftime('%Y%m%d_%H%M%S')}.zpl"
             file_path = os.path.join(output_path, filename)
             
-            with open(file_path, 'w', encoding='utf-8') as f:
-                f.write(data)
+            with open(file_path, 'wb') as f:
+                for chunk in iter_zpl_bytes(data):
+                    f.write(chunk)
             
             log_info(f"ZPL salvo em {file_path}")
             return True
@@ -255,72 +287,208 @@ class LabelPrinter:
             log_error(f"Erro ao salvar arquivo: {str(e)}")
             raise RuntimeError(f"Erro ao salvar arquivo: {str(e)}")
     
-    def send_print_job(self, zpl_data: str, quantity: int = 1) -> bool:
+    def send_print_job(self, zpl_data: ZplData, quantity: int = 1) -> bool:
         """
         Envia job de impressão de acordo com a configuração
         
         Args:
-            zpl_data: Dados ZPL para imprimir
+            zpl_data: Dados ZPL para imprimir (str ou iterável de blocos, enviado em streaming)
             quantity: Quantidade de etiquetas
             
         Returns:
             True se enviado com sucesso
         """
         mode = self.legacy_config.get('output_mode', 'printer')
+        printer_name = self.printer_config.get('name', 'Desconhecida')
+        start = time.perf_counter()
         
         try:
-            log_info(f"Enviando job de impressão: {quantity} etiqueta(s) via {mode}")
-            log_info(f"Impressora: {self.printer_config.get('name', 'Desconhecida')}")
+            log_debug(f"Enviando job de impressão: {quantity} etiqueta(s) via {mode}")
             
-            # Modo "configured" usa as configurações da impressora selecionada
-            if mode == 'configured':
-                printer_id = self.legacy_config.get('printer_id')
-                if printer_id:
-                    # Recarregar configuração da impressora
-                    self.set_printer(printer_id)
+            with timer('print_job', printer=self._metric_printer(), mode=mode, kind='zpl'):
+                result = self._send_to_target(self._resolve_target(), zpl_data, quantity)
+            log_info(f"Job de impressão enviado: {quantity} etiqueta(s) em {printer_name}",
+                     printer_id=self.legacy_config.get('printer_id'), mode=mode, labels=quantity,
+                     duration_ms=round((time.perf_counter() - start) * 1000, 1))
+            return result
                 
-                # Detectar tipo de conexão
-                connection = self.printer_config.get('connection', {})
-                conn_mode = connection.get('mode', 'usb')
-                
-                if conn_mode == 'network':
-                    host = connection.get('ip_address', '127.0.0.1')
-                    port = connection.get('port', 9100)
-                    log_info(f"Usando impressora de rede: {host}:{port}")
-                    return self.send_to_socket_printer(host, port, zpl_data)
-                    
-                elif conn_mode == 'usb':
-                    device_name = connection.get('device_name', 'ZDesigner GK420t')
-                    log_info(f"Usando impressora USB: {device_name}")
-                    return self.send_to_windows_printer(device_name, zpl_data)
-                else:
-                    raise RuntimeError(f"Modo de conexão não suportado: {conn_mode}")
+        except Exception as e:
+            log_error(f"Erro no job de impressão: {str(e)}", printer_id=self.legacy_config.get('printer_id'),
+                      mode=mode, duration_ms=round((time.perf_counter() - start) * 1000, 1))
+            raise
+    
+    def send_stored_format_job(self, stored_format: StoredZplFormat, recall_zpl: ZplData,
+                               quantity: int = 1) -> bool:
+        """
+        Envia um job usando formato armazenado na impressora (^DF/^XF)
+        
+        O formato só é gravado (^DF) quando o registro não confirma a versão
+        atual na impressora; depois disso os jobs levam só a chamada (^XF).
+        No modo arquivo o formato vai sempre junto, para o arquivo ser completo.
+        
+        Args:
+            stored_format: Formato do layout (ZplGenerator.stored_formats)
+            recall_zpl: Chamada de uma etiqueta (ex: ZplGenerator.build_zpl_recall), repetida
+                        quantity vezes; ou iterável de blocos com todas as chamadas do job
+            quantity: Quantidade de etiquetas
+            
+        Returns:
+            True se enviado com sucesso
+        """
+        from printer.format_registry import get_format_registry
+        
+        mode = self.legacy_config.get('output_mode', 'printer')
+        recalls = recall_zpl * quantity if isinstance(recall_zpl, str) else recall_zpl
+        try:
+            log_info(f"Enviando job com formato armazenado {stored_format.name}: {quantity} etiqueta(s) via {mode}")
+            target = self._resolve_target()
+            registry = get_format_registry()
+            printer_key = self._target_key(target)
+            
+            if printer_key and registry.is_current(printer_key, stored_format.name, stored_format.version):
+                try:
+                    with timer('print_job', printer=self._metric_printer(), mode=mode, kind='recall'):
+                        return self._send_to_target(target, recalls, quantity)
+                except Exception:
+                    # Conexão perdida pode ser a impressora reiniciando: regravar no próximo job
+                    registry.forget(printer_key, stored_format.name)
+                    raise
+            
+            try:
+                data = (stored_format.download + recalls if isinstance(recalls, str)
+                        else itertools.chain([stored_format.download], recalls))
+                with timer('print_job', printer=self._metric_printer(), mode=mode, kind='download'):
+                    self._send_to_target(target, data, quantity)
+            except Exception:
+                if printer_key:
+                    registry.forget(printer_key, stored_format.name)
+                raise
+            if printer_key:
+                registry.record(printer_key, stored_format.name, stored_format.version, stored_format.path)
+            return True
             
-            elif mode == 'printer':
-                host = self.legacy_config.get('printer_host', '127.0.0.1')
-                port = self.legacy_config.get('printer_port', 9100)
-                return self.send_to_socket_printer(host, port, zpl_data)
-                
-            elif mode == 'windows_printer':
-                printer_share = self.legacy_config.get('windows_printer_share')
-                if not printer_share:
-                    raise RuntimeError("windows_printer_share não configurado")
-                return self.send_to_windows_printer(printer_share, zpl_data)
-                
-            elif mode == 'file':
-                output_dir = self.legacy_config.get('output_dir', './out')
-                import datetime
-                filename = f"labels_{datetime.datetime.now().strftime('%Y%m%d_%H%M%S')}_{quantity}.zpl"
-                self.save_to_file(output_dir, filename, zpl_data)
-                return True
-                
-            else:
-                raise RuntimeError(f"Modo de saída inválido: {mode}")
-                
         except Exception as e:
             log_error(f"Erro no job de impressão: {str(e)}")
             raise
     
+    def _metric_printer(self) -> str:
+        """Rótulo da impressora nas métricas"""
+        return self.legacy_config.get('printer_id') or self.printer_config.get('name', 'Desconhecida')
+    
+    def _resolve_target(self) -> tuple:
+        """
+        Resolve o destino do job pela configuração
+        
+        Returns:
+            ('network', host, porta), ('windows', impressora) ou ('file', diretório)
+        """
+        mode = self.legacy_config.get('output_mode', 'printer')
+        
+        # Modo "configured" usa as configurações da impressora selecionada
+        if mode == 'configured':
+            printer_id = self.legacy_config.get('printer_id')
+            if printer_id:
+                # Recarregar configuração da impressora
+                self.set_printer(printer_id)
+            
+            # Detectar tipo de conexão
+            connection = self.printer_config.get('connection', {})
+            conn_mode = connection.get('mode', 'usb')
+            
+            if conn_mode == 'network':
+                host = connection.get('ip_address', '127.0.0.1')
+                port = connection.get('port', 9100)
+                log_info(f"Usando impressora de rede: {host}:{port}")
+                return ('network', host, port)
+                
+            elif conn_mode == 'usb':
+                device_name = connection.get('device_name', 'ZDesigner GK420t')
+                log_info(f"Usando impressora USB: {device_name}")
+                return ('windows', device_name)
+            else:
+                raise RuntimeError(f"Modo de conexão não suportado: {conn_mode}")
+        
+        elif mode == 'printer':
+            host = self.legacy_config.get('printer_host', '127.0.0.1')
+            port = self.legacy_config.get('printer_port', 9100)
+            return ('network', host, port)
+            
+        elif mode == 'windows_printer':
+            printer_share = self.legacy_config.get('windows_printer_share')
+            if not printer_share:
+                raise RuntimeError("windows_printer_share não configurado")
+            return ('windows', printer_share)
+            
+        elif mode == 'file':
+            return ('file', self.legacy_config.get('output_dir', './out'))
+            
+        else:
+            raise RuntimeError(f"Modo de saída inválido: {mode}")
+    
+    def _send_to_target(self, target: tuple, zpl_data: ZplData, quantity: int = 1) -> bool:
+        """Envia os dados para o destino resolvido por _resolve_target"""
+        kind = target[0]
+        if kind == 'network':
+            return self.send_to_socket_printer(target[1], target[2], zpl_data)
+        elif kind == 'windows':
+            return self.send_to_windows_printer(target[1], zpl_data)
+        else:
+            import datetime
+            filename = f"labels_{datetime.datetime.now().strftime('%Y%m%d_%H%M%S')}_{quantity}.zpl"
+            self.save_to_file(target[1], filename, zpl_data)
+            return True
+    
+    @staticmethod
+    def _target_key(target: tuple) -> Optional[str]:
+        """Identificação da impressora física no registro de formatos (None = arquivo)"""
+        if target[0] == 'network':
+            return f"{target[1]}:{target[2]}"
+        if target[0] == 'windows':
+            return f"windows:{target[1]}"
+        return None
+    
+    def enqueue_print_job(self, zpl_data: str, quantity: int = 1, job_id: str = None) -> str:
+        """
+        Enfileira o job no spooler persistente em vez de enviar na hora
+        
+        Args:
+            zpl_data: Dados ZPL para imprimir
+            quantity: Quantidade de etiquetas
+            job_id: Identificador idempotente do job (opcional)
+            
+        Returns:
+            ID do job no spooler
+        """
+        from printer.spooler import get_spooler
+        
+        return get_spooler().submit(zpl_data, printer_id=self._spool_printer_id(),
+                                    config=dict(self.legacy_config),
+                                    quantity=quantity, job_id=job_id)
+    
+    def enqueue_batch(self, start_code: int, quantity: int, job_id: str = None) -> str:
+        """
+        Enfileira um lote sequencial no spooler
+        
+        Só a faixa é gravada no journal; o ZPL é gerado em streaming na entrega.
+        
+        Args:
+            start_code: Código inicial da sequência
+            quantity: Quantidade de etiquetas
+            job_id: Identificador idempotente do job (opcional)
+            
+        Returns:
+            ID do job no spooler
+        """
+        from printer.spooler import get_spooler
+        
+        return get_spooler().submit(printer_id=self._spool_printer_id(),
+                                    config=dict(self.legacy_config),
+                                    quantity=quantity, job_id=job_id,
+                                    sequence={'start': start_code, 'quantity': quantity})
+    
+    def _spool_printer_id(self) -> Optional[str]:
+        return self.legacy_config.get('printer_id') or self.printer_id
+    
     def print_label(self, label_data: dict) -> bool:
         """
         Imprime uma etiqueta (método de compatibilidade)
@@ -0,0 +1,318 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Backends de saída RAW para impressoras locais (USB/fila do sistema)
+Cada backend envia os blocos ZPL direto da memória para o destino e
+registra a latência de cada job
+
+Backends disponíveis:
+- win32: API de spool do Windows (WritePrinter em modo RAW, requer pywin32)
+- copy: cópia de arquivo temporário com 'copy /b' (compatibilidade, Windows)
+- cups: fila CUPS em modo raw ('lp -o raw', dados pela entrada padrão)
+- usblp: dispositivo de impressora USB do Linux (/dev/usb/lp*)
+- tcp: porta RAW via TCP ('host:porta'), usado como substituto em testes
+"""
+
+import os
+import re
+import shutil
+import socket
+import subprocess
+import tempfile
+import threading
+import time
+from typing import Any, Dict, Iterable, Iterator, Optional, Type
+
+from utils.logger import log_info
+
+# Destinos que o 'copy /b' aceita como vieram: portas (LPT1, COM3, PRN) e caminhos com unidade
+_COPY_DEVICE_RE = re.compile(r'^(?:LPT\d+|COM\d+|PRN|USB\d+):?$|^[A-Za-z]:[\\/]', re.IGNORECASE)
+
+
+class RawBackend:
+    """Interface dos backends RAW: subclasses implementam _write"""
+
+    name = 'base'
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.jobs = 0
+        self.failures = 0
+        self.bytes_sent = 0
+        self.total_latency = 0.0
+        self.max_latency = 0.0
+        self.last_latency: Optional[float] = None
+
+    def is_available(self) -> bool:
+        """True se o backend pode ser usado neste sistema"""
+        return True
+
+    def send(self, target: str, chunks: Iterable[bytes], job_name: str = 'WMS ZPL') -> float:
+        """
+        Envia um job RAW
+
+        Args:
+            target: Destino do backend (nome da impressora, fila, dispositivo ou host:porta)
+            chunks: Blocos de bytes do job (consumidos sob demanda)
+            job_name: Nome do documento na fila de impressão
+
+        Returns:
+            Latência do job em segundos
+        """
+        counter = _ByteCounter(chunks)
+        start = time.perf_counter()
+        try:
+            self._write(target, counter, job_name)
+        except Exception:
+            with self._lock:
+                self.failures += 1
+            raise
+        latency = time.perf_counter() - start
+
+        with self._lock:
+            self.jobs += 1
+            self.bytes_sent += counter.total
+            self.total_latency += latency
+            self.max_latency = max(self.max_latency, latency)
+            self.last_latency = latency
+        log_info(f"Job RAW enviado via {self.name} para {target}: {counter.total} bytes em {latency * 1000:.1f} ms")
+        return latency
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Contadores e latências do backend"""
+        with self._lock:
+            return {
+                'backend': self.name,
+                'jobs': self.jobs,
+                'failures': self.failures,
+                'bytes_sent': self.bytes_sent,
+                'last_latency_ms': None if self.last_latency is None else self.last_latency * 1000,
+                'avg_latency_ms': (self.total_latency / self.jobs * 1000) if self.jobs else None,
+                'max_latency_ms': self.max_latency * 1000
+            }
+
+    def _write(self, target: str, chunks: Iterable[bytes], job_name: str):
+        raise NotImplementedError
+
+
+class _ByteCounter:
+    """Iterável que conta os bytes consumidos"""
+
+    def __init__(self, chunks: Iterable[bytes]):
+        self._chunks = chunks
+        self.total = 0
+
+    def __iter__(self) -> Iterator[bytes]:
+        for chunk in self._chunks:
+            self.total += len(chunk)
+            yield chunk
+
+
+class WindowsSpoolBackend(RawBackend):
+    """Fila do Windows via API de spool (StartDocPrinter em modo RAW + WritePrinter)"""
+
+    name = 'win32'
+
+    def is_available(self) -> bool:
+        if os.name != 'nt':
+            return False
+        try:
+            import win32print  # noqa: F401
+            return True
+        except ImportError:
+            return False
+
+    def _write(self, target: str, chunks: Iterable[bytes], job_name: str):
+        import win32print
+
+        handle = win32print.OpenPrinter(target)
+        try:
+            win32print.StartDocPrinter(handle, 1, (job_name, None, 'RAW'))
+            try:
+                win32print.StartPagePrinter(handle)
+                for chunk in chunks:
+                    win32print.WritePrinter(handle, chunk)
+                win32print.EndPagePrinter(handle)
+            finally:
+                win32print.EndDocPrinter(handle)
+        finally:
+            win32print.ClosePrinter(handle)
+
+
+class CopyCommandBackend(RawBackend):
+    """Compatibilidade: grava arquivo temporário e envia com 'copy /b' (Windows sem pywin32)"""
+
+    name = 'copy'
+
+    def is_available(self) -> bool:
+        return os.name == 'nt'
+
+    @staticmethod
+    def share_path(target: str) -> str:
+        """
+        Destino do 'copy /b'
+
+        Caminhos UNC (\\\\servidor\\fila), portas (LPT1, COM3) e arquivos seguem como
+        vieram; o nome de uma impressora local vira o compartilhamento \\\\localhost\\<nome>
+        """
+        if target.startswith(('\\\\', '//')) or _COPY_DEVICE_RE.match(target):
+            return target
+        return f'\\\\localhost\\{target}'
+
+    def _write(self, target: str, chunks: Iterable[bytes], job_name: str):
+        with tempfile.NamedTemporaryFile(mode='wb', suffix='.zpl', delete=False) as tmp_file:
+            for chunk in chunks:
+                tmp_file.write(chunk)
+            tmp_path = tmp_file.name
+
+        try:
+            # Linha de comando pronta para o cmd: aspas protegem nomes com espaço
+            cmd = f'copy /b "{tmp_path}" "{self.share_path(target)}"'
+            result = subprocess.run(cmd, capture_output=True, text=True, shell=True)
+        finally:
+            try:
+                os.unlink(tmp_path)
+            except OSError:
+                pass
+
+        if result.returncode != 0:
+            raise RuntimeError(f"copy /b falhou (exit {result.returncode}): {result.stderr}")
+
+
+class CupsRawBackend(RawBackend):
+    """Fila CUPS em modo raw: os blocos seguem pela entrada padrão do 'lp', sem arquivo temporário"""
+
+    name = 'cups'
+
+    def is_available(self) -> bool:
+        return os.name != 'nt' and shutil.which('lp') is not None
+
+    def _write(self, target: str, chunks: Iterable[bytes], job_name: str):
+        process = subprocess.Popen(['lp', '-d', target, '-o', 'raw', '-t', job_name],
+                                   stdin=subprocess.PIPE, stdout=subprocess.DEVNULL,
+                                   stderr=subprocess.PIPE)
+        try:
+            for chunk in chunks:
+                process.stdin.write(chunk)
+            process.stdin.close()
+            _, stderr = process.communicate(timeout=30)
+        except Exception:
+            process.kill()
+            process.wait()
+            raise
+
+        if process.returncode != 0:
+            message = stderr.decode('utf-8', errors='replace').strip()
+            raise RuntimeError(f"lp falhou (exit {process.returncode}): {message}")
+
+
+class UsbLpBackend(RawBackend):
+    """Dispositivo de impressora USB do Linux (ex: /dev/usb/lp0)"""
+
+    name = 'usblp'
+
+    def is_available(self) -> bool:
+        return os.name != 'nt'
+
+    def _write(self, target: str, chunks: Iterable[bytes], job_name: str):
+        with open(target, 'wb', buffering=0) as device:
+            for chunk in chunks:
+                device.write(chunk)
+
+
+class TcpRawBackend(RawBackend):
+    """Porta RAW via TCP ('host:porta'); substitui a impressora local em testes"""
+
+    name = 'tcp'
+
+    def __init__(self, timeout: float = 10):
+        super().__init__()
+        self.timeout = timeout
+
+    def _write(self, target: str, chunks: Iterable[bytes], job_name: str):
+        host, _, port = target.rpartition(':')
+        with socket.create_connection((host or '127.0.0.1', int(port or 9100)), timeout=self.timeout) as sock:
+            for chunk in chunks:
+                sock.sendall(chunk)
+
+
+RAW_BACKENDS: Dict[str, Type[RawBackend]] = {
+    WindowsSpoolBackend.name: WindowsSpoolBackend,
+    CopyCommandBackend.name: CopyCommandBackend,
+    CupsRawBackend.name: CupsRawBackend,
+    UsbLpBackend.name: UsbLpBackend,
+    TcpRawBackend.name: TcpRawBackend
+}
+
+_instances: Dict[str, RawBackend] = {}
+_instances_lock = threading.Lock()
+
+
+def register_backend(backend_class: Type[RawBackend]):
+    """Registra um backend adicional (disponível pelo seu 'name')"""
+    with _instances_lock:
+        RAW_BACKENDS[backend_class.name] = backend_class
+        _instances.pop(backend_class.name, None)
+
+
+def get_backend(name: str) -> RawBackend:
+    """
+    Retorna a instância do backend (uma por processo, acumulando as estatísticas)
+
+    Args:
+        name: Nome do backend (win32, copy, cups, usblp, tcp)
+
+    Returns:
+        Instância do backend
+    """
+    with _instances_lock:
+        backend = _instances.get(name)
+        if backend is None:
+            backend_class = RAW_BACKENDS.get(name)
+            if backend_class is None:
+                raise RuntimeError(f"Backend RAW desconhecido: {name}")
+            backend = _instances[name] = backend_class()
+        return backend
+
+
+def select_backend(target: str, preferred: str = 'auto') -> RawBackend:
+    """
+    Escolhe o backend para o destino
+
+    No modo 'auto': dispositivos /dev/* usam usblp; no Windows, a API de
+    spool (win32) se o pywin32 estiver instalado, senão 'copy /b'; nos
+    demais sistemas, a fila CUPS.
+
+    Args:
+        target: Destino configurado (nome da impressora, fila ou dispositivo)
+        preferred: Nome do backend ou 'auto'
+
+    Returns:
+        Backend disponível
+    """
+    if preferred and preferred != 'auto':
+        backend = get_backend(preferred)
+        if not backend.is_available():
+            raise RuntimeError(f"Backend RAW '{preferred}' não disponível neste sistema")
+        return backend
+
+    if target.startswith('/dev/'):
+        candidates = ['usblp']
+    elif os.name == 'nt':
+        candidates = ['win32', 'copy']
+    else:
+        candidates = ['cups']
+
+    for name in candidates:
+        backend = get_backend(name)
+        if backend.is_available():
+            return backend
+    raise RuntimeError(f"Nenhum backend RAW disponível para {target}")
+
+
+def get_backend_stats() -> Dict[str, Dict[str, Any]]:
+    """Estatísticas dos backends já usados no processo"""
+    with _instances_lock:
+        backends = list(_instances.values())
+    return {backend.name: backend.get_stats() for backend in backends}
@@ -0,0 +1,538 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Spooler de impressão persistente
+Jobs são gravados em um journal append-only (com fsync) antes de serem
+entregues, ficam em filas FIFO por impressora e sobrevivem a reinícios
+do aplicativo
+"""
+
+import json
+import os
+import threading
+import time
+import uuid
+from collections import deque
+from datetime import datetime
+from typing import Any, Callable, Dict, List, Optional
+
+from printer.connection_pool import PartialSendError
+from utils.logger import log_info, log_error, log_warning
+
+JOURNAL_FILE = 'journal.log'
+
+# Estados de um job
+QUEUED = 'queued'
+SENDING = 'sending'
+DONE = 'done'
+FAILED = 'failed'
+INTERRUPTED = 'interrupted'
+
+
+class SpoolJournal:
+    """Journal append-only de operações do spooler (uma linha JSON por registro)"""
+
+    def __init__(self, path: str):
+        self.path = path
+        self._lock = threading.Lock()
+        self._file = None
+
+    def open(self):
+        os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+        self._file = open(self.path, 'a', encoding='utf-8')
+
+    def append(self, record: Dict[str, Any]):
+        """Grava o registro e só retorna depois do fsync"""
+        line = json.dumps(record, ensure_ascii=False) + '\n'
+        with self._lock:
+            if self._file is None:
+                # Spooler encerrado com envio em andamento: o job volta como interrompido
+                log_warning(f"Spooler: journal fechado, registro descartado: {record.get('op')}")
+                return
+            self._file.write(line)
+            self._file.flush()
+            os.fsync(self._file.fileno())
+
+    def replay(self) -> List[Dict[str, Any]]:
+        """
+        Lê os registros gravados
+
+        Uma última linha incompleta (queda durante a escrita) é ignorada.
+        """
+        records = []
+        if not os.path.exists(self.path):
+            return records
+        with open(self.path, 'r', encoding='utf-8') as f:
+            for number, line in enumerate(f, 1):
+                if not line.endswith('\n'):
+                    log_warning(f"Spooler: registro incompleto ignorado na linha {number}")
+                    break
+                try:
+                    records.append(json.loads(line))
+                except ValueError:
+                    log_warning(f"Spooler: registro corrompido ignorado na linha {number}")
+        return records
+
+    def rewrite(self, records: List[Dict[str, Any]]):
+        """Substitui o journal de forma atômica (arquivo temporário + rename)"""
+        tmp_path = self.path + '.tmp'
+        with self._lock:
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                for record in records:
+                    f.write(json.dumps(record, ensure_ascii=False) + '\n')
+                f.flush()
+                os.fsync(f.fileno())
+            if self._file:
+                self._file.close()
+            os.replace(tmp_path, self.path)
+            self._file = open(self.path, 'a', encoding='utf-8')
+
+    def close(self):
+        with self._lock:
+            if self._file:
+                self._file.close()
+                self._file = None
+
+
+def _default_sender(job: Dict[str, Any]):
+    """Entrega o job usando LabelPrinter (levanta exceção em caso de falha)"""
+    from printer.label_printer import LabelPrinter
+
+    config = dict(job['config']) if job.get('config') else None
+    printer = LabelPrinter(printer_id=job.get('printer_id'), config=config)
+
+    sequence = job.get('sequence')
+    if sequence:
+        # Lote sequencial: o ZPL é gerado em streaming na entrega, não fica no journal
+        from printer.zpl_generator import ZplGenerator
+
+        data = ZplGenerator().iter_batch_zpl(sequence['start'], sequence['quantity'])
+    else:
+        data = job['zpl']
+    printer.send_print_job(data, job.get('quantity', 1))
+
+
+class PrintSpooler:
+    """Spooler com filas FIFO por impressora e retentativas com backoff"""
+
+    def __init__(self, spool_dir: str = './spool', sender: Optional[Callable] = None,
+                 base_delay: float = 1.0, max_delay: float = 60.0,
+                 max_attempts: int = 0, resend_interrupted: bool = False,
+                 compact_after: int = 500, keep_done: int = 10000):
+        """
+        Inicializa o spooler
+
+        Args:
+            spool_dir: Diretório do journal
+            sender: Função sender(job) que entrega o job ou levanta exceção
+            base_delay: Espera da primeira retentativa (segundos)
+            max_delay: Espera máxima entre retentativas (segundos)
+            max_attempts: Tentativas antes de marcar como falha (0 = sem limite)
+            resend_interrupted: Reenviar jobs interrompidos durante o envio (queda do app ou da conexão no meio do job)
+            compact_after: Jobs finalizados até compactar o journal
+            keep_done: IDs de jobs entregues mantidos para evitar reenvio
+        """
+        self.spool_dir = spool_dir
+        self.sender = sender or _default_sender
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.max_attempts = max_attempts
+        self.resend_interrupted = resend_interrupted
+        self.compact_after = compact_after
+        self.keep_done = keep_done
+
+        self.journal = SpoolJournal(os.path.join(spool_dir, JOURNAL_FILE))
+        self._cond = threading.Condition()
+        self._jobs: Dict[str, Dict[str, Any]] = {}
+        self._queues: Dict[str, deque] = {}
+        self._workers: Dict[str, threading.Thread] = {}
+        self._done_ids: deque = deque()
+        self._done_set = set()
+        self._finished_since_compact = 0
+        self._running = False
+
+    # ----- Ciclo de vida -----
+
+    def start(self):
+        """Recupera os jobs do journal e inicia as filas pendentes"""
+        with self._cond:
+            if self._running:
+                return
+            self._replay(self.journal.replay())
+            self.journal.open()
+            self._compact_locked()
+            self._running = True
+            pending = [key for key, queue in self._queues.items() if queue]
+            for key in pending:
+                self._ensure_worker(key)
+
+        counts = self._count_states()
+        log_info(f"Spooler iniciado em {self.spool_dir}: {counts.get(QUEUED, 0)} na fila, "
+                 f"{counts.get(INTERRUPTED, 0)} interrompido(s), {counts.get(FAILED, 0)} com falha")
+
+    def stop(self, timeout: float = 5.0):
+        """Encerra as threads de entrega (jobs pendentes permanecem no journal)"""
+        with self._cond:
+            self._running = False
+            self._cond.notify_all()
+            workers = list(self._workers.values())
+        for worker in workers:
+            worker.join(timeout)
+        self._workers.clear()
+        self.journal.close()
+
+    # ----- API pública -----
+
+    def submit(self, zpl: Optional[str] = None, printer_id: Optional[str] = None,
+               config: Optional[Dict[str, Any]] = None, quantity: int = 1,
+               job_id: Optional[str] = None,
+               sequence: Optional[Dict[str, int]] = None) -> str:
+        """
+        Enfileira um job de impressão
+
+        O job é gravado no journal antes do retorno; a entrega acontece em
+        segundo plano, na ordem de chegada de cada impressora.
+
+        Args:
+            zpl: Dados ZPL
+            printer_id: ID da impressora configurada
+            config: Configuração legada do LabelPrinter (output_mode, host, ...)
+            quantity: Quantidade de etiquetas no job
+            job_id: Identificador idempotente (reenvios com o mesmo ID são ignorados)
+            sequence: Lote sequencial {'start', 'quantity'} gerado na entrega (no lugar de zpl)
+
+        Returns:
+            ID do job
+        """
+        if zpl is None and not sequence:
+            raise ValueError("Informe zpl ou sequence")
+        job_id = job_id or uuid.uuid4().hex
+        queue_key = self.queue_key(printer_id, config)
+        job = {
+            'job_id': job_id,
+            'queue': queue_key,
+            'printer_id': printer_id,
+            'config': config,
+            'zpl': zpl,
+            'sequence': sequence,
+            'quantity': quantity,
+            'created_at': datetime.now().isoformat(timespec='seconds')
+        }
+
+        with self._cond:
+            if not self._running:
+                raise RuntimeError("Spooler não iniciado")
+            if job_id in self._jobs or job_id in self._done_set:
+                log_warning(f"Spooler: job {job_id} já registrado, ignorando reenvio")
+                return job_id
+
+            self.journal.append(dict(job, op='enqueue'))
+            self._add_job(job)
+            self._ensure_worker(queue_key)
+            self._cond.notify_all()
+
+        log_info(f"Spooler: job {job_id} enfileirado para {queue_key} ({quantity} etiqueta(s))")
+        return job_id
+
+    def get_job(self, job_id: str) -> Optional[Dict[str, Any]]:
+        """Retorna uma cópia do job (sem o ZPL) ou None"""
+        with self._cond:
+            job = self._jobs.get(job_id)
+            if job is None:
+                return {'job_id': job_id, 'state': DONE} if job_id in self._done_set else None
+            return self._public(job)
+
+    def list_jobs(self, state: Optional[str] = None) -> List[Dict[str, Any]]:
+        """Lista os jobs não entregues, opcionalmente filtrando por estado"""
+        with self._cond:
+            return [self._public(job) for job in self._jobs.values()
+                    if state is None or job['state'] == state]
+
+    def get_status(self) -> Dict[str, Dict[str, Any]]:
+        """
+        Retorna a situação de cada fila
+
+        Returns:
+            Dict fila -> {depth, state do primeiro job, attempts, last_error}
+        """
+        with self._cond:
+            status = {}
+            for key, queue in self._queues.items():
+                head = self._jobs.get(queue[0]) if queue else None
+                status[key] = {
+                    'depth': len(queue),
+                    'head_state': head['state'] if head else None,
+                    'attempts': head['attempts'] if head else 0,
+                    'last_error': head['last_error'] if head else None
+                }
+            return status
+
+    def retry_job(self, job_id: str) -> bool:
+        """Recoloca na fila um job com falha ou interrompido"""
+        with self._cond:
+            job = self._jobs.get(job_id)
+            if not job or job['state'] not in (FAILED, INTERRUPTED):
+                return False
+            self.journal.append({'op': 'requeue', 'job_id': job_id})
+            job['state'] = QUEUED
+            job['attempts'] = 0
+            job['next_attempt'] = 0
+            self._queues.setdefault(job['queue'], deque()).append(job_id)
+            self._ensure_worker(job['queue'])
+            self._cond.notify_all()
+        log_info(f"Spooler: job {job_id} recolocado na fila")
+        return True
+
+    def discard_job(self, job_id: str) -> bool:
+        """Remove um job que ainda não foi entregue"""
+        with self._cond:
+            job = self._jobs.get(job_id)
+            if not job or job['state'] == SENDING:
+                return False
+            self.journal.append({'op': 'discard', 'job_id': job_id})
+            self._remove_job(job)
+        log_info(f"Spooler: job {job_id} descartado")
+        return True
+
+    def wait_idle(self, timeout: Optional[float] = None) -> bool:
+        """Aguarda até não haver jobs na fila ou em envio"""
+        deadline = None if timeout is None else time.time() + timeout
+        with self._cond:
+            while any(job['state'] in (QUEUED, SENDING) for job in self._jobs.values()):
+                remaining = None if deadline is None else deadline - time.time()
+                if remaining is not None and remaining <= 0:
+                    return False
+                self._cond.wait(remaining)
+            return True
+
+    @staticmethod
+    def queue_key(printer_id: Optional[str], config: Optional[Dict[str, Any]]) -> str:
+        """Chave da fila FIFO de um destino de impressão"""
+        config = config or {}
+        mode = config.get('output_mode')
+        if mode == 'printer':
+            return f"tcp://{config.get('printer_host')}:{config.get('printer_port', 9100)}"
+        if mode == 'windows_printer':
+            return f"share://{config.get('windows_printer_share')}"
+        if mode == 'file':
+            return 'file'
+        return printer_id or config.get('printer_id') or 'default'
+
+    # ----- Entrega (threads por fila) -----
+
+    def _ensure_worker(self, queue_key: str):
+        worker = self._workers.get(queue_key)
+        if worker is None or not worker.is_alive():
+            worker = threading.Thread(target=self._worker_loop, args=(queue_key,),
+                                      name=f'spooler-{queue_key}', daemon=True)
+            self._workers[queue_key] = worker
+            worker.start()
+
+    def _worker_loop(self, queue_key: str):
+        while True:
+            with self._cond:
+                job = None
+                while self._running:
+                    queue = self._queues.get(queue_key)
+                    if not queue:
+                        # Fila vazia: a thread termina e é recriada no próximo submit
+                        self._workers.pop(queue_key, None)
+                        return
+                    head = self._jobs[queue[0]]
+                    wait = head['next_attempt'] - time.time()
+                    if wait <= 0:
+                        job = head
+                        break
+                    self._cond.wait(wait)
+                if job is None:
+                    return
+                job['state'] = SENDING
+                job['attempts'] += 1
+                self.journal.append({'op': 'sending', 'job_id': job['job_id'],
+                                     'attempt': job['attempts']})
+
+            try:
+                self.sender(job)
+                error = None
+                partial = False
+            except Exception as e:
+                error = str(e)
+                partial = isinstance(e, PartialSendError)
+
+            with self._cond:
+                if error is None:
+                    self.journal.append({'op': 'done', 'job_id': job['job_id']})
+                    self._remove_job(job)
+                    self._remember_done(job['job_id'])
+                    log_info(f"Spooler: job {job['job_id']} entregue em {queue_key} "
+                             f"(tentativa {job['attempts']})")
+                elif partial and not self.resend_interrupted:
+                    # Parte das etiquetas já saiu: repetir o job inteiro imprimiria duplicadas
+                    self.journal.append({'op': 'interrupted', 'job_id': job['job_id'], 'error': error})
+                    job['state'] = INTERRUPTED
+                    job['last_error'] = error
+                    self._queues[queue_key].popleft()
+                    log_error(f"Spooler: job {job['job_id']} interrompido no meio do envio ({error}), "
+                              f"aguardando confirmação para reenviar")
+                elif self.max_attempts and job['attempts'] >= self.max_attempts:
+                    self.journal.append({'op': 'failed', 'job_id': job['job_id'], 'error': error})
+                    job['state'] = FAILED
+                    job['last_error'] = error
+                    self._queues[queue_key].popleft()
+                    log_error(f"Spooler: job {job['job_id']} falhou após {job['attempts']} tentativa(s): {error}")
+                else:
+                    delay = min(self.max_delay, self.base_delay * (2 ** (job['attempts'] - 1)))
+                    self.journal.append({'op': 'retry', 'job_id': job['job_id'],
+                                         'attempt': job['attempts'], 'error': error})
+                    job['state'] = QUEUED
+                    job['last_error'] = error
+                    job['next_attempt'] = time.time() + delay
+                    log_warning(f"Spooler: falha ao entregar job {job['job_id']} em {queue_key} "
+                                f"({error}); nova tentativa em {delay:.1f}s")
+                self._maybe_compact_locked()
+                self._cond.notify_all()
+
+    # ----- Estado interno (chamado com self._cond adquirido) -----
+
+    def _add_job(self, job: Dict[str, Any], state: str = QUEUED):
+        job.setdefault('attempts', 0)
+        job.setdefault('last_error', None)
+        job['state'] = state
+        job['next_attempt'] = 0
+        self._jobs[job['job_id']] = job
+        if state == QUEUED:
+            self._queues.setdefault(job['queue'], deque()).append(job['job_id'])
+
+    def _remove_job(self, job: Dict[str, Any]):
+        self._jobs.pop(job['job_id'], None)
+        queue = self._queues.get(job['queue'])
+        if queue and job['job_id'] in queue:
+            queue.remove(job['job_id'])
+        self._finished_since_compact += 1
+
+    def _remember_done(self, job_id: str):
+        self._done_ids.append(job_id)
+        self._done_set.add(job_id)
+        while len(self._done_ids) > self.keep_done:
+            self._done_set.discard(self._done_ids.popleft())
+
+    def _replay(self, records: List[Dict[str, Any]]):
+        """Reconstrói as filas a partir do journal"""
+        for record in records:
+            op = record.get('op')
+            job_id = record.get('job_id')
+            job = self._jobs.get(job_id)
+            if op == 'enqueue':
+                if job_id in self._done_set:
+                    continue
+                job = {key: value for key, value in record.items() if key != 'op'}
+                self._jobs[job_id] = job
+                job.setdefault('attempts', 0)
+                job.setdefault('last_error', None)
+                job['state'] = record.get('state', QUEUED)
+            elif op == 'done':
+                self._jobs.pop(job_id, None)
+                self._remember_done(job_id)
+            elif job is None:
+                continue
+            elif op == 'sending':
+                job['state'] = SENDING
+                job['attempts'] = record.get('attempt', job['attempts'] + 1)
+            elif op == 'retry':
+                job['state'] = QUEUED
+                job['last_error'] = record.get('error')
+            elif op == 'failed':
+                job['state'] = FAILED
+                job['last_error'] = record.get('error')
+            elif op == 'interrupted':
+                job['state'] = INTERRUPTED
+                job['last_error'] = record.get('error')
+            elif op == 'requeue':
+                job['state'] = QUEUED
+                job['attempts'] = 0
+            elif op == 'discard':
+                self._jobs.pop(job_id, None)
+
+        for job in list(self._jobs.values()):
+            state = job['state']
+            if state == SENDING:
+                # Queda durante o envio: a impressora pode ou não ter recebido o job
+                if self.resend_interrupted:
+                    log_warning(f"Spooler: job {job['job_id']} interrompido durante o envio, reenviando")
+                    state = QUEUED
+                else:
+                    log_warning(f"Spooler: job {job['job_id']} interrompido durante o envio, "
+                                f"aguardando confirmação para reenviar")
+                    state = INTERRUPTED
+            del self._jobs[job['job_id']]
+            self._add_job(job, state)
+
+    def _maybe_compact_locked(self):
+        if self._finished_since_compact >= self.compact_after:
+            self._compact_locked()
+
+    def _compact_locked(self):
+        """Regrava o journal só com os jobs pendentes e os IDs já entregues"""
+        records = [{'op': 'done', 'job_id': job_id} for job_id in self._done_ids]
+        for job in self._jobs.values():
+            record = {key: value for key, value in job.items()
+                      if key not in ('state', 'next_attempt')}
+            record['op'] = 'enqueue'
+            # Job em envio mantém a marca: se o processo cair, o replay o trata como interrompido
+            if job['state'] in (SENDING, FAILED, INTERRUPTED):
+                record['state'] = job['state']
+            records.append(record)
+        self.journal.rewrite(records)
+        self._finished_since_compact = 0
+
+    def _count_states(self) -> Dict[str, int]:
+        with self._cond:
+            counts: Dict[str, int] = {}
+            for job in self._jobs.values():
+                counts[job['state']] = counts.get(job['state'], 0) + 1
+            return counts
+
+    @staticmethod
+    def _public(job: Dict[str, Any]) -> Dict[str, Any]:
+        return {key: value for key, value in job.items() if key not in ('zpl', 'next_attempt')}
+
+
+_spooler: Optional[PrintSpooler] = None
+_spooler_lock = threading.Lock()
+
+
+def get_spooler() -> PrintSpooler:
+    """
+    Retorna o spooler do processo, iniciando-o (e recuperando o journal) no primeiro uso
+
+    Returns:
+        PrintSpooler configurado pela seção 'spooler' do settings.json
+    """
+    global _spooler
+    with _spooler_lock:
+        if _spooler is None:
+            from utils.config import load_config
+
+            spool_config = load_config().get('spooler', {})
+            project_root = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+            spool_dir = spool_config.get('directory', 'spool')
+            if not os.path.isabs(spool_dir):
+                spool_dir = os.path.join(project_root, spool_dir)
+
+            _spooler = PrintSpooler(
+                spool_dir=spool_dir,
+                base_delay=float(spool_config.get('base_delay', 1)),
+                max_delay=float(spool_config.get('max_delay', 60)),
+                max_attempts=int(spool_config.get('max_attempts', 0)),
+                resend_interrupted=bool(spool_config.get('resend_interrupted', False))
+            )
+            _spooler.start()
+        return _spooler
+
+
+def spooler_enabled() -> bool:
+    """True se a seção 'spooler' do settings.json habilita o spooler"""
+    from utils.config import load_config
+
+    return bool(load_config().get('spooler', {}).get('enabled', False))
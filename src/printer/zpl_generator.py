@@ -8,7 +8,83 @@ Baseado no código PHP original
 
 import json
 import os
-from typing import Dict, Any
+import re
+from typing import Dict, Any, Iterable, Iterator, Optional, Union
+
+from .zpl_template import StoredZplFormat, ZplTemplate, compile_templates, slot
+
+from utils.metrics import timed, timed_iter
+
+# Tamanho padrão dos blocos gerados em streaming (bytes)
+STREAM_CHUNK_SIZE = 64 * 1024
+
+# Objetos gravados na impressora para cada layout com formato armazenado (^DF/^XF)
+STORED_FORMAT_NAMES = {
+    'label': 'WMSLABEL.ZPL',
+    'consolidator': 'WMSCONS.ZPL'
+}
+
+# Maior valor inicial aceito pelo ^SN (12 dígitos)
+SERIAL_MAX_DIGITS = 12
+
+_SN_RE = re.compile(r'\^SN(\d+),(-?\d+),([YN])')
+_PQ_RE = re.compile(r'\^PQ(\d+)[^\n^]*\n?')
+
+
+def iter_zpl_chunks(labels: Iterable[Union[str, bytes]], chunk_size: int = STREAM_CHUNK_SIZE,
+                    encoding: str = 'utf-8') -> Iterator[bytes]:
+    """
+    Agrupa etiquetas ZPL em blocos codificados de tamanho aproximado chunk_size
+    
+    Os blocos sempre terminam no fim de uma etiqueta (nunca cortam um ^XA...^XZ).
+    
+    Args:
+        labels: Etiquetas ZPL (str ou bytes), uma por item
+        chunk_size: Tamanho alvo de cada bloco em bytes
+        encoding: Codificação usada para etiquetas em str
+        
+    Yields:
+        Blocos de bytes prontos para envio
+    """
+    buffer = []
+    buffered = 0
+    for label in labels:
+        data = label.encode(encoding) if isinstance(label, str) else label
+        buffer.append(data)
+        buffered += len(data)
+        if buffered >= chunk_size:
+            yield b''.join(buffer)
+            buffer = []
+            buffered = 0
+    if buffer:
+        yield b''.join(buffer)
+
+
+def expand_serialized_zpl(zpl: str) -> Iterator[str]:
+    """
+    Simula a impressora para um formato com ^SN/^PQ
+    
+    Cada campo ^SN vira um ^FD com o valor que a impressora imprimiria
+    na etiqueta correspondente, e o ^PQ é removido.
+    
+    Args:
+        zpl: Formato único com ^SN e ^PQ
+        
+    Yields:
+        ZPL equivalente de cada etiqueta impressa
+    """
+    match = _PQ_RE.search(zpl)
+    quantity = int(match.group(1)) if match else 1
+    body = _PQ_RE.sub('', zpl)
+    
+    def field(m, index):
+        start, step, zeros = m.group(1), int(m.group(2)), m.group(3)
+        value = str(int(start) + step * index)
+        return '^FD' + (value.zfill(len(start)) if zeros == 'Y' else value)
+    
+    for index in range(quantity):
+        yield _SN_RE.sub(lambda m: field(m, index), body)
+
 
 class ZplGenerator:
     """Gerador de códigos ZPL para etiquetas"""
@@ -22,6 +98,8 @@ class ZplGenerator:
         """
         self.defaults = self._load_defaults(config_path)
         self.zpl_commands = []  # Manter compatibilidade com código existente
+        self._templates = None  # Compilados no primeiro uso
+        self._stored_formats = None
     
     def _load_defaults(self, config_path: str = None) -> Dict[str, Any]:
         """Carrega configurações padrão das etiquetas"""
@@ -60,6 +138,13 @@ class ZplGenerator:
             'barcode_horizontal_ratio': 2,
             'pad_length': 8,
             
+            # Lotes sequenciais em um único formato ^SN/^PQ (a impressora incrementa o código)
+            'batch_serialization': False,
+            
+            # Memória da impressora onde os formatos armazenados (^DF) são gravados
+            # (E: é flash e sobrevive ao desligamento; R: é regravada a cada sessão)
+            'stored_format_device': 'E:',
+            
             # Texto (número)
             'text': {
                 'font': 'A',
@@ -90,6 +175,47 @@ class ZplGenerator:
         """Formata número com 8 dígitos com zeros à esquerda"""
         return str(n).zfill(8)
     
+    @property
+    def templates(self) -> Dict[str, ZplTemplate]:
+        """Layouts pré-compilados (montados uma única vez a partir de self.defaults)"""
+        if self._templates is None:
+            self._templates = compile_templates(self._template_sources())
+        return self._templates
+    
+    @property
+    def stored_formats(self) -> Dict[str, StoredZplFormat]:
+        """Formatos para gravar na impressora (^DF) e chamar com ^XF"""
+        if self._stored_formats is None:
+            device = self.defaults.get('stored_format_device', 'E:')
+            sources = self._template_sources()
+            self._stored_formats = {
+                name: StoredZplFormat(name, sources[name], f"{device}{filename}")
+                for name, filename in STORED_FORMAT_NAMES.items()
+            }
+        return self._stored_formats
+    
+    def invalidate_templates(self):
+        """Descarta os templates compilados (usar após alterar self.defaults)"""
+        self._templates = None
+        self._stored_formats = None
+    
+    def _template_sources(self) -> Dict[str, str]:
+        """Monta cada layout com marcadores no lugar dos campos variáveis"""
+        sources = {
+            'label': self._compose_label_zpl(slot('code'), slot('indicators')),
+            'serialized_label': self._compose_serialized_label_zpl(slot('start'), slot('quantity')),
+            'consolidator': self._compose_consolidator_zpl(slot('code'), slot('details')),
+            'floor_header': self._compose_address_header(slot('title')),
+            'block_header': self._compose_address_header(slot('title')),
+            'single_address': self._compose_single_address_zpl(
+                slot('full_address'), slot('pallet_name'), slot('building_name'), slot('floor_name')
+            )
+        }
+        for idx in range(8):
+            sources[f'floor_cell_{idx}'] = self._compose_floor_cell(idx, slot('address'))
+            sources[f'block_cell_{idx}'] = self._compose_block_cell(idx, slot('address'), slot('floor_name'))
+        return sources
+    
     def build_zpl(self, code: str, cargo_data: Dict[str, Any] = None) -> str:
         """
         Gera código ZPL para uma etiqueta
@@ -98,6 +224,38 @@ class ZplGenerator:
             code: Código a ser impresso na etiqueta
             cargo_data: Dados opcionais da carga (priority, special_handling, expiration, etc)
             
+        Returns:
+            Código ZPL completo
+        """
+        # Adicionar indicadores especiais se cargo_data fornecido
+        indicators = self._add_special_indicators(cargo_data) if cargo_data else ''
+        return self.templates['label'].render(code=code, indicators=indicators)
+    
+    def build_zpl_recall(self, code: str, cargo_data: Dict[str, Any] = None) -> str:
+        """
+        Gera a chamada do formato armazenado 'label' (^XF + dados)
+        
+        Imprime a mesma etiqueta de build_zpl, desde que o formato
+        stored_formats['label'] já esteja gravado na impressora.
+        
+        Args:
+            code: Código a ser impresso na etiqueta
+            cargo_data: Dados opcionais da carga (indicadores especiais)
+            
+        Returns:
+            Código ZPL da chamada
+        """
+        indicators = self._add_special_indicators(cargo_data) if cargo_data else ''
+        return self.stored_formats['label'].render(code=code, indicators=indicators)
+    
+    def _compose_label_zpl(self, code: str, indicators: str = '') -> str:
+        """
+        Monta o ZPL da etiqueta de código sequencial/carga a partir de self.defaults
+        
+        Args:
+            code: Código a ser impresso na etiqueta
+            indicators: ZPL dos indicadores especiais
+            
         Returns:
             Código ZPL completo
         """
@@ -156,9 +314,7 @@ class ZplGenerator:
         zpl += f"^BC{bh['orientation']},{bh['height']},N,N,N\n"
         zpl += f"^FD{code}^FS\n"
         
-        # Adicionar indicadores especiais se cargo_data fornecido
-        if cargo_data:
-            zpl += self._add_special_indicators(cargo_data)
+        zpl += indicators
         
         zpl += "^XZ\n"
         
@@ -257,24 +413,167 @@ class ZplGenerator:
         
         return indicators_zpl
     
-    def build_batch_zpl(self, start_code: int, quantity: int) -> str:
+    @timed('zpl_build')
+    def build_batch_zpl(self, start_code: int, quantity: int, serialize: Optional[bool] = None) -> str:
         """
         Gera ZPL para múltiplas etiquetas sequenciais
         
+        Para lotes grandes prefira iter_batch_zpl, que não mantém o lote
+        inteiro em memória.
+        
         Args:
             start_code: Código inicial da sequência
             quantity: Quantidade de etiquetas
+            serialize: Usar um único formato ^SN/^PQ (padrão: defaults['batch_serialization'])
             
         Returns:
             Código ZPL para todas as etiquetas
         """
-        all_zpl = ''
+        if self._use_serialization(start_code, quantity, serialize):
+            return self.build_serialized_batch_zpl(start_code, quantity)
+        return ''.join(self.iter_batch_labels(start_code, quantity))
+    
+    def iter_batch_labels(self, start_code: int, quantity: int) -> Iterator[str]:
+        """
+        Gera as etiquetas sequenciais uma a uma
+        
+        Args:
+            start_code: Código inicial da sequência
+            quantity: Quantidade de etiquetas
+            
+        Yields:
+            ZPL de cada etiqueta
+        """
+        render = self.templates['label'].render
         for n in range(start_code, start_code + quantity):
-            code = self.pad8(n)
-            zpl = self.build_zpl(code)
-            all_zpl += zpl
+            yield render(code=self.pad8(n), indicators='')
+    
+    def iter_batch_zpl(self, start_code: int, quantity: int,
+                       chunk_size: int = STREAM_CHUNK_SIZE,
+                       serialize: Optional[bool] = None) -> Iterator[bytes]:
+        """
+        Gera o lote sequencial em blocos codificados, com memória constante
+        
+        Args:
+            start_code: Código inicial da sequência
+            quantity: Quantidade de etiquetas
+            chunk_size: Tamanho alvo de cada bloco em bytes
+            serialize: Usar um único formato ^SN/^PQ (padrão: defaults['batch_serialization'])
+            
+        Yields:
+            Blocos de bytes ZPL (cada bloco contém etiquetas completas)
+        """
+        if self._use_serialization(start_code, quantity, serialize):
+            return iter([self.build_serialized_batch_zpl(start_code, quantity).encode('utf-8')])
+        return timed_iter('zpl_build', iter_zpl_chunks(self.iter_batch_labels(start_code, quantity), chunk_size),
+                          op='iter_batch_zpl')
+    
+    def iter_reprint_zpl(self, items: Iterable[tuple], quantity: int = 1, recall: bool = False,
+                         chunk_size: int = STREAM_CHUNK_SIZE) -> Iterator[bytes]:
+        """
+        Gera as etiquetas de uma reimpressão em lote em blocos codificados
+        
+        Args:
+            items: Pares (código, cargo_data) com os indicadores de cada carga
+            quantity: Cópias de cada etiqueta
+            recall: Gerar só as chamadas ^XF (formato 'label' já gravado na impressora)
+            chunk_size: Tamanho alvo de cada bloco em bytes
         
-        return all_zpl
+        Yields:
+            Blocos de bytes ZPL (cada bloco contém etiquetas completas)
+        """
+        build = self.build_zpl_recall if recall else self.build_zpl
+        return timed_iter('zpl_build', iter_zpl_chunks((build(code, cargo_data) * quantity
+                                                        for code, cargo_data in items), chunk_size),
+                          op='iter_reprint_zpl')
+    
+    def can_serialize(self, start_code: int, quantity: int) -> bool:
+        """
+        Verifica se o lote cabe em um único formato ^SN
+        
+        O contador da impressora mantém a largura do valor inicial: a faixa
+        não pode ganhar dígitos no meio (ex: 99999999 -> 100000000).
+        
+        Args:
+            start_code: Código inicial da sequência
+            quantity: Quantidade de etiquetas
+            
+        Returns:
+            True se a impressora imprimiria exatamente os mesmos códigos
+        """
+        if quantity < 1 or start_code < 0:
+            return False
+        width = len(self.pad8(start_code))
+        return width <= SERIAL_MAX_DIGITS and len(str(start_code + quantity - 1)) <= width
+    
+    @timed('zpl_build')
+    def build_serialized_batch_zpl(self, start_code: int, quantity: int) -> str:
+        """
+        Gera o lote sequencial como um único formato com ^SN/^PQ
+        
+        A impressora incrementa o código a cada etiqueta: o tamanho do ZPL
+        não depende da quantidade.
+        
+        Args:
+            start_code: Código inicial da sequência
+            quantity: Quantidade de etiquetas
+            
+        Returns:
+            Código ZPL do formato serializado
+            
+        Raises:
+            ValueError: Se a faixa não puder ser serializada (ver can_serialize)
+        """
+        if not self.can_serialize(start_code, quantity):
+            raise ValueError(f"Faixa {start_code} + {quantity} não pode ser serializada com ^SN")
+        return self.templates['serialized_label'].render(start=self.pad8(start_code), quantity=quantity)
+    
+    def verify_serialized_batch(self, start_code: int, quantity: int) -> bool:
+        """
+        Confere se os dois modos imprimem o mesmo conjunto de códigos
+        
+        Expande o formato ^SN/^PQ como a impressora faria e compara com as
+        etiquetas geradas uma a uma (mesma ordem, mesmos bytes).
+        
+        Args:
+            start_code: Código inicial da sequência
+            quantity: Quantidade de etiquetas
+            
+        Returns:
+            True se os modos forem equivalentes
+        """
+        if not self.can_serialize(start_code, quantity):
+            return False
+        expanded = expand_serialized_zpl(self.build_serialized_batch_zpl(start_code, quantity))
+        count = 0
+        for count, (printed, expected) in enumerate(
+                zip(expanded, self.iter_batch_labels(start_code, quantity)), start=1):
+            if printed != expected:
+                return False
+        return count == quantity
+    
+    def _use_serialization(self, start_code: int, quantity: int, serialize: Optional[bool]) -> bool:
+        if serialize is None:
+            serialize = bool(self.defaults.get('batch_serialization', False))
+        # Faixas que mudam de largura seguem no modo etiqueta a etiqueta
+        return serialize and self.can_serialize(start_code, quantity)
+    
+    def _compose_serialized_label_zpl(self, start: str, quantity: str) -> str:
+        """
+        Monta a etiqueta sequencial com ^SN no lugar do código e ^PQ com a quantidade
+        
+        Args:
+            start: Código inicial (a largura define os zeros à esquerda)
+            quantity: Quantidade de etiquetas
+            
+        Returns:
+            Código ZPL do formato serializado
+        """
+        code = slot('code')
+        zpl = self._compose_label_zpl(code)
+        # Cada campo ^SN incrementa por conta própria: todos partem do mesmo valor
+        zpl = zpl.replace(f"^FD{code}^FS", f"^SN{start},1,Y^FS")
+        return zpl[:-len("^XZ\n")] + f"^PQ{quantity},0,0,N\n^XZ\n"
 
     def build_consolidator_zpl(self, consolidator_code: str, consolidator_data: Dict[str, Any] = None) -> str:
         """
@@ -288,16 +587,35 @@ class ZplGenerator:
         Returns:
             Código ZPL para etiqueta do consolidador
         """
-        # valores padrão
-        data = consolidator_data or {}
-        cargo_count = data.get('cargo_count', '')
-        total_weight = data.get('total_weight', '')
-        total_volume = data.get('total_volume', '')
-        warehouse_name = data.get('warehouse_name', '')
-        status = data.get('status', '')
-        created_at = data.get('created_at', '')
-        additional_text = data.get('additional_text', '')
+        details = self._consolidator_details_zpl(consolidator_data or {})
+        return self.templates['consolidator'].render(code=consolidator_code, details=details)
 
+    def build_consolidator_recall(self, consolidator_code: str,
+                                  consolidator_data: Dict[str, Any] = None) -> str:
+        """
+        Gera a chamada do formato armazenado 'consolidator' (^XF + dados)
+        
+        Args:
+            consolidator_code: Código do consolidador
+            consolidator_data: Mesmos valores opcionais de build_consolidator_zpl
+            
+        Returns:
+            Código ZPL da chamada
+        """
+        details = self._consolidator_details_zpl(consolidator_data or {})
+        return self.stored_formats['consolidator'].render(code=consolidator_code, details=details)
+    
+    def _compose_consolidator_zpl(self, consolidator_code: str, details: str = '') -> str:
+        """
+        Monta o ZPL fixo da etiqueta de consolidador (QR + código)
+
+        Args:
+            consolidator_code: Código do consolidador
+            details: ZPL das informações opcionais (ver _consolidator_details_zpl)
+
+        Returns:
+            Código ZPL para etiqueta do consolidador
+        """
         # Posicionamento independente (ajuste conforme necessário)
         qr_x = 40
         qr_y = 300
@@ -309,26 +627,6 @@ class ZplGenerator:
         code_font_h = 60
         code_font_w = 60
 
-        info1_x = 280
-        info1_y = 380
-        info1_h = 28
-        info1_w = 28
-
-        info2_x = 280
-        info2_y = 415
-        info2_h = 28
-        info2_w = 28
-
-        info3_x = 280
-        info3_y = 450
-        info3_h = 28
-        info3_w = 28
-
-        footer_x = 70
-        footer_y = 250
-        footer_h = 40
-        footer_w = 40
-
         # Construir ZPL
         zpl = "^XA\n"
         zpl += "^CI28\n"  # UTF-8
@@ -354,6 +652,50 @@ class ZplGenerator:
         zpl += f"^A0N,{code_font_h},{code_font_w}\n"
         zpl += f"^FD{consolidator_code}^FS\n"
 
+        zpl += details
+
+        zpl += "^XZ\n"
+        return zpl
+
+    def _consolidator_details_zpl(self, data: Dict[str, Any]) -> str:
+        """
+        Gera o ZPL das informações opcionais do consolidador
+
+        Args:
+            data: cargo_count, total_weight, total_volume, warehouse_name, additional_text
+
+        Returns:
+            Código ZPL das linhas presentes
+        """
+        # valores padrão
+        cargo_count = data.get('cargo_count', '')
+        total_weight = data.get('total_weight', '')
+        total_volume = data.get('total_volume', '')
+        warehouse_name = data.get('warehouse_name', '')
+        additional_text = data.get('additional_text', '')
+
+        info1_x = 280
+        info1_y = 380
+        info1_h = 28
+        info1_w = 28
+
+        info2_x = 280
+        info2_y = 415
+        info2_h = 28
+        info2_w = 28
+
+        info3_x = 280
+        info3_y = 450
+        info3_h = 28
+        info3_w = 28
+
+        footer_x = 70
+        footer_y = 250
+        footer_h = 40
+        footer_w = 40
+
+        zpl = ""
+
         # Informações - cargo_count / weight / volume
         if cargo_count != '':
             zpl += f"^FO{info1_x},{info1_y}\n"
@@ -374,7 +716,6 @@ class ZplGenerator:
         footer_texts = []
         if warehouse_name:
             footer_texts.append(f"Galpão: {warehouse_name}")
-        
 
         if footer_texts or additional_text:
             y = footer_y
@@ -389,7 +730,6 @@ class ZplGenerator:
                 zpl += f"^A0N,{footer_h},{footer_w}\n"
                 zpl += f"^FD{additional_text}^FS\n"
 
-        zpl += "^XZ\n"
         return zpl
 
     # Métodos da classe original (manter compatibilidade)
@@ -429,6 +769,29 @@ class ZplGenerator:
         Returns:
             Código ZPL para etiqueta de endereços por andar
         """
+        templates = self.templates
+        
+        # Título no topo: Galpão + Prédio + Andar
+        title = f"{warehouse_name} ({warehouse_code}) - {building_name} - {floor_name}"
+        parts = [templates['floor_header'].render(title=title)]
+        
+        # Processar até 8 endereços
+        for idx, addr in enumerate(addresses[:8]):
+            parts.append(templates[f'floor_cell_{idx}'].render(address=addr.get('full_address', '')))
+        
+        parts.append("^XZ\n")
+        return ''.join(parts)
+
+    def _compose_address_header(self, title: str) -> str:
+        """
+        Monta o cabeçalho das etiquetas de endereço 150mm x 100mm (MODELOS 01 e 03)
+        
+        Args:
+            title: Título impresso no topo
+            
+        Returns:
+            Código ZPL do cabeçalho (sem ^XZ)
+        """
         # Dimensões da etiqueta 150mm x 100mm
         dpi = 203
         mm_to_dots = dpi / 25.4
@@ -441,8 +804,6 @@ class ZplGenerator:
         zpl += f"^LL{height_dots}\n"
         zpl += "^LH0,0\n"
         
-        # Título no topo: Galpão + Prédio + Andar
-        title = f"{warehouse_name} ({warehouse_code}) - {building_name} - {floor_name}"
         title_x = 50
         title_y = 40
         title_font_h = 50
@@ -451,7 +812,19 @@ class ZplGenerator:
         zpl += f"^FO{title_x},{title_y}\n"
         zpl += f"^A0N,{title_font_h},{title_font_w}\n"
         zpl += f"^FD{title}^FS\n"
+        return zpl
+
+    def _compose_floor_cell(self, idx: int, full_address: str) -> str:
+        """
+        Monta a célula idx (0-7) do grid do MODELO 01: QR code + endereço
         
+        Args:
+            idx: Posição no grid
+            full_address: Endereço completo
+            
+        Returns:
+            Código ZPL da célula
+        """
         # Grid de QR codes: 2 colunas x 4 linhas
         # Espaçamento ajustado para caber 8 QR codes
         qr_start_x = 120
@@ -465,30 +838,25 @@ class ZplGenerator:
         text_font_h = 22  # Fonte menor
         text_font_w = 22
         
-        # Processar até 8 endereços
-        for idx, addr in enumerate(addresses[:8]):
-            # Calcular posição no grid (0-7 -> row 0-3, col 0-1)
-            row = idx // 2
-            col = idx % 2
-            
-            qr_x = qr_start_x + (col * qr_spacing_x)
-            qr_y = qr_start_y + (row * qr_spacing_y)
-            
-            # QR Code
-            full_address = addr.get('full_address', '')
-            zpl += f"^FO{qr_x},{qr_y}\n"
-            zpl += f"^BQN,2,{qr_size}\n"
-            zpl += f"^FDQA,{full_address}^FS\n"
-            
-            # Texto do endereço abaixo do QR
-            text_x = qr_x - 20  # Centralizar melhor
-            text_y = qr_y + text_offset_y
-            
-            zpl += f"^FO{text_x},{text_y}\n"
-            zpl += f"^A0N,{text_font_h},{text_font_w}\n"
-            zpl += f"^FD{full_address}^FS\n"
+        # Calcular posição no grid (0-7 -> row 0-3, col 0-1)
+        row = idx // 2
+        col = idx % 2
         
-        zpl += "^XZ\n"
+        qr_x = qr_start_x + (col * qr_spacing_x)
+        qr_y = qr_start_y + (row * qr_spacing_y)
+        
+        # QR Code
+        zpl = f"^FO{qr_x},{qr_y}\n"
+        zpl += f"^BQN,2,{qr_size}\n"
+        zpl += f"^FDQA,{full_address}^FS\n"
+        
+        # Texto do endereço abaixo do QR
+        text_x = qr_x - 20  # Centralizar melhor
+        text_y = qr_y + text_offset_y
+        
+        zpl += f"^FO{text_x},{text_y}\n"
+        zpl += f"^A0N,{text_font_h},{text_font_w}\n"
+        zpl += f"^FD{full_address}^FS\n"
         return zpl
 
     def build_single_address_zpl(self, full_address: str, pallet_name: str, 
@@ -507,6 +875,14 @@ class ZplGenerator:
         Returns:
             Código ZPL para etiqueta individual vertical
         """
+        return self.templates['single_address'].render(
+            full_address=full_address, pallet_name=pallet_name,
+            building_name=building_name, floor_name=floor_name
+        )
+
+    def _compose_single_address_zpl(self, full_address: str, pallet_name: str, 
+                                    building_name: str, floor_name: str) -> str:
+        """Monta o ZPL do MODELO 02 (ver build_single_address_zpl)"""
         # Dimensões da etiqueta 150mm x 100mm
         dpi = 203
         mm_to_dots = dpi / 25.4
@@ -597,29 +973,34 @@ class ZplGenerator:
         Returns:
             Código ZPL para etiqueta de endereços por bloco vertical
         """
-        # Dimensões da etiqueta 150mm x 100mm
-        dpi = 203
-        mm_to_dots = dpi / 25.4
-        width_dots = int(round(150 * mm_to_dots))  # ~1181 dots
-        height_dots = int(round(100 * mm_to_dots))  # ~787 dots
-        
-        zpl = "^XA\n"
-        zpl += "^CI28\n"  # UTF-8
-        zpl += f"^PW{width_dots}\n"
-        zpl += f"^LL{height_dots}\n"
-        zpl += "^LH0,0\n"
+        templates = self.templates
         
         # Título no topo: Galpão + Prédio
         title = f"{warehouse_name} ({warehouse_code}) - {building_name}"
-        title_x = 50
-        title_y = 40
-        title_font_h = 50
-        title_font_w = 40
+        parts = [templates['block_header'].render(title=title)]
         
-        zpl += f"^FO{title_x},{title_y}\n"
-        zpl += f"^A0N,{title_font_h},{title_font_w}\n"
-        zpl += f"^FD{title}^FS\n"
+        # Processar até 8 endereços
+        for idx, addr_data in enumerate(addresses_by_position[:8]):
+            parts.append(templates[f'block_cell_{idx}'].render(
+                address=addr_data.get('full_address', ''),
+                floor_name=addr_data.get('floor_name', '')
+            ))
+        
+        parts.append("^XZ\n")
+        return ''.join(parts)
+
+    def _compose_block_cell(self, idx: int, full_address: str, floor_name: str) -> str:
+        """
+        Monta a célula idx (0-7) do grid do MODELO 03: QR code + endereço + andar
         
+        Args:
+            idx: Posição no grid (0 = andar mais alto)
+            full_address: Endereço completo
+            floor_name: Nome do andar
+            
+        Returns:
+            Código ZPL da célula
+        """
         # Grid de QR codes: 2 colunas x 4 linhas
         qr_start_x = 120
         qr_start_y = 120
@@ -647,33 +1028,26 @@ class ZplGenerator:
             (0, 3),  # idx 7: esquerda, linha 3 (andar mais baixo)
         ]
         
-        # Processar até 8 endereços
-        for idx, addr_data in enumerate(addresses_by_position[:8]):
-            col, row = position_map[idx]
-            
-            qr_x = qr_start_x + (col * qr_spacing_x)
-            qr_y = qr_start_y + (row * qr_spacing_y)
-            
-            full_address = addr_data.get('full_address', '')
-            floor_name = addr_data.get('floor_name', '')
-            
-            # QR Code
-            zpl += f"^FO{qr_x},{qr_y}\n"
-            zpl += f"^BQN,2,{qr_size}\n"
-            zpl += f"^FDQA,{full_address}^FS\n"
-            
-            # Texto do endereço
-            text_x = qr_x - 20
-            text_y = qr_y + text_offset_y
-            zpl += f"^FO{text_x},{text_y}\n"
-            zpl += f"^A0N,{text_font_h},{text_font_w}\n"
-            zpl += f"^FD{full_address}^FS\n"
-            
-            # Nome do andar
-            floor_y = qr_y + floor_offset_y
-            zpl += f"^FO{text_x},{floor_y}\n"
-            zpl += f"^A0N,{floor_font_h},{floor_font_w}\n"
-            zpl += f"^FD{floor_name}^FS\n"
+        col, row = position_map[idx]
         
-        zpl += "^XZ\n"
+        qr_x = qr_start_x + (col * qr_spacing_x)
+        qr_y = qr_start_y + (row * qr_spacing_y)
+        
+        # QR Code
+        zpl = f"^FO{qr_x},{qr_y}\n"
+        zpl += f"^BQN,2,{qr_size}\n"
+        zpl += f"^FDQA,{full_address}^FS\n"
+        
+        # Texto do endereço
+        text_x = qr_x - 20
+        text_y = qr_y + text_offset_y
+        zpl += f"^FO{text_x},{text_y}\n"
+        zpl += f"^A0N,{text_font_h},{text_font_w}\n"
+        zpl += f"^FD{full_address}^FS\n"
+        
+        # Nome do andar
+        floor_y = qr_y + floor_offset_y
+        zpl += f"^FO{text_x},{floor_y}\n"
+        zpl += f"^A0N,{floor_font_h},{floor_font_w}\n"
+        zpl += f"^FD{floor_name}^FS\n"
         return zpl
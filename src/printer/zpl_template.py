@@ -0,0 +1,144 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Templates ZPL pré-compilados
+Um layout é montado uma única vez com marcadores no lugar dos campos
+variáveis e congelado em partes fixas; renderizar uma etiqueta passa a ser
+apenas a substituição dos campos. O mesmo layout pode ser gravado na
+impressora (^DF) e chamado só com os dados dos campos (^XF)
+"""
+
+import hashlib
+import re
+from typing import Dict, List
+
+# Marcador dos campos no ZPL de origem (não aparece em ZPL válido)
+_SLOT_MARK = '\x00'
+
+
+def slot(name: str) -> str:
+    """Marcador do campo 'name' para usar no lugar do valor ao montar o layout"""
+    return f"{_SLOT_MARK}{name}{_SLOT_MARK}"
+
+
+class ZplTemplate:
+    """Layout ZPL congelado com campos nomeados"""
+
+    __slots__ = ('name', 'slots', 'static_size', '_format', '_format_bytes')
+
+    def __init__(self, name: str, source: str, encoding: str = 'utf-8'):
+        """
+        Compila o template
+
+        Args:
+            name: Nome do layout (para mensagens de erro)
+            source: ZPL montado com slot('campo') no lugar dos valores
+            encoding: Codificação usada em render_bytes
+        """
+        parts = source.split(_SLOT_MARK)
+        if len(parts) % 2 == 0:
+            raise ValueError(f"Template {name}: marcador de campo sem fechamento")
+
+        statics = parts[0::2]
+        self.name = name
+        self.slots: List[str] = parts[1::2]
+        self.static_size = sum(len(part.encode(encoding)) for part in statics)
+        # Um único formato '%s' por template: a substituição roda em C
+        self._format = '%s'.join(part.replace('%', '%%') for part in statics)
+        self._format_bytes = self._format.encode(encoding)
+
+    def render(self, **fields) -> str:
+        """Renderiza o ZPL com os valores dos campos"""
+        try:
+            return self._format % tuple([fields[name] for name in self.slots])
+        except KeyError as e:
+            raise KeyError(f"Template {self.name}: campo {e} não informado")
+
+    def render_bytes(self, encoding: str = 'utf-8', **fields) -> bytes:
+        """Renderiza o ZPL já codificado"""
+        try:
+            values = tuple([str(fields[name]).encode(encoding) for name in self.slots])
+        except KeyError as e:
+            raise KeyError(f"Template {self.name}: campo {e} não informado")
+        return self._format_bytes % values
+
+    def __repr__(self):
+        return f"ZplTemplate({self.name!r}, slots={self.slots})"
+
+
+def compile_templates(sources: Dict[str, str]) -> Dict[str, ZplTemplate]:
+    """
+    Compila vários layouts de uma vez
+
+    Args:
+        sources: Dict nome -> ZPL com marcadores slot()
+
+    Returns:
+        Dict nome -> ZplTemplate
+    """
+    return {name: ZplTemplate(name, source) for name, source in sources.items()}
+
+
+# Campo ^FD...^FS cujo valor contém um marcador (prefixo/sufixo fixos opcionais)
+_FIELD_RE = re.compile(r'\^FD([^\^\x00]*)\x00(\w+)\x00([^\^\x00]*)\^FS')
+
+
+class StoredZplFormat:
+    """
+    Layout gravado na memória da impressora (^DF) e chamado com ^XF
+
+    Cada campo ^FD com marcador vira um ^FNn no formato gravado; um marcador
+    fora de ^FD só é aceito no fim do layout (ZPL adicional, ex: indicadores)
+    e é enviado junto com a chamada.
+    """
+
+    __slots__ = ('name', 'path', 'version', 'download', 'recall')
+
+    def __init__(self, name: str, source: str, path: str):
+        """
+        Monta o formato gravado a partir do layout com marcadores
+
+        Args:
+            name: Nome do layout
+            source: ZPL montado com slot('campo') no lugar dos valores
+            path: Objeto na impressora (ex: E:WMSLABEL.ZPL)
+        """
+        if not (source.startswith("^XA\n") and source.endswith("^XZ\n")):
+            raise ValueError(f"Template {name}: formato deve começar com ^XA e terminar com ^XZ")
+        body = source[len("^XA\n"):-len("^XZ\n")]
+
+        numbers: Dict[tuple, int] = {}
+
+        def to_field_number(match):
+            key = match.groups()
+            if key not in numbers:
+                numbers[key] = len(numbers) + 1
+            return f"^FN{numbers[key]}^FS"
+
+        body = _FIELD_RE.sub(to_field_number, body)
+
+        # ZPL variável (marcador solto) só no fim: é anexado à chamada
+        trailing = ''
+        parts = body.split(_SLOT_MARK)
+        if len(parts) == 3 and parts[2] == '':
+            body, trailing = parts[0], slot(parts[1])
+        elif len(parts) != 1:
+            raise ValueError(f"Template {name}: campos fora de ^FD só são aceitos no fim do layout")
+
+        self.name = name
+        self.path = path
+        self.download = f"^XA\n^DF{path}^FS\n{body}^XZ\n"
+        self.version = hashlib.sha1(self.download.encode('utf-8')).hexdigest()[:12]
+
+        recall = f"^XA\n^CI28\n^XF{path}^FS\n"
+        for (prefix, field, suffix), number in numbers.items():
+            recall += f"^FN{number}^FD{prefix}{slot(field)}{suffix}^FS\n"
+        self.recall = ZplTemplate(f"{name}:recall", recall + trailing + "^XZ\n")
+
+    def render(self, **fields) -> str:
+        """Renderiza a chamada (^XF + dados dos campos)"""
+        return self.recall.render(**fields)
+
+    def __repr__(self):
+        return f"StoredZplFormat({self.name!r}, path={self.path!r}, version={self.version!r})"
@@ -0,0 +1,350 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Journal local das ações de recebimento (SQLite) com sincronização posterior
+Aceites e rejeições são gravados antes de qualquer chamada à API e a tela
+segue para a próxima carga; uma thread reenvia as ações à API na ordem em
+que foram registradas, cada uma com uma chave de idempotência, e guarda as
+recusas da API como conflitos para conferência
+"""
+
+import json
+import os
+import sqlite3
+import threading
+import time
+import uuid
+from typing import Any, Dict, List, Optional
+
+from utils.logger import log_info, log_warning, log_error
+
+# Estados de uma ação
+PENDING = 'pending'
+SENDING = 'sending'
+SYNCED = 'synced'
+CONFLICT = 'conflict'
+DISCARDED = 'discarded'
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS receive_actions (
+    seq INTEGER PRIMARY KEY AUTOINCREMENT,
+    idempotency_key TEXT NOT NULL UNIQUE,
+    cargo_id TEXT,
+    cargo_code TEXT NOT NULL,
+    action TEXT NOT NULL,
+    payload TEXT NOT NULL,
+    state TEXT NOT NULL,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    last_error TEXT,
+    created_at REAL NOT NULL,
+    synced_at REAL
+);
+CREATE INDEX IF NOT EXISTS idx_receive_actions_state ON receive_actions (state, seq);
+"""
+
+# Respostas que indicam falha temporária (a ação é reenviada)
+RETRY_STATUS = (401, 408, 429)
+
+
+class ReceivingJournal:
+    """Fila persistente de ações de recebimento sincronizada em segundo plano"""
+
+    def __init__(self, db_path: str = ':memory:', api_client=None, token: Optional[str] = None,
+                 base_delay: float = 1.0, max_delay: float = 60.0):
+        """
+        Abre (ou cria) o journal
+
+        Args:
+            db_path: Arquivo SQLite (':memory:' = apenas em memória)
+            api_client: APIClient usado na sincronização (criado no primeiro uso se None)
+            token: Token de autenticação (também definido por set_token)
+            base_delay: Espera da primeira retentativa (segundos)
+            max_delay: Espera máxima entre retentativas (segundos)
+        """
+        if db_path != ':memory:':
+            os.makedirs(os.path.dirname(os.path.abspath(db_path)), exist_ok=True)
+        self.db_path = db_path
+        self._api_client = api_client
+        self.token = token
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+
+        self._cond = threading.Condition()
+        self._conn = sqlite3.connect(db_path, check_same_thread=False)
+        self._conn.row_factory = sqlite3.Row
+        self._worker: Optional[threading.Thread] = None
+        self._running = False
+        self._next_attempt = 0.0
+        self._last_error: Optional[str] = None
+        self._failures = 0
+
+        with self._cond, self._conn:
+            if db_path != ':memory:':
+                self._conn.execute('PRAGMA journal_mode=WAL')
+                self._conn.execute('PRAGMA synchronous=FULL')
+            self._conn.executescript(SCHEMA)
+            # Queda durante o envio: a chave de idempotência torna o reenvio seguro
+            interrupted = self._conn.execute("UPDATE receive_actions SET state = ? WHERE state = ?",
+                                             (PENDING, SENDING)).rowcount
+        if interrupted:
+            log_warning(f"Journal de recebimento: {interrupted} ação(ões) interrompida(s) no envio serão reenviadas")
+
+    @property
+    def api_client(self):
+        if self._api_client is None:
+            from api.client import APIClient
+            self._api_client = APIClient()
+        return self._api_client
+
+    # ----- Ciclo de vida -----
+
+    def start(self):
+        """Inicia a thread de sincronização"""
+        with self._cond:
+            if self._running:
+                return
+            self._running = True
+            self._worker = threading.Thread(target=self._sync_loop, name='receiving-sync', daemon=True)
+            self._worker.start()
+        status = self.get_status()
+        log_info(f"Journal de recebimento iniciado: {status[PENDING]} ação(ões) pendente(s), "
+                 f"{status[CONFLICT]} conflito(s)")
+
+    def stop(self, timeout: float = 5.0):
+        """Encerra a sincronização (ações pendentes permanecem no journal)"""
+        with self._cond:
+            self._running = False
+            self._cond.notify_all()
+        if self._worker:
+            self._worker.join(timeout)
+
+    def close(self):
+        self.stop()
+        with self._cond:
+            self._conn.close()
+
+    # ----- API pública -----
+
+    def set_token(self, token: Optional[str]):
+        """Define o token usado nos envios (ações aguardando login voltam a ser enviadas)"""
+        with self._cond:
+            self.token = token
+            self._next_attempt = 0.0
+            self._cond.notify_all()
+
+    def record(self, cargo_id: Any, cargo_code: str, payload: Dict[str, Any]) -> str:
+        """
+        Grava a ação e retorna sem consultar a API
+
+        Args:
+            cargo_id: ID da carga (None = resolvido pelo código na sincronização)
+            cargo_code: Código da carga
+            payload: Corpo de /cargos/{id}/receive-physically (warehouse_id, action, ...)
+
+        Returns:
+            Chave de idempotência da ação
+        """
+        key = uuid.uuid4().hex
+        with self._cond:
+            with self._conn:
+                self._conn.execute(
+                    "INSERT INTO receive_actions (idempotency_key, cargo_id, cargo_code, action, payload, "
+                    "state, created_at) VALUES (?, ?, ?, ?, ?, ?, ?)",
+                    (key, None if cargo_id is None else str(cargo_id), str(cargo_code),
+                     payload.get('action', ''), json.dumps(payload, ensure_ascii=False), PENDING, time.time()))
+            self._cond.notify_all()
+        log_info(f"Journal de recebimento: {payload.get('action')} da carga {cargo_code} registrado ({key})")
+        return key
+
+    def get_status(self) -> Dict[str, Any]:
+        """
+        Situação da sincronização
+
+        Returns:
+            Dict com a quantidade por estado, last_error e retry_in (segundos até a próxima tentativa)
+        """
+        with self._cond:
+            rows = self._conn.execute("SELECT state, COUNT(*) FROM receive_actions GROUP BY state").fetchall()
+            status = {state: 0 for state in (PENDING, SENDING, SYNCED, CONFLICT, DISCARDED)}
+            status.update({state: count for state, count in rows})
+            status['last_error'] = self._last_error
+            status['retry_in'] = max(0.0, round(self._next_attempt - time.time(), 1))
+        return status
+
+    def list_actions(self, state: Optional[str] = None, limit: int = 100) -> List[Dict[str, Any]]:
+        """Ações registradas (mais antigas primeiro), opcionalmente filtradas por estado"""
+        with self._cond:
+            if state:
+                rows = self._conn.execute("SELECT * FROM receive_actions WHERE state = ? ORDER BY seq LIMIT ?",
+                                          (state, int(limit))).fetchall()
+            else:
+                rows = self._conn.execute("SELECT * FROM receive_actions ORDER BY seq LIMIT ?",
+                                          (int(limit),)).fetchall()
+        actions = []
+        for row in rows:
+            action = dict(row)
+            action['payload'] = json.loads(action['payload'])
+            actions.append(action)
+        return actions
+
+    def retry(self, key: str) -> bool:
+        """Recoloca um conflito na fila (ex: após corrigir a carga no sistema web)"""
+        if not self._set_state(key, PENDING, (CONFLICT,)):
+            return False
+        log_info(f"Journal de recebimento: ação {key} recolocada na fila")
+        return True
+
+    def discard(self, key: str) -> bool:
+        """Descarta uma ação pendente ou em conflito"""
+        if not self._set_state(key, DISCARDED, (PENDING, CONFLICT)):
+            return False
+        log_info(f"Journal de recebimento: ação {key} descartada")
+        return True
+
+    def wait_idle(self, timeout: Optional[float] = None) -> bool:
+        """Aguarda até não haver ações pendentes ou em envio"""
+        deadline = None if timeout is None else time.time() + timeout
+        with self._cond:
+            while self._conn.execute("SELECT 1 FROM receive_actions WHERE state IN (?, ?) LIMIT 1",
+                                     (PENDING, SENDING)).fetchone():
+                remaining = None if deadline is None else deadline - time.time()
+                if remaining is not None and remaining <= 0:
+                    return False
+                self._cond.wait(remaining if remaining is not None else 0.5)
+            return True
+
+    # ----- Sincronização -----
+
+    def _sync_loop(self):
+        while True:
+            with self._cond:
+                action = None
+                while self._running:
+                    wait = self._next_attempt - time.time()
+                    if self.token and wait <= 0:
+                        row = self._conn.execute(
+                            "SELECT * FROM receive_actions WHERE state = ? ORDER BY seq LIMIT 1",
+                            (PENDING,)).fetchone()
+                        if row is not None:
+                            action = dict(row)
+                            break
+                    self._cond.wait(wait if self.token and wait > 0 else 1.0)
+                if action is None:
+                    return
+                with self._conn:
+                    self._conn.execute("UPDATE receive_actions SET state = ?, attempts = attempts + 1 "
+                                       "WHERE seq = ?", (SENDING, action['seq']))
+                token = self.token
+
+            outcome, detail = self._send(action, token)
+
+            with self._cond:
+                if outcome == SYNCED:
+                    self._update(action['seq'], state=SYNCED, last_error=None, synced_at=time.time(),
+                                 cargo_id=detail)
+                    self._failures = 0
+                    self._last_error = None
+                    log_info(f"Journal de recebimento: {action['action']} da carga {action['cargo_code']} "
+                             f"sincronizado")
+                elif outcome == CONFLICT:
+                    self._update(action['seq'], state=CONFLICT, last_error=detail)
+                    self._failures = 0
+                    log_error(f"Journal de recebimento: conflito na carga {action['cargo_code']}: {detail}")
+                else:
+                    # Falha temporária: a fila para (a ordem das ações é mantida) até a próxima tentativa
+                    self._update(action['seq'], state=PENDING, last_error=detail)
+                    self._failures += 1
+                    delay = min(self.max_delay, self.base_delay * (2 ** (self._failures - 1)))
+                    self._next_attempt = time.time() + delay
+                    self._last_error = detail
+                    log_warning(f"Journal de recebimento: falha ao sincronizar a carga {action['cargo_code']} "
+                                f"({detail}); nova tentativa em {delay:.1f}s")
+                self._cond.notify_all()
+
+    def _send(self, action: Dict[str, Any], token: str) -> tuple:
+        """
+        Envia uma ação à API
+
+        Returns:
+            (SYNCED, cargo_id), (CONFLICT, mensagem) ou (PENDING, erro temporário)
+        """
+        headers = {'Authorization': f'Bearer {token}', 'Idempotency-Key': action['idempotency_key']}
+        try:
+            cargo_id = action['cargo_id']
+            if cargo_id is None:
+                # Registrado sem a API: a carga é localizada pelo código
+                response = self.api_client.get('/cargos/pending-physical-receipt', headers=headers,
+                                               params={'code': action['cargo_code'], 'per_page': 1})
+                if response.status_code >= 500 or response.status_code in RETRY_STATUS:
+                    return PENDING, f"HTTP {response.status_code}"
+                cargas = (response.json() or {}).get('data') if response.status_code == 200 else None
+                if not cargas:
+                    return CONFLICT, "Carga não encontrada ou já recebida"
+                cargo_id = str(cargas[0]['id'])
+
+            response = self.api_client.post(f'/cargos/{cargo_id}/receive-physically',
+                                            data=json.loads(action['payload']), headers=headers)
+        except Exception as e:
+            return PENDING, str(e)
+
+        if response.status_code >= 500 or response.status_code in RETRY_STATUS:
+            return PENDING, f"HTTP {response.status_code}"
+        try:
+            body = response.json() or {}
+        except Exception:
+            body = {}
+        if response.status_code == 200 and body.get('success'):
+            return SYNCED, cargo_id
+        return CONFLICT, body.get('message') or f"HTTP {response.status_code}"
+
+    def _update(self, seq: int, **fields):
+        columns = ', '.join(f"{name} = ?" for name in fields)
+        with self._conn:
+            self._conn.execute(f"UPDATE receive_actions SET {columns} WHERE seq = ?",
+                               (*fields.values(), seq))
+
+    def _set_state(self, key: str, state: str, allowed: tuple) -> bool:
+        with self._cond:
+            placeholders = ', '.join('?' for _ in allowed)
+            with self._conn:
+                changed = self._conn.execute(
+                    f"UPDATE receive_actions SET state = ? WHERE idempotency_key = ? AND state IN ({placeholders})",
+                    (state, key, *allowed)).rowcount
+            self._cond.notify_all()
+        return bool(changed)
+
+
+_journal: Optional[ReceivingJournal] = None
+_journal_lock = threading.Lock()
+
+
+def get_receiving_journal() -> ReceivingJournal:
+    """
+    Retorna o journal de recebimento do processo, iniciando a sincronização no primeiro uso
+
+    Returns:
+        ReceivingJournal com o banco da seção 'receiving_journal' do settings.json
+    """
+    global _journal
+    with _journal_lock:
+        if _journal is None:
+            from utils.config import load_config
+
+            journal_config = load_config().get('receiving_journal', {})
+            project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+            database = journal_config.get('database', 'spool/receiving.db')
+            if not os.path.isabs(database):
+                database = os.path.join(project_root, database)
+            _journal = ReceivingJournal(database,
+                                        base_delay=float(journal_config.get('base_delay', 1)),
+                                        max_delay=float(journal_config.get('max_delay', 60)))
+            _journal.start()
+        return _journal
+
+
+def receiving_journal_enabled() -> bool:
+    """True se a seção 'receiving_journal' do settings.json habilita o recebimento offline"""
+    from utils.config import load_config
+
+    return bool(load_config().get('receiving_journal', {}).get('enabled', False))
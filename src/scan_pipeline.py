@@ -0,0 +1,336 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Recebimento contínuo por scanner
+Cada leitura entra em uma fila em memória: a busca da carga pendente roda em
+um pool de threads e as cargas encontradas são aceitas em lotes por uma
+thread de envio, enquanto o operador continua lendo. Leituras repetidas
+(duplo disparo do scanner ou carga já aceita) são descartadas
+"""
+
+import queue
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from utils.logger import log_info, log_error, log_throttled
+
+# Estados de uma leitura
+QUEUED = 'queued'
+ACCEPTED = 'accepted'
+NOT_FOUND = 'not_found'
+FAILED = 'failed'
+
+# Evento de carga aceita pela API cuja etiqueta não foi impressa (on_accepted falhou)
+PRINT_FAILED = 'print_failed'
+
+# Endpoint de aceite em lote (sem ele, uma requisição por carga)
+BATCH_ENDPOINT = '/cargos/receive-physically/batch'
+
+# Janela do contador de leituras por minuto (segundos)
+RATE_WINDOW = 60.0
+
+
+class ScanPipeline:
+    """Fila de leituras com busca em paralelo e aceite em lotes"""
+
+    def __init__(self, api_client, token: str, payload: Dict[str, Any], lookup_workers: int = 4,
+                 batch_size: int = 20, batch_wait: float = 0.5, dedupe_seconds: float = 5.0,
+                 use_batch_endpoint: bool = True, journal=None,
+                 on_accepted: Optional[Callable[[List[Tuple[str, Dict[str, Any]]]], None]] = None):
+        """
+        Inicializa o pipeline e a thread de envio
+
+        Args:
+            api_client: Cliente da API
+            token: Token de autenticação
+            payload: Dados do aceite (warehouse_id, area_id, action...) aplicados a todas as cargas
+            lookup_workers: Buscas simultâneas de cargas
+            batch_size: Máximo de cargas por envio
+            batch_wait: Segundos aguardando mais cargas antes de enviar um lote incompleto
+            dedupe_seconds: Leituras do mesmo código dentro deste intervalo são descartadas
+            use_batch_endpoint: Tentar o endpoint de aceite em lote
+            journal: ReceivingJournal que grava os aceites para sincronização posterior (None = envio direto)
+            on_accepted: Callback com [(código, carga)] de cada lote aceito, chamado na thread de envio
+        """
+        self.api_client = api_client
+        self.token = token
+        self.payload = dict(payload)
+        self.batch_size = max(1, int(batch_size))
+        self.batch_wait = max(0.0, float(batch_wait))
+        self.dedupe_seconds = float(dedupe_seconds)
+        self.use_batch_endpoint = use_batch_endpoint
+        self.journal = journal
+        self.on_accepted = on_accepted
+
+        self._lock = threading.Lock()
+        self._status: Dict[str, str] = {}
+        self._last_scan: Dict[str, float] = {}
+        self._scan_times: deque = deque()
+        self._started = time.monotonic()
+        self._lookups_pending = 0
+        self._ready: queue.Queue = queue.Queue()
+        self._events: queue.Queue = queue.Queue()
+        self._stopping = threading.Event()
+        self._lookups = ThreadPoolExecutor(max_workers=max(1, int(lookup_workers)),
+                                           thread_name_prefix='scan-lookup')
+        self.counters = {'scans': 0, 'duplicates': 0, 'accepted': 0, 'not_found': 0, 'failed': 0,
+                         'print_failed': 0, 'batches': 0}
+
+        self._submitter = threading.Thread(target=self._submit_loop, name='scan-submit', daemon=True)
+        self._submitter.start()
+
+    @property
+    def running(self) -> bool:
+        """True enquanto houver leituras a buscar ou enviar (ou o modo não foi encerrado)"""
+        return self._submitter.is_alive()
+
+    @property
+    def headers(self) -> Dict[str, str]:
+        return {'Authorization': f'Bearer {self.token}'}
+
+    def scan(self, code: str) -> bool:
+        """
+        Registra uma leitura do scanner (retorna imediatamente)
+
+        Args:
+            code: Código lido
+
+        Returns:
+            True se a leitura entrou na fila; False se descartada (duplicada ou pipeline parado)
+        """
+        code = code.strip()
+        if not code or self._stopping.is_set():
+            return False
+
+        now = time.monotonic()
+        with self._lock:
+            self._scan_times.append(now)
+            self.counters['scans'] += 1
+            status = self._status.get(code)
+            last = self._last_scan.get(code)
+            self._last_scan[code] = now
+            if status in (QUEUED, ACCEPTED) or (last is not None and now - last < self.dedupe_seconds):
+                self.counters['duplicates'] += 1
+                duplicate = True
+            else:
+                self._status[code] = QUEUED
+                self._lookups_pending += 1
+                duplicate = False
+
+        if duplicate:
+            self._events.put(('duplicate', code, status))
+            return False
+
+        self._events.put(('queued', code, None))
+        try:
+            self._lookups.submit(self._lookup, code)
+        except RuntimeError:
+            # Pipeline parado entre a verificação e o envio ao pool
+            with self._lock:
+                self._lookups_pending -= 1
+            self._finish(code, FAILED, "Modo contínuo encerrado")
+            return False
+        return True
+
+    def drain_events(self) -> List[Tuple[str, str, Any]]:
+        """Eventos (tipo, código, detalhe) ocorridos desde a última chamada, para a interface"""
+        events = []
+        while True:
+            try:
+                events.append(self._events.get_nowait())
+            except queue.Empty:
+                return events
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Contadores, leituras pendentes e leituras por minuto (últimos 60s)"""
+        now = time.monotonic()
+        with self._lock:
+            while self._scan_times and now - self._scan_times[0] > RATE_WINDOW:
+                self._scan_times.popleft()
+            window = min(RATE_WINDOW, max(now - self._started, 1.0))
+            stats = dict(self.counters)
+            stats['pending'] = sum(1 for status in self._status.values() if status == QUEUED)
+            stats['scans_per_minute'] = round(len(self._scan_times) * 60.0 / window, 1)
+        return stats
+
+    def stop(self, wait: bool = True, timeout: Optional[float] = None):
+        """
+        Para de aceitar leituras; as já enfileiradas ainda são buscadas e enviadas
+
+        Args:
+            wait: Aguardar o envio das pendentes
+            timeout: Limite da espera em segundos
+        """
+        self._stopping.set()
+        self._lookups.shutdown(wait=False)
+        if wait:
+            self._submitter.join(timeout)
+
+    # ----- Threads de busca e envio -----
+
+    def _lookup(self, code: str):
+        try:
+            response = self.api_client.get('/cargos/pending-physical-receipt', headers=self.headers,
+                                           params={'code': code, 'per_page': 1})
+            cargo = None
+            if response.status_code == 200:
+                result = response.json()
+                if result.get('success') and result.get('data'):
+                    cargo = result['data'][0]
+            elif response.status_code != 404:
+                raise RuntimeError(f"HTTP {response.status_code}")
+
+            if cargo:
+                self._ready.put((code, cargo))
+            else:
+                self._finish(code, NOT_FOUND, "Carga não encontrada ou já recebida")
+        except Exception as e:
+            log_throttled('scan-lookup-error', f"Leitura {code}: erro ao buscar carga: {e}", cargo_code=code)
+            self._finish(code, FAILED, f"Erro na busca: {e}")
+        finally:
+            with self._lock:
+                self._lookups_pending -= 1
+
+    def _submit_loop(self):
+        while True:
+            try:
+                batch = [self._ready.get(timeout=0.1)]
+            except queue.Empty:
+                with self._lock:
+                    idle = self._lookups_pending == 0
+                if self._stopping.is_set() and idle and self._ready.empty():
+                    return
+                continue
+
+            deadline = time.monotonic() + self.batch_wait
+            while len(batch) < self.batch_size:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    batch.append(self._ready.get(timeout=remaining))
+                except queue.Empty:
+                    break
+
+            try:
+                results = self._submit(batch)
+            except Exception as e:
+                log_error(f"Erro ao enviar lote de {len(batch)} carga(s): {e}")
+                results = {code: str(e) for code, _ in batch}
+
+            accepted = []
+            for code, cargo in batch:
+                error = results.get(code)
+                if error is None:
+                    accepted.append((code, cargo))
+                    self._finish(code, ACCEPTED, cargo)
+                else:
+                    self._finish(code, FAILED, error)
+            with self._lock:
+                self.counters['batches'] += 1
+
+            if accepted and self.on_accepted:
+                try:
+                    self.on_accepted(accepted)
+                except Exception as e:
+                    # A carga continua aceita; o operador precisa reimprimir a etiqueta
+                    log_error(f"Erro após aceite de {len(accepted)} carga(s): {e}")
+                    with self._lock:
+                        self.counters[PRINT_FAILED] += len(accepted)
+                    for code, _ in accepted:
+                        self._events.put((PRINT_FAILED, code, str(e)))
+
+    def _submit(self, batch: List[Tuple[str, Dict[str, Any]]]) -> Dict[str, Optional[str]]:
+        """
+        Aceita as cargas do lote
+
+        Returns:
+            Dict código -> None (aceita) ou mensagem de erro
+        """
+        if self.journal is not None:
+            # Aceite gravado na estação; a API recebe pela sincronização do journal
+            for code, cargo in batch:
+                self.journal.record(cargo['id'], cargo.get('code') or code, self.payload)
+            return {code: None for code, _ in batch}
+
+        if self.use_batch_endpoint:
+            items = [dict(self.payload, cargo_id=cargo['id']) for _, cargo in batch]
+            response = self.api_client.post(BATCH_ENDPOINT, data={'items': items}, headers=self.headers)
+            if response.status_code in (404, 405):
+                log_info("Aceite em lote não disponível na API; enviando uma carga por vez")
+                self.use_batch_endpoint = False
+            elif response.status_code == 200:
+                body = response.json() or {}
+                by_id = {str(item.get('cargo_id')): item
+                         for item in (body.get('data') or {}).get('results', [])}
+                results = {}
+                for code, cargo in batch:
+                    item = by_id.get(str(cargo['id']))
+                    if item is None:
+                        results[code] = "Carga ausente na resposta do lote"
+                    else:
+                        results[code] = None if item.get('success') else item.get('message', 'Recusada pela API')
+                log_info(f"Lote de {len(batch)} carga(s) enviado em uma requisição")
+                return results
+            else:
+                return {code: f"HTTP {response.status_code}" for code, _ in batch}
+
+        results = {}
+        for code, cargo in batch:
+            try:
+                response = self.api_client.post(f"/cargos/{cargo['id']}/receive-physically",
+                                                data=self.payload, headers=self.headers)
+                if response.status_code == 200 and (response.json() or {}).get('success'):
+                    results[code] = None
+                else:
+                    results[code] = self._error_message(response)
+            except Exception as e:
+                results[code] = str(e)
+        return results
+
+    @staticmethod
+    def _error_message(response) -> str:
+        try:
+            return (response.json() or {}).get('message') or f"HTTP {response.status_code}"
+        except Exception:
+            return f"HTTP {response.status_code}"
+
+    def _finish(self, code: str, status: str, detail: Any):
+        with self._lock:
+            self._status[code] = status
+            self.counters[status] += 1
+        if status == FAILED:
+            log_throttled('scan-failed', f"Leitura {code}: {detail}", cargo_code=code)
+        self._events.put((status, code, detail))
+
+
+def create_scan_pipeline(api_client, token: str, payload: Dict[str, Any],
+                         on_accepted: Optional[Callable] = None, journal=None) -> ScanPipeline:
+    """
+    Cria o pipeline com a seção 'scan_mode' do settings.json
+
+    Args:
+        api_client: Cliente da API
+        token: Token de autenticação
+        payload: Dados do aceite aplicados a todas as cargas
+        on_accepted: Callback com [(código, carga)] de cada lote aceito
+        journal: ReceivingJournal para aceites offline-first (None = envio direto)
+
+    Returns:
+        ScanPipeline em execução
+    """
+    from utils.config import load_config
+
+    scan_config = load_config().get('scan_mode', {})
+    return ScanPipeline(api_client, token, payload,
+                        lookup_workers=int(scan_config.get('lookup_workers', 4)),
+                        batch_size=int(scan_config.get('batch_size', 20)),
+                        batch_wait=float(scan_config.get('batch_wait', 0.5)),
+                        dedupe_seconds=float(scan_config.get('dedupe_seconds', 5)),
+                        use_batch_endpoint=bool(scan_config.get('batch_endpoint', True)),
+                        journal=journal,
+                        on_accepted=on_accepted)
@@ -9,7 +9,7 @@ Permite selecionar galpão, impressora e imprimir etiquetas por andar ou individ
 import tkinter as tk
 from tkinter import ttk, messagebox, scrolledtext
 import requests
-from typing import Dict, List, Any
+from typing import Dict, List, Any, Tuple
 import sys
 import os
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
@@ -20,6 +20,15 @@ from printer.label_printer import LabelPrinter
 from utils.logger import log_info, log_error
 from utils.config import load_config
 from utils.printer_config import printer_config
+from utils.job_runner import job_runner
+from api.warehouse_cache import get_warehouse_cache
+from api.reference_data import get_reference_store, ReferenceDataError
+from ui.address_tree import AddressTreeModel, COLUMNS as ADDRESS_COLUMNS
+from printer.fanout import PrintUnit, create_fanout_printer
+
+# Máximo de linhas exibidas para uma busca
+FILTER_LIMIT = 500
+
 
 class AddressLabelsWindow:
     """Janela para impressão de etiquetas de endereçamento"""
@@ -41,7 +50,8 @@ class AddressLabelsWindow:
         # Managers
         self.address_manager = AddressManager()
         self.zpl_generator = ZplGenerator()
-        # Não criar LabelPrinter aqui - será criado quando necessário
+        # Não criar LabelPrinter aqui - será criado quando necessário (um por impressora)
+        self._label_printers = {}
         
         # Criar janela PRIMEIRO (antes de criar qualquer variável Tkinter)
         self.window = tk.Toplevel(parent)
@@ -56,6 +66,11 @@ class AddressLabelsWindow:
         self.organized_data = []  # Dados organizados por andar
         self.organized_blocks = []  # Dados organizados por bloco (posição vertical)
         self.print_mode = 'block'  # Modo de impressão: 'floor' ou 'block'
+        self.structure_job = None
+        self.print_job = None
+        self.address_model = AddressTreeModel([])
+        self._filter_after_id = None
+        self.fanout_printers = []  # Impressoras escolhidas para a distribuição
         
         self._create_widgets()
         self._load_initial_data()
@@ -119,6 +134,10 @@ class AddressLabelsWindow:
                                           command=self._print_all, style='Accent.TButton')
         self.print_all_button.pack(side=tk.LEFT, padx=(0, 10))
         
+        self.fanout_var = tk.BooleanVar(self.window, value=False)
+        ttk.Checkbutton(button_frame, text="🔀 Distribuir entre impressoras",
+                        variable=self.fanout_var).pack(side=tk.LEFT, padx=(0, 10))
+        
         self.mode_description_label = ttk.Label(button_frame, text="", foreground='gray')
         self.mode_description_label.pack(side=tk.LEFT)
         self._update_mode_description()
@@ -127,38 +146,54 @@ class AddressLabelsWindow:
         list_frame = ttk.LabelFrame(main_frame, text="Endereços do Galpão", padding="10")
         list_frame.grid(row=3, column=0, columnspan=2, sticky=(tk.W, tk.E, tk.N, tk.S))
         
-        # Criar frame com canvas e scrollbar para os botões
-        canvas_frame = ttk.Frame(list_frame)
-        canvas_frame.pack(fill=tk.BOTH, expand=True)
+        # Busca por endereço/nome (índice do AddressManager)
+        filter_frame = ttk.Frame(list_frame)
+        filter_frame.pack(fill=tk.X, pady=(0, 5))
         
-        # Canvas e scrollbar
-        self.canvas = tk.Canvas(canvas_frame, borderwidth=0, highlightthickness=0)
-        scrollbar = ttk.Scrollbar(canvas_frame, orient="vertical", command=self.canvas.yview)
-        self.scrollable_frame = ttk.Frame(self.canvas)
+        ttk.Label(filter_frame, text="Buscar:").pack(side=tk.LEFT, padx=(0, 5))
+        self.filter_var = tk.StringVar(self.window)
+        filter_entry = ttk.Entry(filter_frame, textvariable=self.filter_var, width=40)
+        filter_entry.pack(side=tk.LEFT)
+        filter_entry.bind('<KeyRelease>', self._on_filter_changed)
         
-        self.scrollable_frame.bind(
-            "<Configure>",
-            lambda e: self.canvas.configure(scrollregion=self.canvas.bbox("all"))
-        )
+        self.filter_info_label = ttk.Label(filter_frame, text="", foreground='gray')
+        self.filter_info_label.pack(side=tk.LEFT, padx=(10, 0))
+        
+        ttk.Button(filter_frame, text="🖨 Imprimir Selecionado",
+                   command=self._print_selected).pack(side=tk.RIGHT)
+        
+        # Treeview: prédio > andar > palete, níveis montados ao expandir
+        tree_frame = ttk.Frame(list_frame)
+        tree_frame.pack(fill=tk.BOTH, expand=True)
+        
+        self.address_tree = ttk.Treeview(tree_frame, columns=ADDRESS_COLUMNS, show='tree headings')
+        self.address_tree.heading('#0', text='Endereço')
+        self.address_tree.heading('name', text='Palete')
+        self.address_tree.heading('location', text='Prédio / Andar')
+        self.address_tree.heading('status', text='Status')
+        self.address_tree.column('#0', width=320)
+        self.address_tree.column('name', width=200)
+        self.address_tree.column('location', width=300)
+        self.address_tree.column('status', width=100)
         
-        self.canvas.create_window((0, 0), window=self.scrollable_frame, anchor="nw")
-        self.canvas.configure(yscrollcommand=scrollbar.set)
+        tree_scroll = ttk.Scrollbar(tree_frame, orient='vertical', command=self.address_tree.yview)
+        self.address_tree.configure(yscrollcommand=tree_scroll.set)
         
-        self.canvas.pack(side="left", fill="both", expand=True)
-        scrollbar.pack(side="right", fill="y")
+        self.address_tree.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
+        tree_scroll.pack(side=tk.RIGHT, fill=tk.Y)
         
-        # Bind mouse wheel
-        self.canvas.bind_all("<MouseWheel>", self._on_mousewheel)
+        self.address_tree.bind('<<TreeviewOpen>>', self._on_tree_open)
+        self.address_tree.bind('<Double-1>', lambda e: self._print_selected())
+        self.address_tree.bind('<Return>', lambda e: self._print_selected())
+        
+        ttk.Label(list_frame, text="Duplo clique: andar imprime o andar completo, palete imprime a etiqueta individual",
+                  foreground='gray', font=('TkDefaultFont', 8)).pack(anchor=tk.W, pady=(5, 0))
         
         # ===== Status =====
         self.status_label = ttk.Label(main_frame, text="Selecione um galpão para começar", 
                                      foreground='blue')
         self.status_label.grid(row=4, column=0, columnspan=2, sticky=tk.W, pady=(10, 0))
     
-    def _on_mousewheel(self, event):
-        """Handler para scroll com mouse wheel"""
-        self.canvas.yview_scroll(int(-1*(event.delta/120)), "units")
-    
     def _on_mode_changed(self):
         """Callback quando o modo de impressão é alterado"""
         self._update_mode_description()
@@ -181,17 +216,12 @@ class AddressLabelsWindow:
         self._load_printers()
     
     def _load_warehouses(self):
-        """Carrega lista de galpões da API"""
-        try:
-            self.status_label.config(text="Carregando galpões...", foreground='blue')
-            self.window.update()
-            
-            # Buscar galpões da API com autenticação
-            headers = {'Authorization': f'Bearer {self.user_session.token}'}
-            response = self.api_client.get('/warehouses/select', headers=headers)
-            
-            if response.status_code == 200:
-                result = response.json()
+        """Carrega lista de galpões da API (em segundo plano)"""
+        self.status_label.config(text="Carregando galpões...", foreground='blue')
+        
+        def on_success(outcome):
+            status_code, result = outcome
+            if status_code == 200:
                 if result.get('success') and result.get('data'):
                     warehouses_data = result.get('data', [])
                     self.warehouses = warehouses_data
@@ -210,13 +240,29 @@ class AddressLabelsWindow:
                     self.status_label.config(text="Erro ao carregar galpões", foreground='red')
                     messagebox.showerror("Erro", "Não foi possível carregar a lista de galpões")
             else:
-                self.status_label.config(text=f"Erro HTTP {response.status_code}", foreground='red')
-                messagebox.showerror("Erro", f"Erro ao carregar galpões: HTTP {response.status_code}")
-                
-        except Exception as e:
+                self.status_label.config(text=f"Erro HTTP {status_code}", foreground='red')
+                messagebox.showerror("Erro", f"Erro ao carregar galpões: HTTP {status_code}")
+        
+        def on_error(e):
             log_error(f"Erro ao carregar galpões: {str(e)}")
             self.status_label.config(text=f"Erro: {str(e)}", foreground='red')
             messagebox.showerror("Erro", f"Erro ao carregar galpões:\n{str(e)}")
+        
+        job_runner.submit(self.window, self._fetch_warehouses, on_success=on_success, on_error=on_error)
+    
+    def _fetch_warehouses(self, job):
+        """
+        Busca os galpões no store compartilhado (pré-carregados após o login)
+        
+        Returns:
+            Tupla (status_code, resultado JSON ou None)
+        """
+        try:
+            return 200, get_reference_store().get('warehouses', token=self.user_session.token)
+        except ReferenceDataError as e:
+            if e.status_code is None:
+                raise
+            return e.status_code, None
     
     def _load_printers(self):
         """Carrega lista de impressoras disponíveis"""
@@ -262,7 +308,6 @@ class AddressLabelsWindow:
         
         self.status_label.config(text=f"Carregando estrutura do galpão {selected_warehouse['code']}...", 
                                foreground='blue')
-        self.window.update()
         
         self._load_warehouse_structure(self.current_warehouse_id)
     
@@ -273,92 +318,150 @@ class AddressLabelsWindow:
         Args:
             warehouse_id: ID do galpão
         """
-        try:
-            # Buscar estrutura completa da API com autenticação
-            headers = {'Authorization': f'Bearer {self.user_session.token}'}
-            response = self.api_client.get(f'/warehouses/{warehouse_id}', headers=headers)
-            
-            if response.status_code == 200:
-                result = response.json()
-                if result.get('success'):
-                    # Carregar no AddressManager
-                    if self.address_manager.load_warehouse_data(result):
-                        # Organizar dados por andar E por bloco
-                        self.organized_data = self.address_manager.organize_addresses_by_floor()
-                        self.organized_blocks = self.address_manager.organize_addresses_by_block()
-                        
-                        # Exibir endereços
-                        self._display_addresses()
-                        
-                        total_pallets = sum(len(floor['pallets']) for floor in self.organized_data)
-                        self.status_label.config(
-                            text=f"Galpão carregado: {len(self.organized_data)} andar(es), {len(self.organized_blocks)} bloco(s), {total_pallets} palete(s)", 
-                            foreground='green'
-                        )
-                    else:
-                        self.status_label.config(text="Erro ao processar dados do galpão", foreground='red')
-                else:
-                    self.status_label.config(text="Erro ao carregar estrutura do galpão", foreground='red')
-                    messagebox.showerror("Erro", "Não foi possível carregar a estrutura do galpão")
-            else:
-                self.status_label.config(text=f"Erro HTTP {response.status_code}", foreground='red')
-                messagebox.showerror("Erro", f"Erro ao carregar estrutura: HTTP {response.status_code}")
+        if self.structure_job and not self.structure_job.done():
+            # Troca de galpão: o resultado anterior não interessa mais
+            self.structure_job.cancel()
+        
+        def on_success(outcome):
+            if warehouse_id != self.current_warehouse_id:
+                return
+            status, detail = outcome
+            if status == 'ok':
+                self.address_manager, self.organized_data, self.organized_blocks = detail
                 
-        except Exception as e:
+                # Exibir endereços
+                self._display_addresses()
+                
+                total_pallets = sum(len(floor['pallets']) for floor in self.organized_data)
+                self.status_label.config(
+                    text=f"Galpão carregado: {len(self.organized_data)} andar(es), {len(self.organized_blocks)} bloco(s), {total_pallets} palete(s)", 
+                    foreground='green'
+                )
+            elif status == 'invalid':
+                self.status_label.config(text="Erro ao processar dados do galpão", foreground='red')
+            elif status == 'failed':
+                self.status_label.config(text="Erro ao carregar estrutura do galpão", foreground='red')
+                messagebox.showerror("Erro", "Não foi possível carregar a estrutura do galpão")
+            else:
+                self.status_label.config(text=f"Erro HTTP {detail}", foreground='red')
+                messagebox.showerror("Erro", f"Erro ao carregar estrutura: HTTP {detail}")
+        
+        def on_error(e):
+            if warehouse_id != self.current_warehouse_id:
+                return
             log_error(f"Erro ao carregar estrutura: {str(e)}")
             self.status_label.config(text=f"Erro: {str(e)}", foreground='red')
             messagebox.showerror("Erro", f"Erro ao carregar estrutura:\n{str(e)}")
+        
+        self.structure_job = job_runner.submit(self.window, self._fetch_warehouse_structure, warehouse_id,
+                                               on_success=on_success, on_error=on_error)
     
-    def _display_addresses(self):
-        """Exibe os endereços organizados por andar com botões"""
+    def _fetch_warehouse_structure(self, job, warehouse_id: int):
+        """
+        Busca e organiza a estrutura do galpão (em segundo plano)
+        
+        Returns:
+            Tupla (status, detalhe): ('ok', (AddressManager, andares, blocos)), ('invalid', None),
+            ('failed', None) ou ('http', status_code)
+        """
+        # Buscar estrutura completa da API com autenticação
+        headers = {'Authorization': f'Bearer {self.user_session.token}'}
+        cache = get_warehouse_cache()
+        if cache:
+            # Cópia em disco revalidada na API (304 / mesma versão = sem novo download)
+            status_code, result, source = cache.fetch(self.api_client, warehouse_id,
+                                                      self.user_session.get_company_id(), headers)
+            job.check_cancelled()
+            if status_code != 200:
+                return 'http', status_code
+            log_info(f"Estrutura do galpão {warehouse_id} obtida de: {source}")
+        else:
+            response = self.api_client.get(f'/warehouses/{warehouse_id}', headers=headers)
+            job.check_cancelled()
+            
+            if response.status_code != 200:
+                return 'http', response.status_code
+            
+            result = response.json()
         
-        # Limpar frame anterior
-        for widget in self.scrollable_frame.winfo_children():
-            widget.destroy()
+        if not result.get('success'):
+            return 'failed', None
         
-        if not self.organized_data:
-            ttk.Label(self.scrollable_frame, text="Nenhum endereço encontrado", 
-                     foreground='gray').pack(pady=20)
+        # Carregar no AddressManager e organizar dados por andar E por bloco
+        address_manager = AddressManager()
+        if not address_manager.load_warehouse_data(result):
+            return 'invalid', None
+        
+        organized_data = address_manager.organize_addresses_by_floor()
+        organized_blocks = address_manager.organize_addresses_by_block()
+        job.check_cancelled()
+        
+        return 'ok', (address_manager, organized_data, organized_blocks)
+    
+    def _display_addresses(self):
+        """Exibe os prédios na Treeview (andares e paletes são montados ao expandir)"""
+        self.address_model = AddressTreeModel(self.organized_data, self.address_manager)
+        self._apply_filter()
+    
+    def _show_tree_rows(self, rows):
+        """Substitui o conteúdo da Treeview pelas linhas informadas"""
+        tree = self.address_tree
+        tree.delete(*tree.get_children())
+        for iid, text, values, lazy in rows:
+            tree.insert('', 'end', iid=iid, text=text, values=values)
+            if lazy:
+                tree.insert(iid, 'end', iid=f"{iid}:_")  # Marcador: filhos ainda não montados
+    
+    def _on_tree_open(self, event=None):
+        """Monta os filhos do nó expandido na primeira abertura"""
+        tree = self.address_tree
+        iid = tree.focus()
+        placeholder = f"{iid}:_"
+        if not iid or not tree.exists(placeholder):
+            return
+        tree.delete(placeholder)
+        for child, text, values, lazy in self.address_model.children(iid):
+            tree.insert(iid, 'end', iid=child, text=text, values=values)
+            if lazy:
+                tree.insert(child, 'end', iid=f"{child}:_")
+    
+    def _on_filter_changed(self, event=None):
+        """Aplica a busca após uma pausa na digitação"""
+        if self._filter_after_id is not None:
+            self.window.after_cancel(self._filter_after_id)
+        self._filter_after_id = self.window.after(250, self._apply_filter)
+    
+    def _apply_filter(self):
+        """Mostra a árvore completa (sem busca) ou a lista plana dos paletes encontrados"""
+        self._filter_after_id = None
+        query = self.filter_var.get().strip()
+        
+        if not query:
+            self._show_tree_rows(self.address_model.root_rows())
+            self.filter_info_label.config(text="")
             return
         
-        # Organizar por prédio e andar
-        for floor_data in self.organized_data:
-            # Frame para cada andar
-            floor_frame = ttk.LabelFrame(
-                self.scrollable_frame, 
-                text=f"{floor_data['building_name']} - {floor_data['floor_name']} ({len(floor_data['pallets'])} paletes)",
-                padding="10"
-            )
-            floor_frame.pack(fill=tk.X, padx=5, pady=5)
-            
-            # Botão para imprimir andar completo (MODELO 01)
-            floor_btn = ttk.Button(
-                floor_frame,
-                text=f"🖨 Imprimir Andar Completo ({floor_data['floor_name']})",
-                command=lambda fd=floor_data: self._print_floor(fd)
-            )
-            floor_btn.pack(fill=tk.X, pady=(0, 10))
-            
-            # Grid de botões para paletes individuais (MODELO 02)
-            pallets_frame = ttk.Frame(floor_frame)
-            pallets_frame.pack(fill=tk.X)
-            
-            # Criar botões em grid (3 colunas)
-            for idx, pallet in enumerate(floor_data['pallets']):
-                row = idx // 3
-                col = idx % 3
-                
-                pallet_btn = ttk.Button(
-                    pallets_frame,
-                    text=f"{pallet['full_address']}\n{pallet['name']}",
-                    command=lambda fd=floor_data, p=pallet: self._print_single_pallet(fd, p),
-                    width=30
-                )
-                pallet_btn.grid(row=row, column=col, padx=5, pady=5, sticky=(tk.W, tk.E))
-            
-            # Configurar colunas para expandir
-            for col in range(3):
-                pallets_frame.columnconfigure(col, weight=1)
+        rows, truncated = self.address_model.filter_rows(query, FILTER_LIMIT)
+        self._show_tree_rows(rows)
+        if truncated:
+            self.filter_info_label.config(text=f"Mostrando os primeiros {FILTER_LIMIT} resultados - refine a busca")
+        else:
+            self.filter_info_label.config(text=f"{len(rows)} endereço(s) encontrado(s)")
+    
+    def _print_selected(self):
+        """Imprime o item selecionado: andar completo (MODELO 01) ou palete (MODELO 02)"""
+        selection = self.address_tree.selection()
+        if not selection:
+            messagebox.showwarning("Aviso", "Selecione um andar ou palete na lista")
+            return
+        
+        kind, floor_data, pallet = self.address_model.resolve(selection[0])
+        if kind == 'floor':
+            self._print_floor(floor_data)
+        elif kind == 'pallet':
+            self._print_single_pallet(floor_data, pallet)
+        else:
+            messagebox.showinfo("Aviso", "Expanda o prédio e selecione um andar ou palete")
     
     def _print_zpl(self, zpl: str, printer_name: str) -> bool:
         """
@@ -378,8 +481,12 @@ class AddressLabelsWindow:
                 log_error(f"Impressora não encontrada: {printer_name}")
                 return False
             
-            # Criar LabelPrinter com a impressora selecionada
-            printer = LabelPrinter(printer_id=printer_id)
+            # Reaproveitar o LabelPrinter da impressora: com o pool de conexões,
+            # todas as etiquetas do lote seguem pelo mesmo socket
+            printer = self._label_printers.get(printer_id)
+            if printer is None:
+                printer = LabelPrinter(printer_id=printer_id)
+                self._label_printers[printer_id] = printer
             
             # Enviar job de impressão
             return printer.send_print_job(zpl, quantity=1)
@@ -392,7 +499,9 @@ class AddressLabelsWindow:
         """Imprime todas as etiquetas de acordo com o modo selecionado"""
         mode = self.mode_var.get()
         
-        if mode == 'block':
+        if self.fanout_var.get():
+            self._print_all_distributed(mode)
+        elif mode == 'block':
             self._print_all_blocks()
         else:
             self._print_all_floors()
@@ -414,38 +523,18 @@ class AddressLabelsWindow:
                                    f"Deseja imprimir {total_labels} etiqueta(s) para {total_blocks} posição(ões) vertical(is)?"):
             return
         
-        try:
-            printer_name = self.printer_var.get()
-            success_count = 0
-            error_count = 0
-            
-            self.status_label.config(text="Imprimindo etiquetas de blocos...", foreground='blue')
-            self.window.update()
-            
-            for block_data in self.organized_blocks:
-                # Dividir endereços em grupos de 8 (máximo por etiqueta)
-                addresses = block_data['addresses']
-                groups = []
-                for i in range(0, len(addresses), 8):
-                    groups.append(addresses[i:i+8])
-                
-                # Imprimir cada grupo
-                for group in groups:
-                    try:
-                        zpl = self.zpl_generator.build_block_addresses_zpl(
-                            warehouse_code=block_data['warehouse_code'],
-                            warehouse_name=block_data['warehouse_name'],
-                            building_name=block_data['building_name'],
-                            addresses_by_position=group
-                        )
-                        
-                        if self._print_zpl(zpl, printer_name):
-                            success_count += 1
-                        else:
-                            error_count += 1
-                    except Exception as e:
-                        log_error(f"Erro ao imprimir bloco {block_data['position_group']}: {str(e)}")
-                        error_count += 1
+        if self.print_job and not self.print_job.done():
+            return
+        
+        printer_name = self.printer_var.get()
+        blocks = list(self.organized_blocks)
+        
+        self.status_label.config(text="Imprimindo etiquetas de blocos...", foreground='blue')
+        self.print_all_button.config(state=tk.DISABLED)
+        
+        def on_success(counts):
+            self.print_all_button.config(state=tk.NORMAL)
+            success_count, error_count = counts
             
             # Mensagem final
             if error_count == 0:
@@ -463,11 +552,173 @@ class AddressLabelsWindow:
                 messagebox.showwarning("Aviso", 
                                       f"Impressão concluída com erros:\n"
                                       f"Sucesso: {success_count}\nErros: {error_count}")
-                
-        except Exception as e:
+        
+        def on_error(e):
+            self.print_all_button.config(state=tk.NORMAL)
             log_error(f"Erro na impressão em lote de blocos: {str(e)}")
             self.status_label.config(text=f"Erro: {str(e)}", foreground='red')
             messagebox.showerror("Erro", f"Erro na impressão:\n{str(e)}")
+        
+        self.print_job = job_runner.submit(self.window, self._run_print_blocks, blocks, printer_name, total_labels,
+                                           on_success=on_success, on_error=on_error,
+                                           on_progress=self._show_print_progress)
+    
+    def _run_print_blocks(self, job, blocks: List[Dict[str, Any]], printer_name: str, total_labels: int):
+        """Gera e envia as etiquetas de bloco (em segundo plano)"""
+        success_count = 0
+        error_count = 0
+        
+        for block_data in blocks:
+            try:
+                labels = self._block_labels(block_data)
+            except Exception as e:
+                log_error(f"Erro ao gerar etiquetas do bloco {block_data['position_group']}: {str(e)}")
+                labels = []
+                error_count += (len(block_data['addresses']) + 7) // 8
+            
+            # Imprimir cada grupo
+            for zpl, _ in labels:
+                try:
+                    if self._print_zpl(zpl, printer_name):
+                        success_count += 1
+                    else:
+                        error_count += 1
+                except Exception as e:
+                    log_error(f"Erro ao imprimir bloco {block_data['position_group']}: {str(e)}")
+                    error_count += 1
+                job.report_progress(success_count + error_count, total_labels)
+        
+        return success_count, error_count
+    
+    def _print_all_distributed(self, mode: str):
+        """Imprime todas as etiquetas do modo distribuindo entre as impressoras escolhidas"""
+        if not self.warehouse_var.get():
+            messagebox.showwarning("Aviso", "Selecione um galpão")
+            return
+
+        groups = self.organized_blocks if mode == 'block' else self.organized_data
+        if not groups:
+            messagebox.showwarning("Aviso", "Nenhum endereço para imprimir")
+            return
+
+        if self.print_job and not self.print_job.done():
+            return
+
+        printer_names = self._choose_fanout_printers()
+        if not printer_names:
+            return
+
+        key = 'addresses' if mode == 'block' else 'pallets'
+        total_labels = sum((len(group[key]) + 7) // 8 for group in groups)
+        if not messagebox.askyesno("Confirmar Impressão",
+                                   f"Deseja imprimir {total_labels} etiqueta(s) distribuídas entre "
+                                   f"{len(printer_names)} impressora(s)?\n\n" + "\n".join(printer_names)):
+            return
+
+        self.status_label.config(text=f"Distribuindo etiquetas entre {len(printer_names)} impressora(s)...",
+                                 foreground='blue')
+        self.print_all_button.config(state=tk.DISABLED)
+
+        def on_success(manifest):
+            self.print_all_button.config(state=tk.NORMAL)
+            summary = "\n".join(
+                f"{name}: {stats['labels']} etiqueta(s), {stats['labels_per_minute']}/min"
+                + (f", {stats['errors']} erro(s)" if stats['errors'] else "")
+                + (" (retirada do lote)" if stats['removed'] else "")
+                for name, stats in manifest['printers'].items())
+            manifest_info = f"\n\nManifesto: {manifest['manifest_path']}" if manifest.get('manifest_path') else ""
+
+            if manifest['failed'] == 0:
+                self.status_label.config(
+                    text=f"✓ {manifest['printed']} etiqueta(s) impressa(s) em {manifest['elapsed_seconds']:.0f}s",
+                    foreground='green'
+                )
+                messagebox.showinfo("Sucesso", f"{manifest['printed']} etiqueta(s) impressa(s)!\n\n"
+                                               f"{summary}{manifest_info}")
+            else:
+                self.status_label.config(
+                    text=f"⚠ {manifest['printed']} ok, {manifest['failed']} erro(s)",
+                    foreground='orange'
+                )
+                messagebox.showwarning("Aviso", f"Impressão concluída com erros:\n"
+                                                f"Sucesso: {manifest['printed']}\nErros: {manifest['failed']}\n\n"
+                                                f"{summary}{manifest_info}")
+
+        def on_error(e):
+            self.print_all_button.config(state=tk.NORMAL)
+            log_error(f"Erro na impressão distribuída: {str(e)}")
+            self.status_label.config(text=f"Erro: {str(e)}", foreground='red')
+            messagebox.showerror("Erro", f"Erro na impressão:\n{str(e)}")
+
+        self.print_job = job_runner.submit(self.window, self._run_print_distributed, mode, list(groups),
+                                           printer_names,
+                                           on_success=on_success, on_error=on_error,
+                                           on_progress=self._show_print_progress)
+
+    def _run_print_distributed(self, job, mode: str, groups: List[Dict[str, Any]], printer_names: List[str]):
+        """Gera as etiquetas e as distribui entre as impressoras (em segundo plano)"""
+        units = []
+        for group in groups:
+            if mode == 'block':
+                labels = self._block_labels(group)
+                description = f"{group['building_name']} - Posição {group['position_group']}"
+            else:
+                labels = self._floor_labels(group)
+                description = f"{group['building_name']} - {group['floor_name']}"
+            for zpl, addresses in labels:
+                units.append(PrintUnit(len(units) + 1, zpl, addresses, description))
+            job.check_cancelled()
+
+        senders = {name: (lambda zpl, name=name: self._print_zpl(zpl, name)) for name in printer_names}
+        fanout = create_fanout_printer(senders)
+        description = f"{self.warehouse_var.get()} - {'blocos' if mode == 'block' else 'andares'}"
+        return fanout.run(units, on_progress=job.report_progress,
+                          should_cancel=lambda: job.cancelled, description=description)
+
+    def _choose_fanout_printers(self) -> List[str]:
+        """
+        Diálogo para escolher as impressoras da distribuição
+
+        Returns:
+            Nomes das impressoras escolhidas (vazio se cancelado)
+        """
+        dialog = tk.Toplevel(self.window)
+        dialog.title("Distribuir entre impressoras")
+        dialog.transient(self.window)
+        dialog.grab_set()
+
+        frame = ttk.Frame(dialog, padding="10")
+        frame.pack(fill=tk.BOTH, expand=True)
+        ttk.Label(frame, text="Selecione as impressoras que receberão as etiquetas:").pack(anchor=tk.W)
+
+        listbox = tk.Listbox(frame, selectmode=tk.MULTIPLE, height=min(10, max(3, len(self.printers))),
+                             exportselection=False)
+        listbox.pack(fill=tk.BOTH, expand=True, pady=10)
+        previous = set(self.fanout_printers) or {self.printer_var.get()}
+        for idx, name in enumerate(self.printers):
+            listbox.insert(tk.END, name)
+            if name in previous:
+                listbox.selection_set(idx)
+
+        chosen = []
+
+        def confirm():
+            chosen.extend(self.printers[idx] for idx in listbox.curselection())
+            dialog.destroy()
+
+        buttons = ttk.Frame(frame)
+        buttons.pack(fill=tk.X)
+        ttk.Button(buttons, text="Distribuir", command=confirm).pack(side=tk.RIGHT)
+        ttk.Button(buttons, text="Cancelar", command=dialog.destroy).pack(side=tk.RIGHT, padx=(0, 5))
+
+        self.window.wait_window(dialog)
+        if chosen:
+            self.fanout_printers = chosen
+        return chosen
+
+    def _show_print_progress(self, done: int, total: int):
+        """Atualiza o status com o progresso da impressão em lote"""
+        self.status_label.config(text=f"Imprimindo... {done}/{total}", foreground='blue')
     
     def _print_all_floors(self):
         """Imprime etiquetas de todos os andares (MODELO 01)"""
@@ -486,19 +737,18 @@ class AddressLabelsWindow:
                                    f"Deseja imprimir {total_labels} etiqueta(s) para {total_floors} andar(es)?"):
             return
         
-        try:
-            printer_name = self.printer_var.get()
-            success_count = 0
-            error_count = 0
-            
-            self.status_label.config(text="Imprimindo etiquetas de andares...", foreground='blue')
-            self.window.update()
-            
-            for floor_data in self.organized_data:
-                if self._print_floor(floor_data, show_messages=False):
-                    success_count += 1
-                else:
-                    error_count += 1
+        if self.print_job and not self.print_job.done():
+            return
+        
+        printer_name = self.printer_var.get()
+        floors = list(self.organized_data)
+        
+        self.status_label.config(text="Imprimindo etiquetas de andares...", foreground='blue')
+        self.print_all_button.config(state=tk.DISABLED)
+        
+        def on_success(counts):
+            self.print_all_button.config(state=tk.NORMAL)
+            success_count, error_count = counts
             
             # Mensagem final
             if error_count == 0:
@@ -516,69 +766,122 @@ class AddressLabelsWindow:
                 messagebox.showwarning("Aviso", 
                                       f"Impressão concluída com erros:\n"
                                       f"Sucesso: {success_count}\nErros: {error_count}")
-                
-        except Exception as e:
+        
+        def on_error(e):
+            self.print_all_button.config(state=tk.NORMAL)
             log_error(f"Erro na impressão em lote: {str(e)}")
             self.status_label.config(text=f"Erro: {str(e)}", foreground='red')
             messagebox.showerror("Erro", f"Erro na impressão:\n{str(e)}")
+        
+        self.print_job = job_runner.submit(self.window, self._run_print_floors, floors, printer_name,
+                                           on_success=on_success, on_error=on_error,
+                                           on_progress=self._show_print_progress)
+    
+    def _run_print_floors(self, job, floors: List[Dict[str, Any]], printer_name: str):
+        """Gera e envia as etiquetas de andar (em segundo plano)"""
+        success_count = 0
+        error_count = 0
+        
+        for floor_data in floors:
+            try:
+                self._send_floor_labels(floor_data, printer_name)
+                success_count += 1
+            except Exception as e:
+                log_error(f"Erro ao imprimir andar: {str(e)}")
+                error_count += 1
+            job.report_progress(success_count + error_count, len(floors))
+        
+        return success_count, error_count
     
-    def _print_floor(self, floor_data: Dict[str, Any], show_messages: bool = True) -> bool:
+    def _print_floor(self, floor_data: Dict[str, Any]):
         """
-        Imprime etiquetas de um andar completo (MODELO 01)
+        Imprime etiquetas de um andar completo (MODELO 01) em segundo plano
         
         Args:
             floor_data: Dados do andar
-            show_messages: Se deve mostrar mensagens de sucesso/erro
-            
-        Returns:
-            True se sucesso, False se erro
         """
         if not self._validate_selection():
-            return False
+            return
         
-        try:
-            printer_name = self.printer_var.get()
-            pallets = floor_data['pallets']
-            
-            # Dividir em grupos de 8
-            groups = []
-            for i in range(0, len(pallets), 8):
-                groups.append(pallets[i:i+8])
-            
-            # Gerar e imprimir ZPL para cada grupo
-            for group in groups:
-                # Preparar dados para o gerador
-                addresses = [{'full_address': p['full_address'], 'name': p['name']} for p in group]
-                
-                zpl = self.zpl_generator.build_floor_addresses_zpl(
-                    warehouse_code=floor_data['warehouse_code'],
-                    warehouse_name=floor_data['warehouse_name'],
-                    building_name=floor_data['building_name'],
-                    floor_name=floor_data['floor_name'],
-                    addresses=addresses
-                )
-                
-                # Imprimir
-                if not self._print_zpl(zpl, printer_name):
-                    if show_messages:
-                        messagebox.showerror("Erro", f"Erro ao imprimir andar {floor_data['floor_name']}")
-                    return False
-            
-            if show_messages:
-                messagebox.showinfo("Sucesso", 
-                                   f"Etiqueta(s) do andar {floor_data['floor_name']} impressa(s) com sucesso!")
-            
-            return True
-            
-        except Exception as e:
+        if self.print_job and not self.print_job.done():
+            return
+        
+        printer_name = self.printer_var.get()
+        self.status_label.config(text=f"Imprimindo andar {floor_data['floor_name']}...", foreground='blue')
+        
+        def on_success(_):
+            self.status_label.config(text=f"✓ Andar {floor_data['floor_name']} impresso com sucesso!",
+                                     foreground='green')
+            messagebox.showinfo("Sucesso", 
+                               f"Etiqueta(s) do andar {floor_data['floor_name']} impressa(s) com sucesso!")
+        
+        def on_error(e):
             log_error(f"Erro ao imprimir andar: {str(e)}")
-            if show_messages:
-                messagebox.showerror("Erro", f"Erro ao imprimir andar:\n{str(e)}")
-            return False
+            self.status_label.config(text=f"Erro: {str(e)}", foreground='red')
+            messagebox.showerror("Erro", f"Erro ao imprimir andar:\n{str(e)}")
+        
+        self.print_job = job_runner.submit(self.window, lambda job: self._send_floor_labels(floor_data, printer_name),
+                                           on_success=on_success, on_error=on_error)
+    
+    def _send_floor_labels(self, floor_data: Dict[str, Any], printer_name: str):
+        """
+        Gera e envia as etiquetas de um andar, em grupos de 8 paletes
+        
+        Não acessa widgets: pode ser executado em segundo plano.
+        
+        Raises:
+            Exception: Se algum grupo não puder ser impresso
+        """
+        for zpl, _ in self._floor_labels(floor_data):
+            if not self._print_zpl(zpl, printer_name):
+                raise Exception(f"Erro ao imprimir andar {floor_data['floor_name']}")
+    
+    def _floor_labels(self, floor_data: Dict[str, Any]) -> List[Tuple[str, List[str]]]:
+        """
+        Etiquetas de um andar (MODELO 01), em grupos de 8 paletes
+        
+        Returns:
+            Lista de (zpl, endereços da etiqueta)
+        """
+        pallets = floor_data['pallets']
+        labels = []
+        for i in range(0, len(pallets), 8):
+            group = pallets[i:i+8]
+            # Preparar dados para o gerador
+            addresses = [{'full_address': p['full_address'], 'name': p['name']} for p in group]
+            zpl = self.zpl_generator.build_floor_addresses_zpl(
+                warehouse_code=floor_data['warehouse_code'],
+                warehouse_name=floor_data['warehouse_name'],
+                building_name=floor_data['building_name'],
+                floor_name=floor_data['floor_name'],
+                addresses=addresses
+            )
+            labels.append((zpl, [p['full_address'] for p in group]))
+        return labels
+    
+    def _block_labels(self, block_data: Dict[str, Any]) -> List[Tuple[str, List[str]]]:
+        """
+        Etiquetas de uma posição vertical (MODELO 03), em grupos de 8 endereços
+        
+        Returns:
+            Lista de (zpl, endereços da etiqueta)
+        """
+        addresses = block_data['addresses']
+        labels = []
+        for i in range(0, len(addresses), 8):
+            group = addresses[i:i+8]
+            zpl = self.zpl_generator.build_block_addresses_zpl(
+                warehouse_code=block_data['warehouse_code'],
+                warehouse_name=block_data['warehouse_name'],
+                building_name=block_data['building_name'],
+                addresses_by_position=group
+            )
+            labels.append((zpl, [a['full_address'] for a in group]))
+        return labels
     
     def _print_single_pallet(self, floor_data: Dict[str, Any], pallet: Dict[str, Any]):
         """
-        Imprime etiqueta de um palete individual (MODELO 02)
+        Imprime etiqueta de um palete individual (MODELO 02) em segundo plano
         
         Args:
             floor_data: Dados do andar
@@ -587,19 +890,21 @@ class AddressLabelsWindow:
         if not self._validate_selection():
             return
         
-        try:
-            printer_name = self.printer_var.get()
-            
-            # Gerar ZPL
-            zpl = self.zpl_generator.build_single_address_zpl(
-                full_address=pallet['full_address'],
-                pallet_name=pallet['name'],
-                building_name=floor_data['building_name'],
-                floor_name=floor_data['floor_name']
-            )
-            
-            # Imprimir
-            if self._print_zpl(zpl, printer_name):
+        if self.print_job and not self.print_job.done():
+            return
+        
+        printer_name = self.printer_var.get()
+        
+        # Gerar ZPL
+        zpl = self.zpl_generator.build_single_address_zpl(
+            full_address=pallet['full_address'],
+            pallet_name=pallet['name'],
+            building_name=floor_data['building_name'],
+            floor_name=floor_data['floor_name']
+        )
+        
+        def on_success(printed):
+            if printed:
                 self.status_label.config(
                     text=f"✓ Etiqueta {pallet['full_address']} impressa com sucesso!", 
                     foreground='green'
@@ -610,11 +915,14 @@ class AddressLabelsWindow:
                     foreground='red'
                 )
                 messagebox.showerror("Erro", f"Erro ao imprimir etiqueta {pallet['full_address']}")
-                
-        except Exception as e:
+        
+        def on_error(e):
             log_error(f"Erro ao imprimir palete: {str(e)}")
             self.status_label.config(text=f"Erro: {str(e)}", foreground='red')
             messagebox.showerror("Erro", f"Erro ao imprimir etiqueta:\n{str(e)}")
+        
+        self.print_job = job_runner.submit(self.window, lambda job: self._print_zpl(zpl, printer_name),
+                                           on_success=on_success, on_error=on_error)
     
     def _validate_selection(self) -> bool:
         """
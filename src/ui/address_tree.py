@@ -0,0 +1,123 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Modelo da lista de endereços da janela de endereçamento (sem Tkinter)
+A árvore prédio > andar > palete é entregue sob demanda: a Treeview recebe
+só os prédios e cada nível é montado quando o nó é expandido, então o
+tempo de exibição não depende do tamanho do galpão
+"""
+
+from typing import Any, Dict, List, Optional, Tuple
+
+# (iid, texto, valores das colunas, tem filhos a carregar)
+TreeRow = Tuple[str, str, Tuple[str, ...], bool]
+
+# Colunas da Treeview além da coluna da árvore (endereço)
+COLUMNS = ('name', 'location', 'status')
+
+
+class AddressTreeModel:
+    """Linhas da Treeview a partir dos andares organizados e do índice do AddressManager"""
+
+    def __init__(self, organized_data: List[Dict[str, Any]], address_manager=None):
+        """
+        Inicializa o modelo
+
+        Args:
+            organized_data: Andares de AddressManager.organize_addresses_by_floor()
+            address_manager: AddressManager carregado (usado na busca)
+        """
+        self.floors = organized_data
+        self.address_manager = address_manager
+        self.total_pallets = sum(len(floor['pallets']) for floor in organized_data)
+
+        # Prédios na ordem em que aparecem, com os índices dos seus andares
+        self.buildings: List[Tuple[str, List[int]]] = []
+        self._floor_index: Dict[Tuple[Any, Any], int] = {}
+        building_slots: Dict[Any, int] = {}
+        for idx, floor in enumerate(organized_data):
+            self._floor_index[(floor['building_id'], floor['floor_id'])] = idx
+            slot = building_slots.get(floor['building_id'])
+            if slot is None:
+                slot = building_slots[floor['building_id']] = len(self.buildings)
+                self.buildings.append((floor['building_name'], []))
+            self.buildings[slot][1].append(idx)
+
+    def root_rows(self) -> List[TreeRow]:
+        """Linhas do primeiro nível (prédios)"""
+        rows = []
+        for idx, (name, floor_indexes) in enumerate(self.buildings):
+            pallets = sum(len(self.floors[i]['pallets']) for i in floor_indexes)
+            rows.append((f"b:{idx}", f"🏢 {name}", ('', f"{len(floor_indexes)} andar(es), {pallets} palete(s)", ''), True))
+        return rows
+
+    def children(self, iid: str) -> List[TreeRow]:
+        """
+        Filhos de um nó (andares de um prédio ou paletes de um andar)
+
+        Args:
+            iid: Identificador do nó na Treeview
+
+        Returns:
+            Lista de linhas (vazia para paletes ou iid desconhecido)
+        """
+        kind, _, ref = iid.partition(':')
+        if kind == 'b':
+            _, floor_indexes = self.buildings[int(ref)]
+            return [self._floor_row(idx) for idx in floor_indexes]
+        if kind == 'f':
+            floor_idx = int(ref)
+            return [self._pallet_row(floor_idx, pallet_idx)
+                    for pallet_idx in range(len(self.floors[floor_idx]['pallets']))]
+        return []
+
+    def filter_rows(self, query: str, limit: int = 200) -> Tuple[List[TreeRow], bool]:
+        """
+        Paletes que correspondem à busca, em lista plana
+
+        Args:
+            query: Texto da busca (endereço ou nome)
+            limit: Máximo de linhas exibidas
+
+        Returns:
+            Tupla (linhas, truncado) onde truncado indica que havia mais resultados
+        """
+        if self.address_manager is None:
+            return [], False
+
+        rows = []
+        for record in self.address_manager.search_pallets(query, limit + 1):
+            floor_idx = self._floor_index.get((record.floor.building.id, record.floor.id))
+            if floor_idx is None:
+                continue
+            rows.append(self._pallet_row(floor_idx, record.position))
+        return rows[:limit], len(rows) > limit
+
+    def resolve(self, iid: str) -> Tuple[Optional[str], Optional[Dict[str, Any]], Optional[Dict[str, Any]]]:
+        """
+        Dados de impressão de um nó
+
+        Returns:
+            ('floor', andar, None), ('pallet', andar, palete) ou (None, None, None)
+        """
+        kind, _, ref = iid.partition(':')
+        if kind == 'f':
+            return 'floor', self.floors[int(ref)], None
+        if kind == 'p':
+            floor_idx, _, pallet_idx = ref.partition(':')
+            floor = self.floors[int(floor_idx)]
+            return 'pallet', floor, floor['pallets'][int(pallet_idx)]
+        return None, None, None
+
+    def _floor_row(self, floor_idx: int) -> TreeRow:
+        floor = self.floors[floor_idx]
+        return (f"f:{floor_idx}", f"📊 {floor['floor_name']}",
+                ('', f"{len(floor['pallets'])} palete(s)", ''), bool(floor['pallets']))
+
+    def _pallet_row(self, floor_idx: int, pallet_idx: int) -> TreeRow:
+        floor = self.floors[floor_idx]
+        pallet = floor['pallets'][pallet_idx]
+        return (f"p:{floor_idx}:{pallet_idx}", pallet['full_address'],
+                (pallet.get('name') or '', f"{floor['building_name']} - {floor['floor_name']}",
+                 pallet.get('status') or ''), False)
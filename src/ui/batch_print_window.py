@@ -12,7 +12,7 @@ import sys
 import os
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
-from label_manager import LabelManager
+from label_manager import create_label_manager
 from cargo_manager import CargoManager
 from printer.zpl_generator import ZplGenerator
 from printer.label_printer import LabelPrinter
@@ -20,6 +20,8 @@ from api.client import APIClient
 from utils.logger import log_info, log_error
 from utils.validators import format_cpf
 from utils.printer_config import PrinterConfigManager
+from utils.job_runner import job_runner
+from printer.spooler import spooler_enabled
 
 class BatchPrintWindow:
     """Janela de impressão em lote"""
@@ -39,7 +41,8 @@ class BatchPrintWindow:
         
         # Configurar gerenciadores
         self.api_client = APIClient()
-        self.label_manager = LabelManager(self.api_client, token)
+        # Com reserva de blocos, os números saem de uma faixa já reservada por esta estação
+        self.label_manager = create_label_manager(self.api_client, token)
         self.zpl_generator = ZplGenerator()
         self.printer = LabelPrinter()
         self.printer_config_manager = PrinterConfigManager()
@@ -48,6 +51,7 @@ class BatchPrintWindow:
         self.labels = []
         self.selected_label = None
         self.configured_printers = {}
+        self.print_job = None
         
         # Interface
         self.setup_window()
@@ -169,9 +173,9 @@ class BatchPrintWindow:
         action_frame = ttk.Frame(main_frame)
         action_frame.pack(fill=tk.X, pady=(15, 0))
         
-        print_button = ttk.Button(action_frame, text="🖨️ Imprimir", 
-                                 command=self.print_labels, style='Accent.TButton')
-        print_button.pack(side=tk.LEFT, padx=(0, 10))
+        self.print_button = ttk.Button(action_frame, text="🖨️ Imprimir", 
+                                      command=self.print_labels, style='Accent.TButton')
+        self.print_button.pack(side=tk.LEFT, padx=(0, 10))
         
         close_button = ttk.Button(action_frame, text="🚪 Fechar", 
                                  command=self.close_window)
@@ -318,6 +322,10 @@ class BatchPrintWindow:
             messagebox.showwarning("Aviso", "Selecione uma label primeiro.")
             return
         
+        if self.print_job and not self.print_job.done():
+            # Impressão anterior ainda em andamento (evita envio duplicado)
+            return
+        
         try:
             # Validar quantidade
             qty_text = self.qty_entry.get().strip()
@@ -333,26 +341,6 @@ class BatchPrintWindow:
             if not result:
                 return
             
-            self.status_label.config(text="Preparando impressão...", foreground='blue')
-            self.root.update()
-            
-            # Calcular sequência
-            last, start, end = self.label_manager.calculate_sequence(self.selected_label, quantity)
-            
-            log_info(f"Imprimindo sequência {self.label_manager.pad8(start)} até {self.label_manager.pad8(end)}")
-            
-            # Atualizar last_number na API primeiro
-            self.status_label.config(text="Atualizando contador na API...", foreground='blue')
-            self.root.update()
-            
-            self.label_manager.update_last_number(self.selected_label['id'], end)
-            
-            # Gerar ZPL
-            self.status_label.config(text="Gerando códigos ZPL...", foreground='blue')
-            self.root.update()
-            
-            all_zpl = self.zpl_generator.build_batch_zpl(start, quantity)
-            
             # Obter impressora selecionada diretamente do widget
             selected_display = self.printer_combo.get().strip()
             
@@ -390,31 +378,85 @@ class BatchPrintWindow:
                 self.printer.config['printer_id'] = printer_id
                 self.printer.config['output_mode'] = 'configured'
             
-            # Imprimir
-            self.status_label.config(text="Enviando para impressão...", foreground='blue')
-            self.root.update()
-            
-            self.printer.send_print_job(all_zpl, quantity)
-            
-            # Sucesso
-            self.status_label.config(text=f"✅ {quantity} etiqueta(s) impressa(s) com sucesso!", foreground='green')
-            
-            log_info(f"Impressão concluída: {quantity} etiquetas da label {self.selected_label.get('name', 'N/A')}")
+        except Exception as e:
+            log_error(f"Erro na impressão: {str(e)}")
+            self.status_label.config(text=f"❌ Erro: {str(e)}", foreground='red')
+            messagebox.showerror("Erro na Impressão", f"Erro durante a impressão:\n{str(e)}")
+            return
+        
+        label = self.selected_label
+        self.status_label.config(text="Preparando impressão...", foreground='blue')
+        self.print_button.config(state=tk.DISABLED)
+        
+        def on_progress(text):
+            self.status_label.config(text=text, foreground='blue')
+        
+        def on_success(sequence):
+            start, end, spool_id = sequence
+            self.print_button.config(state=tk.NORMAL)
             
             # Atualizar informações da label
-            self.selected_label['last_number'] = end
+            label['last_number'] = end
             self.update_label_info()
             
-            messagebox.showinfo("Sucesso", f"Impressão concluída!\n\nSequência: {self.label_manager.pad8(start)} até {self.label_manager.pad8(end)}")
-            
-        except Exception as e:
-            log_error(f"Erro na impressão: {str(e)}")
+            if spool_id:
+                self.status_label.config(text=f"✅ {quantity} etiqueta(s) na fila de impressão", foreground='green')
+                messagebox.showinfo("Sucesso", f"Etiquetas enviadas para a fila de impressão!\n\nSequência: {self.label_manager.pad8(start)} até {self.label_manager.pad8(end)}\n\nSe a impressora estiver offline, o envio será repetido automaticamente.")
+            else:
+                self.status_label.config(text=f"✅ {quantity} etiqueta(s) impressa(s) com sucesso!", foreground='green')
+                messagebox.showinfo("Sucesso", f"Impressão concluída!\n\nSequência: {self.label_manager.pad8(start)} até {self.label_manager.pad8(end)}")
+        
+        def on_error(e):
+            self.print_button.config(state=tk.NORMAL)
             self.status_label.config(text=f"❌ Erro: {str(e)}", foreground='red')
             messagebox.showerror("Erro na Impressão", f"Erro durante a impressão:\n{str(e)}")
+        
+        self.print_job = job_runner.submit(self.root, self._run_print_job, label, quantity,
+                                           on_success=on_success, on_error=on_error,
+                                           on_progress=on_progress)
+    
+    def _run_print_job(self, job, label: dict, quantity: int):
+        """Reserva a sequência, gera o ZPL e envia para a impressora (em segundo plano)"""
+        # Reservar a sequência antes de imprimir (na API ou no bloco desta estação)
+        job.report_progress("Reservando sequência...")
+        last, start, end = self.label_manager.reserve_sequence(label, quantity)
+        
+        log_info(f"Imprimindo sequência {self.label_manager.pad8(start)} até {self.label_manager.pad8(end)}")
+        
+        # Imprimir: com o spooler, o job fica gravado em disco antes de seguir,
+        # e uma impressora offline não perde a sequência já reservada na API
+        if spooler_enabled():
+            job.report_progress("Enviando para a fila de impressão...")
+            spool_id = self.printer.enqueue_batch(start, quantity,
+                                                  job_id=f"batch-{label['id']}-{start}-{end}")
+            log_info(f"Sequência enfileirada no spooler (job {spool_id}): {quantity} etiquetas da label {label.get('name', 'N/A')}")
+            return start, end, spool_id
+        
+        # ZPL gerado em blocos durante o envio (memória constante para qualquer quantidade)
+        job.report_progress("Enviando para impressão...")
+        self.printer.send_print_job(self.zpl_generator.iter_batch_zpl(start, quantity), quantity)
+        
+        log_info(f"Impressão concluída: {quantity} etiquetas da label {label.get('name', 'N/A')}")
+        return start, end, None
     
     def close_window(self):
-        """Fecha a janela"""
-        self.root.destroy()
+        """Fecha a janela, devolvendo antes os números reservados e não usados"""
+        if self.label_manager.block_ledger is None or not self.label_manager.block_ledger.unused_blocks():
+            self.root.destroy()
+            return
+        
+        if self.print_job and not self.print_job.done():
+            messagebox.showwarning("Aviso", "Aguarde o fim da impressão para fechar a janela.")
+            return
+        
+        def on_done(result=None):
+            if isinstance(result, int) and result:
+                log_info(f"{result} número(s) reservado(s) devolvido(s) à API")
+            self.root.destroy()
+        
+        self.status_label.config(text="Devolvendo números não usados...", foreground='blue')
+        job_runner.submit(self.root, lambda job: self.label_manager.release_unused(),
+                          on_success=on_done, on_error=lambda e: on_done())
     
     # Removido método run() - não é mais necessário para janelas modais
 
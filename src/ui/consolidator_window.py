@@ -16,15 +16,21 @@ Funcionalidades:
 import tkinter as tk
 from tkinter import ttk, messagebox, simpledialog
 from typing import Dict, Any
+import json
 
 import sys, os
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 from api.client import APIClient
+from cargo_manager import CargoManager
 from printer.zpl_generator import ZplGenerator
 from printer.label_printer import LabelPrinter
 from utils.printer_config import PrinterConfigManager
 from utils.logger import log_info, log_error
+from utils.config import load_config
+from utils.job_runner import job_runner
+from printer.format_registry import stored_formats_enabled
+from api.reference_data import get_reference_store
 
 
 class ConsolidatorWindow:
@@ -33,8 +39,10 @@ class ConsolidatorWindow:
         self.token = token
         self.user_data = user_data
 
+        self.config = load_config()
         self.api_client = APIClient()
         self.api_client.token = token
+        self.cargo_manager = CargoManager(self.api_client, token)
         self.zpl_generator = ZplGenerator()
         self.printer = LabelPrinter()
         self.printer_config = PrinterConfigManager()
@@ -47,6 +55,7 @@ class ConsolidatorWindow:
         self.customers = []
         self.customer_dict = {}
         self.cargo_codes_cache = []  # Cache dos códigos digitados
+        self.consolidate_job = None
 
         # Criar Toplevel passando o parent para evitar janela órfã
         self.root = tk.Toplevel(parent) if parent else tk.Toplevel()
@@ -154,9 +163,10 @@ class ConsolidatorWindow:
         buttons_frame = ttk.Frame(frame)
         buttons_frame.pack(fill=tk.X)
 
-        ttk.Button(buttons_frame, text="✅ Consolidar e Imprimir",
-                  command=self.consolidate_and_print,
-                  width=25).pack(side=tk.LEFT, padx=(0, 6))
+        self.consolidate_button = ttk.Button(buttons_frame, text="✅ Consolidar e Imprimir",
+                                             command=self.consolidate_and_print,
+                                             width=25)
+        self.consolidate_button.pack(side=tk.LEFT, padx=(0, 6))
         ttk.Button(buttons_frame, text="� Limpar",
                   command=self.clear_form,
                   width=15).pack(side=tk.LEFT, padx=(0, 6))
@@ -190,42 +200,33 @@ class ConsolidatorWindow:
     def load_warehouses(self):
         """Carrega lista de galpões para o select box"""
         try:
-            headers = {'Authorization': f'Bearer {self.token}'}
-            resp = self.api_client.get('/warehouses/select', headers=headers)
-            if resp.status_code == 200:
-                result = resp.json()
-                if result.get('success') and result.get('data'):
-                    self.warehouses = result.get('data', [])
-                    self.warehouse_dict = {}
-                    for w in self.warehouses:
-                        name = w.get('name') or f"ID:{w.get('id')}"
-                        self.warehouse_dict[name] = w.get('id')
-                    log_info(f"Carregados {len(self.warehouses)} galpões para consolidação")
+            result = get_reference_store().get('warehouses', token=self.token)
+            if result.get('success') and result.get('data'):
+                self.warehouses = result.get('data', [])
+                self.warehouse_dict = {}
+                for w in self.warehouses:
+                    name = w.get('name') or f"ID:{w.get('id')}"
+                    self.warehouse_dict[name] = w.get('id')
+                log_info(f"Carregados {len(self.warehouses)} galpões para consolidação")
         except Exception as e:
             log_error(f"Erro ao carregar galpões (consolidator): {e}")
 
     def load_customers(self):
         """Carrega lista de clientes para o select box"""
         try:
-            headers = {
-                'Authorization': f'Bearer {self.token}',
-                'Accept': 'application/json'
-            }
-            resp = self.api_client.get('/customers', headers=headers)
-            if resp.status_code == 200:
-                result = resp.json()
-                # A API pode retornar direto a lista ou dentro de 'data'
-                customers_data = result if isinstance(result, list) else result.get('data', [])
-                
-                if customers_data:
-                    self.customers = customers_data
-                    self.customer_dict = {}
-                    for c in self.customers:
-                        # Verificar se é dict ou se tem estrutura diferente
-                        if isinstance(c, dict):
-                            name = c.get('name') or c.get('company_name') or f"ID:{c.get('id')}"
-                            self.customer_dict[name] = c.get('id')
-                    log_info(f"Carregados {len(self.customers)} clientes para consolidação")
+            result = get_reference_store().get('customers', token=self.token)
+            # A API pode retornar direto a lista ou dentro de 'data'
+            customers_data = result if isinstance(result, list) else result.get('data', [])
+
+            if customers_data:
+                self.customers = customers_data
+                self.customer_dict = {}
+                for c in self.customers:
+                    # Verificar se é dict ou se tem estrutura diferente
+                    if isinstance(c, dict):
+                        name = c.get('name') or c.get('company_name') or f"ID:{c.get('id')}"
+                        self.customer_dict[name] = c.get('id')
+                log_info(f"Carregados {len(self.customers)} clientes para consolidação")
         except Exception as e:
             log_error(f"Erro ao carregar clientes (consolidator): {e}")
 
@@ -298,303 +299,349 @@ class ConsolidatorWindow:
                     "Digite ou cole os códigos das cargas no campo de texto\n(um por linha ou separados por Enter)")
                 return
 
+            if self.consolidate_job and not self.consolidate_job.done():
+                return
+
             self.show_result(f"⏳ Processando {len(cargo_codes)} carga(s)...\n\nGalpão: {wh_name}\nCliente: {customer_name}\nImpressora: {printer_name}", "blue")
-            self.root.update()
+            self.consolidate_button.config(state=tk.DISABLED)
 
-            # Buscar cargo_ids via API (usando códigos)
+            # Buscar cargo_ids via API (usando códigos), em paralelo e em segundo plano
             # Cargas aptas para consolidação têm status: RECEIVED, CHECKED
-            cargo_ids = []
-            codes_not_found = []
-            codes_wrong_status = []
-            codes_with_errors = []  # Erros HTTP (500, etc.)
+            concurrency = self.config.get('consolidation', {}).get('lookup_concurrency', 8)
+            progress_header = f"Galpão: {wh_name}\nCliente: {customer_name}\nImpressora: {printer_name}"
+            counters = {'found': 0, 'not_found': 0, 'error': 0}
+            context = {
+                'warehouse_id': warehouse_id,
+                'customer_id': customer_id,
+                'printer_id': printer_id,
+                'wh_name': wh_name,
+                'qty': qty,
+                'cargo_codes': cargo_codes
+            }
             
-            headers = {'Authorization': f'Bearer {self.token}'}
-            for code in cargo_codes:
-                try:
-                    # Tentar buscar por /cargos/code/{code} primeiro
-                    resp = self.api_client.get(f'/cargos/code/{code}', headers=headers)
-                    
-                    if resp.status_code == 200:
-                        result = resp.json()
-                        cargo = result.get('data')
-                        
-                        if cargo:
-                            cargo_id = cargo.get('id')
-                            cargo_status = cargo.get('status')
-                            
-                            # Verificar se status permite consolidação
-                            consolidable_statuses = ['RECEIVED',  'CHECKED']
-                            
-                            log_info(f"Busca carga {code}: ID={cargo_id}, status={cargo_status}")
-                            
-                            if cargo_status in consolidable_statuses:
-                                log_info(f"  ✓ Carga {code} apta para consolidação")
-                                cargo_ids.append(cargo_id)
-                            else:
-                                log_info(f"  ✗ Carga {code} com status inválido: {cargo_status}")
-                                codes_wrong_status.append({
-                                    'code': code,
-                                    'status': cargo_status
-                                })
-                        else:
-                            log_info(f"  ✗ Carga {code} não encontrada (data vazio)")
-                            codes_not_found.append(code)
-                    elif resp.status_code == 404:
-                        log_info(f"  ✗ Carga {code} não existe (404)")
-                        codes_not_found.append(code)
-                    else:
-                        # Acumular erro HTTP
-                        error_detail = f"HTTP {resp.status_code}"
-                        try:
-                            error_json = resp.json()
-                            error_msg = error_json.get('message', resp.text[:100])
-                            error_detail += f": {error_msg}"
-                        except:
-                            error_detail += f": {resp.text[:100]}"
-                        
-                        log_error(f"Erro ao buscar carga {code}: {error_detail}")
-                        codes_with_errors.append({
-                            'code': code,
-                            'error': error_detail,
-                            'full_response': resp.text[:500]
-                        })
-                except Exception as e:
-                    log_error(f"Erro ao buscar carga {code}: {e}")
-                    import traceback
-                    log_error(f"Traceback: {traceback.format_exc()}")
-                    codes_with_errors.append({
-                        'code': code,
-                        'error': f"Exceção: {str(e)}",
-                        'full_response': traceback.format_exc()
-                    })
-
-
-            # Verificar se houve erros e acumular mensagem
-            if codes_not_found or codes_wrong_status or codes_with_errors:
-                error_summary = "⚠️ PROBLEMAS ENCONTRADOS ⚠️\n\n"
-                error_summary += f"Total de cargas processadas: {len(cargo_codes)}\n"
-                error_summary += f"Cargas válidas para consolidação: {len(cargo_ids)}\n\n"
-                
-                if codes_not_found:
-                    error_summary += f"❌ {len(codes_not_found)} carga(s) NÃO ENCONTRADA(S):\n"
-                    for c in codes_not_found[:10]:
-                        error_summary += f"  • {c}\n"
-                    if len(codes_not_found) > 10:
-                        error_summary += f"  ... e mais {len(codes_not_found) - 10}\n"
-                    error_summary += "\n"
-                
-                if codes_wrong_status:
-                    error_summary += f"⚠️ {len(codes_wrong_status)} carga(s) com STATUS INVÁLIDO:\n"
-                    for item in codes_wrong_status[:10]:
-                        error_summary += f"  • {item['code']} → status: {item['status']}\n"
-                    if len(codes_wrong_status) > 10:
-                        error_summary += f"  ... e mais {len(codes_wrong_status) - 10}\n"
-                    error_summary += "\n  Status válidos: RECEIVED, CHECKED\n\n"
-                
-                if codes_with_errors:
-                    error_summary += f"🔥 {len(codes_with_errors)} carga(s) com ERRO NO SERVIDOR:\n"
-                    for item in codes_with_errors[:5]:
-                        error_summary += f"  • {item['code']}\n"
-                        error_summary += f"    {item['error']}\n"
-                    if len(codes_with_errors) > 5:
-                        error_summary += f"  ... e mais {len(codes_with_errors) - 5}\n"
-                    error_summary += "\n"
-                    
-                    # Log detalhado dos erros de servidor
-                    log_error("=" * 60)
-                    log_error("DETALHES COMPLETOS DOS ERROS DE SERVIDOR:")
-                    for item in codes_with_errors:
-                        log_error(f"\nCarga: {item['code']}")
-                        log_error(f"Erro: {item['error']}")
-                        log_error(f"Resposta completa:\n{item['full_response']}")
-                        log_error("-" * 40)
-                    log_error("=" * 60)
-                
-                # Exibir resumo na área de resultado
-                self.show_result(error_summary, "orange")
-                
-                # Se não há cargas válidas, não continuar
-                if not cargo_ids:
-                    messagebox.showerror(
-                        "Nenhuma Carga Válida",
-                        "Não foi possível encontrar nenhuma carga válida para consolidação.\n\n"
-                        "Verifique os erros acima e tente novamente."
-                    )
-                    return
-                
-                # Se há cargas válidas E erros, perguntar se quer continuar
-                error_summary += "=" * 50 + "\n\n"
-                error_summary += f"✅ {len(cargo_ids)} carga(s) podem ser consolidadas.\n\n"
-                error_summary += "⚠️ ATENÇÃO: Esta ação NÃO PODERÁ SER DESFEITA!\n\n"
-                error_summary += "Deseja continuar com a consolidação das cargas válidas?"
-                
-                # Perguntar ao usuário
-                response = messagebox.askyesno(
-                    "Continuar com Erros?",
-                    error_summary,
-                    icon='warning'
+            def on_progress(done, total, result):
+                if result['error']:
+                    counters['error'] += 1
+                elif result['cargo']:
+                    counters['found'] += 1
+                else:
+                    counters['not_found'] += 1
+                self.show_result(
+                    f"⏳ Buscando cargas: {done}/{total}\n"
+                    f"✓ {counters['found']} encontrada(s) | ✗ {counters['not_found']} não encontrada(s) | "
+                    f"🔥 {counters['error']} erro(s)\n\n{progress_header}",
+                    "blue"
                 )
-                
-                if not response:
-                    self.show_result("❌ Consolidação cancelada pelo usuário.", "blue")
-                    return
+            
+            def resolve(job):
+                return self.cargo_manager.resolve_codes(cargo_codes, max_workers=concurrency,
+                                                        on_progress=job.report_progress)
+            
+            self.consolidate_job = job_runner.submit(
+                self.root, resolve,
+                on_success=lambda results: self._on_codes_resolved(context, results),
+                on_error=self._on_consolidation_error,
+                on_progress=on_progress
+            )
 
+        except Exception as e:
+            self._on_consolidation_error(e)
+
+    def _on_consolidation_error(self, e: Exception):
+        """Exibe erro inesperado da consolidação"""
+        log_error(f"Erro ao consolidar: {e}")
+        self.show_result(f"❌ Erro:\n{str(e)}", "red")
+        self._finish_consolidation()
+        messagebox.showerror("Erro", f"Erro ao consolidar:\n{e}")
+
+    def _finish_consolidation(self):
+        """Libera o botão de consolidação"""
+        self.consolidate_button.config(state=tk.NORMAL)
+
+    def _on_codes_resolved(self, context: Dict[str, Any], results: list):
+        """Analisa as cargas encontradas e dispara a criação do consolidador"""
+        self._finish_consolidation()
+        cargo_codes = context['cargo_codes']
+        groups = self.cargo_manager.group_lookup_results(results, ['RECEIVED', 'CHECKED'])
+        cargo_ids = groups['cargo_ids']
+        codes_not_found = groups['not_found']
+        codes_wrong_status = groups['wrong_status']
+        codes_with_errors = groups['errors']  # Erros HTTP (500, etc.)
+        
+        # Contadores do pool HTTP (prova de reaproveitamento de conexões)
+        log_info(f"Conexões HTTP na busca de cargas: {self.api_client.get_connection_stats()}")
+
+        # Verificar se houve erros e acumular mensagem
+        if codes_not_found or codes_wrong_status or codes_with_errors:
+            error_summary = "⚠️ PROBLEMAS ENCONTRADOS ⚠️\n\n"
+            error_summary += f"Total de cargas processadas: {len(cargo_codes)}\n"
+            error_summary += f"Cargas válidas para consolidação: {len(cargo_ids)}\n\n"
+            
+            if codes_not_found:
+                error_summary += f"❌ {len(codes_not_found)} carga(s) NÃO ENCONTRADA(S):\n"
+                for c in codes_not_found[:10]:
+                    error_summary += f"  • {c}\n"
+                if len(codes_not_found) > 10:
+                    error_summary += f"  ... e mais {len(codes_not_found) - 10}\n"
+                error_summary += "\n"
+            
+            if codes_wrong_status:
+                error_summary += f"⚠️ {len(codes_wrong_status)} carga(s) com STATUS INVÁLIDO:\n"
+                for item in codes_wrong_status[:10]:
+                    error_summary += f"  • {item['code']} → status: {item['status']}\n"
+                if len(codes_wrong_status) > 10:
+                    error_summary += f"  ... e mais {len(codes_wrong_status) - 10}\n"
+                error_summary += "\n  Status válidos: RECEIVED, CHECKED\n\n"
+            
+            if codes_with_errors:
+                error_summary += f"🔥 {len(codes_with_errors)} carga(s) com ERRO NO SERVIDOR:\n"
+                for item in codes_with_errors[:5]:
+                    error_summary += f"  • {item['code']}\n"
+                    error_summary += f"    {item['error']}\n"
+                if len(codes_with_errors) > 5:
+                    error_summary += f"  ... e mais {len(codes_with_errors) - 5}\n"
+                error_summary += "\n"
+                
+                # Log detalhado dos erros de servidor
+                log_error("=" * 60)
+                log_error("DETALHES COMPLETOS DOS ERROS DE SERVIDOR:")
+                for item in codes_with_errors:
+                    log_error(f"\nCarga: {item['code']}")
+                    log_error(f"Erro: {item['error']}")
+                    log_error(f"Resposta completa:\n{item['full_response']}")
+                    log_error("-" * 40)
+                log_error("=" * 60)
+            
+            # Exibir resumo na área de resultado
+            self.show_result(error_summary, "orange")
+            
+            # Se não há cargas válidas, não continuar
             if not cargo_ids:
-                messagebox.showerror("Erro", "Nenhuma carga válida encontrada")
+                messagebox.showerror(
+                    "Nenhuma Carga Válida",
+                    "Não foi possível encontrar nenhuma carga válida para consolidação.\n\n"
+                    "Verifique os erros acima e tente novamente."
+                )
+                return
+            
+            # Se há cargas válidas E erros, perguntar se quer continuar
+            error_summary += "=" * 50 + "\n\n"
+            error_summary += f"✅ {len(cargo_ids)} carga(s) podem ser consolidadas.\n\n"
+            error_summary += "⚠️ ATENÇÃO: Esta ação NÃO PODERÁ SER DESFEITA!\n\n"
+            error_summary += "Deseja continuar com a consolidação das cargas válidas?"
+            
+            # Perguntar ao usuário
+            response = messagebox.askyesno(
+                "Continuar com Erros?",
+                error_summary,
+                icon='warning'
+            )
+            
+            if not response:
+                self.show_result("❌ Consolidação cancelada pelo usuário.", "blue")
                 return
 
-            # Criar consolidador via API
-            payload = {
-                'warehouse_id': int(warehouse_id),
-                'customer_id': int(customer_id),
-                'cargo_ids': cargo_ids
-            }
+        if not cargo_ids:
+            messagebox.showerror("Erro", "Nenhuma carga válida encontrada")
+            return
+
+        # Criar consolidador via API
+        payload = {
+            'warehouse_id': int(context['warehouse_id']),
+            'customer_id': int(context['customer_id']),
+            'cargo_ids': cargo_ids
+        }
 
-            log_info(f"Criando consolidador: {len(cargo_ids)} cargas no galpão {warehouse_id} para cliente {customer_id}")
+        context['cargo_ids'] = cargo_ids
+        log_info(f"Criando consolidador: {len(cargo_ids)} cargas no galpão {context['warehouse_id']} para cliente {context['customer_id']}")
+
+        self.consolidate_button.config(state=tk.DISABLED)
+        self.consolidate_job = job_runner.submit(
+            self.root, self._run_create_consolidator, payload, context,
+            on_success=lambda outcome: self._on_consolidator_created(context, outcome),
+            on_error=self._on_consolidation_error,
+            on_progress=lambda success_msg, warnings: self.show_result(success_msg, "green" if not warnings else "orange")
+        )
+
+    def _build_consolidator_message(self, result: Dict[str, Any], context: Dict[str, Any]) -> tuple:
+        """
+        Monta a mensagem de sucesso do consolidador criado
+
+        Returns:
+            Tupla (mensagem, warnings, consolidated_count, total_requested)
+        """
+        cargo_ids = context['cargo_ids']
+        consolidator = result.get('data', {})
+        consolidator_code = consolidator.get('code', 'N/A')
+        
+        # Verificar se há warnings (consolidação parcial)
+        warnings = result.get('warnings')
+        consolidated_count = result.get('consolidated_count', consolidator.get('cargo_count', len(cargo_ids)))
+        total_requested = result.get('total_requested', len(cargo_ids))
+        
+        success_msg = f"✅ Consolidador criado com sucesso!\n\n"
+        success_msg += f"Código: {consolidator_code}\n"
+        success_msg += f"Cargas consolidadas: {consolidated_count}\n"
+        
+        if warnings:
+            success_msg += f"⚠️ Cargas solicitadas: {total_requested}\n"
+            success_msg += f"⚠️ Cargas NÃO consolidadas: {total_requested - consolidated_count}\n\n"
+        
+        success_msg += f"Galpão: {context['wh_name']}\n\n"
+        
+        # Mostrar warnings se houver
+        if warnings:
+            warning_msg = warnings.get('message', '')
+            skipped_cargos = warnings.get('skipped_cargos', [])
+            
+            if warning_msg:
+                success_msg += f"⚠️ {warning_msg}\n\n"
             
-            resp = self.api_client.post('/consolidators', data=payload, headers=headers)
+            if skipped_cargos:
+                success_msg += "Cargas não consolidadas:\n"
+                for skip in skipped_cargos[:5]:
+                    cargo_code = skip.get('cargo_code', f"ID:{skip.get('cargo_id')}")
+                    errors = skip.get('errors', [])
+                    success_msg += f"  • {cargo_code}\n"
+                    for err in errors:
+                        err_type = err.get('type', 'erro')
+                        err_msg = err.get('message', 'Erro desconhecido')
+                        success_msg += f"    → {err_type}: {err_msg[:80]}\n"
+                if len(skipped_cargos) > 5:
+                    success_msg += f"  ... e mais {len(skipped_cargos) - 5}\n"
+                success_msg += "\n"
+        
+        success_msg += f"Imprimindo {context['qty']} etiqueta(s)..."
+        return success_msg, warnings, consolidated_count, total_requested
 
-            if resp.status_code in (200, 201):
-                result = resp.json()
-                if result.get('success'):
-                    consolidator = result.get('data', {})
-                    consolidator_code = consolidator.get('code', 'N/A')
-                    
-                    # Verificar se há warnings (consolidação parcial)
-                    warnings = result.get('warnings')
-                    consolidated_count = result.get('consolidated_count', consolidator.get('cargo_count', len(cargo_ids)))
-                    total_requested = result.get('total_requested', len(cargo_ids))
-                    
-                    success_msg = f"✅ Consolidador criado com sucesso!\n\n"
-                    success_msg += f"Código: {consolidator_code}\n"
-                    success_msg += f"Cargas consolidadas: {consolidated_count}\n"
-                    
-                    if warnings:
-                        success_msg += f"⚠️ Cargas solicitadas: {total_requested}\n"
-                        success_msg += f"⚠️ Cargas NÃO consolidadas: {total_requested - consolidated_count}\n\n"
-                    
-                    success_msg += f"Galpão: {wh_name}\n\n"
-                    
-                    # Mostrar warnings se houver
-                    if warnings:
-                        warning_msg = warnings.get('message', '')
-                        skipped_cargos = warnings.get('skipped_cargos', [])
-                        
-                        if warning_msg:
-                            success_msg += f"⚠️ {warning_msg}\n\n"
-                        
-                        if skipped_cargos:
-                            success_msg += "Cargas não consolidadas:\n"
-                            for skip in skipped_cargos[:5]:
-                                cargo_code = skip.get('cargo_code', f"ID:{skip.get('cargo_id')}")
-                                errors = skip.get('errors', [])
-                                success_msg += f"  • {cargo_code}\n"
-                                for err in errors:
-                                    err_type = err.get('type', 'erro')
-                                    err_msg = err.get('message', 'Erro desconhecido')
-                                    success_msg += f"    → {err_type}: {err_msg[:80]}\n"
-                            if len(skipped_cargos) > 5:
-                                success_msg += f"  ... e mais {len(skipped_cargos) - 5}\n"
-                            success_msg += "\n"
+    def _run_create_consolidator(self, job, payload: Dict[str, Any], context: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Cria o consolidador na API e imprime as etiquetas (em segundo plano)
+
+        Returns:
+            Dict com status 'created' (result, print_error) ou 'http' (status_code, text)
+        """
+        headers = {'Authorization': f'Bearer {self.token}'}
+        resp = self.api_client.post('/consolidators', data=payload, headers=headers)
+
+        if resp.status_code not in (200, 201):
+            return {'status': 'http', 'status_code': resp.status_code, 'text': resp.text}
+
+        result = resp.json()
+        if not result.get('success'):
+            return {'status': 'failed', 'message': result.get('message', 'Erro desconhecido')}
+
+        success_msg, warnings, _, _ = self._build_consolidator_message(result, context)
+        job.report_progress(success_msg, warnings)
+
+        # Imprimir etiquetas
+        print_error = None
+        try:
+            self.print_consolidator_label(result.get('data', {}), context['printer_id'], context['qty'])
+        except Exception as e:
+            log_error(f"Erro ao imprimir: {e}")
+            print_error = e
+
+        return {'status': 'created', 'result': result, 'print_error': print_error}
+
+    def _on_consolidator_created(self, context: Dict[str, Any], outcome: Dict[str, Any]):
+        """Exibe o resultado da criação do consolidador"""
+        self._finish_consolidation()
+        qty = context['qty']
+
+        if outcome['status'] == 'created':
+            result = outcome['result']
+            consolidator_code = result.get('data', {}).get('code', 'N/A')
+            success_msg, warnings, consolidated_count, total_requested = \
+                self._build_consolidator_message(result, context)
+
+            print_error = outcome['print_error']
+            if print_error is None:
+                final_msg = success_msg.replace("Imprimindo", "✅ Impresso")
+                self.show_result(final_msg, "green" if not warnings else "orange")
+                
+                msg_title = "Sucesso com Avisos" if warnings else "Sucesso"
+                msg_text = f"Consolidador {consolidator_code} criado!\n\n"
+                msg_text += f"✅ {consolidated_count} carga(s) consolidada(s)\n"
+                if warnings:
+                    msg_text += f"⚠️ {total_requested - consolidated_count} carga(s) não incluída(s)\n\n"
+                msg_text += f"✅ {qty} etiqueta(s) impressa(s)!"
+                
+                messagebox.showinfo(msg_title, msg_text)
+                
+                # Limpar formulário após sucesso
+                self.clear_form()
+            else:
+                error_msg = success_msg + f"\n\n⚠️ Erro ao imprimir:\n{str(print_error)}"
+                self.show_result(error_msg, "orange")
+                messagebox.showwarning("Atenção", 
+                    f"Consolidador criado, mas erro ao imprimir:\n{str(print_error)}")
+        elif outcome['status'] == 'failed':
+            messagebox.showerror("Erro", outcome['message'])
+        else:
+            status_code = outcome['status_code']
+            resp_text = outcome['text']
+            # Tratar erros da API (incluindo o formato especial de erros de consolidação)
+            log_error(f"Erro ao criar consolidador - HTTP {status_code}")
+            log_error(f"Resposta completa: {resp_text}")
+            
+            try:
+                error_data = json.loads(resp_text)
+                if not error_data.get('success', True):
+                    error_msg = f"❌ {error_data.get('message', 'Erro ao consolidar')}\n\n"
                     
-                    success_msg += f"Imprimindo {qty} etiqueta(s)..."
+                    # Verificar se há erros detalhados (suporta 2 formatos)
+                    # Formato 1: "errors" (antigo)
+                    # Formato 2: "invalid_cargos" (novo)
+                    errors_list = error_data.get('errors') or error_data.get('invalid_cargos', [])
                     
-                    self.show_result(success_msg, "green" if not warnings else "orange")
-                    self.root.update()
-
-                    # Imprimir etiquetas
-                    try:
-                        self.print_consolidator_label(consolidator, printer_id, qty)
-                        final_msg = success_msg.replace("Imprimindo", "✅ Impresso")
-                        self.show_result(final_msg, "green" if not warnings else "orange")
-                        
-                        msg_title = "Sucesso com Avisos" if warnings else "Sucesso"
-                        msg_text = f"Consolidador {consolidator_code} criado!\n\n"
-                        msg_text += f"✅ {consolidated_count} carga(s) consolidada(s)\n"
-                        if warnings:
-                            msg_text += f"⚠️ {total_requested - consolidated_count} carga(s) não incluída(s)\n\n"
-                        msg_text += f"✅ {qty} etiqueta(s) impressa(s)!"
-                        
-                        messagebox.showinfo(msg_title, msg_text)
-                        
-                        # Limpar formulário após sucesso
-                        self.clear_form()
-                        
-                    except Exception as print_error:
-                        log_error(f"Erro ao imprimir: {print_error}")
-                        error_msg = success_msg + f"\n\n⚠️ Erro ao imprimir:\n{str(print_error)}"
-                        self.show_result(error_msg, "orange")
-                        messagebox.showwarning("Atenção", 
-                            f"Consolidador criado, mas erro ao imprimir:\n{str(print_error)}")
-                else:
-                    messagebox.showerror("Erro", result.get('message', 'Erro desconhecido'))
-            else:
-                # Tratar erros da API (incluindo o formato especial de erros de consolidação)
-                log_error(f"Erro ao criar consolidador - HTTP {resp.status_code}")
-                log_error(f"Resposta completa: {resp.text}")
-                
-                try:
-                    error_data = resp.json()
-                    if not error_data.get('success', True):
-                        error_msg = f"❌ {error_data.get('message', 'Erro ao consolidar')}\n\n"
-                        
-                        # Verificar se há erros detalhados (suporta 2 formatos)
-                        # Formato 1: "errors" (antigo)
-                        # Formato 2: "invalid_cargos" (novo)
-                        errors_list = error_data.get('errors') or error_data.get('invalid_cargos', [])
-                        
-                        if errors_list and isinstance(errors_list, list):
-                            error_msg += "Detalhes dos erros:\n\n"
-                            for err in errors_list:
-                                if isinstance(err, dict):
-                                    cargo_code = err.get('cargo_code', 'N/A')
+                    if errors_list and isinstance(errors_list, list):
+                        error_msg += "Detalhes dos erros:\n\n"
+                        for err in errors_list:
+                            if isinstance(err, dict):
+                                cargo_code = err.get('cargo_code', 'N/A')
+                                
+                                # Formato antigo: erro direto no objeto
+                                if 'error' in err:
+                                    error_type = err.get('error', 'desconhecido')
+                                    message = err.get('message', 'Erro desconhecido')
                                     
-                                    # Formato antigo: erro direto no objeto
-                                    if 'error' in err:
-                                        error_type = err.get('error', 'desconhecido')
-                                        message = err.get('message', 'Erro desconhecido')
-                                        
-                                        error_msg += f"📦 Carga: {cargo_code}\n"
-                                        error_msg += f"   Tipo: {error_type}\n"
-                                        error_msg += f"   {message}\n\n"
-                                        
-                                        # Informações extras se disponíveis
-                                        if err.get('cargo_warehouse'):
-                                            error_msg += f"   Galpão atual: {err.get('cargo_warehouse')}\n"
-                                        if err.get('target_warehouse'):
-                                            error_msg += f"   Galpão destino: {err.get('target_warehouse')}\n"
-                                        error_msg += "\n"
+                                    error_msg += f"📦 Carga: {cargo_code}\n"
+                                    error_msg += f"   Tipo: {error_type}\n"
+                                    error_msg += f"   {message}\n\n"
                                     
-                                    # Formato novo: array de errors dentro do objeto
-                                    elif 'errors' in err:
-                                        error_msg += f"📦 Carga: {cargo_code}\n"
-                                        sub_errors = err.get('errors', [])
-                                        for sub_err in sub_errors:
-                                            if isinstance(sub_err, dict):
-                                                err_type = sub_err.get('type', 'desconhecido')
-                                                err_message = sub_err.get('message', 'Erro desconhecido')
-                                                error_msg += f"   • {err_type}: {err_message}\n"
-                                        error_msg += "\n"
-                        
-                        self.show_result(error_msg, "red")
-                        messagebox.showerror("Erro na Consolidação", error_data.get('message', 'Erro'))
-                    else:
-                        # Erro sem formato esperado
-                        messagebox.showerror(
-                            f"Erro HTTP {resp.status_code}",
-                            f"Resposta inesperada da API:\n\n{resp.text[:500]}"
-                        )
-                except Exception as parse_error:
-                    log_error(f"Erro ao processar resposta da API: {parse_error}")
+                                    # Informações extras se disponíveis
+                                    if err.get('cargo_warehouse'):
+                                        error_msg += f"   Galpão atual: {err.get('cargo_warehouse')}\n"
+                                    if err.get('target_warehouse'):
+                                        error_msg += f"   Galpão destino: {err.get('target_warehouse')}\n"
+                                    error_msg += "\n"
+                                
+                                # Formato novo: array de errors dentro do objeto
+                                elif 'errors' in err:
+                                    error_msg += f"📦 Carga: {cargo_code}\n"
+                                    sub_errors = err.get('errors', [])
+                                    for sub_err in sub_errors:
+                                        if isinstance(sub_err, dict):
+                                            err_type = sub_err.get('type', 'desconhecido')
+                                            err_message = sub_err.get('message', 'Erro desconhecido')
+                                            error_msg += f"   • {err_type}: {err_message}\n"
+                                    error_msg += "\n"
+                    
+                    self.show_result(error_msg, "red")
+                    messagebox.showerror("Erro na Consolidação", error_data.get('message', 'Erro'))
+                else:
+                    # Erro sem formato esperado
                     messagebox.showerror(
-                        f"Erro HTTP {resp.status_code}",
-                        f"Erro ao criar consolidador:\n\n{resp.text[:500]}"
+                        f"Erro HTTP {status_code}",
+                        f"Resposta inesperada da API:\n\n{resp_text[:500]}"
                     )
-
-        except Exception as e:
-            log_error(f"Erro ao consolidar: {e}")
-            self.show_result(f"❌ Erro:\n{str(e)}", "red")
-            messagebox.showerror("Erro", f"Erro ao consolidar:\n{e}")
+            except Exception as parse_error:
+                log_error(f"Erro ao processar resposta da API: {parse_error}")
+                messagebox.showerror(
+                    f"Erro HTTP {status_code}",
+                    f"Erro ao criar consolidador:\n\n{resp_text[:500]}"
+                )
 
     def print_consolidator_label(self, consolidator: Dict[str, Any], printer_id: str, qty: int):
         """Imprime etiqueta do consolidador"""
@@ -608,9 +655,6 @@ class ConsolidatorWindow:
             'created_at': consolidator.get('created_at'),
         }
 
-        zpl = self.zpl_generator.build_consolidator_zpl(code, consolidator_data)
-        all_zpl = zpl * qty
-
         # Configurar impressora
         if printer_id == 'file':
             self.printer.config['output_mode'] = 'file'
@@ -621,7 +665,15 @@ class ConsolidatorWindow:
             self.printer.config['printer_id'] = printer_id
             self.printer.config['output_mode'] = 'configured'
 
-        self.printer.send_print_job(all_zpl, qty)
+        # Formato gravado na impressora: envia só a chamada ^XF com os dados
+        if stored_formats_enabled():
+            self.printer.send_stored_format_job(self.zpl_generator.stored_formats['consolidator'],
+                                                self.zpl_generator.build_consolidator_recall(code, consolidator_data),
+                                                qty)
+            return
+
+        zpl = self.zpl_generator.build_consolidator_zpl(code, consolidator_data)
+        self.printer.send_print_job(zpl * qty, qty)
 
     def clear_form(self):
         """Limpa o formulário"""
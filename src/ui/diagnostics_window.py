@@ -0,0 +1,104 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Painel de diagnóstico
+Latências p50/p95/p99 por operação (requisições à API por endpoint, geração
+de ZPL, jobs por impressora, busca de cargas), atualizadas a cada 2 segundos
+"""
+
+import tkinter as tk
+from tkinter import ttk, messagebox
+
+from utils.logger import log_info, log_error
+from utils.metrics import get_metrics, metrics_export_path
+
+# Nome exibido de cada operação
+OPERATION_NAMES = {
+    'api_request': 'API',
+    'zpl_build': 'Geração ZPL',
+    'print_job': 'Impressão',
+    'cargo_lookup': 'Busca de carga',
+}
+
+REFRESH_MS = 2000
+
+
+class DiagnosticsWindow:
+    """Janela com as métricas de latência do processo"""
+
+    def __init__(self, parent):
+        self.metrics = get_metrics()
+
+        self.root = tk.Toplevel(parent)
+        self.root.title("Diagnóstico - Latências")
+        self.root.geometry("820x420")
+        self.root.transient(parent)
+
+        self.create_widgets()
+        self.refresh()
+
+    def create_widgets(self):
+        main_frame = ttk.Frame(self.root, padding="8")
+        main_frame.pack(fill=tk.BOTH, expand=True)
+
+        ttk.Label(main_frame, text="📊 Latências por operação (ms)",
+                  font=('Arial', 11, 'bold')).pack(anchor='w')
+        self.summary_label = ttk.Label(main_frame, text="", font=('Arial', 8), foreground='gray')
+        self.summary_label.pack(anchor='w', pady=(2, 6))
+
+        columns = ('operation', 'series', 'count', 'errors', 'p50', 'p95', 'p99', 'max')
+        headings = ('Operação', 'Série', 'Qtd', 'Erros', 'p50', 'p95', 'p99', 'Máx')
+        widths = (100, 300, 60, 50, 65, 65, 65, 65)
+        tree_frame = ttk.Frame(main_frame)
+        tree_frame.pack(fill=tk.BOTH, expand=True)
+        self.tree = ttk.Treeview(tree_frame, columns=columns, show='headings', height=14)
+        for column, heading, width in zip(columns, headings, widths):
+            self.tree.heading(column, text=heading)
+            self.tree.column(column, width=width, anchor='w' if column in ('operation', 'series') else 'e')
+        scrollbar = ttk.Scrollbar(tree_frame, orient=tk.VERTICAL, command=self.tree.yview)
+        self.tree.configure(yscrollcommand=scrollbar.set)
+        self.tree.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
+        scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
+
+        buttons = ttk.Frame(main_frame)
+        buttons.pack(fill=tk.X, pady=(6, 0))
+        ttk.Button(buttons, text="💾 Exportar", command=self.export, width=12).pack(side=tk.LEFT, padx=(0, 3))
+        ttk.Button(buttons, text="🗑️ Zerar", command=self.reset, width=12).pack(side=tk.LEFT)
+        ttk.Button(buttons, text="❌ Fechar", command=self.root.destroy, width=12).pack(side=tk.RIGHT)
+
+    def refresh(self):
+        """Recarrega a tabela a cada REFRESH_MS (thread do Tk)"""
+        if not self.root.winfo_exists():
+            return
+        self._render()
+        self.root.after(REFRESH_MS, self.refresh)
+
+    def _render(self):
+        rows = self.metrics.snapshot()
+        self.tree.delete(*self.tree.get_children())
+        for row in rows:
+            series = ' '.join(f"{value}" if key in ('endpoint', 'op') else f"{key}={value}"
+                              for key, value in sorted(row['labels'].items()))
+            self.tree.insert('', tk.END, values=(
+                OPERATION_NAMES.get(row['name'], row['name']), series, row['count'], row['errors'],
+                f"{row['p50_ms']:.1f}", f"{row['p95_ms']:.1f}", f"{row['p99_ms']:.1f}", f"{row['max_ms']:.1f}"))
+
+        total = sum(row['count'] for row in rows)
+        status = "" if self.metrics.enabled else " | métricas desabilitadas (settings.json)"
+        self.summary_label.config(text=f"{len(rows)} série(s), {total} medição(ões){status}")
+
+    def export(self):
+        """Grava as métricas no arquivo configurado"""
+        try:
+            path = self.metrics.export(metrics_export_path())
+            log_info(f"Métricas exportadas para {path}")
+            messagebox.showinfo("Diagnóstico", f"Métricas exportadas para:\n{path}", parent=self.root)
+        except Exception as e:
+            log_error(f"Erro ao exportar métricas: {e}")
+            messagebox.showerror("Erro", f"Erro ao exportar métricas:\n{e}", parent=self.root)
+
+    def reset(self):
+        if messagebox.askyesno("Diagnóstico", "Zerar todas as medições?", parent=self.root):
+            self.metrics.reset()
+            self._render()
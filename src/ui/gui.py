@@ -8,6 +8,8 @@ from auth.login import LoginManager
 from api.client import APIClient
 from utils.logger import setup_logger, log_info, log_error
 from utils.validators import validate_cpf, format_cpf, clean_cpf
+from printer.spooler import get_spooler, spooler_enabled
+from api.reference_data import prefetch_reference_data
 
 class LoginWindowSimple:
     """Versão simplificada da tela de login sem formatação automática"""
@@ -273,9 +275,22 @@ class MainWindow:
         self.api_client = APIClient()
         self.api_client.token = token
         
+        # Retomar jobs pendentes do spooler de impressão (sobrevivem a reinícios)
+        try:
+            if spooler_enabled():
+                get_spooler()
+        except Exception as e:
+            log_error(f"Erro ao iniciar spooler de impressão: {e}")
+        
+        # Pré-carregar galpões/clientes/áreas em segundo plano (janelas abrem sem esperar a API)
+        try:
+            prefetch_reference_data(token)
+        except Exception as e:
+            log_error(f"Erro ao iniciar pré-carga de dados de referência: {e}")
+        
         self.root = tk.Tk()
         self.root.title("Repositorium WMS - Menu Principal")
-        self.root.geometry("450x600")  # Tamanho compacto
+        self.root.geometry("450x660")  # Tamanho compacto
         self.root.resizable(False, False)
         
         # Centralizar janela na tela
@@ -365,6 +380,13 @@ class MainWindow:
                                           style='Compact.TButton')
         printer_config_button.pack(pady=8, fill=tk.X)
         
+        # Painel de diagnóstico (latências por operação)
+        diagnostics_button = ttk.Button(buttons_frame,
+                                        text="📊 Diagnóstico",
+                                        command=self.open_diagnostics,
+                                        style='Compact.TButton')
+        diagnostics_button.pack(pady=8, fill=tk.X)
+        
         separator2 = ttk.Separator(buttons_frame, orient='horizontal')
         separator2.pack(fill=tk.X, pady=12)
         
@@ -796,6 +818,15 @@ class MainWindow:
             log_error(f"Erro ao abrir configuração de impressoras: {str(e)}")
             messagebox.showerror("Erro", f"Erro ao abrir configuração de impressoras:\n{str(e)}")
     
+    def open_diagnostics(self):
+        """Abre o painel de diagnóstico com as latências medidas"""
+        try:
+            from ui.diagnostics_window import DiagnosticsWindow
+            DiagnosticsWindow(self.root)
+        except Exception as e:
+            log_error(f"Erro ao abrir painel de diagnóstico: {str(e)}")
+            messagebox.showerror("Erro", f"Erro ao abrir painel de diagnóstico:\n{str(e)}")
+    
     def disable_main_window(self):
         """Desabilita todos os botões da janela principal"""
         # Verificar se a janela principal ainda existe
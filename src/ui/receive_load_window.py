@@ -6,6 +6,7 @@ Janela de Recebimento Físico de Cargas - Nova Versão
 Fluxo: 1. Selecionar Galpão → 2. Selecionar Área → 3. Buscar Carga → 4. Aceitar/Ressalvas/Rejeitar → 5. Imprimir Etiqueta
 """
 
+import time
 import tkinter as tk
 from tkinter import ttk, messagebox, scrolledtext
 from datetime import datetime
@@ -14,9 +15,17 @@ from typing import Optional, Dict, Any, List
 from api.client import APIClient
 from printer.zpl_generator import ZplGenerator
 from printer.label_printer import LabelPrinter
-from utils.logger import log_info, log_error
+from utils.logger import log_info, log_error, log_debug
 from utils.validators import format_cpf
 from utils.printer_config import PrinterConfigManager
+from utils.job_runner import job_runner
+from printer.format_registry import stored_formats_enabled
+from api.reference_data import get_reference_store
+from cargo_cache import get_cargo_cache
+from cargo_manager import CargoManager
+from print_history import get_print_history
+from scan_pipeline import create_scan_pipeline
+from receiving_journal import get_receiving_journal, receiving_journal_enabled, CONFLICT
 
 
 class ReceiveLoadWindow:
@@ -31,6 +40,11 @@ class ReceiveLoadWindow:
         self.api_client = APIClient()
         self.api_client.token = token
         
+        # Journal local: ações gravadas na estação e sincronizadas com a API em segundo plano
+        self.receiving_journal = get_receiving_journal() if receiving_journal_enabled() else None
+        if self.receiving_journal:
+            self.receiving_journal.set_token(token)
+        
         # Gerenciadores de impressão
         self.zpl_generator = ZplGenerator()
         self.printer = LabelPrinter()
@@ -44,6 +58,11 @@ class ReceiveLoadWindow:
         self.current_cargo = None
         self.configured_printers = {}
         
+        # Jobs em segundo plano
+        self.search_job = None
+        self.process_job = None
+        self.scan_pipeline = None
+        
         # IDs selecionados
         self.selected_warehouse_id = None
         self.selected_area_id = None
@@ -70,16 +89,12 @@ class ReceiveLoadWindow:
     def load_warehouses(self):
         """Carrega galpões"""
         try:
-            headers = {'Authorization': f'Bearer {self.token}'}
-            response = self.api_client.get('/warehouses/select', headers=headers)
-            
-            if response.status_code == 200:
-                result = response.json()
-                if result.get('success') and result.get('data'):
-                    self.warehouses = result['data']
-                    for w in self.warehouses:
-                        self.warehouse_dict[w.get('name', 'N/A')] = w.get('id')
-                    log_info(f"Carregados {len(self.warehouses)} galpões")
+            result = get_reference_store().get('warehouses', token=self.token)
+            if result.get('success') and result.get('data'):
+                self.warehouses = result['data']
+                for w in self.warehouses:
+                    self.warehouse_dict[w.get('name', 'N/A')] = w.get('id')
+                log_info(f"Carregados {len(self.warehouses)} galpões")
         except Exception as e:
             log_error(f"Erro ao carregar galpões: {e}")
             
@@ -94,35 +109,29 @@ class ReceiveLoadWindow:
             return
             
         try:
-            headers = {'Authorization': f'Bearer {self.token}'}
-            response = self.api_client.get(
-                f'/warehouses/{self.selected_warehouse_id}/areas',
-                headers=headers
-            )
-            
-            if response.status_code == 200:
-                result = response.json()
-                if result.get('success') and result.get('data'):
-                    self.areas = result['data'].get('areas', [])
-                    self.area_dict = {}
-                    for area in self.areas:
-                        area_info = f"{area.get('name')} - {area.get('type', '')} (Disponível: {area.get('available', 0)})"
-                        self.area_dict[area_info] = area.get('id')
+            result = get_reference_store().get('warehouse_areas', token=self.token,
+                                               warehouse_id=self.selected_warehouse_id)
+            if result.get('success') and result.get('data'):
+                self.areas = result['data'].get('areas', [])
+                self.area_dict = {}
+                for area in self.areas:
+                    area_info = f"{area.get('name')} - {area.get('type', '')} (Disponível: {area.get('available', 0)})"
+                    self.area_dict[area_info] = area.get('id')
+                
+                # Atualizar combobox de áreas
+                if self.areas:
+                    area_options = list(self.area_dict.keys())
+                    self.area_combo['values'] = area_options
+                    self.area_combo.set('-- Selecione uma área --')
+                    self.area_combo.config(state='readonly')
+                    log_info(f"Carregadas {len(self.areas)} áreas")
+                    self.show_cargo_info(f"✅ Galpão selecionado!\n\n⚠️ PASSO 2: Selecione uma área para continuar.\n\n{len(self.areas)} área(s) disponível(is).")
+                else:
+                    self.area_combo['values'] = ['Nenhuma área disponível']
+                    self.area_combo.set('Nenhuma área disponível')
+                    self.area_combo.config(state='disabled')
+                    self.show_cargo_info("⚠️ Este galpão não possui áreas cadastradas.\n\nSelecione outro galpão.")
                     
-                    # Atualizar combobox de áreas
-                    if self.areas:
-                        area_options = list(self.area_dict.keys())
-                        self.area_combo['values'] = area_options
-                        self.area_combo.set('-- Selecione uma área --')
-                        self.area_combo.config(state='readonly')
-                        log_info(f"Carregadas {len(self.areas)} áreas")
-                        self.show_cargo_info(f"✅ Galpão selecionado!\n\n⚠️ PASSO 2: Selecione uma área para continuar.\n\n{len(self.areas)} área(s) disponível(is).")
-                    else:
-                        self.area_combo['values'] = ['Nenhuma área disponível']
-                        self.area_combo.set('Nenhuma área disponível')
-                        self.area_combo.config(state='disabled')
-                        self.show_cargo_info("⚠️ Este galpão não possui áreas cadastradas.\n\nSelecione outro galpão.")
-                        
         except Exception as e:
             log_error(f"Erro ao carregar áreas: {e}")
             if hasattr(self, 'area_combo'):
@@ -238,12 +247,21 @@ class ReceiveLoadWindow:
         
         self.code_entry = ttk.Entry(search_frame, font=('Arial', 9), state='disabled')
         self.code_entry.pack(side=tk.LEFT, fill=tk.X, expand=True, padx=(0, 5))
-        self.code_entry.bind('<Return>', lambda e: self.search_cargo())
+        self.code_entry.bind('<Return>', lambda e: self.on_code_entered())
         
         self.search_button = ttk.Button(search_frame, text="🔍",
                                        command=self.search_cargo, state='disabled', width=4)
         self.search_button.pack(side=tk.LEFT)
         
+        # Modo contínuo: cada leitura do scanner é aceita em segundo plano
+        scan_frame = ttk.Frame(step3_frame)
+        scan_frame.pack(fill=tk.X, pady=(3, 0))
+        self.scan_mode_var = tk.BooleanVar(value=False)
+        ttk.Checkbutton(scan_frame, text="📡 Modo contínuo (scanner): aceitar cada leitura",
+                        variable=self.scan_mode_var, command=self.toggle_scan_mode).pack(side=tk.LEFT)
+        self.scan_stats_label = ttk.Label(scan_frame, text="", font=('Arial', 8), foreground='blue')
+        self.scan_stats_label.pack(side=tk.RIGHT)
+        
         # INFORMAÇÕES DA CARGA
         info_frame = ttk.LabelFrame(main_frame, text="📋 Informações", padding="3")
         info_frame.pack(fill=tk.BOTH, expand=True, pady=(0, 5))
@@ -318,8 +336,15 @@ class ReceiveLoadWindow:
         
         ttk.Button(bottom_buttons, text="🔄 Limpar",
                   command=self.clear_form, width=12).pack(side=tk.LEFT, padx=(0, 3))
+        if self.receiving_journal:
+            ttk.Button(bottom_buttons, text="⚠️ Conflitos",
+                      command=self.show_journal_conflicts, width=12).pack(side=tk.LEFT, padx=(0, 3))
+            self.journal_status_label = ttk.Label(bottom_buttons, text="", font=('Arial', 8))
+            self.journal_status_label.pack(side=tk.LEFT, padx=(5, 0))
+            self._poll_journal_status()
         ttk.Button(bottom_buttons, text="❌ Fechar",
-                  command=self.root.destroy, width=12).pack(side=tk.RIGHT)
+                  command=self.close_window, width=12).pack(side=tk.RIGHT)
+        self.root.protocol("WM_DELETE_WINDOW", self.close_window)
                   
     def show_cargo_info(self, text: str):
         """Exibe informações da carga"""
@@ -339,37 +364,63 @@ class ReceiveLoadWindow:
         if not self.selected_warehouse_id:
             messagebox.showwarning("Atenção", "Selecione um galpão primeiro.")
             return
+        
+        if self.search_job and not self.search_job.done():
+            return
             
-        try:
-            self.show_cargo_info("🔍 Buscando carga...")
-            self.root.update()
-            
-            headers = {'Authorization': f'Bearer {self.token}'}
-            response = self.api_client.get(
-                '/cargos/pending-physical-receipt',
-                headers=headers,
-                params={'code': code, 'per_page': 1}
-            )
-            
-            if response.status_code == 200:
-                result = response.json()
-                if result.get('success') and result.get('data'):
-                    cargas = result['data']
-                    if cargas:
-                        self.current_cargo = cargas[0]
-                        self.display_cargo_details(self.current_cargo)
-                        self.enable_action_buttons()
-                        log_info(f"Carga {code} encontrada")
-                        return
-                        
+        self.show_cargo_info("🔍 Buscando carga...")
+        self.disable_action_buttons()
+        self.search_button.config(state='disabled')
+        
+        def on_success(cargo):
+            self.search_button.config(state='normal')
+            if cargo:
+                self.current_cargo = cargo
+                self.display_cargo_details(self.current_cargo)
+                self.enable_action_buttons()
+                log_info(f"Carga {code} encontrada")
+                return
+                
             self.show_cargo_info(f"❌ Carga '{code}' não encontrada ou já recebida.")
             self.current_cargo = None
             self.disable_action_buttons()
-            
-        except Exception as e:
+        
+        def on_error(e):
+            self.search_button.config(state='normal')
             log_error(f"Erro ao buscar carga: {e}")
+            if self.receiving_journal and messagebox.askyesno(
+                    "API indisponível",
+                    f"Erro ao buscar carga:\n{e}\n\n"
+                    f"Registrar a ação da carga '{code}' na estação? Ela será enviada ao sistema "
+                    f"quando a API voltar."):
+                # Sem ID: o journal localiza a carga pelo código na sincronização
+                self.current_cargo = {'id': None, 'code': code, '_source': 'offline'}
+                self.show_cargo_info(f"📴 CARGA {code} (SEM CONSULTA À API)\n\n"
+                                     f"Dados da carga indisponíveis; a ação será sincronizada depois.")
+                self.enable_action_buttons()
+                return
             messagebox.showerror("Erro", f"Erro ao buscar carga:\n{e}")
             self.disable_action_buttons()
+        
+        self.search_job = job_runner.submit(self.root, self._fetch_pending_cargo, code,
+                                            on_success=on_success, on_error=on_error)
+    
+    def _fetch_pending_cargo(self, job, code: str) -> Optional[Dict]:
+        """Busca a carga pendente de recebimento na API (em segundo plano)"""
+        headers = {'Authorization': f'Bearer {self.token}'}
+        response = self.api_client.get(
+            '/cargos/pending-physical-receipt',
+            headers=headers,
+            params={'code': code, 'per_page': 1}
+        )
+        
+        if response.status_code == 200:
+            result = response.json()
+            if result.get('success') and result.get('data'):
+                cargas = result['data']
+                if cargas:
+                    return cargas[0]
+        return None
             
     def display_cargo_details(self, cargo: Dict):
         """Exibe detalhes da carga"""
@@ -476,101 +527,167 @@ class ReceiveLoadWindow:
         if remarks and action in ['accept_with_remarks', 'reject']:
             payload['remarks'] = remarks
             
-        # Enviar para API
-        try:
-            headers = {'Authorization': f'Bearer {self.token}'}
-            cargo_id = self.current_cargo['id']
-            
-            # Log detalhado do payload
-            log_info(f"Enviando para API - Cargo ID: {cargo_id}")
-            log_info(f"Payload: {payload}")
-            
-            response = self.api_client.post(
-                f'/cargos/{cargo_id}/receive-physically',
-                data=payload,
-                headers=headers
-            )
-            
-            log_info(f"Resposta da API - Status: {response.status_code}")
-            
-            # Log da resposta completa em caso de erro
-            if response.status_code != 200:
-                try:
-                    error_response = response.json()
-                    log_error(f"Erro da API (HTTP {response.status_code}): {error_response}")
-                except:
-                    log_error(f"Erro da API (HTTP {response.status_code}): {response.text}")
-            
-            if response.status_code == 200:
-                result = response.json()
-                if result.get('success'):
-                    log_info(f"Carga {cargo_code} processada: {action}")
-                    
-                    # Imprimir etiqueta automaticamente (exceto para rejeição)
-                    if action != 'reject':
-                        print_success = self.print_label_after_receive(cargo_code)
-                        
-                        # Mensagem de sucesso incluindo status da impressão
-                        success_msg = self.format_success_message(result, action)
-                        if print_success:
-                            success_msg += "\n\n✅ Etiqueta impressa com sucesso!"
-                        else:
-                            success_msg += "\n\n⚠️ Erro ao imprimir etiqueta (verifique os logs)"
-                        
-                        messagebox.showinfo("Recebimento Concluído", success_msg)
-                    else:
-                        # Rejeição - apenas mostrar mensagem de sucesso
-                        success_msg = self.format_success_message(result, action)
-                        messagebox.showinfo("Recebimento Concluído", success_msg)
-                    
-                    # Limpar formulário
-                    self.clear_form()
+        # Dados de impressão lidos aqui: widgets só podem ser acessados na thread do Tk
+        print_request = None
+        if action != 'reject':
+            print_request = self.prepare_label_print(cargo_code)
+        
+        if self.process_job and not self.process_job.done():
+            return
+        
+        self.disable_action_buttons()
+        self.show_cargo_info(f"⏳ Processando carga {cargo_code}...")
+        
+        def on_success(outcome):
+            if outcome['success']:
+                if outcome.get('journal_key'):
+                    success_msg = self.format_journal_message(cargo_code, action)
                 else:
-                    messagebox.showerror("Erro", result.get('message', 'Erro desconhecido'))
-            else:
-                # Erro HTTP - mostrar detalhes
-                try:
-                    error_data = response.json() if response.text else {}
-                    error_msg = error_data.get('message', f'Erro HTTP {response.status_code}')
-                    
-                    # Se houver erros de validação (422), mostrar detalhes
-                    if response.status_code == 422 and 'errors' in error_data:
-                        errors = error_data.get('errors', {})
-                        error_details = []
-                        for field, messages in errors.items():
-                            if isinstance(messages, list):
-                                error_details.append(f"• {field}: {', '.join(messages)}")
-                            else:
-                                error_details.append(f"• {field}: {messages}")
-                        
-                        if error_details:
-                            error_msg += "\n\nErros de validação:\n" + "\n".join(error_details)
-                    
-                    # Se erro 500, adicionar orientação
-                    if response.status_code == 500:
-                        error_msg += "\n\n⚠️ Este é um erro interno do servidor."
-                        error_msg += "\nContate o administrador do sistema."
-                        
-                        # Se for erro de SQL relacionado a movement_type
-                        if 'movement_type' in error_msg.lower() and 'truncated' in error_msg.lower():
-                            error_msg += "\n\n💡 Problema detectado: O campo 'movement_type' no banco de dados"
-                            error_msg += "\nprecisa ser ajustado para aceitar valores maiores."
-                    
-                    messagebox.showerror("Erro na API", error_msg)
-                except Exception as parse_error:
-                    log_error(f"Erro ao parsear resposta: {parse_error}")
-                    messagebox.showerror("Erro", f"Erro HTTP {response.status_code}")
+                    success_msg = self.format_success_message(outcome['result'], action)
                 
-        except Exception as e:
+                # Mensagem de sucesso incluindo status da impressão (exceto para rejeição)
+                if action != 'reject':
+                    if outcome['print_success']:
+                        success_msg += "\n\n✅ Etiqueta impressa com sucesso!"
+                    else:
+                        success_msg += "\n\n⚠️ Erro ao imprimir etiqueta (verifique os logs)"
+                
+                messagebox.showinfo("Recebimento Concluído", success_msg)
+                
+                # Limpar formulário
+                self.clear_form()
+            else:
+                self.display_cargo_details(self.current_cargo)
+                self.enable_action_buttons()
+                messagebox.showerror(outcome['error_title'], outcome['error_message'])
+        
+        def on_error(e):
             log_error(f"Erro ao processar carga: {e}")
+            self.display_cargo_details(self.current_cargo)
+            self.enable_action_buttons()
             messagebox.showerror("Erro", f"Erro ao processar carga:\n{e}")
+        
+        self.process_job = job_runner.submit(self.root, self._run_receive_job,
+                                             self.current_cargo['id'], cargo_code, action,
+                                             payload, print_request,
+                                             on_success=on_success, on_error=on_error)
+    
+    def _run_receive_job(self, job, cargo_id, cargo_code: str, action: str,
+                         payload: Dict, print_request: Optional[Dict]) -> Dict:
+        """
+        Envia a ação de recebimento e imprime a etiqueta (em segundo plano)
+        
+        Returns:
+            Dict com success, result/print_success ou error_title/error_message
+        """
+        if self.receiving_journal:
+            # Gravado na estação: a API recebe a ação pela sincronização em segundo plano
+            journal_key = self.receiving_journal.record(cargo_id, cargo_code, payload)
+            print_success = self._after_receive(cargo_code, action, print_request)
+            return {'success': True, 'journal_key': journal_key, 'print_success': print_success}
+        
+        headers = {'Authorization': f'Bearer {self.token}'}
+        
+        # Payload completo só em DEBUG
+        log_debug(f"Enviando para API - Cargo ID: {cargo_id}", cargo_code=cargo_code, payload=payload)
+        start = time.perf_counter()
+        
+        response = self.api_client.post(
+            f'/cargos/{cargo_id}/receive-physically',
+            data=payload,
+            headers=headers
+        )
+        
+        log_info(f"Resposta da API - Status: {response.status_code}", cargo_code=cargo_code, action=action,
+                 status=response.status_code, duration_ms=round((time.perf_counter() - start) * 1000, 1))
+        
+        # Log da resposta completa em caso de erro
+        if response.status_code != 200:
+            try:
+                error_response = response.json()
+                log_error(f"Erro da API (HTTP {response.status_code}): {error_response}")
+            except:
+                log_error(f"Erro da API (HTTP {response.status_code}): {response.text}")
+        
+        if response.status_code == 200:
+            result = response.json()
+            if result.get('success'):
+                log_info(f"Carga {cargo_code} processada: {action}")
+                print_success = self._after_receive(cargo_code, action, print_request)
+                return {'success': True, 'result': result, 'print_success': print_success}
             
+            return {'success': False, 'error_title': "Erro",
+                    'error_message': result.get('message', 'Erro desconhecido')}
+        
+        # Erro HTTP - mostrar detalhes
+        try:
+            error_data = response.json() if response.text else {}
+            error_msg = error_data.get('message', f'Erro HTTP {response.status_code}')
+            
+            # Se houver erros de validação (422), mostrar detalhes
+            if response.status_code == 422 and 'errors' in error_data:
+                errors = error_data.get('errors', {})
+                error_details = []
+                for field, messages in errors.items():
+                    if isinstance(messages, list):
+                        error_details.append(f"• {field}: {', '.join(messages)}")
+                    else:
+                        error_details.append(f"• {field}: {messages}")
+                
+                if error_details:
+                    error_msg += "\n\nErros de validação:\n" + "\n".join(error_details)
+            
+            # Se erro 500, adicionar orientação
+            if response.status_code == 500:
+                error_msg += "\n\n⚠️ Este é um erro interno do servidor."
+                error_msg += "\nContate o administrador do sistema."
+                
+                # Se for erro de SQL relacionado a movement_type
+                if 'movement_type' in error_msg.lower() and 'truncated' in error_msg.lower():
+                    error_msg += "\n\n💡 Problema detectado: O campo 'movement_type' no banco de dados"
+                    error_msg += "\nprecisa ser ajustado para aceitar valores maiores."
+            
+            return {'success': False, 'error_title': "Erro na API", 'error_message': error_msg}
+        except Exception as parse_error:
+            log_error(f"Erro ao parsear resposta: {parse_error}")
+            return {'success': False, 'error_title': "Erro",
+                    'error_message': f"Erro HTTP {response.status_code}"}
+            
+    def _after_receive(self, cargo_code: str, action: str, print_request: Optional[Dict]) -> bool:
+        """
+        Invalida caches e imprime a etiqueta após a ação (em segundo plano)
+        
+        Returns:
+            True se a etiqueta foi impressa
+        """
+        # Ocupação das áreas mudou: próxima consulta vai à API
+        get_reference_store().invalidate('warehouse_areas',
+                                         warehouse_id=self.selected_warehouse_id)
+        # Status da carga mudou: a reimpressão não deve usar a cópia antiga
+        get_cargo_cache().invalidate(cargo_code)
+        
+        # Imprimir etiqueta automaticamente (exceto para rejeição)
+        if action != 'reject' and print_request:
+            return self.print_label_after_receive(cargo_code, print_request)
+        return False
+    
+    def format_journal_message(self, cargo_code: str, action: str) -> str:
+        """Formata mensagem de ação gravada no journal local"""
+        status = self.receiving_journal.get_status()
+        verb = 'rejeitada' if action == 'reject' else 'recebida'
+        return (
+            f"💾 Carga {verb} na estação!\n\n"
+            f"Código: {cargo_code}\n"
+            f"Ação: {action}\n"
+            f"Aguardando sincronização: {status['pending'] + status['sending']} ação(ões)"
+        )
+    
     def format_success_message(self, result: Dict, action: str) -> str:
         """Formata mensagem de sucesso"""
         data = result.get('data', {})
         
         # Log para debug - ver o que a API está retornando
-        log_info(f"Dados retornados pela API: {data}")
+        log_debug("Dados retornados pela API", response=data)
         
         if action == 'reject':
             return (
@@ -586,7 +703,7 @@ class ReceiveLoadWindow:
             
             # Pegar o status real retornado pela API (não forçar 'STORED')
             actual_status = cargo.get('status', 'N/A')
-            log_info(f"Status da carga retornado pela API: {actual_status}")
+            log_debug(f"Status da carga retornado pela API: {actual_status}")
             
             return (
                 f"{status_emoji} Carga recebida com sucesso!\n\n"
@@ -658,20 +775,22 @@ class ReceiveLoadWindow:
             self.printer_combo['values'] = ["💾 Salvar em Arquivo"]
             self.printer_combo.current(0)
     
-    def print_label_after_receive(self, cargo_code: str):
-        """Imprime etiqueta após recebimento bem-sucedido"""
+    def prepare_label_print(self, cargo_code: str) -> Optional[Dict]:
+        """
+        Lê quantidade e impressora da tela e configura a impressora
+        
+        Returns:
+            Dict com quantity e cargo_data, ou None se a impressão não for possível
+        """
         try:
             # Validar quantidade
             qty_text = self.qty_entry.get().strip()
             if not qty_text.isdigit() or int(qty_text) <= 0:
                 messagebox.showerror("Erro", "Digite uma quantidade válida para impressão (número inteiro > 0)")
-                return False
+                return None
             
             quantity = int(qty_text)
             
-            # Gerar ZPL com dados da carga (para indicadores especiais)
-            log_info(f"Gerando ZPL para código: {cargo_code}")
-            
             # Preparar dados da carga para indicadores especiais
             cargo_data = None
             if self.current_cargo:
@@ -681,30 +800,20 @@ class ReceiveLoadWindow:
                     'expiration_date': self.current_cargo.get('expiration_date'),
                     'handling_instructions': self.current_cargo.get('handling_instructions')
                 }
-                log_info(f"Indicadores especiais: priority={cargo_data['is_priority']}, "
-                        f"special_handling={cargo_data['requires_special_handling']}, "
-                        f"expiration={cargo_data['expiration_date']}")
-            
-            zpl = self.zpl_generator.build_zpl(cargo_code, cargo_data)
-            
-            # Múltiplas etiquetas
-            if quantity > 1:
-                all_zpl = zpl * quantity
-            else:
-                all_zpl = zpl
+                log_debug("Indicadores especiais", cargo_code=cargo_code, **cargo_data)
             
             # Obter impressora selecionada
             selected_display = self.printer_combo.get().strip()
             
             if not selected_display:
                 messagebox.showwarning("Atenção", "Selecione uma impressora")
-                return False
+                return None
             
             printer_id = self.configured_printers.get(selected_display)
             
             if not printer_id:
                 messagebox.showerror("Erro", f"Impressora não encontrada no mapeamento")
-                return False
+                return None
             
             # Configurar impressora
             if printer_id == "file":
@@ -713,22 +822,235 @@ class ReceiveLoadWindow:
                 printer_config = self.printer_config_manager.get_printer(printer_id)
                 if not printer_config:
                     messagebox.showerror("Erro", f"Configuração da impressora não encontrada")
-                    return False
+                    return None
                 
                 self.printer.config['printer_id'] = printer_id
                 self.printer.config['output_mode'] = 'configured'
             
+            return {'quantity': quantity, 'cargo_data': cargo_data,
+                    'cargo': dict(self.current_cargo or {}), 'printer': selected_display}
+            
+        except Exception as e:
+            log_error(f"Erro ao preparar impressão: {e}")
+            return None
+    
+    def print_label_after_receive(self, cargo_code: str, print_request: Dict) -> bool:
+        """Imprime etiqueta após recebimento bem-sucedido (em segundo plano)"""
+        try:
+            quantity = print_request['quantity']
+            
+            # Formato gravado na impressora: envia só a chamada ^XF com os dados
+            if stored_formats_enabled():
+                self.printer.send_stored_format_job(
+                    self.zpl_generator.stored_formats['label'],
+                    self.zpl_generator.build_zpl_recall(cargo_code, print_request['cargo_data']),
+                    quantity
+                )
+                log_info(f"Impressão concluída: {quantity} etiquetas do código {cargo_code}")
+                self._record_print(cargo_code, print_request)
+                return True
+            
+            # Gerar ZPL com dados da carga (para indicadores especiais)
+            log_info(f"Gerando ZPL para código: {cargo_code}")
+            zpl = self.zpl_generator.build_zpl(cargo_code, print_request['cargo_data'])
+            
+            # Múltiplas etiquetas
+            if quantity > 1:
+                all_zpl = zpl * quantity
+            else:
+                all_zpl = zpl
+            
             # Imprimir
             log_info(f"Enviando para impressão: {quantity} etiqueta(s) do código {cargo_code}")
             self.printer.send_print_job(all_zpl, quantity)
             
             log_info(f"Impressão concluída: {quantity} etiquetas do código {cargo_code}")
+            self._record_print(cargo_code, print_request)
             return True
             
         except Exception as e:
             log_error(f"Erro na impressão: {e}")
             return False
     
+    def _record_print(self, cargo_code: str, print_request: Dict):
+        """Registra a etiqueta no histórico de impressão da estação"""
+        history = get_print_history()
+        if not history or not print_request.get('cargo'):
+            return
+        try:
+            history.record_print(cargo_code, print_request['cargo'], print_request['quantity'],
+                                 print_request.get('printer'), 'receive')
+        except Exception as e:
+            log_error(f"Erro ao registrar impressão de {cargo_code} no histórico: {e}")
+    
+    def on_code_entered(self):
+        """Enter no campo de código: leitura contínua ou busca normal"""
+        if self.scan_pipeline and self.scan_mode_var.get():
+            code = self.code_entry.get().strip()
+            self.code_entry.delete(0, tk.END)
+            if code:
+                self.scan_pipeline.scan(code)
+                self._update_scan_stats()
+            return
+        self.search_cargo()
+    
+    def toggle_scan_mode(self):
+        """Liga/desliga o recebimento contínuo por scanner"""
+        if not self.scan_mode_var.get():
+            self._stop_scan_mode()
+            return
+        
+        if self.scan_pipeline and self.scan_pipeline.running:
+            # Lote do modo anterior ainda sendo enviado
+            messagebox.showwarning("Atenção", "Aguarde o envio das leituras pendentes do modo contínuo.")
+            self.scan_mode_var.set(False)
+            return
+        
+        if not self.selected_warehouse_id or not self.selected_area_id:
+            messagebox.showwarning("Atenção", "Selecione galpão e área antes de ligar o modo contínuo.")
+            self.scan_mode_var.set(False)
+            return
+        
+        # Impressora e quantidade lidas agora: valem para todas as leituras do modo
+        self.current_cargo = None
+        print_request = self.prepare_label_print('')
+        if not print_request:
+            self.scan_mode_var.set(False)
+            return
+        
+        payload = {
+            'warehouse_id': self.selected_warehouse_id,
+            'action': 'accept',
+            'area_id': self.selected_area_id,
+            'area_type': 'RECEIVING'
+        }
+        warehouse_id = self.selected_warehouse_id
+        self.scan_pipeline = create_scan_pipeline(
+            self.api_client, self.token, payload, journal=self.receiving_journal,
+            on_accepted=lambda accepted: self._on_scans_accepted(accepted, print_request, warehouse_id)
+        )
+        self.scan_log = []
+        
+        self.disable_action_buttons()
+        self.warehouse_combo.config(state='disabled')
+        self.area_combo.config(state='disabled')
+        self.search_button.config(state='disabled')
+        self.code_entry.config(state='normal')
+        self.code_entry.delete(0, tk.END)
+        self.code_entry.focus()
+        self.show_cargo_info("📡 MODO CONTÍNUO LIGADO\n\nLeia os códigos com o scanner: cada carga encontrada é "
+                             "aceita e tem a etiqueta impressa em segundo plano.")
+        log_info(f"Modo contínuo ligado: galpão {self.selected_warehouse_id}, área {self.selected_area_id}")
+        self._poll_scan_events()
+    
+    def _stop_scan_mode(self):
+        """Para de aceitar leituras; as pendentes continuam sendo enviadas"""
+        if self.scan_pipeline:
+            self.scan_pipeline.stop(wait=False)
+            log_info(f"Modo contínuo desligado: {self.scan_pipeline.get_stats()}")
+        self.warehouse_combo.config(state='readonly')
+        self.area_combo.config(state='readonly')
+        self.check_enable_search()
+    
+    def _poll_scan_events(self):
+        """Atualiza a lista de leituras e o contador (thread do Tk)"""
+        pipeline = self.scan_pipeline
+        if pipeline is None or not self.root.winfo_exists():
+            return
+        
+        labels = {
+            'queued': "⏳ na fila",
+            'duplicate': "♻️ leitura repetida (ignorada)",
+            'accepted': "✅ aceita",
+            'not_found': "❌ não encontrada ou já recebida",
+            'failed': "🔥 falhou",
+            'print_failed': "🖨️ aceita, etiqueta NÃO impressa (reimprimir)"
+        }
+        events = pipeline.drain_events()
+        for kind, code, detail in events:
+            line = f"{datetime.now().strftime('%H:%M:%S')}  {code}  {labels.get(kind, kind)}"
+            if kind in ('failed', 'print_failed'):
+                line += f": {detail}"
+            self.scan_log.append(line)
+        if events:
+            del self.scan_log[:-200]
+            self.show_cargo_info("\n".join(reversed(self.scan_log)))
+        self._update_scan_stats()
+        
+        if pipeline.running or events:
+            self.root.after(250, self._poll_scan_events)
+    
+    def _update_scan_stats(self):
+        if not self.scan_pipeline:
+            return
+        stats = self.scan_pipeline.get_stats()
+        self.scan_stats_label.config(
+            text=f"📈 {stats['scans_per_minute']:.0f} leituras/min | ✅ {stats['accepted']} | "
+                 f"⏳ {stats['pending']} | ❌ {stats['not_found'] + stats['failed']} | ♻️ {stats['duplicates']} | "
+                 f"🖨️ {stats['print_failed']} sem etiqueta")
+    
+    def _on_scans_accepted(self, accepted: List, print_request: Dict, warehouse_id):
+        """Após cada lote aceito no modo contínuo: imprime as etiquetas em um único job (thread de envio)"""
+        get_reference_store().invalidate('warehouse_areas', warehouse_id=warehouse_id)
+        cache = get_cargo_cache()
+        for code, _ in accepted:
+            cache.invalidate(code)
+        
+        quantity = print_request['quantity']
+        pairs = [(cargo.get('code') or code, CargoManager.get_indicator_data(cargo)) for code, cargo in accepted]
+        labels = len(pairs) * quantity
+        if stored_formats_enabled():
+            self.printer.send_stored_format_job(self.zpl_generator.stored_formats['label'],
+                                                self.zpl_generator.iter_reprint_zpl(pairs, quantity, recall=True),
+                                                labels)
+        else:
+            self.printer.send_print_job(self.zpl_generator.iter_reprint_zpl(pairs, quantity), labels)
+        log_info(f"Modo contínuo: {labels} etiqueta(s) de {len(pairs)} carga(s) impressa(s)")
+        
+        for (code, cargo), (printed_code, _) in zip(accepted, pairs):
+            self._record_print(printed_code, dict(print_request, cargo=cargo))
+    
+    def _poll_journal_status(self):
+        """Atualiza o contador de ações pendentes/conflitos do journal (thread do Tk)"""
+        if not self.root.winfo_exists():
+            return
+        status = self.receiving_journal.get_status()
+        pending = status['pending'] + status['sending']
+        text = f"💾 Pendentes: {pending} | ⚠️ Conflitos: {status[CONFLICT]}"
+        if pending and status['last_error']:
+            text += f" | 📴 API: {status['last_error'][:40]}"
+        color = 'red' if status[CONFLICT] else ('orange' if status['last_error'] else 'green')
+        self.journal_status_label.config(text=text, foreground=color)
+        self.root.after(2000, self._poll_journal_status)
+    
+    def show_journal_conflicts(self):
+        """Lista as ações recusadas pela API na sincronização"""
+        conflicts = self.receiving_journal.list_actions(CONFLICT)
+        if not conflicts:
+            messagebox.showinfo("Conflitos", "Nenhum conflito de sincronização.")
+            return
+        
+        lines = ["⚠️ AÇÕES RECUSADAS PELA API\n", "=" * 70]
+        for action in conflicts:
+            created = datetime.fromtimestamp(action['created_at']).strftime('%d/%m %H:%M:%S')
+            lines.append(f"\n{created}  {action['cargo_code']}  {action['action']}")
+            lines.append(f"   {action['last_error']}")
+        lines.append("\n" + "=" * 70)
+        lines.append("\nConfira as cargas no sistema web.")
+        self.show_cargo_info("\n".join(lines))
+        
+        if messagebox.askyesno("Conflitos",
+                               f"{len(conflicts)} ação(ões) recusada(s) pela API.\n\n"
+                               f"Já conferidas no sistema web? Elas serão removidas da lista."):
+            for action in conflicts:
+                self.receiving_journal.discard(action['idempotency_key'])
+    
+    def close_window(self):
+        """Fecha a janela (leituras pendentes do modo contínuo continuam sendo enviadas)"""
+        if self.scan_pipeline:
+            self.scan_pipeline.stop(wait=False)
+        self.root.destroy()
+    
     def clear_form(self):
         """Limpa formulário"""
         self.code_entry.delete(0, tk.END)
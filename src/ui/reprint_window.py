@@ -7,18 +7,24 @@ Interface para escanear código e reimprimir etiqueta específica
 """
 
 import tkinter as tk
-from tkinter import ttk, messagebox
+from tkinter import ttk, messagebox, scrolledtext
 import sys
 import os
+import time
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 from cargo_manager import CargoManager
+from cargo_cache import get_cargo_cache, cargo_cache_enabled
+from print_history import get_print_history
 from printer.zpl_generator import ZplGenerator
 from printer.label_printer import LabelPrinter
 from api.client import APIClient
 from utils.logger import log_info, log_error
 from utils.validators import format_cpf
 from utils.printer_config import PrinterConfigManager
+from utils.job_runner import job_runner
+from utils.config import load_config
+from printer.format_registry import stored_formats_enabled
 
 class ReprintWindow:
     """Janela de reimpressão"""
@@ -38,7 +44,9 @@ class ReprintWindow:
         
         # Configurar gerenciadores
         self.api_client = APIClient()
-        self.cargo_manager = CargoManager(self.api_client, token)
+        self.cargo_manager = CargoManager(self.api_client, token,
+                                          cache=get_cargo_cache() if cargo_cache_enabled() else None,
+                                          print_history=get_print_history())
         self.zpl_generator = ZplGenerator()
         self.printer = LabelPrinter()
         self.printer_config_manager = PrinterConfigManager()
@@ -46,6 +54,9 @@ class ReprintWindow:
         # Dados
         self.current_cargo = None
         self.configured_printers = {}
+        self.search_job = None
+        self.print_job = None
+        self.batch_job = None
         
         # Interface
         self.setup_window()
@@ -124,9 +135,9 @@ class ReprintWindow:
         self.code_entry.pack(side=tk.LEFT, padx=(10, 10), fill=tk.X, expand=True)
         self.code_entry.focus()
         
-        search_button = ttk.Button(entry_frame, text="🔍 Buscar", 
-                                  command=self.search_cargo, style='Accent.TButton')
-        search_button.pack(side=tk.RIGHT)
+        self.search_button = ttk.Button(entry_frame, text="🔍 Buscar", 
+                                       command=self.search_cargo, style='Accent.TButton')
+        self.search_button.pack(side=tk.RIGHT)
         
         # Enter para buscar
         self.code_entry.bind('<Return>', lambda e: self.search_cargo())
@@ -179,6 +190,10 @@ class ReprintWindow:
                                         state=tk.DISABLED)
         self.reprint_button.pack(side=tk.LEFT, padx=(0, 10))
         
+        self.batch_button = ttk.Button(action_frame, text="📋 Reimpressão em lote",
+                                      command=self.open_batch_reprint)
+        self.batch_button.pack(side=tk.LEFT, padx=(0, 10))
+        
         clear_button = ttk.Button(action_frame, text="🗑️ Limpar", 
                                  command=self.clear_form)
         clear_button.pack(side=tk.LEFT, padx=(0, 10))
@@ -246,18 +261,24 @@ class ReprintWindow:
             messagebox.showwarning("Aviso", "Digite um código primeiro.")
             return
         
-        try:
-            self.status_label.config(text="Buscando carga na API...", foreground='blue')
-            self.root.update()
-            
-            # Buscar cargo
-            cargo = self.cargo_manager.get_cargo_by_code(code)
-            
+        if self.search_job and not self.search_job.done():
+            return
+        
+        self.status_label.config(text="Buscando carga na API...", foreground='blue')
+        self.reprint_button.config(state=tk.DISABLED)
+        self.search_button.config(state=tk.DISABLED)
+        
+        def on_success(cargo):
+            self.search_button.config(state=tk.NORMAL)
             if cargo:
                 self.current_cargo = cargo
                 self.show_cargo_details(cargo)
                 self.reprint_button.config(state=tk.NORMAL)
-                self.status_label.config(text="✅ Carga encontrada! Pronta para reimpressão.", foreground='green')
+                if cargo.get('_source'):
+                    self.status_label.config(text="⚠️ API indisponível: usando dados locais da última impressão.",
+                                             foreground='orange')
+                else:
+                    self.status_label.config(text="✅ Carga encontrada! Pronta para reimpressão.", foreground='green')
                 log_info(f"Cargo encontrado para reimpressão: {code}")
                 
             else:
@@ -265,19 +286,21 @@ class ReprintWindow:
                 self.show_cargo_not_found(code)
                 self.reprint_button.config(state=tk.DISABLED)
                 self.status_label.config(text="❌ Carga não encontrada", foreground='red')
-                
-        except ValueError as e:
-            self.current_cargo = None
-            self.show_cargo_info(f"❌ ERRO DE VALIDAÇÃO\n\n{str(e)}\n\nFormatos aceitos:\n• 9 dígitos (entrada manual/arquivo): 080000004\n• 8 dígitos (inventário/OS): 00000001")
-            self.reprint_button.config(state=tk.DISABLED)
-            self.status_label.config(text="❌ Código inválido", foreground='red')
-            
-        except Exception as e:
-            log_error(f"Erro ao buscar cargo {code}: {str(e)}")
+        
+        def on_error(e):
+            self.search_button.config(state=tk.NORMAL)
             self.current_cargo = None
-            self.show_cargo_error(str(e))
             self.reprint_button.config(state=tk.DISABLED)
-            self.status_label.config(text=f"❌ Erro: {str(e)}", foreground='red')
+            if isinstance(e, ValueError):
+                self.show_cargo_info(f"❌ ERRO DE VALIDAÇÃO\n\n{str(e)}\n\nFormatos aceitos:\n• 9 dígitos (entrada manual/arquivo): 080000004\n• 8 dígitos (inventário/OS): 00000001")
+                self.status_label.config(text="❌ Código inválido", foreground='red')
+            else:
+                log_error(f"Erro ao buscar cargo {code}: {str(e)}")
+                self.show_cargo_error(str(e))
+                self.status_label.config(text=f"❌ Erro: {str(e)}", foreground='red')
+        
+        self.search_job = job_runner.submit(self.root, lambda job: self.cargo_manager.get_cargo_by_code(code),
+                                            on_success=on_success, on_error=on_error)
     
     def show_cargo_details(self, cargo):
         """Mostra detalhes do cargo encontrado"""
@@ -331,6 +354,10 @@ class ReprintWindow:
             messagebox.showwarning("Aviso", "Busque uma carga primeiro.")
             return
         
+        if self.print_job and not self.print_job.done():
+            # Reimpressão anterior ainda em andamento (evita envio duplicado)
+            return
+        
         try:
             # Validar quantidade
             qty_text = self.qty_entry.get().strip()
@@ -349,90 +376,280 @@ class ReprintWindow:
             if not result:
                 return
             
-            self.status_label.config(text="Preparando reimpressão...", foreground='blue')
-            self.root.update()
-            
             log_info(f"Iniciando reimpressão: {quantity}x código {code_to_print}")
             
-            # Gerar ZPL com indicadores especiais
-            self.status_label.config(text="Gerando código ZPL...", foreground='blue')
-            self.root.update()
-            
             # Preparar dados da carga para indicadores especiais
             cargo_data = None
             if self.current_cargo:
-                cargo_data = {
-                    'is_priority': self.current_cargo.get('is_priority', False),
-                    'requires_special_handling': self.current_cargo.get('requires_special_handling', False),
-                    'expiration_date': self.current_cargo.get('expiration_date'),
-                    'handling_instructions': self.current_cargo.get('handling_instructions')
-                }
+                cargo_data = self.cargo_manager.get_indicator_data(self.current_cargo)
                 log_info(f"Indicadores na reimpressão: priority={cargo_data['is_priority']}, "
                         f"special_handling={cargo_data['requires_special_handling']}, "
                         f"expiration={cargo_data['expiration_date']}")
             
-            zpl = self.zpl_generator.build_zpl(code_to_print, cargo_data)
+            selected_display = self._configure_selected_printer()
             
-            # Se múltiplas etiquetas, repetir o ZPL
-            if quantity > 1:
-                all_zpl = zpl * quantity
-            else:
-                all_zpl = zpl
-            
-            # Obter impressora selecionada diretamente do widget
-            selected_display = self.printer_combo.get().strip()
-            
-            # Debug
-            log_info(f"Display selecionado: '{selected_display}'")
-            log_info(f"Impressoras configuradas: {list(self.configured_printers.keys())}")
-            
-            # Verificar se há seleção
-            if not selected_display:
-                raise Exception("Por favor, selecione uma impressora no combobox")
-            
-            printer_id = self.configured_printers.get(selected_display)
+        except Exception as e:
+            log_error(f"Erro na reimpressão: {str(e)}")
+            self.status_label.config(text=f"❌ Erro: {str(e)}", foreground='red')
+            messagebox.showerror("Erro na Reimpressão", f"Erro durante a reimpressão:\n{str(e)}")
+            return
+        
+        self.status_label.config(text="Preparando reimpressão...", foreground='blue')
+        self.reprint_button.config(state=tk.DISABLED)
+        
+        def on_progress(text):
+            self.status_label.config(text=text, foreground='blue')
+        
+        def on_success(_):
+            self.reprint_button.config(state=tk.NORMAL)
+            self.status_label.config(text=f"✅ {quantity} etiqueta(s) reimprimida(s) com sucesso!", foreground='green')
+            messagebox.showinfo("Sucesso", f"Reimpressão concluída!\n\nCódigo: {code_to_print}\nQuantidade: {quantity}")
+        
+        def on_error(e):
+            self.reprint_button.config(state=tk.NORMAL)
+            self.status_label.config(text=f"❌ Erro: {str(e)}", foreground='red')
+            messagebox.showerror("Erro na Reimpressão", f"Erro durante a reimpressão:\n{str(e)}")
+        
+        cargo = self.current_cargo
+        self.print_job = job_runner.submit(self.root, self._run_reprint_job, code_to_print, cargo_data, quantity,
+                                           cargo, selected_display, on_success=on_success, on_error=on_error,
+                                           on_progress=on_progress)
+    
+    def _configure_selected_printer(self) -> str:
+        """
+        Configura self.printer com a impressora escolhida no combobox
+        
+        Returns:
+            Nome exibido da impressora
+        """
+        # Obter impressora selecionada diretamente do widget
+        selected_display = self.printer_combo.get().strip()
+        
+        # Debug
+        log_info(f"Display selecionado: '{selected_display}'")
+        log_info(f"Impressoras configuradas: {list(self.configured_printers.keys())}")
+        
+        # Verificar se há seleção
+        if not selected_display:
+            raise Exception("Por favor, selecione uma impressora no combobox")
+        
+        printer_id = self.configured_printers.get(selected_display)
+        
+        if not printer_id:
+            # Tentar encontrar por correspondência parcial
+            for key in self.configured_printers.keys():
+                if selected_display in key or key in selected_display:
+                    printer_id = self.configured_printers[key]
+                    log_info(f"Impressora encontrada por correspondência: {key}")
+                    break
             
             if not printer_id:
-                # Tentar encontrar por correspondência parcial
-                for key in self.configured_printers.keys():
-                    if selected_display in key or key in selected_display:
-                        printer_id = self.configured_printers[key]
-                        log_info(f"Impressora encontrada por correspondência: {key}")
-                        break
-                
-                if not printer_id:
-                    raise Exception(f"Impressora não encontrada no mapeamento.\nSelecionado: '{selected_display}'\nDisponíveis: {', '.join(self.configured_printers.keys())}")
-            
-            # Configurar impressora
-            if printer_id == "file":
-                # Modo arquivo
-                self.printer.config['output_mode'] = 'file'
-            else:
-                # Usar configuração da impressora
-                printer_config = self.printer_config_manager.get_printer(printer_id)
-                if not printer_config:
-                    raise Exception(f"Impressora {printer_id} não encontrada")
-                
-                self.printer.config['printer_id'] = printer_id
-                self.printer.config['output_mode'] = 'configured'
-            
-            # Imprimir
-            self.status_label.config(text="Enviando para impressão...", foreground='blue')
-            self.root.update()
-            
-            self.printer.send_print_job(all_zpl, quantity)
-            
-            # Sucesso
-            self.status_label.config(text=f"✅ {quantity} etiqueta(s) reimprimida(s) com sucesso!", foreground='green')
+                raise Exception(f"Impressora não encontrada no mapeamento.\nSelecionado: '{selected_display}'\nDisponíveis: {', '.join(self.configured_printers.keys())}")
+        
+        # Configurar impressora
+        if printer_id == "file":
+            # Modo arquivo
+            self.printer.config['output_mode'] = 'file'
+        else:
+            # Usar configuração da impressora
+            printer_config = self.printer_config_manager.get_printer(printer_id)
+            if not printer_config:
+                raise Exception(f"Impressora {printer_id} não encontrada")
             
+            self.printer.config['printer_id'] = printer_id
+            self.printer.config['output_mode'] = 'configured'
+        
+        return selected_display
+    
+    def _run_reprint_job(self, job, code_to_print: str, cargo_data: dict, quantity: int,
+                         cargo: dict, printer_name: str):
+        """Gera o ZPL e envia para a impressora (em segundo plano)"""
+        # Formato gravado na impressora: envia só a chamada ^XF com os dados
+        if stored_formats_enabled():
+            job.report_progress("Enviando para impressão...")
+            self.printer.send_stored_format_job(self.zpl_generator.stored_formats['label'],
+                                                self.zpl_generator.build_zpl_recall(code_to_print, cargo_data),
+                                                quantity)
             log_info(f"Reimpressão concluída: {quantity} etiquetas do código {code_to_print}")
-            
-            messagebox.showinfo("Sucesso", f"Reimpressão concluída!\n\nCódigo: {code_to_print}\nQuantidade: {quantity}")
-            
+            self.cargo_manager.record_print(code_to_print, cargo, quantity, printer_name, 'reprint')
+            return True
+        
+        # Gerar ZPL com indicadores especiais
+        job.report_progress("Gerando código ZPL...")
+        zpl = self.zpl_generator.build_zpl(code_to_print, cargo_data)
+        
+        # Se múltiplas etiquetas, repetir o ZPL
+        if quantity > 1:
+            all_zpl = zpl * quantity
+        else:
+            all_zpl = zpl
+        
+        # Imprimir
+        job.report_progress("Enviando para impressão...")
+        self.printer.send_print_job(all_zpl, quantity)
+        
+        log_info(f"Reimpressão concluída: {quantity} etiquetas do código {code_to_print}")
+        self.cargo_manager.record_print(code_to_print, cargo, quantity, printer_name, 'reprint')
+        return True
+    
+    def open_batch_reprint(self):
+        """Abre a janela para colar vários códigos (ou faixas) e reimprimir todos de uma vez"""
+        if self.batch_job and not self.batch_job.done():
+            return
+        
+        dialog = tk.Toplevel(self.root)
+        dialog.title("Reimpressão em Lote")
+        dialog.geometry("460x420")
+        dialog.transient(self.root)
+        dialog.grab_set()
+        
+        frame = ttk.Frame(dialog, padding="15")
+        frame.pack(fill=tk.BOTH, expand=True)
+        
+        ttk.Label(frame, text="Cole os códigos (um por linha, separados por vírgula ou espaço).\n"
+                              "Faixas: 080000001-080000050",
+                  font=('Arial', 9)).pack(anchor=tk.W, pady=(0, 8))
+        
+        codes_text = scrolledtext.ScrolledText(frame, height=12, font=('Consolas', 10))
+        codes_text.pack(fill=tk.BOTH, expand=True)
+        codes_text.focus()
+        
+        qty_frame = ttk.Frame(frame)
+        qty_frame.pack(fill=tk.X, pady=(10, 0))
+        ttk.Label(qty_frame, text="Etiquetas por código:").pack(side=tk.LEFT)
+        qty_entry = ttk.Entry(qty_frame, width=8)
+        qty_entry.insert(0, "1")
+        qty_entry.pack(side=tk.LEFT, padx=(10, 0))
+        ttk.Label(qty_frame, text=f"Impressora: {self.printer_combo.get().strip() or '-'}",
+                  font=('Arial', 9)).pack(side=tk.RIGHT)
+        
+        def submit():
+            if self._start_batch_reprint(codes_text.get('1.0', tk.END), qty_entry.get().strip()):
+                dialog.destroy()
+        
+        buttons = ttk.Frame(frame)
+        buttons.pack(fill=tk.X, pady=(12, 0))
+        ttk.Button(buttons, text="🖨️ Reimprimir lote", command=submit,
+                   style='Accent.TButton').pack(side=tk.LEFT)
+        ttk.Button(buttons, text="Cancelar", command=dialog.destroy).pack(side=tk.RIGHT)
+    
+    def _start_batch_reprint(self, text: str, qty_text: str) -> bool:
+        """
+        Valida a lista e dispara a reimpressão em lote
+        
+        Returns:
+            True se o job foi iniciado (a janela do lote pode ser fechada)
+        """
+        batch_config = load_config().get('batch_reprint', {})
+        
+        if not qty_text.isdigit() or int(qty_text) <= 0:
+            messagebox.showerror("Erro", "Digite uma quantidade válida (número inteiro > 0)")
+            return False
+        quantity = int(qty_text)
+        
+        try:
+            parsed = self.cargo_manager.parse_code_list(text, int(batch_config.get('max_codes', 500)))
+        except ValueError as e:
+            messagebox.showerror("Erro", str(e))
+            return False
+        
+        codes = parsed['codes']
+        if not codes:
+            messagebox.showwarning("Aviso", "Nenhum código válido na lista.")
+            return False
+        
+        message = f"Reimprimir {len(codes)} código(s), {quantity} etiqueta(s) cada?"
+        if parsed['invalid']:
+            message += f"\n\n{len(parsed['invalid'])} item(ns) ignorado(s) (formato inválido): " \
+                       f"{', '.join(parsed['invalid'][:10])}"
+        if not messagebox.askyesno("Confirmar Reimpressão em Lote", message):
+            return False
+        
+        try:
+            printer_name = self._configure_selected_printer()
         except Exception as e:
-            log_error(f"Erro na reimpressão: {str(e)}")
+            log_error(f"Erro na reimpressão em lote: {str(e)}")
+            messagebox.showerror("Erro na Reimpressão", str(e))
+            return False
+        
+        log_info(f"Iniciando reimpressão em lote: {len(codes)} código(s), {quantity} etiqueta(s) cada")
+        self.batch_button.config(state=tk.DISABLED)
+        self.reprint_button.config(state=tk.DISABLED)
+        self.status_label.config(text=f"Buscando {len(codes)} carga(s)...", foreground='blue')
+        
+        def on_progress(text):
+            self.status_label.config(text=text, foreground='blue')
+        
+        def on_success(report):
+            self._finish_batch_reprint()
+            report['invalid'] = parsed['invalid']
+            self.show_cargo_info(self.cargo_manager.format_reprint_report(report))
+            if report['labels']:
+                self.status_label.config(text=f"✅ Lote: {report['labels']} etiqueta(s) de "
+                                              f"{report['printed']} código(s) reimpressa(s)", foreground='green')
+            else:
+                self.status_label.config(text="❌ Nenhuma etiqueta do lote foi impressa", foreground='red')
+        
+        def on_error(e):
+            self._finish_batch_reprint()
             self.status_label.config(text=f"❌ Erro: {str(e)}", foreground='red')
-            messagebox.showerror("Erro na Reimpressão", f"Erro durante a reimpressão:\n{str(e)}")
+            messagebox.showerror("Erro na Reimpressão", f"Erro durante a reimpressão em lote:\n{str(e)}")
+        
+        concurrency = int(batch_config.get('lookup_concurrency', 8))
+        self.batch_job = job_runner.submit(self.root, self._run_batch_reprint, codes, quantity, printer_name,
+                                           concurrency, on_success=on_success, on_error=on_error,
+                                           on_progress=on_progress)
+        return True
+    
+    def _finish_batch_reprint(self):
+        self.batch_button.config(state=tk.NORMAL)
+        if self.current_cargo:
+            self.reprint_button.config(state=tk.NORMAL)
+    
+    def _run_batch_reprint(self, job, codes: list, quantity: int, printer_name: str,
+                           concurrency: int) -> dict:
+        """
+        Busca as cargas em paralelo e envia todas as etiquetas em um único job (em segundo plano)
+        
+        Returns:
+            Relatório do lote (ver CargoManager.format_reprint_report)
+        """
+        start = time.perf_counter()
+        results = self.cargo_manager.resolve_codes(
+            codes, max_workers=concurrency,
+            on_progress=lambda done, total, _: job.report_progress(f"Buscando cargas: {done}/{total}"))
+        job.check_cancelled()
+        
+        plan = self.cargo_manager.plan_reprint(results)
+        items = plan['items']
+        labels = len(items) * quantity
+        
+        if items:
+            job.report_progress(f"Enviando {labels} etiqueta(s) para impressão...")
+            pairs = [(code, cargo_data) for code, cargo_data, _ in items]
+            if stored_formats_enabled():
+                self.printer.send_stored_format_job(self.zpl_generator.stored_formats['label'],
+                                                    self.zpl_generator.iter_reprint_zpl(pairs, quantity, recall=True),
+                                                    labels)
+            else:
+                self.printer.send_print_job(self.zpl_generator.iter_reprint_zpl(pairs, quantity), labels)
+            for code, _, cargo in items:
+                self.cargo_manager.record_print(code, cargo, quantity, printer_name, 'reprint')
+        
+        elapsed = time.perf_counter() - start
+        log_info(f"Reimpressão em lote concluída: {labels} etiqueta(s) de {len(items)}/{len(codes)} "
+                 f"código(s) em {elapsed:.1f}s")
+        return {
+            'requested': len(codes),
+            'printed': len(items),
+            'labels': labels,
+            'quantity': quantity,
+            'printer': printer_name,
+            'not_found': plan['not_found'],
+            'errors': plan['errors'],
+            'offline': plan['offline'],
+            'elapsed': elapsed
+        }
     
     def clear_form(self):
         """Limpa o formulário"""
@@ -41,5 +41,98 @@ def get_default_config():
         },
         "default_qty": 1,
         "timeout": 30,
+        "http": {
+            "pool_connections": 4,
+            "pool_maxsize": 16,
+            "keep_alive": True,
+            "max_retries": 0,
+            "timeouts": {
+                "default": {"connect": 5, "read": 30}
+            }
+        },
+        "consolidation": {
+            "lookup_concurrency": 8
+        },
+        "spooler": {
+            "enabled": True,
+            "directory": "spool",
+            "base_delay": 1,
+            "max_delay": 60,
+            "max_attempts": 0,
+            "resend_interrupted": False
+        },
+        "printer_connections": {
+            "keep_alive": True,
+            "idle_timeout": 30
+        },
+        "stored_formats": {
+            "enabled": False,
+            "registry_file": "spool/stored_formats.json"
+        },
+        "warehouse_cache": {
+            "enabled": True,
+            "directory": "cache/warehouses",
+            "fresh_for": 0
+        },
+        "label_blocks": {
+            "enabled": False,
+            "block_size": 1000,
+            "journal_file": "spool/label_blocks.log"
+        },
+        "fanout": {
+            "queue_depth": 2,
+            "max_failures": 3,
+            "manifest_dir": "spool/manifests"
+        },
+        "reference_data": {
+            "prefetch": True,
+            "prefetch_areas": 20,
+            "ttl": {
+                "warehouses": 600,
+                "customers": 600,
+                "warehouse_areas": 60
+            }
+        },
+        "cargo_cache": {
+            "enabled": True,
+            "max_entries": 500,
+            "ttl": 300
+        },
+        "print_history": {
+            "enabled": True,
+            "database": "cache/print_history.db",
+            "keep_days": 90
+        },
+        "batch_reprint": {
+            "max_codes": 500,
+            "lookup_concurrency": 8
+        },
+        "scan_mode": {
+            "lookup_workers": 4,
+            "batch_size": 20,
+            "batch_wait": 0.5,
+            "dedupe_seconds": 5,
+            "batch_endpoint": True
+        },
+        "logging": {
+            "json": True,
+            "max_bytes": 10485760,
+            "backup_count": 5,
+            "rotate_hours": 24,
+            "queue_size": 10000,
+            "console": True
+        },
+        "metrics": {
+            "enabled": True,
+            "export_file": "logs/metrics.json",
+            "export_on_exit": True,
+            "prometheus_port": 0
+        },
+        "receiving_journal": {
+            "enabled": False,
+            "database": "spool/receiving.db",
+            "base_delay": 1,
+            "max_delay": 60
+        },
         "debug_mode": False
     }
\ No newline at end of file
@@ -0,0 +1,177 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Executor de jobs em segundo plano para as janelas Tkinter
+Executa I/O (API, impressoras) fora do loop principal e devolve os
+resultados na thread do Tk via after()
+"""
+
+import queue
+import threading
+import tkinter as tk
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Optional
+
+from utils.logger import log_error
+
+POLL_INTERVAL_MS = 30
+
+
+class JobCancelled(Exception):
+    """Lançada pela função do job quando detecta cancelamento"""
+
+
+class Job:
+    """Job submetido ao JobRunner (API semelhante a um Future)"""
+
+    def __init__(self, widget, on_success: Optional[Callable] = None,
+                 on_error: Optional[Callable] = None,
+                 on_progress: Optional[Callable] = None,
+                 on_cancel: Optional[Callable] = None):
+        self.widget = widget
+        self.on_success = on_success
+        self.on_error = on_error
+        self.on_progress = on_progress
+        self.on_cancel = on_cancel
+        self.future = None
+
+        self._events = queue.Queue()
+        self._cancel_event = threading.Event()
+        self._finished = False
+
+    # ----- Chamado pela função do job (thread de trabalho) -----
+
+    @property
+    def cancelled(self) -> bool:
+        """True se o cancelamento foi solicitado"""
+        return self._cancel_event.is_set()
+
+    def check_cancelled(self):
+        """Interrompe a função do job se o cancelamento foi solicitado"""
+        if self._cancel_event.is_set():
+            raise JobCancelled()
+
+    def report_progress(self, *args):
+        """Envia um evento de progresso para a thread do Tk"""
+        if self.on_progress:
+            self._events.put(('progress', args))
+
+    # ----- Chamado pela thread do Tk -----
+
+    def cancel(self) -> bool:
+        """
+        Solicita o cancelamento do job
+
+        Returns:
+            True se o job ainda não tinha terminado
+        """
+        self._cancel_event.set()
+        if self.future is not None and self.future.cancel():
+            # Ainda estava na fila: _run não será executado
+            self._events.put(('cancel', ()))
+        return not self._finished
+
+    def done(self) -> bool:
+        """True se o job terminou (sucesso, erro ou cancelamento)"""
+        return self._finished
+
+    def result(self, timeout: Optional[float] = None) -> Any:
+        """Aguarda o resultado (não usar na thread do Tk)"""
+        return self.future.result(timeout)
+
+    def _run(self, func: Callable, args, kwargs):
+        try:
+            if self._cancel_event.is_set():
+                raise JobCancelled()
+            value = func(self, *args, **kwargs)
+            if self._cancel_event.is_set():
+                self._events.put(('cancel', ()))
+            else:
+                self._events.put(('success', (value,)))
+            return value
+        except JobCancelled:
+            self._events.put(('cancel', ()))
+        except Exception as e:
+            log_error(f"Erro no job {getattr(func, '__name__', func)}: {str(e)}")
+            self._events.put(('error', (e,)))
+            raise
+
+    def _poll(self):
+        """Entrega os eventos pendentes na thread do Tk"""
+        try:
+            while True:
+                kind, args = self._events.get_nowait()
+                callback = {
+                    'progress': self.on_progress,
+                    'success': self.on_success,
+                    'error': self.on_error,
+                    'cancel': self.on_cancel
+                }[kind]
+                if kind != 'progress':
+                    self._finished = True
+                if callback:
+                    try:
+                        callback(*args)
+                    except Exception as e:
+                        log_error(f"Erro no callback do job ({kind}): {str(e)}")
+        except queue.Empty:
+            pass
+
+        if self._finished:
+            return
+        try:
+            self.widget.after(POLL_INTERVAL_MS, self._poll)
+        except tk.TclError:
+            # Janela destruída: não há mais para onde entregar os eventos
+            self._cancel_event.set()
+            self._finished = True
+
+
+class JobRunner:
+    """Executor compartilhado de jobs em segundo plano"""
+
+    def __init__(self, max_workers: int = 4):
+        """
+        Inicializa o executor
+
+        Args:
+            max_workers: Quantidade de threads de trabalho
+        """
+        self._executor = ThreadPoolExecutor(max_workers=max_workers,
+                                            thread_name_prefix='ui-job')
+
+    def submit(self, widget, func: Callable, *args,
+               on_success: Optional[Callable] = None,
+               on_error: Optional[Callable] = None,
+               on_progress: Optional[Callable] = None,
+               on_cancel: Optional[Callable] = None, **kwargs) -> Job:
+        """
+        Executa func(job, *args, **kwargs) em segundo plano
+
+        Deve ser chamado na thread do Tk. Os callbacks são executados na
+        thread do Tk, via widget.after().
+
+        Args:
+            widget: Qualquer widget da janela que receberá os callbacks
+            func: Função a executar; recebe o Job como primeiro argumento
+            on_success: Callback(resultado)
+            on_error: Callback(exceção)
+            on_progress: Callback(*args) para cada job.report_progress(*args)
+            on_cancel: Callback() quando o job é cancelado
+
+        Returns:
+            Job com cancel(), done() e result()
+        """
+        job = Job(widget, on_success, on_error, on_progress, on_cancel)
+        job.future = self._executor.submit(job._run, func, args, kwargs)
+        widget.after(POLL_INTERVAL_MS, job._poll)
+        return job
+
+    def shutdown(self, wait: bool = False):
+        """Encerra o executor"""
+        self._executor.shutdown(wait=wait)
+
+
+# Instância global
+job_runner = JobRunner()
@@ -1,34 +1,206 @@
+import atexit
+import copy
+import json
 import logging
+import logging.handlers
 import os
+import queue
+import threading
+import time
+from datetime import datetime
 
 LOG_FORMAT = "%(asctime)s - %(levelname)s - %(message)s"
-LOG_LEVEL = logging.DEBUG
+LOG_LEVEL = logging.INFO
+
+# Campos padrão de um LogRecord (o restante vem de extra= e vai para o JSON)
+_RECORD_ATTRS = set(vars(logging.LogRecord('', 0, '', 0, '', (), None))) | {'message', 'asctime'}
+
+_listener = None
+_queue_handler = None
+_throttle_lock = threading.Lock()
+_throttle_state = {}
+
+
+class JsonFormatter(logging.Formatter):
+    """Um objeto JSON por linha: ts, level, thread, msg e os campos estruturados do registro"""
+
+    def format(self, record):
+        entry = {
+            'ts': datetime.fromtimestamp(record.created).isoformat(timespec='milliseconds'),
+            'level': record.levelname,
+            'thread': record.threadName,
+            'msg': record.getMessage(),
+        }
+        for key, value in vars(record).items():
+            if key not in _RECORD_ATTRS and not key.startswith('_'):
+                entry[key] = value
+        if record.exc_info:
+            entry['exc'] = self.formatException(record.exc_info)
+        elif record.exc_text:
+            entry['exc'] = record.exc_text
+        return json.dumps(entry, ensure_ascii=False, default=str)
+
+
+class SizeTimeRotatingFileHandler(logging.handlers.RotatingFileHandler):
+    """RotatingFileHandler que também rotaciona a cada rotate_hours horas"""
+
+    def __init__(self, filename, max_bytes=0, backup_count=0, rotate_hours=0, encoding='utf-8'):
+        super().__init__(filename, maxBytes=max_bytes, backupCount=backup_count, encoding=encoding)
+        self.interval = rotate_hours * 3600
+        self.rollover_at = self._next_rollover()
+
+    def _next_rollover(self):
+        return time.time() + self.interval if self.interval > 0 else float('inf')
+
+    def shouldRollover(self, record):
+        if time.time() >= self.rollover_at:
+            return True
+        return super().shouldRollover(record)
+
+    def doRollover(self):
+        super().doRollover()
+        self.rollover_at = self._next_rollover()
+
+
+class _DroppingQueueHandler(logging.handlers.QueueHandler):
+    """Nunca bloqueia quem loga: com a fila cheia o registro é descartado e contado"""
+
+    dropped = 0
+
+    def prepare(self, record):
+        # Mensagem e traceback resolvidos aqui (args/exc_info podem não ser serializáveis),
+        # mas mantidos separados para o JSON ter o campo 'exc'
+        record = copy.copy(record)
+        record.msg = record.getMessage()
+        record.args = None
+        if record.exc_info:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+    def enqueue(self, record):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+
+class _LogListener(logging.handlers.QueueListener):
+    """QueueListener cujo encerramento espera vaga na fila (put_nowait falharia com a fila cheia)"""
+
+    def enqueue_sentinel(self):
+        self.queue.put(self._sentinel)
+
+
+def setup_logger(log_file='application.log', level=None):
+    """
+    Configura o log da aplicação: os registros vão para uma fila e uma thread
+    grava o arquivo (JSON por linha, com rotação por tamanho e tempo) e o console
+
+    Args:
+        log_file: Arquivo em logs/
+        level: Nível mínimo (padrão: log_level do settings.json)
+    """
+    global _listener, _queue_handler
+    from utils.config import load_config
+
+    config = load_config()
+    log_config = config.get('logging', {})
+    level = logging.getLevelName(str(level or config.get('log_level', 'INFO')).upper())
+    if not isinstance(level, int):
+        level = LOG_LEVEL
+
+    root = logging.getLogger()
+    root.setLevel(level)
+    if _listener is not None:
+        return
 
-def setup_logger(log_file='application.log'):
     if not os.path.exists('logs'):
         os.makedirs('logs')
-    
-    logging.basicConfig(
-        filename=os.path.join('logs', log_file),
-        level=LOG_LEVEL,
-        format=LOG_FORMAT,
-        filemode='a'
+
+    file_handler = SizeTimeRotatingFileHandler(
+        os.path.join('logs', log_file),
+        max_bytes=int(log_config.get('max_bytes', 10 * 1024 * 1024)),
+        backup_count=int(log_config.get('backup_count', 5)),
+        rotate_hours=float(log_config.get('rotate_hours', 24))
     )
-    
-    console_handler = logging.StreamHandler()
-    console_handler.setLevel(LOG_LEVEL)
-    console_handler.setFormatter(logging.Formatter(LOG_FORMAT))
-    
-    logging.getLogger().addHandler(console_handler)
+    file_handler.setFormatter(JsonFormatter() if log_config.get('json', True) else logging.Formatter(LOG_FORMAT))
+    handlers = [file_handler]
+
+    if log_config.get('console', True):
+        console_handler = logging.StreamHandler()
+        console_handler.setFormatter(logging.Formatter(LOG_FORMAT))
+        handlers.append(console_handler)
+
+    log_queue = queue.Queue(maxsize=int(log_config.get('queue_size', 10000)))
+    _queue_handler = _DroppingQueueHandler(log_queue)
+    for handler in list(root.handlers):
+        root.removeHandler(handler)
+    root.addHandler(_queue_handler)
+
+    _listener = _LogListener(log_queue, *handlers, respect_handler_level=True)
+    _listener.start()
+    atexit.register(shutdown_logger)
+
+
+def shutdown_logger():
+    """Grava os registros ainda na fila e encerra a thread de log"""
+    global _listener, _queue_handler
+    if _listener is None:
+        return
+    root = logging.getLogger()
+    root.removeHandler(_queue_handler)
+    if _queue_handler.dropped:
+        # Último registro da fila: gravado pelos handlers da thread (logging.warning aqui,
+        # sem handler no root, criaria um handler de console pelo basicConfig)
+        dropped = _queue_handler.dropped
+        _queue_handler.queue.put(root.makeRecord(
+            root.name, logging.WARNING, __file__, 0,
+            f"{dropped} registro(s) de log descartado(s) com a fila cheia", None, None,
+            extra={'dropped': dropped}))
+    _listener.stop()
+    for handler in _listener.handlers:
+        handler.close()
+    _listener = None
+    _queue_handler = None
+
+
+def _log(level, message, fields):
+    if logging.getLogger().isEnabledFor(level):
+        logging.log(level, message, extra=fields or None)
+
+
+def log_info(message, **fields):
+    _log(logging.INFO, message, fields)
+
+def log_error(message, **fields):
+    _log(logging.ERROR, message, fields)
 
-def log_info(message):
-    logging.info(message)
+def log_warning(message, **fields):
+    _log(logging.WARNING, message, fields)
 
-def log_error(message):
-    logging.error(message)
+def log_debug(message, **fields):
+    _log(logging.DEBUG, message, fields)
 
-def log_warning(message):
-    logging.warning(message)
+def log_throttled(key, message, interval=5.0, level=logging.WARNING, **fields):
+    """
+    Loga no máximo uma vez a cada interval segundos por chave (para laços por item);
+    o registro seguinte informa quantos foram suprimidos
 
-def log_debug(message):
-    logging.debug(message)
\ No newline at end of file
+    Args:
+        key: Identifica a origem (ex: 'cargo-lookup-error')
+        message: Mensagem
+        interval: Segundos entre registros da mesma chave
+        level: Nível do registro
+    """
+    now = time.monotonic()
+    with _throttle_lock:
+        last, suppressed = _throttle_state.get(key, (None, 0))
+        if last is not None and now - last < interval:
+            _throttle_state[key] = (last, suppressed + 1)
+            return
+        _throttle_state[key] = (now, 0)
+    if suppressed:
+        message = f"{message} (+{suppressed} semelhante(s) suprimido(s))"
+        fields['suppressed'] = suppressed
+    _log(level, message, fields)
@@ -0,0 +1,356 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Métricas de latência em memória
+Histogramas por operação e rótulos (endpoint, impressora...), alimentados por
+timer() / @timed nos pontos quentes (requisições à API, geração de ZPL, envio
+à impressora, busca de cargas). Exportáveis em JSON ou no formato texto do
+Prometheus
+"""
+
+import atexit
+import bisect
+import functools
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, HTTPServer
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Tuple
+
+from utils.logger import log_info, log_error
+
+# Limites dos buckets em milissegundos (o último bucket é +Inf)
+BUCKETS_MS = (0.5, 1, 2, 3, 5, 7.5, 10, 15, 20, 30, 50, 75, 100, 150, 200, 300, 500, 750,
+              1000, 1500, 2000, 3000, 5000, 7500, 10000, 20000, 30000, 60000)
+
+PERCENTILES = (50, 95, 99)
+
+
+class LatencyHistogram:
+    """Histograma de latências com buckets fixos (memória constante)"""
+
+    def __init__(self):
+        self.counts = [0] * (len(BUCKETS_MS) + 1)
+        self.count = 0
+        self.errors = 0
+        self.total_ms = 0.0
+        self.max_ms = 0.0
+
+    def observe(self, elapsed_ms: float, error: bool = False):
+        self.counts[bisect.bisect_left(BUCKETS_MS, elapsed_ms)] += 1
+        self.count += 1
+        self.total_ms += elapsed_ms
+        self.max_ms = max(self.max_ms, elapsed_ms)
+        if error:
+            self.errors += 1
+
+    def percentile(self, pct: float) -> float:
+        """Percentil estimado por interpolação dentro do bucket (limitado ao máximo observado)"""
+        if not self.count:
+            return 0.0
+        rank = self.count * pct / 100.0
+        seen = 0
+        for index, bucket_count in enumerate(self.counts):
+            if bucket_count and seen + bucket_count >= rank:
+                lower = BUCKETS_MS[index - 1] if index > 0 else 0.0
+                upper = BUCKETS_MS[index] if index < len(BUCKETS_MS) else self.max_ms
+                value = lower + (upper - lower) * (rank - seen) / bucket_count
+                return round(min(value, self.max_ms), 2)
+            seen += bucket_count
+        return round(self.max_ms, 2)
+
+
+class MetricsRegistry:
+    """Histogramas de latência por (operação, rótulos)"""
+
+    def __init__(self, enabled: bool = True):
+        self.enabled = enabled
+        self._lock = threading.Lock()
+        self._histograms: Dict[Tuple[str, Tuple[Tuple[str, str], ...]], LatencyHistogram] = {}
+        self._started = time.time()
+
+    def observe(self, name: str, elapsed_ms: float, error: bool = False, **labels):
+        """
+        Registra uma medição
+
+        Args:
+            name: Operação (ex: 'api_request')
+            elapsed_ms: Duração em milissegundos
+            error: A operação terminou com exceção
+            **labels: Rótulos da série (ex: endpoint='/cargos/{id}', method='GET')
+        """
+        if not self.enabled:
+            return
+        self.observe_series((name, series_labels(labels)), elapsed_ms, error)
+
+    def observe_series(self, key: Tuple[str, Tuple[Tuple[str, str], ...]], elapsed_ms: float,
+                       error: bool = False):
+        """Registra uma medição pela chave já montada (name, series_labels(...))"""
+        with self._lock:
+            histogram = self._histograms.get(key)
+            if histogram is None:
+                histogram = self._histograms[key] = LatencyHistogram()
+            histogram.observe(elapsed_ms, error)
+
+    @contextmanager
+    def timer(self, name: str, **labels):
+        """Mede o bloco; exceções são contadas como erro e propagadas"""
+        start = time.perf_counter()
+        error = False
+        try:
+            yield
+        except BaseException:
+            error = True
+            raise
+        finally:
+            self.observe(name, (time.perf_counter() - start) * 1000, error, **labels)
+
+    def snapshot(self) -> List[Dict[str, Any]]:
+        """
+        Resumo de todas as séries
+
+        Returns:
+            Lista de dicts com name, labels, count, errors, mean_ms, max_ms e p50_ms/p95_ms/p99_ms
+        """
+        with self._lock:
+            items = sorted(self._histograms.items())
+            rows = []
+            for (name, labels), histogram in items:
+                row = {'name': name, 'labels': dict(labels), 'count': histogram.count,
+                       'errors': histogram.errors,
+                       'mean_ms': round(histogram.total_ms / histogram.count, 2) if histogram.count else 0.0,
+                       'max_ms': round(histogram.max_ms, 2)}
+                for pct in PERCENTILES:
+                    row[f'p{pct}_ms'] = histogram.percentile(pct)
+                rows.append(row)
+        return rows
+
+    def to_prometheus(self) -> str:
+        """Séries no formato texto do Prometheus (histogramas em segundos)"""
+        lines = []
+        with self._lock:
+            items = sorted(self._histograms.items())
+            names = []
+            for (name, _), _ in items:
+                if name not in names:
+                    names.append(name)
+            for name in names:
+                metric = f"wms_{name}_seconds"
+                lines.append(f"# TYPE {metric} histogram")
+                for (series, labels), histogram in items:
+                    if series != name:
+                        continue
+                    label_text = ','.join(f'{k}="{_escape(v)}"' for k, v in labels)
+                    prefix = label_text + ',' if label_text else ''
+                    cumulative = 0
+                    for bound, bucket_count in zip(BUCKETS_MS + (None,), histogram.counts):
+                        cumulative += bucket_count
+                        le = '+Inf' if bound is None else repr(bound / 1000.0)
+                        lines.append(f'{metric}_bucket{{{prefix}le="{le}"}} {cumulative}')
+                    suffix = f"{{{label_text}}}" if label_text else ''
+                    lines.append(f"{metric}_sum{suffix} {histogram.total_ms / 1000.0:.6f}")
+                    lines.append(f"{metric}_count{suffix} {histogram.count}")
+                errors_metric = f"wms_{name}_errors_total"
+                lines.append(f"# TYPE {errors_metric} counter")
+                for (series, labels), histogram in items:
+                    if series == name:
+                        label_text = ','.join(f'{k}="{_escape(v)}"' for k, v in labels)
+                        suffix = f"{{{label_text}}}" if label_text else ''
+                        lines.append(f"{errors_metric}{suffix} {histogram.errors}")
+        return "\n".join(lines) + "\n"
+
+    def export(self, path: str) -> str:
+        """
+        Grava as métricas em arquivo (.prom = formato Prometheus; demais = JSON)
+
+        Returns:
+            Caminho gravado
+        """
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        if path.endswith('.prom'):
+            content = self.to_prometheus()
+        else:
+            content = json.dumps({'started_at': self._started, 'exported_at': time.time(),
+                                  'series': self.snapshot()}, ensure_ascii=False, indent=2)
+        tmp_path = path + '.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            f.write(content)
+        os.replace(tmp_path, path)
+        return path
+
+    def reset(self):
+        """Descarta todas as medições"""
+        with self._lock:
+            self._histograms.clear()
+            self._started = time.time()
+
+
+def series_labels(labels: Dict[str, Any]) -> Tuple[Tuple[str, str], ...]:
+    """Rótulos normalizados (ordenados, valores em texto) que identificam a série"""
+    return tuple(sorted((k, str(v)) for k, v in labels.items()))
+
+
+def _escape(value: str) -> str:
+    return value.replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def start_prometheus_server(registry: MetricsRegistry, port: int, host: str = '127.0.0.1') -> HTTPServer:
+    """
+    Serve GET /metrics no formato texto do Prometheus em uma thread
+
+    Args:
+        registry: Métricas expostas
+        port: Porta (0 = porta livre escolhida pelo sistema)
+        host: Interface (padrão: apenas local)
+
+    Returns:
+        HTTPServer em execução (server_address traz a porta usada)
+    """
+    class _MetricsHandler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            if self.path.split('?')[0] != '/metrics':
+                self.send_error(404)
+                return
+            body = registry.to_prometheus().encode('utf-8')
+            self.send_response(200)
+            self.send_header('Content-Type', 'text/plain; version=0.0.4; charset=utf-8')
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format, *args):
+            pass
+
+    server = HTTPServer((host, port), _MetricsHandler)
+    threading.Thread(target=server.serve_forever, name='metrics-http', daemon=True).start()
+    log_info(f"Métricas disponíveis em http://{host}:{server.server_address[1]}/metrics")
+    return server
+
+
+_registry: Optional[MetricsRegistry] = None
+_registry_lock = threading.Lock()
+
+
+def get_metrics() -> MetricsRegistry:
+    """
+    Retorna as métricas do processo, criadas no primeiro uso
+
+    Returns:
+        MetricsRegistry configurado pela seção 'metrics' do settings.json
+        (com enabled: false as medições são ignoradas)
+    """
+    global _registry
+    with _registry_lock:
+        if _registry is None:
+            from utils.config import load_config
+
+            metrics_config = load_config().get('metrics', {})
+            _registry = MetricsRegistry(enabled=bool(metrics_config.get('enabled', True)))
+            port = int(metrics_config.get('prometheus_port', 0) or 0)
+            if _registry.enabled and port:
+                try:
+                    start_prometheus_server(_registry, port)
+                except OSError as e:
+                    log_error(f"Não foi possível abrir o endpoint de métricas na porta {port}: {e}")
+            if _registry.enabled and metrics_config.get('export_on_exit', True):
+                atexit.register(_export_on_exit, _registry)
+        return _registry
+
+
+def _export_on_exit(registry: MetricsRegistry):
+    if not registry.snapshot():
+        return
+    try:
+        registry.export(metrics_export_path())
+    except Exception as e:
+        log_error(f"Erro ao exportar métricas: {e}")
+
+
+def metrics_export_path() -> str:
+    """Arquivo de exportação das métricas (seção 'metrics', chave 'export_file')"""
+    from utils.config import load_config
+
+    project_root = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    path = load_config().get('metrics', {}).get('export_file', 'logs/metrics.json')
+    return path if os.path.isabs(path) else os.path.join(project_root, path)
+
+
+def timer(name: str, **labels):
+    """Context manager: mede o bloco nas métricas do processo"""
+    return get_metrics().timer(name, **labels)
+
+
+def timed_iter(name: str, iterable: Iterable, **labels) -> Iterator:
+    """
+    Mede o tempo gasto produzindo os itens de um iterável (uma medição ao final)
+
+    Só conta o tempo dentro do iterável: o consumidor pode enviar cada item à
+    impressora entre um e outro sem inflar a medida. Com as métricas
+    desligadas devolve o próprio iterador.
+
+    Args:
+        name: Operação
+        iterable: Itens a medir (ex: blocos de ZPL gerados em streaming)
+        **labels: Rótulos da série
+    """
+    registry = _registry or get_metrics()
+    if not registry.enabled:
+        return iter(iterable)
+    return _timed_items(registry, (name, series_labels(labels)), iter(iterable))
+
+
+def _timed_items(registry: 'MetricsRegistry', key, iterator: Iterator) -> Iterator:
+    elapsed = 0.0
+    error = False
+    try:
+        while True:
+            start = time.perf_counter()
+            try:
+                item = next(iterator)
+            except StopIteration:
+                return
+            except BaseException:
+                error = True
+                raise
+            finally:
+                elapsed += time.perf_counter() - start
+            yield item
+    finally:
+        registry.observe_series(key, elapsed * 1000, error)
+
+
+def timed(name: str, labels: Optional[Callable[..., Dict[str, Any]]] = None):
+    """
+    Decorador: mede cada chamada da função nas métricas do processo
+
+    Com as métricas desligadas a função é chamada direto, sem medir; o custo
+    fica em uma leitura do registro já criado (sem lock) e no teste de enabled.
+
+    Args:
+        name: Operação
+        labels: Função opcional (mesmos argumentos da decorada) que retorna os rótulos;
+                sem ela o rótulo é op=<nome da função>
+    """
+    def decorator(func):
+        default_key = (name, series_labels({'op': func.__name__}))
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            registry = _registry or get_metrics()
+            if not registry.enabled:
+                return func(*args, **kwargs)
+            key = (name, series_labels(labels(*args, **kwargs))) if labels else default_key
+            start = time.perf_counter()
+            error = False
+            try:
+                return func(*args, **kwargs)
+            except BaseException:
+                error = True
+                raise
+            finally:
+                registry.observe_series(key, (time.perf_counter() - start) * 1000, error)
+        return wrapper
+    return decorator
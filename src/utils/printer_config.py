@@ -521,37 +521,13 @@ class PrinterConfigManager:
         device_name = connection.get('device_name')
         
         try:
-            if os.name == 'nt':  # Windows
-                # Tentar enviar via spooler do Windows
-                import tempfile
-                import subprocess
-                
-                # Criar arquivo temporário
-                with tempfile.NamedTemporaryFile(mode='w', suffix='.zpl', delete=False) as f:
-                    f.write(zpl)
-                    temp_file = f.name
-                
-                # Enviar para impressora via copy
-                result = subprocess.run(
-                    ['copy', temp_file, f'\\\\localhost\\"{device_name}"'],
-                    shell=True,
-                    capture_output=True,
-                    text=True
-                )
-                
-                # Limpar arquivo temporário
-                os.unlink(temp_file)
-                
-                if result.returncode == 0:
-                    log_info(f"Padrão de teste enviado para USB: {device_name}")
-                    return True
-                else:
-                    log_error(f"Erro ao enviar para USB: {result.stderr}")
-                    return False
-            else:
-                # Para Linux/Mac - implementar conforme necessário
-                log_warning("Envio de teste USB não implementado para este sistema")
-                return True
+            from printer.raw_backends import select_backend
+            
+            # Mesmo backend RAW da impressão (API de spool do Windows, CUPS ou /dev/usb/lp*)
+            backend = select_backend(device_name, connection.get('backend', 'auto'))
+            backend.send(device_name, [zpl.encode('utf-8')], job_name='Teste de impressora')
+            log_info(f"Padrão de teste enviado para USB: {device_name}")
+            return True
                 
         except Exception as e:
             log_error(f"Erro ao enviar ZPL via USB: {str(e)}")
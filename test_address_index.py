@@ -0,0 +1,97 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Teste da representação indexada do AddressManager
+Warehouse sintético com 40.000 posições: consultas por id, listas por
+posição e memória menor que o JSON original
+"""
+
+import sys
+import os
+import gc
+import json
+import time
+import tracemalloc
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), 'src'))
+
+from address_manager import AddressManager
+
+
+def _warehouse_json(buildings=4, floors=10, positions=1000):
+    """JSON no formato da API /warehouses/{id}"""
+    data = {'id': 3, 'code': 'COT001', 'name': 'Cotia 1', 'buildings': []}
+    floor_id = pallet_id = 1
+    for b in range(buildings):
+        building = {'id': 100 + b, 'code': chr(65 + b), 'name': f"Prédio {chr(65 + b)}",
+                    'total_floors': floors, 'floors': []}
+        for f in range(floors):
+            building['floors'].append({
+                'id': floor_id, 'code': f"{f:02d}", 'name': f"Andar {f}", 'floor_number': f,
+                'pallets': [{'id': pallet_id + p, 'code': f"{p + 1:02d}", 'name': f"Palete {p + 1:02d}",
+                             'full_address': f"COT001-{chr(65 + b)}-{f:02d}-{p + 1:04d}",
+                             'short_address': f"{chr(65 + b)}-{f:02d}-{p + 1:04d}", 'status': 'LIVRE'}
+                            for p in range(positions)]
+            })
+            floor_id += 1
+            pallet_id += positions
+        data['buildings'].append(building)
+    return json.dumps({'success': True, 'data': data})
+
+
+def test_lookups():
+    """Consultas devem achar prédio/andar/palete pelo id e respeitar a hierarquia"""
+    print("🧪 Testando consultas indexadas...")
+    manager = AddressManager()
+    assert manager.load_warehouse_data(json.loads(_warehouse_json()))
+
+    label = manager.get_pallet_label_data(103, 40, 39999)
+    assert label == {'full_address': 'COT001-D-09-0999', 'pallet_name': 'Palete 999',
+                     'building_name': 'Prédio D', 'floor_name': 'Andar 9'}
+    assert manager.get_pallet_label_data(100, 40, 39999) == {}  # andar de outro prédio
+    assert manager.get_pallet_by_address('COT001-A-00-0001').id == 1
+
+    header, groups = manager.get_floor_labels_data(101, 11)
+    assert header['floor_name'] == 'Andar 0' and len(groups) == 125 and len(groups[0]) == 8
+    assert len(manager.get_pallets_by_floor(101, 11)) == 1000
+    assert [f['pallets_count'] for f in manager.get_floors_by_building(102)] == [1000] * 10
+
+    blocks = manager.organize_addresses_by_block()
+    assert len(blocks) == 4000
+    assert [a['floor_name'] for a in blocks[0]['addresses']][:2] == ['Andar 9', 'Andar 8']
+
+    start = time.perf_counter()
+    for _ in range(10000):
+        manager.get_pallet_label_data(103, 40, 39999)
+    per_lookup = (time.perf_counter() - start) / 10000 * 1e6
+    print(f"✅ Consulta de palete em {per_lookup:.2f} µs (40.000 posições)")
+    assert per_lookup < 50
+    return True
+
+
+def test_memory_below_raw_json():
+    """A representação indexada deve ocupar menos memória que o JSON da API"""
+    print("🧪 Medindo memória...")
+    text = _warehouse_json()
+    gc.collect()
+    tracemalloc.start()
+    raw = json.loads(text)
+    raw_size = tracemalloc.get_traced_memory()[0]
+
+    manager = AddressManager()
+    manager.load_warehouse_data(raw)
+    del raw
+    gc.collect()
+    indexed_size = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+
+    print(f"   JSON: {raw_size / 2**20:.1f} MiB | indexado: {indexed_size / 2**20:.1f} MiB")
+    assert indexed_size < raw_size
+    print("✅ Memória menor que o JSON original")
+    return True
+
+
+if __name__ == "__main__":
+    test_lookups()
+    test_memory_below_raw_json()
+    print("\n🎉 Todos os testes do índice de endereços passaram!")
@@ -9,6 +9,7 @@ Valida os geradores ZPL para os modelos 01 e 02
 import sys
 import os
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), 'src'))
 
 from src.printer.zpl_generator import ZplGenerator
 from src.address_manager import AddressManager
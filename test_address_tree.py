@@ -0,0 +1,114 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Teste do modelo da lista de endereços (Treeview sob demanda) e da busca
+do AddressManager
+"""
+
+import sys
+import os
+import time
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), 'src'))
+
+from address_manager import AddressManager
+from ui.address_tree import AddressTreeModel
+
+
+def _warehouse(buildings, floors, positions):
+    """Galpão no formato da API /warehouses/{id}: prédios A, B..., andares 00.. e paletes 0001.."""
+    data = {'id': 3, 'code': 'COT001', 'name': 'Cotia 1', 'buildings': []}
+    floor_id = pallet_id = 1
+    for b in range(buildings):
+        letter = chr(65 + b)
+        building = {'id': 100 + b, 'code': letter, 'name': f"Prédio {letter}", 'total_floors': floors,
+                    'floors': []}
+        for f in range(floors):
+            building['floors'].append({
+                'id': floor_id, 'code': f"{f:02d}", 'name': f"Andar {f}", 'floor_number': f,
+                'pallets': [{'id': pallet_id + p, 'code': f"{p + 1:02d}", 'name': f"Palete {p + 1:02d}",
+                             'full_address': f"COT001-{letter}-{f:02d}-{p + 1:04d}",
+                             'short_address': f"{letter}-{f:02d}-{p + 1:04d}", 'status': 'LIVRE'}
+                            for p in range(positions)]
+            })
+            floor_id += 1
+            pallet_id += positions
+        data['buildings'].append(building)
+    return {'success': True, 'data': data}
+
+
+def _model(buildings, floors, positions):
+    manager = AddressManager()
+    assert manager.load_warehouse_data(_warehouse(buildings, floors, positions))
+    return AddressTreeModel(manager.organize_addresses_by_floor(), manager)
+
+
+def test_lazy_tree():
+    """Primeiro nível só com prédios; andares e paletes montados ao expandir"""
+    print("🧪 Testando árvore sob demanda...")
+    model = _model(2, 3, 5)
+    roots = model.root_rows()
+    assert [row[0] for row in roots] == ['b:0', 'b:1']
+    assert roots[1][1] == '🏢 Prédio B' and roots[1][3]
+    assert roots[0][2][1] == '3 andar(es), 15 palete(s)'
+
+    floors = model.children('b:1')
+    assert [row[0] for row in floors] == ['f:3', 'f:4', 'f:5']
+    pallets = model.children('f:4')
+    assert len(pallets) == 5 and not any(row[3] for row in pallets)
+    assert pallets[2] == ('p:4:2', 'COT001-B-01-0003', ('Palete 03', 'Prédio B - Andar 1', 'LIVRE'), False)
+    assert model.children('p:4:2') == []
+
+    kind, floor, pallet = model.resolve('p:4:2')
+    assert kind == 'pallet' and floor['floor_name'] == 'Andar 1' and pallet['full_address'] == 'COT001-B-01-0003'
+    assert model.resolve('f:0')[0] == 'floor'
+    assert model.resolve('b:0') == (None, None, None)
+    print("✅ Níveis montados sob demanda")
+    return True
+
+
+def test_search():
+    """Busca por prefixo de endereço, substring e nome, com limite"""
+    print("🧪 Testando busca...")
+    model = _model(2, 3, 20)
+    manager = model.address_manager
+
+    found = [p.full_address for p in manager.search_pallets('cot001-b-02-001')]
+    assert found == [f"COT001-B-02-{n:04d}" for n in range(10, 20)], found
+    assert [p.full_address for p in manager.search_pallets('A-00-0007')] == ['COT001-A-00-0007']
+    assert len(manager.search_pallets('palete 01')) == 6  # nome, 1 por andar
+    assert manager.search_pallets('   ') == [] and manager.search_pallets('XYZ') == []
+    assert all(p.floor.pallets[p.position] is p for p in manager.search_pallets('COT001', 500))
+
+    rows, truncated = model.filter_rows('COT001', limit=50)
+    assert len(rows) == 50 and truncated
+    rows, truncated = model.filter_rows('B-02-0011', limit=50)
+    assert not truncated and [row[0] for row in rows] == ['p:5:10']
+    print("✅ Busca pelo índice correta")
+    return True
+
+
+def test_render_cost_independent_of_size():
+    """Linhas entregues na abertura não crescem com o número de paletes"""
+    print("🧪 Testando custo de exibição por tamanho de galpão...")
+    for positions in (10, 1000):
+        model = _model(4, 10, positions)
+        start = time.perf_counter()
+        initial = model.root_rows()
+        elapsed = time.perf_counter() - start
+
+        start = time.perf_counter()
+        rows, _ = model.filter_rows('COT001-C-05', limit=500)
+        search = time.perf_counter() - start
+        assert len(initial) == 4
+        print(f"   {model.total_pallets} paletes: {len(initial)} linhas iniciais em {elapsed * 1000:.2f} ms, "
+              f"busca com {len(rows)} resultados em {search * 1000:.2f} ms")
+    print("✅ Exibição inicial independe do tamanho do galpão")
+    return True
+
+
+if __name__ == "__main__":
+    test_lazy_tree()
+    test_search()
+    test_render_cost_independent_of_size()
+    print("\n🎉 Todos os testes da lista de endereços passaram!")
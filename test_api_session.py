@@ -0,0 +1,84 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Teste do pool de conexões HTTP do APIClient
+Sobe um servidor HTTP/1.1 local e verifica o reaproveitamento de conexões
+"""
+
+import sys
+import os
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), 'src'))
+
+from api.client import APIClient
+from api.session import SessionPool, resolve_timeout
+
+
+class _KeepAliveHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+    wbufsize = 65536  # resposta em um único segmento (evita atraso do Nagle)
+
+    def do_GET(self):
+        body = json.dumps({'success': True, 'data': {'path': self.path}}).encode('utf-8')
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def _start_server():
+    server = ThreadingHTTPServer(('127.0.0.1', 0), _KeepAliveHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def test_connection_reuse():
+    """500 buscas sequenciais devem usar uma única conexão TCP"""
+    print("🧪 Testando reaproveitamento de conexões...")
+    server = _start_server()
+    try:
+        client = APIClient()
+        client.base_url = f"http://127.0.0.1:{server.server_address[1]}/api"
+        client.session = SessionPool(pool_connections=2, pool_maxsize=4)
+
+        for n in range(500):
+            response = client.get(f'/cargos/code/{n:09d}')
+            assert response.status_code == 200
+
+        stats = client.get_connection_stats()
+        print(f"✅ Contadores: {stats}")
+        assert stats['requests'] == 500
+        assert stats['connections_opened'] == 1
+        assert stats['connections_reused'] == 499
+    finally:
+        server.shutdown()
+    return True
+
+
+def test_endpoint_timeouts():
+    """Timeouts devem ser resolvidos pelo prefixo mais longo"""
+    print("🧪 Testando timeouts por endpoint...")
+    timeouts = {
+        'default': {'connect': 5, 'read': 30},
+        '/cargos': {'read': 20},
+        '/cargos/code': {'connect': 3, 'read': 10}
+    }
+    assert resolve_timeout('/cargos/code/080000004', timeouts) == (3.0, 10.0)
+    assert resolve_timeout('cargos/123/receive-physically', timeouts) == (5.0, 20.0)
+    assert resolve_timeout('/login', timeouts) == (5.0, 30.0)
+    assert resolve_timeout('/login', {}, default_read=15) == (10.0, 15.0)
+    print("✅ Timeouts resolvidos corretamente")
+    return True
+
+
+if __name__ == "__main__":
+    test_connection_reuse()
+    test_endpoint_timeouts()
+    print("\n🎉 Todos os testes do pool HTTP passaram!")
@@ -0,0 +1,141 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Teste da reimpressão em lote
+Lista colada com faixas, busca em paralelo e ZPL gerado em um único job
+"""
+
+import sys
+import os
+import threading
+import time
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), 'src'))
+
+from fake_api import FakeResponse
+from cargo_manager import CargoManager
+from cargo_cache import CargoCache
+from printer.zpl_generator import ZplGenerator
+
+
+class _FakeCargoApi:
+    """Responde /cargos/code/{code} com latência; códigos em 'broken' retornam HTTP 500"""
+
+    def __init__(self, cargos, delay=0.01, broken=()):
+        self.cargos = cargos
+        self.delay = delay
+        self.broken = set(broken)
+        self.calls = 0
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self._lock = threading.Lock()
+
+    def get(self, endpoint, headers=None, **kwargs):
+        code = endpoint.rsplit('/', 1)[-1]
+        with self._lock:
+            self.calls += 1
+            self.in_flight += 1
+            self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        time.sleep(self.delay)
+        with self._lock:
+            self.in_flight -= 1
+        if code in self.broken:
+            return FakeResponse(500)
+        cargo = self.cargos.get(code)
+        return FakeResponse(200, {'data': cargo}) if cargo else FakeResponse(404)
+
+
+def _cargos(first, count):
+    return {f"{n:09d}": {'id': n, 'code': f"{n:09d}", 'label_code': f"{n:09d}", 'status': 'RECEIVED',
+                         'is_priority': n % 10 == 0}
+            for n in range(first, first + count)}
+
+
+def test_parse_code_list():
+    """Lista colada aceita separadores variados e faixas"""
+    print("🧪 Testando leitura da lista de códigos...")
+    manager = CargoManager(None, 'token')
+    parsed = manager.parse_code_list("080000001-080000005\n080000003, 00000010;abc 12345 080000009-080000008")
+    assert parsed['codes'] == ['080000001', '080000002', '080000003', '080000004', '080000005', '00000010']
+    assert parsed['invalid'] == ['abc', '12345', '080000009-080000008']
+
+    try:
+        manager.parse_code_list("080000001-080001000", max_codes=500)
+        assert False, "faixa acima do limite deveria ser recusada"
+    except ValueError:
+        pass
+    print("✅ Lista lida corretamente")
+    return True
+
+
+def test_resolve_and_plan():
+    """Busca paralela separa reimpressos, não encontrados e erros"""
+    print("🧪 Testando busca em paralelo do lote...")
+    api = _FakeCargoApi(_cargos(80000001, 180), broken={'080000007'})
+    manager = CargoManager(api, 'token', cache=CargoCache())
+    codes = manager.parse_code_list("080000001-080000200")['codes']
+
+    start = time.perf_counter()
+    results = manager.resolve_codes(codes, max_workers=8)
+    elapsed = time.perf_counter() - start
+    plan = manager.plan_reprint(results)
+
+    assert len(plan['items']) == 179
+    assert plan['not_found'] == [f"{n:09d}" for n in range(80000181, 80000201)]
+    assert [e['code'] for e in plan['errors']] == ['080000007']
+    assert api.max_in_flight > 1 and elapsed < 200 * api.delay / 2
+    indicators = {code: cargo_data for code, cargo_data, _ in plan['items']}
+    assert indicators['080000010']['is_priority'] and not indicators['080000011']['is_priority']
+
+    # Segunda rodada (ex: nova tentativa após atolamento) sai do cache
+    calls = api.calls
+    manager.resolve_codes(codes[:50], max_workers=8)
+    assert api.calls == calls + 1  # só o código com erro volta à API
+    print(f"✅ 200 códigos em {elapsed:.2f}s (serial ~{200 * api.delay:.1f}s), "
+          f"{api.max_in_flight} busca(s) simultâneas")
+    return True
+
+
+def test_single_streamed_job():
+    """Todas as etiquetas do lote saem em um único fluxo de blocos"""
+    print("🧪 Testando geração do job do lote...")
+    generator = ZplGenerator()
+    manager = CargoManager(None, 'token')
+    cargos = list(_cargos(80000001, 150).values())
+    pairs = [(manager.get_code_to_print(c), manager.get_indicator_data(c)) for c in cargos]
+
+    chunks = list(generator.iter_reprint_zpl(pairs, quantity=2, chunk_size=4096))
+    data = b''.join(chunks).decode('utf-8')
+    expected = ''.join(generator.build_zpl(code, cargo_data) * 2 for code, cargo_data in pairs)
+    assert data == expected
+    assert data.count('^XA') == 300 and len(chunks) > 1
+    assert all(chunk.rstrip().endswith(b'^XZ') for chunk in chunks)
+
+    recalls = b''.join(generator.iter_reprint_zpl(pairs, recall=True)).decode('utf-8')
+    assert recalls.count('^XF') == 150 and len(recalls) < len(expected) / 2
+    print(f"✅ {data.count('^XA')} etiquetas em {len(chunks)} bloco(s), {len(data)} bytes "
+          f"({len(recalls)} bytes com formato armazenado)")
+    return True
+
+
+def test_report():
+    """Relatório do lote lista pendências"""
+    print("🧪 Testando relatório do lote...")
+    text = CargoManager(None, 'token').format_reprint_report({
+        'requested': 4, 'printed': 2, 'labels': 4, 'quantity': 2, 'printer': 'ZT-1',
+        'not_found': ['080000003'], 'errors': [{'code': '080000004', 'error': 'HTTP 500'}],
+        'offline': [], 'invalid': ['abc'], 'elapsed': 1.25
+    })
+    assert "Reimpressos: 2 (4 etiqueta(s), 2 por código)" in text
+    assert "Não encontrados (1): 080000003" in text and "080000004: HTTP 500" in text
+    assert "abc" in text
+    print("✅ Relatório formatado")
+    return True
+
+
+if __name__ == "__main__":
+    test_parse_code_list()
+    test_resolve_and_plan()
+    test_single_streamed_job()
+    test_report()
+    print("\n🎉 Todos os testes de reimpressão em lote passaram!")
@@ -0,0 +1,85 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Teste do benchmark do ZplGenerator
+Confere a detecção de regressões em relação à baseline
+"""
+
+import sys
+import os
+import json
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from bench_zpl import run, compare, merge_baseline, BASELINE_FILE
+from utils.metrics import get_metrics
+
+
+def _result(rate, size=180.0, peak=12.0, calibration=1000000.0):
+    return {'meta': {'calibration_ops_per_sec': calibration},
+            'results': {'build_zpl@1000': {'labels_per_sec': rate, 'bytes_per_label': size, 'peak_kib': peak}}}
+
+
+def test_compare_thresholds():
+    """Queda de taxa, etiqueta maior e pico de memória acima do limite são regressões"""
+    print("🧪 Testando comparação com a baseline...")
+    baseline = _result(100000)
+    assert compare(_result(80000), baseline) == []
+    assert len(compare(_result(60000), baseline)) == 1
+    # Máquina 2x mais lenta (calibração) com a mesma taxa relativa não é regressão
+    assert compare(_result(50000, calibration=500000.0), baseline) == []
+    assert 'B/etq' in compare(_result(100000, size=181.0), baseline)[0]
+    assert 'pico' in compare(_result(100000, peak=500.0), baseline)[0]
+    assert compare(_result(100000, peak=70.0), baseline) == []  # folga fixa para casos pequenos
+    print("✅ Regressões detectadas")
+    return True
+
+
+def test_partial_update_keeps_calibration():
+    """Atualização parcial: cada caso mantém a calibração da rodada em que foi medido"""
+    print("🧪 Testando atualização parcial da baseline...")
+    baseline = _result(100000)
+    baseline['results']['build_batch_zpl@1000'] = {'labels_per_sec': 400000, 'bytes_per_label': 180.0,
+                                                   'peak_kib': 400.0}
+    # Nova rodada só de build_zpl em uma máquina 2x mais lenta
+    merged = merge_baseline(baseline, _result(50000, calibration=500000.0))
+    assert merged['results']['build_zpl@1000']['calibration_ops_per_sec'] == 500000.0
+    assert merged['results']['build_batch_zpl@1000']['calibration_ops_per_sec'] == 1000000.0
+    assert 'calibration_ops_per_sec' not in merged['meta']
+
+    # De volta à máquina original, o caso não medido na rodada parcial continua sem regressão
+    current = {'meta': {'calibration_ops_per_sec': 1000000.0},
+               'results': {'build_zpl@1000': {'labels_per_sec': 100000, 'bytes_per_label': 180.0,
+                                              'peak_kib': 12.0},
+                           'build_batch_zpl@1000': {'labels_per_sec': 400000, 'bytes_per_label': 180.0,
+                                                    'peak_kib': 400.0}}}
+    assert compare(current, merged) == []
+    current['results']['build_batch_zpl@1000']['labels_per_sec'] = 200000
+    assert [line.split(':')[0] for line in compare(current, merged)] == ['build_batch_zpl@1000']
+    print("✅ Calibração por caso preservada na atualização parcial")
+    return True
+
+
+def test_run_matches_baseline_cases():
+    """Uma rodada curta mede os mesmos casos da baseline versionada"""
+    print("🧪 Testando rodada curta do benchmark...")
+    metrics = get_metrics()
+    enabled = metrics.enabled
+    current = run(sizes=(1,), repeat=1)
+    with open(BASELINE_FILE, encoding='utf-8') as f:
+        baseline = json.load(f)
+    assert set(current['results']) <= set(baseline['results'])
+    # Layout medido com e sem métricas; o registro da aplicação volta como estava
+    assert {'build_zpl@1', 'build_zpl_metrics_off@1'} <= set(current['results'])
+    assert metrics.enabled == enabled and metrics.snapshot() == []
+    for key, row in current['results'].items():
+        assert row['labels_per_sec'] > 0 and row['bytes_per_label'] == baseline['results'][key]['bytes_per_label']
+    print(f"✅ {len(current['results'])} caso(s) com o mesmo tamanho de etiqueta da baseline")
+    return True
+
+
+if __name__ == "__main__":
+    test_compare_thresholds()
+    test_partial_update_keeps_calibration()
+    test_run_matches_baseline_cases()
+    print("\n🎉 Todos os testes do benchmark ZPL passaram!")
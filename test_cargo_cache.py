@@ -0,0 +1,160 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Teste do cache de cargas e do histórico de impressão da reimpressão
+Usa uma API falsa de /cargos/code que pode ser "desligada"
+"""
+
+import sys
+import os
+import shutil
+import tempfile
+import time
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), 'src'))
+
+from fake_api import FakeResponse
+from cargo_manager import CargoManager
+from cargo_cache import CargoCache
+from print_history import PrintHistory
+
+
+class _FakeCargoApi:
+    """Responde /cargos/code/{code}; offline=True simula queda (APIClient lança Exception)"""
+
+    def __init__(self, cargos):
+        self.cargos = cargos
+        self.calls = 0
+        self.offline = False
+        self.status_code = 200
+
+    def get(self, endpoint, headers=None, **kwargs):
+        self.calls += 1
+        if self.offline:
+            raise Exception("Erro de conexão - verifique a conectividade com a API")
+        if self.status_code != 200:
+            return FakeResponse(self.status_code)
+        cargo = self.cargos.get(endpoint.rsplit('/', 1)[-1])
+        return FakeResponse(200, {'data': cargo}) if cargo else FakeResponse(404)
+
+
+def _cargos(count):
+    return {f"{80000000 + n:09d}": {'id': n, 'code': f"{80000000 + n:09d}", 'status': 'RECEIVED'}
+            for n in range(count)}
+
+
+def test_lru_and_ttl():
+    """Limite de entradas descarta a menos usada; TTL vencido volta à API"""
+    print("🧪 Testando LRU e TTL...")
+    cache = CargoCache(max_entries=3, ttl=0.05)
+    for code in ('1', '2', '3'):
+        cache.put(code, {'code': code})
+    assert cache.get('1') == {'code': '1'}  # '1' passa a ser a mais recente
+    cache.put('4', {'code': '4'})
+    assert cache.get('2') is None and cache.get('1') and cache.get('4')
+
+    time.sleep(0.06)
+    assert cache.get('1') is None
+    cargo, age = cache.get_stale('1')
+    assert cargo == {'code': '1'} and age >= 0.05
+    print(f"✅ {cache.get_stats()}")
+    return True
+
+
+def test_repeated_lookups_use_cache():
+    """Consultas repetidas do mesmo código não vão à API"""
+    print("🧪 Testando reimpressões repetidas...")
+    api = _FakeCargoApi(_cargos(300))
+    manager = CargoManager(api, 'token', cache=CargoCache(max_entries=500, ttl=60))
+    codes = list(api.cargos)
+
+    start = time.perf_counter()
+    for _ in range(10):
+        for code in codes:
+            assert manager.get_cargo_by_code(code)['code'] == code
+    elapsed = time.perf_counter() - start
+    assert api.calls == 300, api.calls
+
+    # Não encontrado não é guardado: a carga pode ser registrada depois
+    assert manager.get_cargo_by_code('099999999') is None
+    assert manager.get_cargo_by_code('099999999') is None
+    assert api.calls == 302
+    print(f"✅ 3000 buscas, {api.calls} chamadas à API ({elapsed * 1000:.0f} ms)")
+    return True
+
+
+def test_outage_fallback():
+    """Com a API fora do ar a busca usa o cache vencido e depois o histórico"""
+    print("🧪 Testando busca com a API fora do ar...")
+    tmp_dir = tempfile.mkdtemp()
+    try:
+        db_path = os.path.join(tmp_dir, 'print_history.db')
+        api = _FakeCargoApi(_cargos(3))
+        history = PrintHistory(db_path)
+        manager = CargoManager(api, 'token', cache=CargoCache(ttl=0), print_history=history)
+
+        cargo = manager.get_cargo_by_code('080000001')
+        manager.record_print('080000001', cargo, 2, 'ZT-1')
+        manager.record_print('080000001', cargo, 1, 'ZT-2')
+
+        api.offline = True
+        cargo = manager.get_cargo_by_code('080000001')
+        assert cargo['_source'] == 'cache' and cargo['id'] == 1
+
+        # Nova estação (cache vazio): histórico persistido no SQLite
+        history.close()
+        history = PrintHistory(db_path)
+        manager = CargoManager(api, 'token', cache=CargoCache(), print_history=history)
+        cargo = manager.get_cargo_by_code('080000001')
+        assert cargo['_source'] == 'history' and cargo['status'] == 'RECEIVED'
+
+        record = history.lookup('080000001')
+        assert record['print_count'] == 2 and record['labels_printed'] == 3
+        assert record['last_printer'] == 'ZT-2' and '_source' not in record['cargo']
+
+        # Erro 5xx também usa a cópia local; código desconhecido continua falhando
+        api.offline = False
+        api.status_code = 503
+        assert manager.get_cargo_by_code('080000001')['_source'] == 'history'
+        try:
+            manager.get_cargo_by_code('080000002')
+            assert False, "deveria falhar sem cópia local"
+        except RuntimeError:
+            pass
+
+        # Busca em lote: mesma regra; erro de autorização ou validação não vira cópia local
+        assert manager.lookup_cargo('080000001')['cargo']['_source'] == 'history'
+        api.offline = True
+        assert manager.lookup_cargo('080000001')['cargo']['_source'] == 'history'
+        api.offline = False
+        for status in (401, 403, 422):
+            api.status_code = status
+            result = manager.lookup_cargo('080000001')
+            assert result['cargo'] is None and result['error'].startswith(f"HTTP {status}"), result
+        history.close()
+    finally:
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+    print("✅ Cópia local usada na queda da API")
+    return True
+
+
+def test_history_prune_and_recent():
+    """Histórico lista as últimas impressões e apaga as antigas"""
+    print("🧪 Testando limpeza do histórico...")
+    history = PrintHistory()
+    for n in range(5):
+        history.record_print(f"08000000{n}", {'id': n, 'code': f"08000000{n}"}, source='receive')
+    history._conn.execute("UPDATE printed_cargo SET last_printed_at = 0 WHERE code = '080000000'")
+    assert len(history.recent(2)) == 2 and history.recent()[-1]['code'] == '080000000'
+    assert history.prune(30) == 1 and history.count() == 4
+    history.close()
+    print("✅ Histórico limpo")
+    return True
+
+
+if __name__ == "__main__":
+    test_lru_and_ttl()
+    test_repeated_lookups_use_cache()
+    test_outage_fallback()
+    test_history_prune_and_recent()
+    print("\n🎉 Todos os testes do cache de cargas passaram!")
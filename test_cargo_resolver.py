@@ -0,0 +1,73 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Teste da resolução de cargas em lote (CargoManager.resolve_codes)
+Usa um cliente de API simulado com latência para validar ordem e paralelismo
+"""
+
+import sys
+import os
+import time
+import random
+import threading
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), 'src'))
+
+from fake_api import FakeResponse
+from cargo_manager import CargoManager
+
+
+class _FakeAPIClient:
+    """Responde /cargos/code/{code} com latência aleatória"""
+
+    def __init__(self, latency=0.02):
+        self.latency = latency
+        self.active = 0
+        self.peak = 0
+        self._lock = threading.Lock()
+
+    def get(self, endpoint, headers=None, **kwargs):
+        with self._lock:
+            self.active += 1
+            self.peak = max(self.peak, self.active)
+        try:
+            time.sleep(random.uniform(0, self.latency))
+            code = endpoint.rsplit('/', 1)[-1]
+            if code.endswith('0'):
+                return FakeResponse(404, {'message': 'Not found'})
+            if code.endswith('5'):
+                return FakeResponse(500, {'message': 'Erro interno'})
+            status = 'RECEIVED' if int(code) % 2 else 'STORED'
+            return FakeResponse(200, {'data': {'id': int(code), 'code': code, 'status': status}})
+        finally:
+            with self._lock:
+                self.active -= 1
+
+
+def test_resolve_codes_order_and_buckets():
+    """Resultados em ordem de entrada, agrupados por bucket, com limite de concorrência"""
+    print("🧪 Testando resolução em lote...")
+    api = _FakeAPIClient()
+    manager = CargoManager(api, 'token')
+    codes = [f"{n:09d}" for n in range(80000001, 80000301)]
+    progress = []
+
+    results = manager.resolve_codes(codes, max_workers=8,
+                                    on_progress=lambda done, total, r: progress.append((done, total)))
+
+    assert [r['code'] for r in results] == codes
+    assert progress[-1] == (300, 300) and len(progress) == 300
+    assert api.peak <= 8
+
+    groups = manager.group_lookup_results(results, ['RECEIVED', 'CHECKED'])
+    assert len(groups['not_found']) == 30
+    assert len(groups['errors']) == 30
+    assert groups['cargo_ids'] == [int(c) for c in codes if c[-1] not in '05' and int(c) % 2]
+    assert all(item['status'] == 'STORED' for item in groups['wrong_status'])
+    print(f"✅ 300 cargas resolvidas (pico de {api.peak} requisições simultâneas)")
+    return True
+
+
+if __name__ == "__main__":
+    test_resolve_codes_order_and_buckets()
+    print("\n🎉 Teste de resolução em lote passou!")
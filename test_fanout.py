@@ -0,0 +1,139 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Teste da distribuição de etiquetas entre várias impressoras
+Usa impressoras falsas com tempos de envio diferentes
+"""
+
+import sys
+import os
+import json
+import shutil
+import tempfile
+import threading
+import time
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), 'src'))
+
+from printer.fanout import FanOutPrinter, PrintUnit, PRINTED, FAILED, CANCELLED
+
+
+class _FakePrinter:
+    """Impressora que leva 'delay' segundos por etiqueta e pode falhar"""
+
+    def __init__(self, delay, fail=False):
+        self.delay = delay
+        self.fail = fail
+        self.received = []
+        self.concurrent = 0
+        self.max_concurrent = 0
+        self._lock = threading.Lock()
+
+    def send(self, zpl):
+        with self._lock:
+            self.concurrent += 1
+            self.max_concurrent = max(self.max_concurrent, self.concurrent)
+        time.sleep(self.delay)
+        with self._lock:
+            self.concurrent -= 1
+        if self.fail:
+            return False
+        self.received.append(zpl)
+        return True
+
+
+def _units(count):
+    return [PrintUnit(n + 1, f"^XA^FD{n + 1}^FS^XZ", [f"COT001-A-00-{2 * n + 1:04d}", f"COT001-A-00-{2 * n + 2:04d}"])
+            for n in range(count)]
+
+
+def test_parallel_and_balanced():
+    """Impressoras imprimem ao mesmo tempo e a mais rápida recebe mais etiquetas"""
+    print("🧪 Testando distribuição em paralelo...")
+    printers = {'ZT-1': _FakePrinter(0.002), 'ZT-2': _FakePrinter(0.01),
+                'ZT-3': _FakePrinter(0.01), 'ZT-4': _FakePrinter(0.01)}
+    progress = []
+    fanout = FanOutPrinter({name: p.send for name, p in printers.items()}, queue_depth=2)
+
+    start = time.perf_counter()
+    manifest = fanout.run(_units(80), on_progress=lambda done, total: progress.append((done, total)))
+    elapsed = time.perf_counter() - start
+    serial = 80 * 0.01
+
+    assert manifest['printed'] == 80 and manifest['failed'] == 0
+    assert sum(len(p.received) for p in printers.values()) == 80
+    assert all(p.max_concurrent == 1 for p in printers.values()), "uma etiqueta por vez em cada impressora"
+    assert len(printers['ZT-1'].received) > len(printers['ZT-2'].received)
+    assert elapsed < serial / 2, f"{elapsed:.2f}s não foi paralelo (serial ~{serial:.2f}s)"
+    assert progress[-1] == (80, 80) and len(progress) == 80
+
+    # Manifesto: cada endereço aparece uma vez, na impressora que imprimiu a etiqueta
+    printed_addresses = [a for stats in manifest['printers'].values() for a in stats['addresses']]
+    assert sorted(printed_addresses) == sorted(a for u in _units(80) for a in u.addresses)
+    for unit in manifest['units']:
+        assert unit['status'] == PRINTED
+        assert set(unit['addresses']) <= set(manifest['printers'][unit['printer']]['addresses'])
+    for name, stats in manifest['printers'].items():
+        print(f"   {name}: {stats['labels']} etiquetas, {stats['labels_per_minute']}/min")
+    print(f"✅ 80 etiquetas em {elapsed:.2f}s (serial ~{serial:.2f}s)")
+    return True
+
+
+def test_failing_printer_is_removed():
+    """Etiquetas de uma impressora com falha são reimpressas nas outras"""
+    print("🧪 Testando impressora com falha...")
+    good = _FakePrinter(0.002)
+    bad = _FakePrinter(0.001, fail=True)
+    fanout = FanOutPrinter({'boa': good.send, 'ruim': bad.send}, queue_depth=2, max_failures=2)
+    manifest = fanout.run(_units(20))
+
+    assert manifest['printed'] == 20 and manifest['failed'] == 0
+    assert len(good.received) == 20
+    assert manifest['printers']['ruim']['removed'] and manifest['printers']['ruim']['labels'] == 0
+    assert all(unit['printer'] == 'boa' for unit in manifest['units'])
+    print("✅ Impressora retirada e etiquetas reimpressas")
+    return True
+
+
+def test_all_failing_and_cancel():
+    """Sem impressora disponível as etiquetas falham; cancelamento interrompe o lote"""
+    print("🧪 Testando falha total e cancelamento...")
+    fanout = FanOutPrinter({'ruim': _FakePrinter(0, fail=True).send}, max_failures=1)
+    manifest = fanout.run(_units(5))
+    assert manifest['printed'] == 0 and manifest['failed'] == 5
+    assert all(unit['status'] == FAILED for unit in manifest['units'])
+
+    slow = _FakePrinter(0.02)
+    cancel = threading.Event()
+    threading.Timer(0.05, cancel.set).start()
+    manifest = FanOutPrinter({'lenta': slow.send}).run(_units(50), should_cancel=cancel.is_set)
+    assert manifest['cancelled'] and 0 < manifest['printed'] < 50
+    assert manifest['printed'] == len(slow.received)
+    assert {unit['status'] for unit in manifest['units']} == {PRINTED, CANCELLED}
+    print(f"✅ Cancelado após {manifest['printed']} etiqueta(s)")
+    return True
+
+
+def test_manifest_file():
+    """Manifesto gravado em JSON no diretório configurado"""
+    print("🧪 Testando gravação do manifesto...")
+    manifest_dir = tempfile.mkdtemp()
+    try:
+        fanout = FanOutPrinter({'ZT-1': _FakePrinter(0).send}, manifest_dir=manifest_dir)
+        manifest = fanout.run(_units(3), description="COT001 - andares")
+        with open(manifest['manifest_path'], 'r', encoding='utf-8') as f:
+            saved = json.load(f)
+        assert saved['description'] == "COT001 - andares" and saved['printed'] == 3
+        assert saved['printers']['ZT-1']['addresses'][:2] == ['COT001-A-00-0001', 'COT001-A-00-0002']
+    finally:
+        shutil.rmtree(manifest_dir, ignore_errors=True)
+    print("✅ Manifesto gravado")
+    return True
+
+
+if __name__ == "__main__":
+    test_parallel_and_balanced()
+    test_failing_printer_is_removed()
+    test_all_failing_and_cancel()
+    test_manifest_file()
+    print("\n🎉 Todos os testes de distribuição passaram!")
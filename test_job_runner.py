@@ -0,0 +1,123 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Teste do executor de jobs em segundo plano das janelas
+Usa um widget falso que executa os callbacks do after() em um laço manual
+"""
+
+import sys
+import os
+import time
+import threading
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), 'src'))
+
+from utils.job_runner import JobRunner, JobCancelled
+
+
+class _FakeWidget:
+    """Simula o after() do Tk, registrando a thread dos callbacks"""
+
+    def __init__(self):
+        self.pending = []
+        self.thread = threading.current_thread()
+
+    def after(self, ms, func):
+        self.pending.append(func)
+
+    def pump(self, job, timeout=5):
+        deadline = time.time() + timeout
+        while not job.done() and time.time() < deadline:
+            callbacks, self.pending = self.pending, []
+            for func in callbacks:
+                func()
+            time.sleep(0.005)
+        assert job.done(), "job não terminou"
+
+
+def test_success_and_progress():
+    """Resultado e progresso devem chegar na thread da interface"""
+    print("🧪 Testando sucesso e progresso...")
+    runner = JobRunner(max_workers=2)
+    widget = _FakeWidget()
+    events = []
+
+    def work(job, total):
+        for n in range(1, total + 1):
+            job.report_progress(n, total)
+        return 'ok'
+
+    def record(kind):
+        def callback(*args):
+            assert threading.current_thread() is widget.thread
+            events.append((kind,) + args)
+        return callback
+
+    job = runner.submit(widget, work, 3, on_success=record('success'),
+                        on_error=record('error'), on_progress=record('progress'))
+    widget.pump(job)
+    assert events == [('progress', 1, 3), ('progress', 2, 3), ('progress', 3, 3), ('success', 'ok')], events
+    print(f"✅ Eventos: {events}")
+    runner.shutdown(wait=True)
+    return True
+
+
+def test_error():
+    """Exceções da função devem chegar ao on_error"""
+    print("🧪 Testando erro...")
+    runner = JobRunner(max_workers=1)
+    widget = _FakeWidget()
+    errors = []
+
+    def work(job):
+        raise ValueError("falha na impressora")
+
+    job = runner.submit(widget, work, on_error=errors.append)
+    widget.pump(job)
+    assert len(errors) == 1 and str(errors[0]) == "falha na impressora"
+    print("✅ Erro entregue ao callback")
+    runner.shutdown(wait=True)
+    return True
+
+
+def test_cancel():
+    """Cancelamento deve interromper o job e chamar on_cancel"""
+    print("🧪 Testando cancelamento...")
+    runner = JobRunner(max_workers=1)
+    widget = _FakeWidget()
+    started = threading.Event()
+    results = []
+
+    def work(job):
+        started.set()
+        while True:
+            job.check_cancelled()
+            time.sleep(0.01)
+
+    job = runner.submit(widget, work, on_success=results.append,
+                        on_cancel=lambda: results.append('cancelled'))
+    started.wait(2)
+    assert job.cancel()
+    widget.pump(job)
+    assert results == ['cancelled'], results
+
+    # Job ainda na fila: cancelado antes de executar
+    blocker = threading.Event()
+    first = runner.submit(widget, lambda job: blocker.wait(2))
+    queued = runner.submit(widget, lambda job: results.append('executou'),
+                           on_cancel=lambda: results.append('cancelled-queued'))
+    queued.cancel()
+    blocker.set()
+    widget.pump(first)
+    widget.pump(queued)
+    assert results == ['cancelled', 'cancelled-queued'], results
+    print("✅ Cancelamento em execução e na fila")
+    runner.shutdown(wait=True)
+    return True
+
+
+if __name__ == "__main__":
+    test_success_and_progress()
+    test_error()
+    test_cancel()
+    print("\n🎉 Todos os testes do executor de jobs passaram!")
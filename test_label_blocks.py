@@ -0,0 +1,261 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Teste da reserva de blocos de numeração das labels
+Usa uma API falsa de labels (com ou sem endpoint de reserva atômica)
+compartilhada por várias "estações"
+"""
+
+import sys
+import os
+import json
+import shutil
+import tempfile
+import threading
+import time
+from types import SimpleNamespace
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), 'src'))
+
+from fake_api import FakeResponse
+from label_manager import LabelManager, create_label_manager
+from label_blocks import LabelBlockLedger, LabelBlockError, block_reservation_enabled
+from printer.spooler import spooler_enabled
+from ui.batch_print_window import BatchPrintWindow
+
+
+class _FakeLabelsApi:
+    """Contador de uma label; com atomic=False só aceita GET/PUT (If-Match quando etag=True)"""
+
+    def __init__(self, atomic=True, last_number=0, delay=0.001, etag=True):
+        self.atomic = atomic
+        self.etag = etag
+        self.last_number = last_number
+        self.version = 0
+        self.delay = delay
+        self.calls = 0
+        self._lock = threading.Lock()
+
+    def get(self, endpoint, headers=None, **kwargs):
+        time.sleep(self.delay)
+        with self._lock:
+            self.calls += 1
+            return FakeResponse(200, {'id': 1, 'last_number': self.last_number},
+                                 {'ETag': f'"{self.version}"'} if self.etag else {})
+
+    def put(self, endpoint, data=None, headers=None, **kwargs):
+        time.sleep(self.delay)
+        with self._lock:
+            self.calls += 1
+            if (headers or {}).get('If-Match') not in (None, f'"{self.version}"'):
+                return FakeResponse(412)
+            self.last_number = data['last_number']
+            self.version += 1
+            return FakeResponse(200, {'id': 1, 'last_number': self.last_number})
+
+    def post(self, endpoint, data=None, headers=None, **kwargs):
+        time.sleep(self.delay)
+        with self._lock:
+            self.calls += 1
+            if not self.atomic:
+                return FakeResponse(404)
+            if endpoint.endswith('/reserve'):
+                start = self.last_number + 1
+                self.last_number += data['quantity']
+                self.version += 1
+                return FakeResponse(200, {'start': start, 'end': self.last_number})
+            if self.last_number != data['end']:
+                return FakeResponse(409)
+            self.last_number = data['start'] - 1
+            self.version += 1
+            return FakeResponse(200)
+
+
+def _run_stations(api, stations=3, batches=40, block_size=1):
+    """Estações imprimindo lotes ao mesmo tempo; retorna todas as sequências entregues"""
+    sequences = []
+    lock = threading.Lock()
+
+    def station():
+        manager = LabelManager(api, 'token', block_ledger=LabelBlockLedger(), block_size=block_size)
+        for n in range(batches):
+            _, start, end = manager.reserve_sequence({'id': 1}, 1 + n % 7)
+            with lock:
+                sequences.append((start, end))
+
+    threads = [threading.Thread(target=station) for _ in range(stations)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return sequences
+
+
+def _assert_no_duplicates(sequences):
+    numbers = [n for start, end in sequences for n in range(start, end + 1)]
+    assert len(numbers) == len(set(numbers)), "números duplicados entre estações"
+
+
+def test_concurrent_stations():
+    """Estações simultâneas com registro de blocos nunca recebem o mesmo número"""
+    print("🧪 Testando estações simultâneas...")
+    for atomic in (True, False):
+        # block_size=1: cada lote reserva na API exatamente a sua quantidade
+        api = _FakeLabelsApi(atomic=atomic)
+        sequences = _run_stations(api)
+        _assert_no_duplicates(sequences)
+        assert len(sequences) == 120
+        print(f"   {'reserva atômica' if atomic else 'GET/PUT com If-Match'}: "
+              f"{api.calls} chamadas à API para {len(sequences)} lotes")
+
+    api = _FakeLabelsApi(atomic=True)
+    sequences = _run_stations(api, block_size=1000)
+    _assert_no_duplicates(sequences)
+    assert api.calls == 3, api.calls  # um bloco por estação
+    print(f"   blocos de 1000: {api.calls} chamadas à API para {len(sequences)} lotes")
+    print("✅ Sem duplicidade")
+    return True
+
+
+def test_block_reuse_and_release():
+    """Lotes saem do bloco; sobra é devolvida só se ninguém reservou depois"""
+    print("🧪 Testando uso e devolução de blocos...")
+    api = _FakeLabelsApi(atomic=True, last_number=500)
+    station_a = LabelManager(api, 'token', block_ledger=LabelBlockLedger(), block_size=100)
+    station_b = LabelManager(api, 'token', block_ledger=LabelBlockLedger(), block_size=100)
+
+    assert station_a.reserve_sequence({'id': 1}, 10) == (500, 501, 510)
+    assert station_a.reserve_sequence({'id': 1}, 95) == (600, 601, 695)  # não cabe no resto: novo bloco
+    assert station_a.reserve_sequence({'id': 1}, 20) == (510, 511, 530)  # resto do primeiro bloco
+    assert api.last_number == 700
+
+    # A é a última a reservar: devolve 696-700; o resto 531-600 fica com A
+    assert station_a.release_unused() == 5
+    assert api.last_number == 695
+    assert [(b.next, b.end) for b in station_a.block_ledger.unused_blocks()] == [(531, 600)]
+
+    assert station_b.reserve_sequence({'id': 1}, 1) == (695, 696, 696)
+    assert station_b.release_unused() == 99 and api.last_number == 696
+
+    # Sem endpoint de devolução: usa GET/PUT
+    api.atomic = False
+    station_c = LabelManager(api, 'token', block_ledger=LabelBlockLedger(), block_size=50)
+    assert station_c.reserve_sequence({'id': 1}, 5)[1:] == (697, 701)
+    assert station_c.release_unused() == 45 and api.last_number == 701
+    print("✅ Blocos usados e devolvidos corretamente")
+    return True
+
+
+def test_no_etag_fails_closed():
+    """Com blocos, sem /reserve e sem ETag a reserva é recusada e o bloco não é devolvido"""
+    print("🧪 Testando blocos em API sem reserva atômica e sem ETag...")
+    api = _FakeLabelsApi(atomic=True, last_number=100)
+    station = LabelManager(api, 'token', block_ledger=LabelBlockLedger(), block_size=50)
+    assert station.reserve_sequence({'id': 1}, 5)[1:] == (101, 105)
+
+    api.atomic = False
+    api.etag = False
+    try:
+        station.reserve_sequence({'id': 1}, 60)
+        assert False, "reserva de bloco sem ETag deveria ser recusada"
+    except LabelBlockError:
+        pass
+    assert api.last_number == 150  # nenhum PUT sem If-Match
+
+    # Devolução sem If-Match também poderia desfazer a reserva de outra estação
+    assert station.release_unused() == 0 and api.last_number == 150
+    assert [(b.next, b.end) for b in station.block_ledger.unused_blocks()] == [(106, 150)]
+
+    # Várias estações com blocos: falham todas, nenhuma recebe números
+    errors = []
+
+    def run():
+        manager = LabelManager(api, 'token', block_ledger=LabelBlockLedger(), block_size=10)
+        for n in range(5):
+            try:
+                manager.reserve_sequence({'id': 1}, 1 + n)
+            except LabelBlockError as e:
+                errors.append(e)
+
+    threads = [threading.Thread(target=run) for _ in range(3)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert len(errors) == 15 and api.last_number == 150
+    print("✅ Reserva de blocos recusada sem ETag (sem duplicidade)")
+    return True
+
+
+def test_default_config_without_reserve():
+    """Configuração padrão (sem blocos) imprime em API sem /reserve e sem ETag, como antes"""
+    print("🧪 Testando impressão em lote com a configuração padrão...")
+    assert not block_reservation_enabled() and spooler_enabled()
+    api = _FakeLabelsApi(atomic=False, etag=False, last_number=41)
+    manager = create_label_manager(api, 'token')
+    assert manager.block_ledger is None
+
+    class _SpoolPrinter:
+        """Spooler habilitado (padrão): o lote vai para a fila com a sequência reservada"""
+
+        def __init__(self):
+            self.jobs = []
+
+        def enqueue_batch(self, start, quantity, job_id=None):
+            self.jobs.append((start, quantity))
+            return job_id
+
+    job = SimpleNamespace(report_progress=lambda text: None)
+    window = SimpleNamespace(label_manager=manager, printer=_SpoolPrinter(), zpl_generator=None)
+
+    label = {'id': 1, 'name': 'Recebimento', 'last_number': 41}
+    start, end, _ = BatchPrintWindow._run_print_job(window, job, label, 10)
+    assert (start, end) == (42, 51) and api.last_number == 51
+    label['last_number'] = end  # como o on_success da janela
+    assert BatchPrintWindow._run_print_job(window, job, label, 5)[:2] == (52, 56)
+    assert window.printer.jobs == [(42, 10), (52, 5)] and api.last_number == 56
+    print("✅ Sequências 42-51 e 52-56 impressas e last_number atualizado na API")
+    return True
+
+
+def test_journal_resume_and_integrity():
+    """Bloco retomado após reinício e faixa sobreposta recusada"""
+    print("🧪 Testando journal de blocos...")
+    tmp_dir = tempfile.mkdtemp()
+    try:
+        path = os.path.join(tmp_dir, 'label_blocks.log')
+        ledger = LabelBlockLedger(path)
+        ledger.record_lease(1, 1, 1000)
+        assert ledger.take(1, 300) == (1, 300)
+        ledger.close()
+
+        ledger = LabelBlockLedger(path)
+        assert ledger.get_status() == {'1': [{'start': 1, 'end': 1000, 'next': 301}]}
+        assert ledger.take(1, 700) == (301, 1000)
+        assert ledger.take(1, 1) is None
+        try:
+            ledger.record_lease(1, 900, 1900)
+            assert False, "faixa sobreposta deveria ser recusada"
+        except LabelBlockError:
+            pass
+        ledger.record_lease(1, 1001, 2000)
+        ledger.record_release(ledger.unused_blocks(1)[0])
+        ledger.record_lease(1, 1001, 1500)  # números devolvidos podem voltar
+        ledger.close()
+
+        with open(path, 'r', encoding='utf-8') as f:
+            ops = [json.loads(line)['op'] for line in f]
+        assert ops == ['lease', 'issue', 'issue', 'lease', 'release', 'lease'], ops
+    finally:
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+    print("✅ Journal retomado e faixas verificadas")
+    return True
+
+
+if __name__ == "__main__":
+    test_concurrent_stations()
+    test_block_reuse_and_release()
+    test_no_etag_fails_closed()
+    test_default_config_without_reserve()
+    test_journal_resume_and_integrity()
+    print("\n🎉 Todos os testes de blocos de labels passaram!")
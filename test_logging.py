@@ -0,0 +1,172 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Teste do log em fila com registros JSON
+Grava em um diretório temporário; não usa o logs/ do projeto
+"""
+
+import sys
+import os
+import json
+import logging
+import queue
+import tempfile
+import time
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), 'src'))
+
+from utils import logger
+from utils.logger import (setup_logger, shutdown_logger, log_info, log_debug, log_throttled,
+                          SizeTimeRotatingFileHandler, JsonFormatter)
+
+
+class _SlowHandler(logging.Handler):
+    """Simula disco lento"""
+
+    def __init__(self):
+        super().__init__()
+        self.records = []
+
+    def emit(self, record):
+        time.sleep(0.05)
+        self.records.append(record.getMessage())
+
+
+def test_json_records_in_background():
+    """Registros saem em JSON com os campos estruturados, gravados pela thread de log"""
+    print("🧪 Testando log JSON em segundo plano...")
+    cwd = os.getcwd()
+    with tempfile.TemporaryDirectory() as tmp:
+        os.chdir(tmp)
+        try:
+            setup_logger('test.log', level='INFO')
+            log_info("Job de impressão enviado", printer_id='zebra-1', labels=3, duration_ms=12.5)
+            log_debug("Payload completo", payload={'action': 'accept'})  # abaixo do nível
+            try:
+                raise RuntimeError("falha simulada")
+            except RuntimeError:
+                logging.exception("Erro ao imprimir")
+            shutdown_logger()
+
+            with open(os.path.join('logs', 'test.log'), encoding='utf-8') as f:
+                entries = [json.loads(line) for line in f]
+        finally:
+            os.chdir(cwd)
+            logging.getLogger().handlers.clear()
+
+    assert [e['msg'] for e in entries] == ["Job de impressão enviado", "Erro ao imprimir"]
+    first = entries[0]
+    assert first['level'] == 'INFO' and first['printer_id'] == 'zebra-1' and first['duration_ms'] == 12.5
+    assert first['thread'] == 'MainThread' and 'ts' in first
+    assert 'RuntimeError: falha simulada' in entries[1]['exc']
+    print("✅ Registros JSON com campos estruturados")
+    return True
+
+
+def test_logging_never_blocks():
+    """Handler lento não atrasa quem loga; fila cheia descarta em vez de esperar"""
+    print("🧪 Testando log sem bloqueio...")
+    slow = _SlowHandler()
+    log_queue = queue.Queue(maxsize=5)
+    handler = logger._DroppingQueueHandler(log_queue)
+    listener = logger._LogListener(log_queue, slow)
+    test_logger = logging.getLogger('test_logging.nonblocking')
+    test_logger.propagate = False
+    test_logger.addHandler(handler)
+    listener.start()
+
+    start = time.perf_counter()
+    for n in range(50):
+        test_logger.warning(f"registro {n}")
+    elapsed = time.perf_counter() - start
+    listener.stop()
+
+    assert elapsed < 0.05, f"log bloqueou ({elapsed:.3f}s)"
+    assert handler.dropped > 0 and len(slow.records) + handler.dropped == 50
+    print(f"✅ 50 registros em {elapsed * 1000:.1f}ms ({handler.dropped} descartados com a fila cheia)")
+    return True
+
+
+def test_dropped_count_on_shutdown():
+    """Total descartado vai para o arquivo como último registro, sem handler novo no console"""
+    print("🧪 Testando contagem de descartes no encerramento...")
+    cwd = os.getcwd()
+    with tempfile.TemporaryDirectory() as tmp:
+        os.chdir(tmp)
+        try:
+            setup_logger('test.log', level='INFO')
+            log_info("Último registro normal")
+            logger._queue_handler.dropped = 7  # fila cheia em algum momento da execução
+            shutdown_logger()
+            root_handlers = list(logging.getLogger().handlers)
+
+            with open(os.path.join('logs', 'test.log'), encoding='utf-8') as f:
+                entries = [json.loads(line) for line in f]
+        finally:
+            os.chdir(cwd)
+            logging.getLogger().handlers.clear()
+
+    assert root_handlers == [], root_handlers
+    assert entries[0]['msg'] == "Último registro normal"
+    assert entries[-1]['level'] == 'WARNING' and entries[-1]['dropped'] == 7
+    assert '7 registro(s) de log descartado(s)' in entries[-1]['msg']
+    print("✅ Descartes registrados no arquivo de log")
+    return True
+
+
+def test_size_and_time_rotation():
+    """Arquivo é rotacionado por tamanho e por tempo"""
+    print("🧪 Testando rotação do arquivo de log...")
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'app.log')
+        handler = SizeTimeRotatingFileHandler(path, max_bytes=2000, backup_count=3, rotate_hours=1)
+        handler.setFormatter(JsonFormatter())
+        for n in range(100):
+            handler.emit(logging.LogRecord('app', logging.INFO, __file__, 0, f"linha {n:03d}", (), None))
+        assert os.path.exists(path + '.1') and os.path.exists(path + '.3') and not os.path.exists(path + '.4')
+        assert os.path.getsize(path) <= 2000
+
+        handler.rollover_at = time.time() - 1  # intervalo vencido
+        before = os.path.getsize(path)
+        handler.emit(logging.LogRecord('app', logging.INFO, __file__, 0, "após o intervalo", (), None))
+        assert before > 0 and os.path.getsize(path + '.1') == before
+        assert handler.rollover_at > time.time() + 3000
+        handler.close()
+    print("✅ Rotação por tamanho e por tempo")
+    return True
+
+
+def test_throttled():
+    """Erros repetidos em laço saem uma vez por intervalo, com a contagem dos suprimidos"""
+    print("🧪 Testando agrupamento de registros repetidos...")
+    records = []
+
+    class _Capture(logging.Handler):
+        def emit(self, record):
+            records.append(record)
+
+    root = logging.getLogger()
+    capture = _Capture()
+    root.addHandler(capture)
+    try:
+        for n in range(100):
+            log_throttled('test-lookup', f"Erro ao buscar carga {n}", interval=0.2, cargo_code=str(n))
+        time.sleep(0.25)
+        log_throttled('test-lookup', "Erro ao buscar carga 100", interval=0.2)
+    finally:
+        root.removeHandler(capture)
+
+    assert [r.getMessage() for r in records] == [
+        "Erro ao buscar carga 0", "Erro ao buscar carga 100 (+99 semelhante(s) suprimido(s))"]
+    assert records[0].cargo_code == '0' and records[1].suppressed == 99
+    print("✅ 100 erros viraram 2 registros")
+    return True
+
+
+if __name__ == "__main__":
+    test_json_records_in_background()
+    test_logging_never_blocks()
+    test_dropped_count_on_shutdown()
+    test_size_and_time_rotation()
+    test_throttled()
+    print("\n🎉 Todos os testes de log passaram!")
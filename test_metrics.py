@@ -0,0 +1,233 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Teste das métricas de latência
+Histogramas, instrumentação do APIClient e exportação (JSON e Prometheus)
+"""
+
+import sys
+import os
+import json
+import random
+import tempfile
+import time
+import urllib.request
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), 'src'))
+
+from fake_api import FakeResponse
+from utils.metrics import MetricsRegistry, LatencyHistogram, start_prometheus_server, get_metrics, timed, timed_iter
+from api.client import APIClient, metric_endpoint
+
+
+class _FakeSession:
+    """Substitui o pool HTTP: responde pelo último segmento do endpoint"""
+
+    def request(self, method, url, **kwargs):
+        if url.endswith('/offline'):
+            import requests
+            raise requests.exceptions.ConnectionError("sem rota")
+        return FakeResponse(404 if url.endswith('/missing') else 200)
+
+
+def test_percentiles():
+    """Percentis estimados pelos buckets ficam próximos dos exatos"""
+    print("🧪 Testando percentis do histograma...")
+    rng = random.Random(7)
+    samples = [rng.lognormvariate(3.5, 0.8) for _ in range(20000)]  # mediana ~33ms
+    histogram = LatencyHistogram()
+    for value in samples:
+        histogram.observe(value)
+
+    ordered = sorted(samples)
+    for pct in (50, 95, 99):
+        exact = ordered[int(len(ordered) * pct / 100) - 1]
+        estimate = histogram.percentile(pct)
+        assert abs(estimate - exact) / exact < 0.2, (pct, estimate, exact)
+        print(f"   p{pct}: estimado {estimate:.1f}ms, exato {exact:.1f}ms")
+    assert histogram.percentile(100) <= max(samples)
+    assert LatencyHistogram().percentile(50) == 0.0
+    print("✅ Percentis dentro de 20% do valor exato")
+    return True
+
+
+def test_timer_and_labels():
+    """Timer separa séries por rótulo e conta exceções como erro"""
+    print("🧪 Testando medições por rótulo...")
+    metrics = MetricsRegistry()
+    for _ in range(3):
+        with metrics.timer('print_job', printer='zebra-1'):
+            pass
+    try:
+        with metrics.timer('print_job', printer='zebra-2'):
+            raise OSError("impressora desligada")
+    except OSError:
+        pass
+
+    rows = {row['labels']['printer']: row for row in metrics.snapshot()}
+    assert rows['zebra-1']['count'] == 3 and rows['zebra-1']['errors'] == 0
+    assert rows['zebra-2']['count'] == 1 and rows['zebra-2']['errors'] == 1
+
+    disabled = MetricsRegistry(enabled=False)
+    with disabled.timer('print_job'):
+        pass
+    assert disabled.snapshot() == []
+    print("✅ Séries por impressora, erros contados")
+    return True
+
+
+def test_timed_decorator():
+    """@timed mede com as métricas ligadas e não mede nada com elas desligadas"""
+    print("🧪 Testando o decorador @timed...")
+
+    @timed('zpl_build')
+    def build(code):
+        if code is None:
+            raise ValueError("sem código")
+        return f"^XA^FD{code}^FS^XZ"
+
+    @timed('print_job', labels=lambda printer: {'printer': printer})
+    def send(printer):
+        return True
+
+    metrics = get_metrics()
+    metrics.reset()
+    enabled = metrics.enabled
+    try:
+        metrics.enabled = True
+        assert build('1') == "^XA^FD1^FS^XZ" and send('zebra-1')
+        try:
+            build(None)
+        except ValueError:
+            pass
+        rows = {row['name']: row for row in metrics.snapshot()}
+        assert rows['zpl_build']['labels'] == {'op': 'build'}
+        assert rows['zpl_build']['count'] == 2 and rows['zpl_build']['errors'] == 1
+        assert rows['print_job']['labels'] == {'printer': 'zebra-1'}
+
+        metrics.reset()
+        metrics.enabled = False
+        assert build('2') == "^XA^FD2^FS^XZ"
+        assert metrics.snapshot() == []
+    finally:
+        metrics.enabled = enabled
+        metrics.reset()
+    print("✅ Rótulos padrão e por função; desligado não registra")
+    return True
+
+
+def test_timed_stream():
+    """Streaming do lote: uma medição por lote, só com o tempo de geração dos blocos"""
+    print("🧪 Testando medição de geração em streaming...")
+    from printer.zpl_generator import ZplGenerator
+
+    metrics = get_metrics()
+    metrics.reset()
+    enabled = metrics.enabled
+    try:
+        metrics.enabled = True
+        gen = ZplGenerator()
+        for n in range(5):
+            gen.build_zpl(gen.pad8(n))
+        assert metrics.snapshot() == []  # etiqueta a etiqueta não é medida
+
+        chunks = 0
+        for _ in gen.iter_batch_zpl(1, 3000, chunk_size=4096, serialize=False):
+            chunks += 1
+            time.sleep(0.005)  # envio à impressora entre os blocos não entra na medida
+        list(gen.iter_reprint_zpl([('00000001', None), ('00000002', None)], quantity=2))
+        rows = {row['labels']['op']: row for row in metrics.snapshot() if row['name'] == 'zpl_build'}
+        assert chunks > 10 and rows['iter_batch_zpl']['count'] == 1
+        assert rows['iter_batch_zpl']['max_ms'] < chunks * 5, rows['iter_batch_zpl']
+        assert rows['iter_reprint_zpl']['count'] == 1
+
+        def broken():
+            yield b'^XA'
+            raise RuntimeError("falha na geração")
+
+        try:
+            list(timed_iter('zpl_build', broken(), op='broken'))
+        except RuntimeError:
+            pass
+        rows = {row['labels']['op']: row for row in metrics.snapshot()}
+        assert rows['broken']['errors'] == 1
+
+        metrics.reset()
+        metrics.enabled = False
+        assert sum(len(chunk) for chunk in gen.iter_batch_zpl(1, 10, serialize=False)) == 1800
+        assert metrics.snapshot() == []
+    finally:
+        metrics.enabled = enabled
+        metrics.reset()
+    print(f"✅ {chunks} bloco(s) em uma medição de lote")
+    return True
+
+
+def test_api_client_instrumented():
+    """Cada requisição entra na série do endpoint normalizado"""
+    print("🧪 Testando instrumentação do APIClient...")
+    assert metric_endpoint('/cargos/123/receive-physically') == '/cargos/{id}/receive-physically'
+    assert metric_endpoint('cargos/code/080000001') == '/cargos/code/{id}'
+    assert metric_endpoint('/warehouses?page=2') == '/warehouses'
+
+    metrics = get_metrics()
+    metrics.reset()
+    client = APIClient()
+    client.session = _FakeSession()
+    for cargo_id in (1, 2, 3):
+        client.post(f'/cargos/{cargo_id}/receive-physically', data={'action': 'accept'})
+    client.get('/cargos/missing')
+    try:
+        client.get('/offline')
+    except Exception:
+        pass
+
+    series = {(row['labels']['endpoint'], row['labels']['status']): row for row in metrics.snapshot()
+              if row['name'] == 'api_request'}
+    assert series[('/cargos/{id}/receive-physically', '2xx')]['count'] == 3
+    assert series[('/cargos/missing', '4xx')]['count'] == 1
+    assert series[('/offline', 'error')]['errors'] == 1
+    print(f"✅ {len(series)} série(s) de endpoint")
+    return True
+
+
+def test_exports():
+    """Exportação em JSON, texto Prometheus e endpoint /metrics"""
+    print("🧪 Testando exportação das métricas...")
+    metrics = MetricsRegistry()
+    for value in (4, 8, 120):
+        metrics.observe('api_request', value, endpoint='/login', method='POST')
+    metrics.observe('zpl_build', 0.2, op='build_zpl')
+
+    text = metrics.to_prometheus()
+    assert '# TYPE wms_api_request_seconds histogram' in text
+    assert 'wms_api_request_seconds_bucket{endpoint="/login",method="POST",le="0.01"} 2' in text
+    assert 'wms_api_request_seconds_bucket{endpoint="/login",method="POST",le="+Inf"} 3' in text
+    assert 'wms_api_request_seconds_count{endpoint="/login",method="POST"} 3' in text
+    assert 'wms_zpl_build_errors_total{op="build_zpl"} 0' in text
+
+    with tempfile.TemporaryDirectory() as tmp:
+        data = json.load(open(metrics.export(os.path.join(tmp, 'metrics.json')), encoding='utf-8'))
+        assert [row['count'] for row in data['series']] == [3, 1]
+        with open(metrics.export(os.path.join(tmp, 'metrics.prom')), encoding='utf-8') as f:
+            assert f.read() == text
+
+    server = start_prometheus_server(metrics, 0)
+    try:
+        url = f"http://127.0.0.1:{server.server_address[1]}/metrics"
+        body = urllib.request.urlopen(url, timeout=5).read().decode('utf-8')
+        assert body == text
+    finally:
+        server.shutdown()
+    print("✅ JSON, .prom e /metrics com o mesmo conteúdo")
+    return True
+
+
+if __name__ == "__main__":
+    test_percentiles()
+    test_timer_and_labels()
+    test_timed_decorator()
+    test_timed_stream()
+    test_api_client_instrumented()
+    test_exports()
+    print("\n🎉 Todos os testes de métricas passaram!")
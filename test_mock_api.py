@@ -0,0 +1,355 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Teste da API do WMS simulada
+Fluxos reais do cliente (login, cargas, recebimento, labels, galpões) contra o
+servidor local, com latência e falhas injetadas. Os testes *_default_profile
+usam só os endpoints da API real; os demais ligam as extensões que testam
+"""
+
+import sys
+import os
+import shutil
+import tempfile
+import threading
+import time
+import urllib.request
+import json
+import random
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), 'src'))
+
+from api.mock_server import MockWmsServer, MockWmsData, LatencyModel, PENDING_RECEIPT, RECEIVED
+from api.client import APIClient
+from api.warehouse_cache import WarehouseCache
+from auth.login import LoginManager
+from cargo_manager import CargoManager
+from label_manager import LabelManager, create_label_manager
+from label_blocks import LabelBlockLedger, LabelBlockError
+from address_manager import AddressManager
+from receiving_journal import ReceivingJournal, SYNCED, CONFLICT
+from scan_pipeline import ScanPipeline
+
+PASSWORD = '123456'
+
+
+def _client(server):
+    client = APIClient()
+    client.base_url = server.url
+    return client
+
+
+def _login(client):
+    return LoginManager(client).login('12345678901', PASSWORD)['token']
+
+
+def _codes(data, status, count):
+    return [c['code'] for c in data.cargos.values() if c['status'] == status][:count]
+
+
+def test_login_and_lookup():
+    """Login emite token; busca de cargas em paralelo aproveita a latência"""
+    print("🧪 Testando login e busca de cargas...")
+    data = MockWmsData(cargos=500)
+    with MockWmsServer(port=0, data=data, latency='fixed:20') as server:
+        client = _client(server)
+        try:
+            LoginManager(client).login('12345678901', 'errada')
+            assert False, "senha errada deveria falhar"
+        except Exception as e:
+            assert 'inválidas' in str(e)
+        token = _login(client)
+
+        manager = CargoManager(client, token)
+        assert manager.get_cargo_by_code('010000001')['id'] == 1
+        assert manager.get_cargo_by_code('099999999') is None
+        try:
+            CargoManager(client, 'token-invalido').get_cargo_by_code('010000001')
+            assert False, "token inválido deveria falhar"
+        except RuntimeError:
+            pass
+
+        codes = [c['code'] for c in data.cargos.values()][:200]
+        start = time.perf_counter()
+        results = manager.resolve_codes(codes, max_workers=16)
+        elapsed = time.perf_counter() - start
+        assert [r['cargo']['code'] for r in results] == codes
+        assert elapsed < 200 * 0.02 / 2, elapsed  # serial levaria 4s
+        print(f"✅ 200 buscas com 20ms de latência em {elapsed:.2f}s (16 workers)")
+    return True
+
+
+def test_receive_idempotency():
+    """Idempotency-Key repete a resposta; recebimento duplicado é recusado"""
+    print("🧪 Testando recebimento e Idempotency-Key...")
+    data = MockWmsData(cargos=50)
+    with MockWmsServer(port=0, data=data, idempotency=True, with_batch=True) as server:
+        client = _client(server)
+        headers = {'Authorization': f'Bearer {_login(client)}', 'Idempotency-Key': 'chave-1'}
+        cargo = data.cargos_by_code[_codes(data, PENDING_RECEIPT, 1)[0]]
+        payload = {'warehouse_id': 1, 'action': 'accept', 'area_id': 101, 'area_type': 'RECEIVING'}
+
+        first = client.post(f"/cargos/{cargo['id']}/receive-physically", data=payload, headers=headers)
+        again = client.post(f"/cargos/{cargo['id']}/receive-physically", data=payload, headers=headers)
+        assert first.status_code == again.status_code == 200
+        assert again.headers.get('Idempotent-Replayed') == 'true' and again.json() == first.json()
+        assert first.json()['data']['cargo']['status'] == RECEIVED
+
+        headers['Idempotency-Key'] = 'chave-2'
+        duplicate = client.post(f"/cargos/{cargo['id']}/receive-physically", data=payload, headers=headers)
+        assert duplicate.status_code == 422
+
+        # Lote: cargas pendentes aceitas, a já recebida recusada
+        pending = [data.cargos_by_code[code]['id'] for code in _codes(data, PENDING_RECEIPT, 3)]
+        del headers['Idempotency-Key']
+        response = client.post('/cargos/receive-physically/batch', headers=headers,
+                               data={'items': [dict(payload, cargo_id=cid) for cid in pending + [cargo['id']]]})
+        results = {row['cargo_id']: row['success'] for row in response.json()['data']['results']}
+        assert results == {**{cid: True for cid in pending}, cargo['id']: False}
+    print("✅ Repetição idempotente e recusa de duplicado conferidas")
+    return True
+
+
+def test_journal_retries_through_outage():
+    """Journal de recebimento sincroniza depois de uma janela de 503 e quedas de conexão"""
+    print("🧪 Testando journal com falhas injetadas...")
+    data = MockWmsData(cargos=100)
+    with MockWmsServer(port=0, data=data, seed=3) as server:
+        client = _client(server)
+        token = _login(client)
+        server.set_faults('/cargos', error_rate=0.5, drop_rate=0.2)
+
+        journal = ReceivingJournal(api_client=client, token=token, base_delay=0.01, max_delay=0.05)
+        journal.start()
+        try:
+            codes = _codes(data, PENDING_RECEIPT, 20)
+            for code in codes:
+                journal.record(data.cargos_by_code[code]['id'], code, {'warehouse_id': 1, 'action': 'accept'})
+            time.sleep(0.3)
+            server.clear_faults()
+            assert journal.wait_idle(timeout=15)
+            assert journal.get_status()[SYNCED] == 20
+        finally:
+            journal.close()
+        assert all(data.cargos_by_code[code]['status'] == RECEIVED for code in codes)
+
+        stats = server.get_stats()
+        assert stats['injected_errors'] > 0 and stats['dropped'] > 0
+    print(f"✅ 20 cargas sincronizadas após {stats['injected_errors']} erro(s) e {stats['dropped']} queda(s)")
+    return True
+
+
+def test_label_reservations():
+    """Reservas concorrentes não se sobrepõem, pelo /reserve e pelo fallback com If-Match"""
+    print("🧪 Testando reserva concorrente de numeração...")
+    with MockWmsServer(port=0, latency='uniform:0,5', with_reserve=True, etag=True) as server:
+        client = _client(server)
+        token = _login(client)
+
+        for label_id in (1, 2):
+            if label_id == 2:
+                # API sem /reserve: LabelManager cai no PUT com If-Match
+                server.set_faults('/labels/2/reserve', error_rate=1.0, error_status=404)
+            ranges, errors = [], []
+
+            def worker():
+                try:
+                    for _ in range(5):
+                        ranges.append(LabelManager(client, token).lease_block(label_id, 100))
+                except Exception as e:
+                    errors.append(e)
+
+            threads = [threading.Thread(target=worker) for _ in range(6)]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+            numbers = [n for start, end in ranges for n in range(start, end + 1)]
+            assert len(numbers) == len(set(numbers))
+            assert server.data.labels[label_id]['last_number'] == len(numbers)
+            if label_id == 1:
+                assert not errors and len(numbers) == 3000
+            else:
+                # Sob disputa forte a estação pode esgotar as tentativas, mas nunca repete números
+                assert all('tentativas' in str(e) for e in errors), errors
+                print(f"   fallback If-Match: {len(ranges)} bloco(s), {len(errors)} estação(ões) sem reserva")
+    print("✅ Blocos sem sobreposição (com e sem /reserve)")
+    return True
+
+
+def test_large_warehouse():
+    """Galpão com 100 mil paletes: download, 304 na revalidação e índice completo"""
+    print("🧪 Testando galpão com 100 mil paletes...")
+    cache_dir = tempfile.mkdtemp()
+    try:
+        with MockWmsServer(port=0, data=MockWmsData(cargos=10, warehouses=1, pallets=100000),
+                           etag=True) as server:
+            client = _client(server)
+            headers = {'Authorization': f'Bearer {_login(client)}'}
+            cache = WarehouseCache(cache_dir)
+
+            start = time.perf_counter()
+            status, result, source = cache.fetch(client, 1, 1, headers)
+            elapsed = time.perf_counter() - start
+            assert status == 200 and source == 'network'
+            status, _, source = cache.fetch(client, 1, 1, headers)
+            assert status == 200 and source == 'not_modified'
+            server.data.touch_warehouse(1)
+            assert cache.fetch(client, 1, 1, headers)[2] == 'network'
+
+            manager = AddressManager()
+            assert manager.load_warehouse_data(result)
+            assert len(manager.get_all_pallets_flat()) == 100000
+            assert manager.get_pallet_by_address('GLP001-A-00-0001') is not None
+        print(f"✅ 100.000 paletes baixados em {elapsed:.2f}s, revalidação com 304")
+    finally:
+        shutil.rmtree(cache_dir, ignore_errors=True)
+    return True
+
+
+def test_labels_default_profile():
+    """API real (sem /reserve nem ETag): fluxo de last_number funciona e blocos são recusados"""
+    print("🧪 Testando numeração de labels sem extensões...")
+    with MockWmsServer(port=0) as server:
+        client = _client(server)
+        token = _login(client)
+        assert client.post('/labels/1/reserve', data={'count': 10},
+                           headers={'Authorization': f'Bearer {token}'}).status_code == 404
+
+        manager = create_label_manager(client, token)
+        label = manager.get_label_by_id(1)
+        assert manager.reserve_sequence(label, 10) == (0, 1, 10)
+        assert manager.reserve_sequence(manager.get_label_by_id(1), 5) == (10, 11, 15)
+        assert server.data.labels[1]['last_number'] == 15
+
+        try:
+            LabelManager(client, token, block_ledger=LabelBlockLedger()).lease_block(1, 100)
+            assert False, "sem /reserve e sem ETag a reserva de bloco deveria ser recusada"
+        except LabelBlockError:
+            pass
+        assert server.data.labels[1]['last_number'] == 15
+    print("✅ last_number atualizado por lote; bloco recusado sem garantia")
+    return True
+
+
+def test_scan_default_profile():
+    """API real (sem aceite em lote): pipeline cai no envio carga a carga"""
+    print("🧪 Testando modo contínuo sem endpoint de lote...")
+    data = MockWmsData(cargos=50)
+    with MockWmsServer(port=0, data=data) as server:
+        client = _client(server)
+        pipeline = ScanPipeline(client, _login(client), {'warehouse_id': 1, 'action': 'accept'}, batch_wait=0.05)
+        codes = _codes(data, PENDING_RECEIPT, 8)
+        for code in codes:
+            pipeline.scan(code)
+        pipeline.stop(wait=True, timeout=10)
+
+        assert not pipeline.use_batch_endpoint
+        assert pipeline.get_stats()['accepted'] == 8
+        assert all(data.cargos_by_code[code]['status'] == RECEIVED for code in codes)
+    print("✅ 8 cargas aceitas uma a uma após 404 no lote")
+    return True
+
+
+def test_journal_default_profile():
+    """API real (Idempotency-Key ignorada): ações sincronizam e repetição vira conflito"""
+    print("🧪 Testando journal sem Idempotency-Key no servidor...")
+    data = MockWmsData(cargos=50)
+    with MockWmsServer(port=0, data=data) as server:
+        client = _client(server)
+        journal = ReceivingJournal(api_client=client, token=_login(client), base_delay=0.01, max_delay=0.05)
+        journal.start()
+        try:
+            codes = _codes(data, PENDING_RECEIPT, 5)
+            for code in codes:
+                journal.record(data.cargos_by_code[code]['id'], code, {'warehouse_id': 1, 'action': 'accept'})
+            assert journal.wait_idle(timeout=10)
+            assert journal.get_status()[SYNCED] == 5
+            # Segundo registro da mesma carga: o servidor recusa, o journal não repete
+            journal.record(data.cargos_by_code[codes[0]]['id'], codes[0], {'warehouse_id': 1, 'action': 'accept'})
+            assert journal.wait_idle(timeout=10)
+            assert journal.get_status()[CONFLICT] == 1
+        finally:
+            journal.close()
+        assert all(data.cargos_by_code[code]['status'] == RECEIVED for code in codes)
+    print("✅ 5 cargas sincronizadas; repetição registrada como conflito")
+    return True
+
+
+def test_warehouse_default_profile():
+    """API real (sem ETag/Last-Modified): cache compara o campo version do galpão"""
+    print("🧪 Testando cache de galpão sem requisição condicional...")
+    cache_dir = tempfile.mkdtemp()
+    try:
+        with MockWmsServer(port=0, data=MockWmsData(cargos=10, warehouses=1, pallets=500)) as server:
+            client = _client(server)
+            headers = {'Authorization': f'Bearer {_login(client)}'}
+            cache = WarehouseCache(cache_dir)
+
+            status, result, source = cache.fetch(client, 1, 1, headers)
+            assert status == 200 and source == 'network'
+            assert client.get('/warehouses/1', headers=headers).headers.get('ETag') is None
+            assert cache.fetch(client, 1, 1, headers)[2] == 'not_modified'
+            server.data.touch_warehouse(1)
+            assert cache.fetch(client, 1, 1, headers)[2] == 'network'
+        print("✅ Versão do galpão decide entre cópia local e novo download")
+    finally:
+        shutil.rmtree(cache_dir, ignore_errors=True)
+    return True
+
+
+def test_fault_injection():
+    """Latência, 503 e quedas por rota; contadores em /__mock/stats"""
+    print("🧪 Testando injeção de latência e falhas...")
+    model = LatencyModel('lognormal:40,0.5', random.Random(1))
+    samples = sorted(model.sample() for _ in range(5000))
+    assert 36 < samples[2500] < 44
+    for spec in ('uniform:1', 'gamma:1,2', 'abc'):
+        try:
+            LatencyModel(spec)
+            assert False, spec
+        except ValueError:
+            pass
+
+    with MockWmsServer(port=0, require_auth=False) as server:
+        client = _client(server)
+        server.set_faults('/customers', latency='fixed:80')
+        start = time.perf_counter()
+        assert client.get('/customers').status_code == 200
+        assert time.perf_counter() - start >= 0.08
+        start = time.perf_counter()
+        assert client.get('/warehouses/select').status_code == 200
+        assert time.perf_counter() - start < 0.08
+
+        server.set_faults('/warehouses', error_rate=1.0)
+        assert client.get('/warehouses/select').status_code == 503
+        server.set_faults('/warehouses', error_rate=0.0, drop_rate=1.0)
+        try:
+            client.get('/warehouses/select')
+            assert False, "conexão derrubada deveria falhar"
+        except Exception as e:
+            assert 'conexão' in str(e) or 'requisição' in str(e)
+
+        request = urllib.request.Request(f"http://127.0.0.1:{server.port}/__mock/faults", method='POST',
+                                         data=json.dumps({'clear': True}).encode('utf-8'))
+        urllib.request.urlopen(request, timeout=5).read()
+        assert client.get('/warehouses/select').status_code == 200
+        stats = json.load(urllib.request.urlopen(f"http://127.0.0.1:{server.port}/__mock/stats", timeout=5))
+        assert stats['routes']['GET /warehouses/select']['requests'] >= 4
+        assert stats['injected_errors'] == 1 and stats['dropped'] >= 1
+    print("✅ Latência por rota, 503, queda de conexão e controle HTTP conferidos")
+    return True
+
+
+if __name__ == "__main__":
+    test_login_and_lookup()
+    test_receive_idempotency()
+    test_journal_retries_through_outage()
+    test_label_reservations()
+    test_large_warehouse()
+    test_labels_default_profile()
+    test_scan_default_profile()
+    test_journal_default_profile()
+    test_warehouse_default_profile()
+    test_fault_injection()
+    print("\n🎉 Todos os testes da API simulada passaram!")
@@ -0,0 +1,204 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Teste do spooler de impressão persistente
+Verifica ordem FIFO por impressora, retentativas, recuperação após reinício
+e que cada job é entregue uma única vez
+"""
+
+import sys
+import os
+import time
+import shutil
+import tempfile
+import threading
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), 'src'))
+
+from printer.spooler import PrintSpooler, INTERRUPTED, DONE, JOURNAL_FILE
+
+
+class _FlakyPrinter:
+    """Sender falso: falha as primeiras N tentativas de cada impressora"""
+
+    def __init__(self, failures=0):
+        self.failures = failures
+        self.attempts = {}
+        self.delivered = []
+        self.lock = threading.Lock()
+
+    def __call__(self, job):
+        with self.lock:
+            count = self.attempts.get(job['queue'], 0) + 1
+            self.attempts[job['queue']] = count
+            if count <= self.failures:
+                raise RuntimeError(f"Timeout ao conectar na impressora {job['queue']}")
+            self.delivered.append((job['queue'], job['job_id']))
+
+
+def _spooler(spool_dir, sender, **kwargs):
+    spooler = PrintSpooler(spool_dir=spool_dir, sender=sender, base_delay=0.01,
+                           max_delay=0.05, **kwargs)
+    spooler.start()
+    return spooler
+
+
+def test_fifo_and_retry():
+    """Jobs devem sair em ordem por impressora, mesmo com falhas temporárias"""
+    print("🧪 Testando FIFO por impressora e retentativas...")
+    spool_dir = tempfile.mkdtemp()
+    try:
+        printer = _FlakyPrinter(failures=3)
+        spooler = _spooler(spool_dir, printer)
+        for n in range(20):
+            spooler.submit(f"^XA^FD{n}^FS^XZ", printer_id=f"zebra_{n % 2}", job_id=f"job-{n:02d}")
+        assert spooler.wait_idle(10)
+
+        for queue in ('zebra_0', 'zebra_1'):
+            delivered = [job_id for q, job_id in printer.delivered if q == queue]
+            assert delivered == sorted(delivered), delivered
+            assert len(delivered) == 10
+        assert printer.attempts == {'zebra_0': 13, 'zebra_1': 13}, printer.attempts
+        print(f"✅ {len(printer.delivered)} jobs entregues em ordem, tentativas: {printer.attempts}")
+        spooler.stop()
+    finally:
+        shutil.rmtree(spool_dir)
+    return True
+
+
+def test_restart_recovery():
+    """Jobs pendentes sobrevivem ao reinício e não são reenviados após a entrega"""
+    print("🧪 Testando recuperação após reinício...")
+    spool_dir = tempfile.mkdtemp()
+    try:
+        offline = _FlakyPrinter(failures=10 ** 6)
+        spooler = _spooler(spool_dir, offline, max_attempts=0)
+        for n in range(5):
+            spooler.submit(f"^XA^FD{n}^FS^XZ", printer_id='zebra', job_id=f"batch-1-{n}")
+        time.sleep(0.1)
+        spooler.stop()
+        assert offline.delivered == []
+
+        # "Reinício" do aplicativo com a impressora de volta
+        online = _FlakyPrinter()
+        spooler = _spooler(spool_dir, online)
+        assert spooler.wait_idle(5)
+        assert [job_id for _, job_id in online.delivered] == [f"batch-1-{n}" for n in range(5)]
+
+        # Reenvio com o mesmo ID (ex: usuário repetiu a ação) é ignorado
+        spooler.submit("^XA^FD0^FS^XZ", printer_id='zebra', job_id='batch-1-0')
+        assert spooler.wait_idle(5)
+        spooler.stop()
+
+        spooler = _spooler(spool_dir, online)
+        assert spooler.wait_idle(5)
+        assert len(online.delivered) == 5, online.delivered
+        spooler.stop()
+        print("✅ Jobs recuperados e entregues uma única vez")
+    finally:
+        shutil.rmtree(spool_dir)
+    return True
+
+
+def test_interrupted_and_torn_journal():
+    """Job em envio durante a queda fica retido; linha incompleta é ignorada"""
+    print("🧪 Testando queda durante o envio...")
+    spool_dir = tempfile.mkdtemp()
+    try:
+        journal = os.path.join(spool_dir, JOURNAL_FILE)
+        with open(journal, 'w', encoding='utf-8') as f:
+            f.write('{"op": "enqueue", "job_id": "a", "queue": "zebra", "printer_id": "zebra", '
+                    '"config": null, "zpl": "^XA^XZ", "quantity": 1, "created_at": "x"}\n')
+            f.write('{"op": "sending", "job_id": "a", "attempt": 1}\n')
+            f.write('{"op": "enqueue", "job_id": "b", "queue": "zeb')
+
+        printer = _FlakyPrinter()
+        spooler = _spooler(spool_dir, printer)
+        assert spooler.get_job('a')['state'] == INTERRUPTED
+        assert spooler.get_job('b') is None
+        assert printer.delivered == []
+
+        assert spooler.retry_job('a')
+        assert spooler.wait_idle(5)
+        assert printer.delivered == [('zebra', 'a')]
+        spooler.stop()
+        print("✅ Job interrompido retido até confirmação")
+    finally:
+        shutil.rmtree(spool_dir)
+    return True
+
+
+def test_compact_during_send():
+    """Compactação com um job em envio não o transforma em job novo no journal"""
+    print("🧪 Testando compactação com envio em andamento...")
+    spool_dir = tempfile.mkdtemp()
+    crash_dir = tempfile.mkdtemp()
+    release = threading.Event()
+    sending = threading.Event()
+    delivered = []
+
+    def sender(job):
+        if job['queue'] == 'lenta':
+            sending.set()
+            release.wait(10)
+        delivered.append(job['job_id'])
+
+    try:
+        spooler = _spooler(spool_dir, sender, compact_after=5)
+        spooler.submit("^XA^FDlento^FS^XZ", printer_id='lenta', job_id='em-envio')
+        assert sending.wait(5)
+        for n in range(5):
+            spooler.submit(f"^XA^FD{n}^FS^XZ", printer_id='rapida', job_id=f"rapida-{n}")
+        deadline = time.time() + 5
+        while len(delivered) < 5 and time.time() < deadline:
+            time.sleep(0.01)
+        time.sleep(0.05)
+
+        # Queda do processo com o job ainda na impressora: vale o journal compactado
+        with open(os.path.join(spool_dir, JOURNAL_FILE), encoding='utf-8') as f:
+            assert f.read().count('"op"') == 6
+        shutil.copy(os.path.join(spool_dir, JOURNAL_FILE), crash_dir)
+        resent = []
+        recovered = _spooler(crash_dir, lambda job: resent.append(job['job_id']))
+        assert recovered.get_job('em-envio')['state'] == INTERRUPTED
+        assert recovered.get_job('rapida-0')['state'] == DONE
+        time.sleep(0.1)
+        assert resent == [], resent
+        recovered.stop()
+
+        release.set()
+        assert spooler.wait_idle(5)
+        spooler.stop()
+        print("✅ Job em envio continua retido após compactação e queda")
+    finally:
+        release.set()
+        shutil.rmtree(spool_dir)
+        shutil.rmtree(crash_dir)
+    return True
+
+
+def test_enqueue_latency():
+    """Enfileirar deve ser rápido mesmo com a impressora offline"""
+    print("🧪 Medindo latência de enfileiramento...")
+    spool_dir = tempfile.mkdtemp()
+    try:
+        spooler = _spooler(spool_dir, _FlakyPrinter(failures=10 ** 6))
+        zpl = "^XA^FO50,50^BQN,2,5^FDQA,080000001^FS^XZ" * 100
+        start = time.perf_counter()
+        for n in range(50):
+            spooler.submit(zpl, printer_id='offline', job_id=f"lat-{n}")
+        elapsed = (time.perf_counter() - start) / 50
+        print(f"✅ Enfileiramento médio: {elapsed * 1000:.2f} ms (inclui fsync)")
+        spooler.stop()
+    finally:
+        shutil.rmtree(spool_dir)
+    return True
+
+
+if __name__ == "__main__":
+    test_fifo_and_retry()
+    test_restart_recovery()
+    test_interrupted_and_torn_journal()
+    test_compact_during_send()
+    test_enqueue_latency()
+    print("\n🎉 Todos os testes do spooler passaram!")
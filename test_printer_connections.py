@@ -0,0 +1,153 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Teste do pool de conexões persistentes com impressoras de rede
+Sobe um servidor TCP local no lugar da impressora (porta RAW)
+"""
+
+import sys
+import os
+import time
+import socket
+import threading
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), 'src'))
+
+from printer.connection_pool import PrinterConnectionPool
+from printer.zpl_generator import ZplGenerator
+
+
+class _FakeRawPrinter:
+    """Servidor TCP que conta conexões e acumula os bytes recebidos"""
+
+    def __init__(self):
+        self.server = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        self.server.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        self.server.bind(('127.0.0.1', 0))
+        self.server.listen(8)
+        self.port = self.server.getsockname()[1]
+        self.accepted = 0
+        self.received = bytearray()
+        self.clients = []
+        self.lock = threading.Lock()
+        threading.Thread(target=self._accept_loop, daemon=True).start()
+
+    def _accept_loop(self):
+        while True:
+            try:
+                client, _ = self.server.accept()
+            except OSError:
+                return
+            with self.lock:
+                self.accepted += 1
+                self.clients.append(client)
+            threading.Thread(target=self._read_loop, args=(client,), daemon=True).start()
+
+    def _read_loop(self, client):
+        while True:
+            try:
+                chunk = client.recv(65536)
+            except OSError:
+                return
+            if not chunk:
+                return
+            with self.lock:
+                self.received.extend(chunk)
+
+    def drop_clients(self):
+        """Simula a impressora fechando a conexão (ex: reinício)"""
+        with self.lock:
+            for client in self.clients:
+                try:
+                    client.shutdown(socket.SHUT_RDWR)
+                except OSError:
+                    pass
+                client.close()
+            self.clients = []
+
+    def wait_bytes(self, size, timeout=5):
+        deadline = time.time() + timeout
+        while time.time() < deadline:
+            with self.lock:
+                if len(self.received) >= size:
+                    return True
+            time.sleep(0.01)
+        return False
+
+    def close(self):
+        self.drop_clients()
+        self.server.close()
+
+
+def test_single_connection_for_batch():
+    """Centenas de etiquetas devem seguir por um único socket"""
+    print("🧪 Testando lote de etiquetas em uma conexão...")
+    printer = _FakeRawPrinter()
+    pool = PrinterConnectionPool(idle_timeout=30)
+    try:
+        generator = ZplGenerator()
+        total = 0
+        for n in range(300):
+            data = generator.build_zpl(f"{80000000 + n:09d}").encode('utf-8')
+            pool.send('127.0.0.1', printer.port, data)
+            total += len(data)
+
+        assert printer.wait_bytes(total)
+        stats = pool.get_stats()[f"127.0.0.1:{printer.port}"]
+        print(f"✅ {stats['sends']} envios, {printer.accepted} conexão(ões), {total} bytes")
+        assert printer.accepted == 1
+        assert stats['connections_opened'] == 1
+    finally:
+        pool.close_all()
+        printer.close()
+    return True
+
+
+def test_reconnect_after_printer_closes():
+    """Conexão fechada pela impressora deve ser reaberta no próximo envio"""
+    print("🧪 Testando reconexão automática...")
+    printer = _FakeRawPrinter()
+    pool = PrinterConnectionPool(idle_timeout=30)
+    try:
+        pool.send('127.0.0.1', printer.port, b"^XA^FDA^FS^XZ")
+        assert printer.wait_bytes(13)
+        printer.drop_clients()
+        time.sleep(0.1)
+
+        pool.send('127.0.0.1', printer.port, b"^XA^FDB^FS^XZ")
+        assert printer.wait_bytes(26)
+        assert printer.accepted == 2
+        assert bytes(printer.received) == b"^XA^FDA^FS^XZ^XA^FDB^FS^XZ"
+        print("✅ Reconectado após a impressora fechar o socket")
+    finally:
+        pool.close_all()
+        printer.close()
+    return True
+
+
+def test_idle_timeout():
+    """Sockets ociosos devem ser fechados pelo pool"""
+    print("🧪 Testando timeout de ociosidade...")
+    printer = _FakeRawPrinter()
+    pool = PrinterConnectionPool(idle_timeout=0.2, reaper_interval=0.05)
+    try:
+        pool.send('127.0.0.1', printer.port, b"^XA^XZ")
+        conn = pool.get('127.0.0.1', printer.port)
+        assert conn.is_open
+        time.sleep(0.5)
+        assert not conn.is_open
+        pool.send('127.0.0.1', printer.port, b"^XA^XZ")
+        assert printer.wait_bytes(12)
+        assert conn.connections_opened == 2
+        print("✅ Conexão ociosa fechada e reaberta sob demanda")
+    finally:
+        pool.close_all()
+        printer.close()
+    return True
+
+
+if __name__ == "__main__":
+    test_single_connection_for_batch()
+    test_reconnect_after_printer_closes()
+    test_idle_timeout()
+    print("\n🎉 Todos os testes de conexão com impressoras passaram!")
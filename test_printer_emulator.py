@@ -0,0 +1,262 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Teste de ponta a ponta com o emulador de impressora Zebra
+LabelPrinter, spooler e fan-out enviando para impressoras simuladas na porta RAW
+"""
+
+import sys
+import os
+import socket
+import shutil
+import tempfile
+import time
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), 'src'))
+
+from printer.emulator import ZebraEmulator
+from printer.host_status import query_host_status, parse_host_status
+from printer.label_printer import LabelPrinter
+from printer.fanout import FanOutPrinter, PrintUnit, PRINTED
+from printer.spooler import PrintSpooler
+from printer.zpl_generator import ZplGenerator
+
+
+def _printer(emulator, timeout=5):
+    return LabelPrinter(config={'output_mode': 'printer', 'printer_host': '127.0.0.1',
+                                'printer_port': emulator.port, 'timeout': timeout})
+
+
+def test_label_printer_batch():
+    """Lote sequencial em streaming chega inteiro e na ordem"""
+    print("🧪 Testando lote do LabelPrinter no emulador...")
+    with ZebraEmulator(port=0, ips=0) as emulator:
+        gen = ZplGenerator()
+        start = time.perf_counter()
+        assert _printer(emulator).send_print_job(gen.iter_batch_zpl(1, 1000, serialize=False), 1000)
+        assert emulator.wait_printed(1000, timeout=10)
+        elapsed = time.perf_counter() - start
+        labels = list(emulator.labels)
+        assert gen.pad8(1) in labels[0] and gen.pad8(1000) in labels[-1]
+        print(f"✅ 1000 etiquetas em {elapsed:.2f}s ({1000 / elapsed:,.0f} etq/s)")
+    return True
+
+
+def test_print_speed():
+    """Tempo de impressão segue ^LL / dpi / ips e ^PQ"""
+    print("🧪 Testando velocidade de impressão simulada...")
+    with ZebraEmulator(port=0, ips=20, dpi=200) as emulator:
+        # 10 etiquetas de 200 dots (1 pol) a 20 ips = 0,5s
+        start = time.perf_counter()
+        assert _printer(emulator).send_print_job("^XA^LL200^FO10,10^FDteste^FS^PQ10^XZ")
+        assert emulator.wait_printed(10, timeout=5)
+        elapsed = time.perf_counter() - start
+        assert 0.45 <= elapsed < 1.5, elapsed
+        print(f"✅ 10 etiquetas de 1 pol a 20 ips em {elapsed:.2f}s")
+    return True
+
+
+def test_host_status_and_paper_out():
+    """Sem papel a impressão para, o ~HS informa e o lote continua ao repor"""
+    print("🧪 Testando falta de papel e ~HS...")
+    with ZebraEmulator(port=0, ips=200, paper_labels=3) as emulator:
+        assert _printer(emulator).send_print_job("^XA^FDa^FS^PQ5^XZ^XA^FDb^FS^XZ")
+        assert emulator.wait_printed(3, timeout=5)
+        time.sleep(0.1)
+
+        status = query_host_status('127.0.0.1', emulator.port)
+        assert status['paper_out'] and not status['ready']
+        assert status['formats_in_buffer'] == 2 and status['labels_remaining'] == 2
+        assert emulator.stats['labels_printed'] == 3
+
+        emulator.set_state(paper_out=False, head_open=True, paper_labels=100)
+        time.sleep(0.1)
+        status = query_host_status('127.0.0.1', emulator.port)
+        assert status['head_open'] and not status['paper_out']
+        assert emulator.stats['labels_printed'] == 3
+
+        emulator.set_state(head_open=False)
+        assert emulator.wait_printed(6, timeout=5)
+        assert query_host_status('127.0.0.1', emulator.port)['ready']
+    try:
+        parse_host_status(b'\x02030,0\x03')
+        assert False, "resposta truncada deveria falhar"
+    except ValueError:
+        pass
+    print("✅ Parada sem papel/cabeça aberta e retomada conferidas")
+    return True
+
+
+def test_buffer_backpressure():
+    """Com o buffer cheio o emulador para de ler e o envio fica retido"""
+    print("🧪 Testando buffer cheio...")
+    with ZebraEmulator(port=0, ips=200, buffer_size=4096) as emulator:
+        emulator.set_state(paused=True)
+        label = "^XA^FO10,10^A0N,30,30^FD" + "X" * 200 + "^FS^XZ"
+        sock = socket.create_connection(('127.0.0.1', emulator.port))
+        sock.setsockopt(socket.SOL_SOCKET, socket.SO_SNDBUF, 4096)
+        sock.settimeout(1.0)
+        sent = 0
+        try:
+            for _ in range(50000):
+                sock.sendall(label.encode('ascii'))
+                sent += 1
+            assert False, "envio deveria ficar retido"
+        except socket.timeout:
+            pass
+
+        status = query_host_status('127.0.0.1', emulator.port)
+        assert status['buffer_full'] and status['paused']
+        assert sent < 50000
+
+        # ~PS pela rede libera a impressão e o envio volta a fluir
+        with socket.create_connection(('127.0.0.1', emulator.port)) as control:
+            control.sendall(b'~PS')
+        sock.settimeout(10.0)
+        sock.sendall(label.encode('ascii'))
+        sock.close()
+        assert emulator.wait_printed(sent + 1, timeout=10)
+        print(f"✅ Envio retido após ~{sent} etiqueta(s); liberado com ~PS")
+    return True
+
+
+def test_stored_format_and_cancel():
+    """^DF grava sem imprimir, ^XF imprime; ~JA descarta o buffer"""
+    print("🧪 Testando formatos gravados e cancelamento...")
+    with ZebraEmulator(port=0, ips=200) as emulator:
+        printer = _printer(emulator)
+        assert printer.send_print_job("^XA^DFR:ETQ.ZPL^FS^LL100^FO10,10^FN1^FS^XZ")
+        assert printer.send_print_job("^XA^XFR:ETQ.ZPL^FS^FN1^FD123^FS^PQ2^XZ")
+        assert emulator.wait_printed(2, timeout=5)
+        assert 'R:ETQ.ZPL' in emulator.stored_formats
+
+        emulator.set_state(paused=True)
+        assert printer.send_print_job("^XA^FDx^FS^PQ50^XZ")
+        time.sleep(0.1)
+        assert printer.send_print_job("~JA")
+        time.sleep(0.1)
+        emulator.set_state(paused=False)
+        time.sleep(0.1)
+        assert emulator.stats['labels_printed'] == 2 and emulator.stats['cancelled'] == 1
+    print("✅ ^DF/^XF e ~JA conferidos")
+    return True
+
+
+def test_spooler_end_to_end():
+    """Spooler entrega lotes sequenciais ao emulador pelo sender padrão"""
+    print("🧪 Testando spooler com o emulador...")
+    spool_dir = tempfile.mkdtemp()
+    try:
+        with ZebraEmulator(port=0, ips=0) as emulator:
+            spooler = PrintSpooler(spool_dir=spool_dir, base_delay=0.01, max_delay=0.05)
+            spooler.start()
+            try:
+                config = {'output_mode': 'printer', 'printer_host': '127.0.0.1',
+                          'printer_port': emulator.port, 'timeout': 5}
+                for start in (1, 301):
+                    spooler.submit(config=config, quantity=300, sequence={'start': start, 'quantity': 300})
+                assert spooler.wait_idle(timeout=10)
+                assert emulator.wait_printed(600, timeout=10)
+            finally:
+                spooler.stop()
+            assert ZplGenerator().pad8(600) in emulator.labels[-1]
+    finally:
+        shutil.rmtree(spool_dir, ignore_errors=True)
+    print("✅ 600 etiquetas entregues pelo spooler")
+    return True
+
+
+def test_spooler_connection_drop():
+    """Conexão perdida no meio do job: o spooler não repete o lote, aguarda o operador"""
+    print("🧪 Testando queda de conexão no meio de um job do spooler...")
+    spool_dir = tempfile.mkdtemp()
+    try:
+        with ZebraEmulator(port=0, ips=200, buffer_size=4096) as emulator:
+            emulator.set_state(paused=True)
+            spooler = PrintSpooler(spool_dir=spool_dir, base_delay=0.01, max_delay=0.05)
+            spooler.start()
+            try:
+                config = {'output_mode': 'printer', 'printer_host': '127.0.0.1',
+                          'printer_port': emulator.port, 'timeout': 5}
+                job_id = spooler.submit(config=config, quantity=100000, sequence={'start': 1, 'quantity': 100000})
+                deadline = time.time() + 5
+                while not emulator.get_status()['buffer_full'] and time.time() < deadline:
+                    time.sleep(0.01)
+                assert emulator.get_status()['buffer_full'], "envio deveria estar retido"
+                emulator.drop_connections()
+
+                deadline = time.time() + 10
+                while spooler.get_job(job_id)['state'] != 'interrupted' and time.time() < deadline:
+                    time.sleep(0.01)
+                job = spooler.get_job(job_id)
+                assert job['state'] == 'interrupted' and job['attempts'] == 1, job
+
+                emulator.set_state(paused=False)
+                buffered = emulator.get_status()['formats_in_buffer']
+                assert emulator.wait_printed(buffered, timeout=10)
+                time.sleep(0.2)
+                printed = [label for label in emulator.labels]
+                assert 0 < len(printed) < 100000
+                assert len(printed) == len(set(printed)), "etiquetas repetidas"
+            finally:
+                spooler.stop()
+            # Replay mantém o job aguardando o operador
+            reloaded = PrintSpooler(spool_dir=spool_dir)
+            reloaded.start()
+            try:
+                assert reloaded.get_job(job_id)['state'] == 'interrupted'
+            finally:
+                reloaded.stop()
+        print(f"✅ {len(printed)} etiqueta(s) impressas uma vez; job interrompido sem reenvio")
+    finally:
+        shutil.rmtree(spool_dir, ignore_errors=True)
+    return True
+
+
+def test_fanout_throughput():
+    """Fan-out em três impressoras: a mais rápida imprime mais"""
+    print("🧪 Testando fan-out em impressoras simuladas...")
+    speeds = {'ZT-1': 40, 'ZT-2': 10, 'ZT-3': 10}
+    emulators = {name: ZebraEmulator(port=0, ips=ips, dpi=200) for name, ips in speeds.items()}
+    try:
+        def sender(emulator):
+            printer = _printer(emulator)
+
+            def send(zpl):
+                # Aguarda a impressora esvaziar o buffer, como o operador que confere cada etiqueta
+                if not printer.send_print_job(zpl):
+                    return False
+                while query_host_status('127.0.0.1', emulator.port)['formats_in_buffer']:
+                    time.sleep(0.005)
+                return True
+            return send
+
+        fanout = FanOutPrinter({name: sender(em) for name, em in emulators.items()}, queue_depth=1)
+        units = [PrintUnit(n + 1, f"^XA^LL100^FD{n + 1}^FS^XZ", [str(n + 1)]) for n in range(60)]
+        start = time.perf_counter()
+        manifest = fanout.run(units)
+        elapsed = time.perf_counter() - start
+
+        assert all(unit.status == PRINTED for unit in units) and manifest['printed'] == 60
+        printed = {name: em.stats['labels_printed'] for name, em in emulators.items()}
+        assert sum(printed.values()) == 60
+        assert printed['ZT-1'] > printed['ZT-2'] and printed['ZT-1'] > printed['ZT-3']
+        # Uma impressora a 10 ips levaria 3s
+        assert elapsed < 2.5, elapsed
+        print(f"✅ {printed} em {elapsed:.2f}s")
+    finally:
+        for emulator in emulators.values():
+            emulator.close()
+    return True
+
+
+if __name__ == "__main__":
+    test_label_printer_batch()
+    test_print_speed()
+    test_host_status_and_paper_out()
+    test_buffer_backpressure()
+    test_stored_format_and_cancel()
+    test_spooler_end_to_end()
+    test_spooler_connection_drop()
+    test_fanout_throughput()
+    print("\n🎉 Todos os testes do emulador de impressora passaram!")
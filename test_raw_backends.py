@@ -0,0 +1,138 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Teste dos backends RAW de impressoras locais
+Usa o backend TCP contra um servidor local e um arquivo no lugar de /dev/usb/lp*
+"""
+
+import sys
+import os
+import shutil
+import socketserver
+import tempfile
+import threading
+import time
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), 'src'))
+
+from printer.raw_backends import RawBackend, CopyCommandBackend, get_backend, register_backend, select_backend
+from printer.label_printer import LabelPrinter
+from printer.zpl_generator import ZplGenerator
+
+
+class _RawSink(socketserver.ThreadingTCPServer):
+    """Impressora RAW falsa: acumula em received os bytes de todas as conexões"""
+
+    daemon_threads = True
+    allow_reuse_address = True
+
+    def __init__(self):
+        self.received = bytearray()
+        self.lock = threading.Lock()
+        super().__init__(('127.0.0.1', 0), _RawSinkHandler)
+        self.port = self.server_address[1]
+        threading.Thread(target=self.serve_forever, daemon=True).start()
+
+    def wait_bytes(self, size, timeout=5):
+        deadline = time.time() + timeout
+        while time.time() < deadline:
+            with self.lock:
+                if len(self.received) >= size:
+                    return True
+            time.sleep(0.01)
+        return False
+
+    def close(self):
+        self.shutdown()
+        self.server_close()
+
+
+class _RawSinkHandler(socketserver.BaseRequestHandler):
+    def handle(self):
+        while True:
+            chunk = self.request.recv(65536)
+            if not chunk:
+                return
+            with self.server.lock:
+                self.server.received.extend(chunk)
+
+
+def test_tcp_backend_via_label_printer():
+    """LabelPrinter deve enviar pelo backend configurado e registrar a latência"""
+    print("🧪 Testando backend TCP pelo LabelPrinter...")
+    printer = _RawSink()
+    try:
+        label_printer = LabelPrinter(config={'output_mode': 'windows_printer',
+                                             'windows_printer_share': f"127.0.0.1:{printer.port}",
+                                             'raw_backend': 'tcp'})
+        generator = ZplGenerator()
+        expected = generator.build_batch_zpl(80000001, 200).encode('utf-8')
+        assert label_printer.send_print_job(generator.iter_batch_zpl(80000001, 200), 200)
+        assert printer.wait_bytes(len(expected))
+        assert bytes(printer.received) == expected
+        assert label_printer.last_job_latency is not None
+
+        stats = get_backend('tcp').get_stats()
+        assert stats['jobs'] >= 1 and stats['bytes_sent'] >= len(expected)
+        print(f"✅ {len(expected)} bytes em {label_printer.last_job_latency * 1000:.1f} ms "
+              f"(média {stats['avg_latency_ms']:.1f} ms)")
+    finally:
+        printer.close()
+    return True
+
+
+def test_usblp_backend_writes_device():
+    """Backend usblp deve gravar os bytes direto no dispositivo"""
+    print("🧪 Testando backend usblp...")
+    temp_dir = tempfile.mkdtemp()
+    try:
+        device = os.path.join(temp_dir, 'lp0')
+        backend = get_backend('usblp')
+        latency = backend.send(device, [b"^XA", b"^FDteste^FS", b"^XZ"])
+        with open(device, 'rb') as f:
+            assert f.read() == b"^XA^FDteste^FS^XZ"
+        assert latency >= 0 and backend.last_latency == latency
+        print(f"✅ Dispositivo gravado em {latency * 1000:.2f} ms")
+    finally:
+        shutil.rmtree(temp_dir)
+    return True
+
+
+def test_selection_and_custom_backend():
+    """Seleção automática por destino e registro de backend adicional"""
+    print("🧪 Testando seleção de backend...")
+    if os.name != 'nt':
+        assert select_backend('/dev/usb/lp0').name == 'usblp'
+
+    class MemoryBackend(RawBackend):
+        name = 'memory'
+        data = []
+
+        def _write(self, target, chunks, job_name):
+            self.data.append((target, b''.join(chunks)))
+
+    # 'copy /b' recebe o nome da impressora (como em printer_config) e monta o compartilhamento
+    assert CopyCommandBackend.share_path('Zebra ZT230') == '\\\\localhost\\Zebra ZT230'
+    for target in ('\\\\servidor\\Zebra', 'LPT1', 'COM3:', 'C:\\saida\\etiqueta.zpl'):
+        assert CopyCommandBackend.share_path(target) == target, target
+
+    register_backend(MemoryBackend)
+    backend = select_backend('qualquer', 'memory')
+    backend.send('fila', [b"^XA^XZ"])
+    assert MemoryBackend.data == [('fila', b"^XA^XZ")]
+
+    failing = RawBackend()
+    try:
+        failing.send('x', [b''])
+        assert False, "backend base deveria falhar"
+    except NotImplementedError:
+        assert failing.failures == 1
+    print("✅ Backends selecionados e estatísticas registradas")
+    return True
+
+
+if __name__ == "__main__":
+    test_tcp_backend_via_label_printer()
+    test_usblp_backend_writes_device()
+    test_selection_and_custom_backend()
+    print("\n🎉 Todos os testes de backends RAW passaram!")
@@ -0,0 +1,184 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Teste do journal de recebimento offline-first
+Usa uma API falsa que pode ficar fora do ar, perder respostas ou recusar cargas
+"""
+
+import sys
+import os
+import tempfile
+import threading
+import time
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), 'src'))
+
+from fake_api import FakeResponse
+from receiving_journal import ReceivingJournal, PENDING, SYNCED, CONFLICT, DISCARDED
+from scan_pipeline import ScanPipeline
+
+
+class _FakeReceivingApi:
+    """Aceita cargas respeitando Idempotency-Key; 'online' liga/desliga a API"""
+
+    def __init__(self, codes, delay=0.0, refuse=()):
+        self.cargos = {code: n for n, code in enumerate(codes, start=1)}
+        self.delay = delay
+        self.refuse = set(refuse)
+        self.online = True
+        self.lose_next_response = False
+        self.received = []
+        self.keys = {}
+        self.posts = 0
+        self._lock = threading.Lock()
+
+    def get(self, endpoint, headers=None, params=None, **kwargs):
+        if not self.online:
+            raise Exception("Erro de conexão com a API")
+        with self._lock:
+            received = {code for code, _ in self.received}
+            code = params['code']
+            if code in self.cargos and code not in received:
+                return FakeResponse(200, {'success': True, 'data': [{'id': self.cargos[code], 'code': code}]})
+        return FakeResponse(200, {'success': True, 'data': []})
+
+    def post(self, endpoint, data=None, headers=None, **kwargs):
+        time.sleep(self.delay)
+        if not self.online:
+            raise Exception("Erro de conexão com a API")
+        cargo_id = int(endpoint.split('/')[2])
+        code = next(code for code, n in self.cargos.items() if n == cargo_id)
+        key = headers['Idempotency-Key']
+        with self._lock:
+            self.posts += 1
+            if key not in self.keys:
+                if code in self.refuse:
+                    return FakeResponse(409, {'success': False, 'message': 'Carga já recebida por outra estação'})
+                self.received.append((code, data['action']))
+                self.keys[key] = code
+            if self.lose_next_response:
+                # Ação aplicada, mas a resposta não chega à estação
+                self.lose_next_response = False
+                raise Exception("Tempo de resposta esgotado")
+        return FakeResponse(200, {'success': True, 'data': {'cargo': {'code': code}}})
+
+
+def _codes(count):
+    return [f"CG{n:05d}" for n in range(count)]
+
+
+def test_offline_then_sync_in_order():
+    """Com a API fora, o registro retorna na hora; ao voltar, as ações sobem em ordem"""
+    print("🧪 Testando recebimento com a API fora do ar...")
+    api = _FakeReceivingApi(_codes(20))
+    api.online = False
+    journal = ReceivingJournal(api_client=api, token='token', base_delay=0.01, max_delay=0.05)
+    journal.start()
+
+    start = time.perf_counter()
+    keys = [journal.record(n, code, {'warehouse_id': 1, 'action': 'reject' if n % 5 == 0 else 'accept',
+                                     'area_id': 3, 'remarks': 'Embalagem avariada na descarga'})
+            for n, code in enumerate(_codes(20), start=1)]
+    elapsed = time.perf_counter() - start
+    time.sleep(0.1)
+
+    status = journal.get_status()
+    assert status[PENDING] + status['sending'] == 20 and status['last_error']
+    assert not api.received
+
+    api.online = True
+    assert journal.wait_idle(timeout=5)
+    assert [code for code, _ in api.received] == _codes(20)
+    assert api.received[4] == ('CG00004', 'reject')
+    assert len(set(keys)) == 20 and set(api.keys) == set(keys)
+    assert journal.get_status()[SYNCED] == 20
+    journal.close()
+    print(f"✅ 20 ações registradas em {elapsed * 1000:.1f}ms e sincronizadas em ordem")
+    return True
+
+
+def test_idempotent_resend_after_restart():
+    """Resposta perdida e reabertura do journal não duplicam o recebimento"""
+    print("🧪 Testando reenvio com chave de idempotência...")
+    api = _FakeReceivingApi(_codes(4))
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'receiving.db')
+
+        # Estação sem login: ações ficam no arquivo
+        journal = ReceivingJournal(path, api_client=api)
+        journal.start()
+        for n, code in enumerate(_codes(3), start=1):
+            journal.record(n, code, {'warehouse_id': 1, 'action': 'accept'})
+        journal.close()
+        assert not api.received
+
+        reopened = ReceivingJournal(path, api_client=api, token='token', base_delay=0.01)
+        api.lose_next_response = True
+        reopened.start()
+        assert reopened.wait_idle(timeout=5)
+        assert [code for code, _ in api.received] == _codes(3)
+        assert api.posts == 4  # a primeira ação foi reenviada uma vez
+        actions = reopened.list_actions()
+        assert [a['state'] for a in actions] == [SYNCED] * 3 and actions[0]['attempts'] == 2
+        reopened.close()
+    print("✅ Reenvio aplicado uma única vez")
+    return True
+
+
+def test_conflicts_and_offline_code():
+    """Recusa da API vira conflito sem travar a fila; ação sem ID é resolvida pelo código"""
+    print("🧪 Testando conflitos de sincronização...")
+    api = _FakeReceivingApi(_codes(5), refuse={'CG00001'})
+    journal = ReceivingJournal(api_client=api, token='token', base_delay=0.01)
+    journal.start()
+    journal.record(1, 'CG00000', {'warehouse_id': 1, 'action': 'accept'})
+    journal.record(2, 'CG00001', {'warehouse_id': 1, 'action': 'accept'})
+    journal.record(None, 'CG00002', {'warehouse_id': 1, 'action': 'accept'})  # registrada sem a API
+    journal.record(None, 'XX99999', {'warehouse_id': 1, 'action': 'accept'})
+    assert journal.wait_idle(timeout=5)
+
+    assert [code for code, _ in api.received] == ['CG00000', 'CG00002']
+    conflicts = journal.list_actions(CONFLICT)
+    assert [(c['cargo_code'], c['last_error']) for c in conflicts] == [
+        ('CG00001', 'Carga já recebida por outra estação'),
+        ('XX99999', 'Carga não encontrada ou já recebida')]
+    assert journal.list_actions(SYNCED)[1]['cargo_id'] == '3'
+
+    api.refuse.clear()
+    assert journal.retry(conflicts[0]['idempotency_key'])
+    assert journal.discard(conflicts[1]['idempotency_key'])
+    assert not journal.retry(conflicts[1]['idempotency_key'])
+    assert journal.wait_idle(timeout=5)
+    status = journal.get_status()
+    assert status[SYNCED] == 3 and status[CONFLICT] == 0 and status[DISCARDED] == 1
+    journal.close()
+    print("✅ Conflitos reportados e resolvidos")
+    return True
+
+
+def test_scan_pipeline_with_journal():
+    """Modo contínuo grava os aceites no journal sem esperar a API"""
+    print("🧪 Testando modo contínuo com journal...")
+    api = _FakeReceivingApi(_codes(10), delay=0.02)
+    journal = ReceivingJournal(api_client=api, token='token', base_delay=0.01)
+    pipeline = ScanPipeline(api, 'token', {'warehouse_id': 1, 'action': 'accept'}, batch_wait=0.01,
+                            journal=journal)
+    for code in _codes(10):
+        pipeline.scan(code)
+    pipeline.stop(wait=True, timeout=5)
+    assert pipeline.get_stats()['accepted'] == 10 and not api.received
+
+    journal.start()
+    assert journal.wait_idle(timeout=5)
+    assert sorted(code for code, _ in api.received) == _codes(10)
+    journal.close()
+    print("✅ 10 leituras aceitas pelo journal e sincronizadas")
+    return True
+
+
+if __name__ == "__main__":
+    test_offline_then_sync_in_order()
+    test_idempotent_resend_after_restart()
+    test_conflicts_and_offline_code()
+    test_scan_pipeline_with_journal()
+    print("\n🎉 Todos os testes do journal de recebimento passaram!")
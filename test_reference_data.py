@@ -0,0 +1,169 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Teste do store de dados de referência (galpões, clientes, áreas)
+Usa uma API falsa lenta que conta as requisições por endpoint
+"""
+
+import sys
+import os
+import threading
+import time
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), 'src'))
+
+from fake_api import FakeResponse
+from api.reference_data import ReferenceDataStore, ReferenceDataError, DEFAULT_RESOURCES
+
+
+class _FakeApi:
+    """API com atraso fixo; registra endpoint e token de cada requisição"""
+
+    def __init__(self, delay=0.05, status_code=200):
+        self.delay = delay
+        self.status_code = status_code
+        self.refuse = False  # HTTP 200 com success: false
+        self.requests = []
+        self._lock = threading.Lock()
+
+    def count(self, endpoint):
+        return sum(1 for e, _ in self.requests if e == endpoint)
+
+    def get(self, endpoint, headers=None):
+        with self._lock:
+            self.requests.append((endpoint, (headers or {}).get('Authorization')))
+        time.sleep(self.delay)
+        if self.status_code != 200:
+            return FakeResponse(self.status_code)
+        if self.refuse:
+            return FakeResponse(200, {'success': False, 'message': 'Empresa não selecionada'})
+        if endpoint == '/warehouses/select':
+            return FakeResponse(200, {'success': True, 'data': [{'id': n, 'code': f'G{n}', 'name': f'Galpão {n}'}
+                                                                 for n in (1, 2, 3)]})
+        if endpoint == '/customers':
+            return FakeResponse(200, [{'id': 7, 'name': 'Cliente'}])
+        warehouse_id = endpoint.split('/')[2]
+        return FakeResponse(200, {'success': True, 'data': {'areas': [{'id': f'{warehouse_id}-1'}]}})
+
+
+def test_single_flight():
+    """Janelas abrindo juntas devem gerar uma única requisição por recurso"""
+    print("🧪 Testando single-flight...")
+    api = _FakeApi(delay=0.1)
+    store = ReferenceDataStore(api)
+    results = []
+
+    def open_window():
+        results.append(store.get('warehouses', token='t1'))
+
+    threads = [threading.Thread(target=open_window) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert api.count('/warehouses/select') == 1, api.requests
+    assert len(results) == 8 and all(r is results[0] for r in results)
+    assert api.requests[0][1] == 'Bearer t1'
+    print("✅ 8 chamadas simultâneas, 1 requisição")
+    return True
+
+
+def test_ttl_and_invalidate():
+    """Cache respeita TTL por recurso e invalidação manual"""
+    print("🧪 Testando TTL e invalidação...")
+    api = _FakeApi(delay=0)
+    resources = dict(DEFAULT_RESOURCES)
+    resources['warehouse_areas'] = (resources['warehouse_areas'][0], 0.05)
+    store = ReferenceDataStore(api, resources)
+
+    store.get('warehouses', token='t1')
+    store.get('warehouses')
+    assert api.count('/warehouses/select') == 1
+
+    store.get('warehouse_areas', warehouse_id=1)
+    store.get('warehouse_areas', warehouse_id=2)
+    assert api.count('/warehouses/1/areas') == 1 and api.count('/warehouses/2/areas') == 1
+    time.sleep(0.08)
+    store.get('warehouse_areas', warehouse_id=1)
+    assert api.count('/warehouses/1/areas') == 2, "TTL curto deveria expirar"
+    assert api.count('/warehouses/select') == 1, "TTL longo não deveria expirar"
+
+    store.invalidate('warehouse_areas', warehouse_id=1)
+    store.get('warehouse_areas', warehouse_id=1)
+    store.get('warehouse_areas', warehouse_id=2)
+    assert api.count('/warehouses/1/areas') == 3 and api.count('/warehouses/2/areas') == 2
+
+    store.invalidate()
+    store.get('warehouses')
+    assert api.count('/warehouses/select') == 2
+    print("✅ TTL e invalidação corretos")
+    return True
+
+
+def test_token_change_and_errors():
+    """Outro usuário descarta o cache; erro HTTP ou success: false não fica em cache"""
+    print("🧪 Testando troca de usuário e erros...")
+    api = _FakeApi(delay=0)
+    store = ReferenceDataStore(api)
+    store.get('customers', token='t1')
+    store.get('customers', token='t2')
+    assert [token for _, token in api.requests] == ['Bearer t1', 'Bearer t2']
+
+    api.status_code = 401
+    store.invalidate()
+    try:
+        store.get('warehouses')
+        assert False, "HTTP 401 deveria falhar"
+    except ReferenceDataError as e:
+        assert e.status_code == 401
+    api.status_code = 200
+    assert store.get('warehouses')['success']
+    assert api.count('/warehouses/select') == 2
+
+    # success: false com HTTP 200 também é erro e não fica em cache
+    api.refuse = True
+    try:
+        store.get('warehouse_areas', warehouse_id=1)
+        assert False, "success: false deveria falhar"
+    except ReferenceDataError as e:
+        assert 'Empresa não selecionada' in str(e) and e.status_code is None
+    api.refuse = False
+    assert store.get('warehouse_areas', warehouse_id=1)['success']
+    assert api.count('/warehouses/1/areas') == 2
+
+    try:
+        store.get('inexistente')
+        assert False, "recurso desconhecido deveria falhar"
+    except ReferenceDataError as e:
+        assert e.status_code is None
+    print("✅ Cache por usuário e erros não armazenados")
+    return True
+
+
+def test_prefetch():
+    """Após a pré-carga as janelas não consultam a API"""
+    print("🧪 Testando pré-carga...")
+    api = _FakeApi(delay=0.02)
+    store = ReferenceDataStore(api)
+    store.prefetch(token='t1', areas_limit=2).join(5)
+    loaded = len(api.requests)
+    assert loaded == 4, api.requests  # galpões, clientes, áreas de 2 galpões
+
+    start = time.perf_counter()
+    store.get('warehouses', token='t1')
+    store.get('customers', token='t1')
+    store.get('warehouse_areas', token='t1', warehouse_id=2)
+    elapsed = time.perf_counter() - start
+    assert len(api.requests) == loaded
+    assert store.get_stats()['hits'] >= 3
+    print(f"✅ Consultas após pré-carga em {elapsed * 1000:.2f} ms, sem requisições")
+    return True
+
+
+if __name__ == "__main__":
+    test_single_flight()
+    test_ttl_and_invalidate()
+    test_token_change_and_errors()
+    test_prefetch()
+    print("\n🎉 Todos os testes de dados de referência passaram!")
@@ -0,0 +1,166 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Teste do recebimento contínuo por scanner
+Usa uma API falsa de recebimento (com ou sem aceite em lote)
+"""
+
+import sys
+import os
+import threading
+import time
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), 'src'))
+
+from fake_api import FakeResponse
+from scan_pipeline import ScanPipeline, BATCH_ENDPOINT
+
+
+class _FakeReceivingApi:
+    """Cargas pendentes por código; aceitar remove a carga da lista de pendentes"""
+
+    def __init__(self, codes, batch=True, delay=0.01, refuse=()):
+        self.pending = {code: {'id': n, 'code': code} for n, code in enumerate(codes, start=1)}
+        self.batch = batch
+        self.delay = delay
+        self.refuse = set(refuse)
+        self.accepted = []
+        self.posts = 0
+        self.batch_sizes = []
+        self._lock = threading.Lock()
+
+    def get(self, endpoint, headers=None, params=None, **kwargs):
+        time.sleep(self.delay)
+        with self._lock:
+            cargo = self.pending.get(params['code'])
+        return FakeResponse(200, {'success': True, 'data': [cargo] if cargo else []})
+
+    def post(self, endpoint, data=None, headers=None, **kwargs):
+        time.sleep(self.delay)
+        with self._lock:
+            self.posts += 1
+            if endpoint == BATCH_ENDPOINT:
+                if not self.batch:
+                    return FakeResponse(404)
+                self.batch_sizes.append(len(data['items']))
+                results = [self._accept(item['cargo_id']) for item in data['items']]
+                return FakeResponse(200, {'success': True, 'data': {'results': results}})
+            result = self._accept(int(endpoint.split('/')[2]))
+            return FakeResponse(200, {'success': result['success'], 'message': result.get('message')})
+
+    def _accept(self, cargo_id):
+        code = next(code for code, cargo in self.pending.items() if cargo['id'] == cargo_id)
+        if code in self.refuse:
+            return {'cargo_id': cargo_id, 'success': False, 'message': 'Carga bloqueada'}
+        del self.pending[code]
+        self.accepted.append(code)
+        return {'cargo_id': cargo_id, 'success': True}
+
+
+def _codes(count):
+    return [f"CG{n:05d}" for n in range(count)]
+
+
+def _wait(pipeline, timeout=5):
+    pipeline.stop(wait=True, timeout=timeout)
+    assert not pipeline.running, "pipeline não terminou"
+
+
+def test_pipelined_batches():
+    """Leituras rápidas viram poucos envios em lote, sem bloquear o scanner"""
+    print("🧪 Testando leituras em sequência rápida...")
+    api = _FakeReceivingApi(_codes(60))
+    printed = []
+    pipeline = ScanPipeline(api, 'token', {'warehouse_id': 1, 'action': 'accept'},
+                            lookup_workers=4, batch_size=20, batch_wait=0.05,
+                            on_accepted=lambda accepted: printed.extend(code for code, _ in accepted))
+
+    start = time.perf_counter()
+    for code in _codes(60):
+        assert pipeline.scan(code)
+    scan_time = time.perf_counter() - start
+    _wait(pipeline)
+
+    stats = pipeline.get_stats()
+    assert sorted(api.accepted) == _codes(60) and sorted(printed) == _codes(60)
+    assert stats['accepted'] == 60 and stats['pending'] == 0
+    assert api.posts < 60 / 2, api.posts
+    assert scan_time < 0.05, f"scan() bloqueou ({scan_time:.3f}s)"
+    assert stats['scans_per_minute'] > 0
+    print(f"✅ 60 cargas aceitas em {api.posts} envio(s) (lotes {api.batch_sizes})")
+    return True
+
+
+def test_dedupe_and_not_found():
+    """Duplo disparo e carga já aceita são ignorados; inexistente é reportada"""
+    print("🧪 Testando leituras repetidas...")
+    api = _FakeReceivingApi(_codes(3))
+    pipeline = ScanPipeline(api, 'token', {'warehouse_id': 1, 'action': 'accept'},
+                            batch_wait=0.01, dedupe_seconds=0.2)
+    assert pipeline.scan('CG00000')
+    assert not pipeline.scan('CG00000')  # duplo disparo
+    assert pipeline.scan('XX99999')
+    time.sleep(0.3)
+    assert not pipeline.scan('CG00000')  # já aceita
+    time.sleep(0.3)
+    assert pipeline.scan('XX99999')  # não encontrada pode ser lida de novo após o intervalo
+    _wait(pipeline)
+
+    stats = pipeline.get_stats()
+    assert api.accepted == ['CG00000']
+    assert stats['duplicates'] == 2 and stats['not_found'] == 2 and stats['accepted'] == 1
+    kinds = [kind for kind, code, _ in pipeline.drain_events() if code == 'CG00000']
+    assert kinds == ['queued', 'duplicate', 'accepted', 'duplicate']
+    print("✅ Repetidas ignoradas")
+    return True
+
+
+def test_fallback_without_batch_endpoint():
+    """Sem endpoint de lote, cada carga é enviada separadamente; recusas viram falha"""
+    print("🧪 Testando API sem aceite em lote...")
+    api = _FakeReceivingApi(_codes(10), batch=False, refuse={'CG00003'})
+    pipeline = ScanPipeline(api, 'token', {'warehouse_id': 1, 'action': 'accept'}, batch_wait=0.05)
+    for code in _codes(10):
+        pipeline.scan(code)
+    _wait(pipeline)
+
+    stats = pipeline.get_stats()
+    assert not pipeline.use_batch_endpoint
+    assert stats['accepted'] == 9 and stats['failed'] == 1
+    failures = [(code, detail) for kind, code, detail in pipeline.drain_events() if kind == 'failed']
+    assert failures == [('CG00003', 'Carga bloqueada')]
+    assert not pipeline.scan('CG00004')  # parado
+    print(f"✅ {stats['accepted']} aceitas uma a uma, 1 recusada")
+    return True
+
+
+def test_print_failure_reported():
+    """Falha na impressão após o aceite vira evento print_failed por carga e entra nos contadores"""
+    print("🧪 Testando falha de impressão após o aceite...")
+    api = _FakeReceivingApi(_codes(5))
+
+    def broken_printer(accepted):
+        raise RuntimeError("Impressora offline")
+
+    pipeline = ScanPipeline(api, 'token', {'warehouse_id': 1, 'action': 'accept'}, batch_wait=0.05,
+                            on_accepted=broken_printer)
+    for code in _codes(5):
+        pipeline.scan(code)
+    _wait(pipeline)
+
+    stats = pipeline.get_stats()
+    assert sorted(api.accepted) == _codes(5)
+    assert stats['accepted'] == 5 and stats['print_failed'] == 5
+    events = [(code, detail) for kind, code, detail in pipeline.drain_events() if kind == 'print_failed']
+    assert sorted(code for code, _ in events) == _codes(5)
+    assert all(detail == "Impressora offline" for _, detail in events)
+    print("✅ 5 cargas aceitas com falha de impressão reportada")
+    return True
+
+
+if __name__ == "__main__":
+    test_pipelined_batches()
+    test_dedupe_and_not_found()
+    test_fallback_without_batch_endpoint()
+    test_print_failure_reported()
+    print("\n🎉 Todos os testes do modo contínuo passaram!")
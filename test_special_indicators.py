@@ -5,6 +5,10 @@
 Teste de Geração de Etiquetas com Indicadores Especiais
 """
 
+import sys
+import os
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), 'src'))
+
 from src.printer.zpl_generator import ZplGenerator
 
 # Criar gerador
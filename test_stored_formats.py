@@ -0,0 +1,199 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Teste dos formatos ZPL armazenados na impressora (^DF/^XF)
+Verifica equivalência com o ZPL completo, envio único do formato por
+impressora e reenvio automático quando a versão do layout muda ou quando a
+memória volátil (R:) pode ter sido apagada
+"""
+
+import sys
+import os
+import re
+import shutil
+import socketserver
+import tempfile
+import threading
+import time
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), 'src'))
+
+from printer import format_registry
+from printer.format_registry import StoredFormatRegistry
+from printer.label_printer import LabelPrinter
+from printer.zpl_generator import ZplGenerator
+
+
+class _RawSink(socketserver.ThreadingTCPServer):
+    """Impressora RAW falsa: acumula em received os bytes de todas as conexões"""
+
+    daemon_threads = True
+    allow_reuse_address = True
+
+    def __init__(self):
+        self.received = bytearray()
+        self.lock = threading.Lock()
+        super().__init__(('127.0.0.1', 0), _RawSinkHandler)
+        self.port = self.server_address[1]
+        threading.Thread(target=self.serve_forever, daemon=True).start()
+
+    def wait_bytes(self, size, timeout=5):
+        deadline = time.time() + timeout
+        while time.time() < deadline:
+            with self.lock:
+                if len(self.received) >= size:
+                    return True
+            time.sleep(0.01)
+        return False
+
+    def close(self):
+        self.shutdown()
+        self.server_close()
+
+
+class _RawSinkHandler(socketserver.BaseRequestHandler):
+    def handle(self):
+        while True:
+            chunk = self.request.recv(65536)
+            if not chunk:
+                return
+            with self.server.lock:
+                self.server.received.extend(chunk)
+
+
+def _merge(download, recall):
+    """Simula a impressora: preenche os ^FN do formato gravado com os dados da chamada"""
+    values = dict(re.findall(r'\^FN(\d+)\^FD([^\^]*)\^FS\n', recall))
+    extra = re.sub(r'^\^XA\n\^CI28\n\^XF[^\^]*\^FS\n|\^FN\d+\^FD[^\^]*\^FS\n|\^XZ\n$', '', recall)
+    body = re.sub(r'\^DF[^\^]*\^FS\n', '', download)[:-len("^XZ\n")]
+    body = re.sub(r'\^FN(\d+)\^FS', lambda m: f"^FD{values[m.group(1)]}^FS", body)
+    return body + extra + "^XZ\n"
+
+
+def test_recall_matches_full_label():
+    """Formato gravado + chamada deve imprimir a mesma etiqueta do ZPL completo"""
+    print("🧪 Testando equivalência formato armazenado x ZPL completo...")
+    gen = ZplGenerator()
+    formats = gen.stored_formats
+    cargo = {'is_priority': True, 'requires_special_handling': True, 'expiration_date': '2026-12-31',
+             'handling_instructions': 'Manter na vertical'}
+    assert gen._add_special_indicators(cargo)
+    assert _merge(formats['label'].download, gen.build_zpl_recall('80000001', cargo)) == \
+        gen.build_zpl('80000001', cargo)
+    data = {'cargo_count': 3, 'warehouse_name': 'Cotia 1', 'additional_text': '100%'}
+    assert _merge(formats['consolidator'].download, gen.build_consolidator_recall('900001', data)) == \
+        gen.build_consolidator_zpl('900001', data)
+    print(f"✅ Etiqueta: {len(gen.build_zpl('80000001'))} bytes completa x "
+          f"{len(gen.build_zpl_recall('80000001'))} bytes por chamada")
+    return True
+
+
+def test_download_once_per_printer():
+    """O formato vai uma vez; jobs seguintes levam só a chamada ^XF"""
+    print("🧪 Testando gravação única do formato...")
+    printer = _RawSink()
+    temp_dir = tempfile.mkdtemp()
+    format_registry._registry = StoredFormatRegistry(os.path.join(temp_dir, 'formats.json'))
+    try:
+        label_printer = LabelPrinter(config={'output_mode': 'printer', 'printer_host': '127.0.0.1',
+                                             'printer_port': printer.port})
+        gen = ZplGenerator()
+        label = gen.stored_formats['label']
+
+        expected = len(label.download) + len(gen.build_zpl_recall('80000001'))
+        assert label_printer.send_stored_format_job(label, gen.build_zpl_recall('80000001'))
+        assert printer.wait_bytes(expected)
+        for n in range(2, 11):
+            recall = gen.build_zpl_recall(f"{80000000 + n}")
+            expected += len(recall)
+            assert label_printer.send_stored_format_job(label, recall)
+        assert printer.wait_bytes(expected)
+        received = bytes(printer.received).decode('utf-8')
+        assert received.count("^DF") == 1 and received.count("^XF") == 10
+
+        # Registro persistido: um novo processo continua sem reenviar o formato
+        reloaded = StoredFormatRegistry(os.path.join(temp_dir, 'formats.json'))
+        assert reloaded.is_current(f"127.0.0.1:{printer.port}", 'label', label.version)
+        print(f"✅ 10 etiquetas em {expected} bytes (formato enviado uma vez)")
+    finally:
+        format_registry._registry = None
+        printer.close()
+        shutil.rmtree(temp_dir)
+    return True
+
+
+def test_stale_version_redownloads():
+    """Layout alterado (nova versão) força novo ^DF"""
+    print("🧪 Testando reenvio de formato desatualizado...")
+    printer = _RawSink()
+    format_registry._registry = StoredFormatRegistry(None)
+    try:
+        label_printer = LabelPrinter(config={'output_mode': 'printer', 'printer_host': '127.0.0.1',
+                                             'printer_port': printer.port})
+        gen = ZplGenerator()
+        old_label = gen.stored_formats['label']
+        label_printer.send_stored_format_job(old_label, gen.build_zpl_recall('80000001'))
+
+        gen.defaults['width_mm'] = gen.defaults.get('width_mm', 90) + 10
+        gen.invalidate_templates()
+        new_label = gen.stored_formats['label']
+        assert new_label.version != old_label.version
+        label_printer.send_stored_format_job(new_label, gen.build_zpl_recall('80000002'))
+
+        size = len(old_label.download) + len(new_label.download) + 2 * len(gen.build_zpl_recall('80000001'))
+        assert printer.wait_bytes(size)
+        assert bytes(printer.received).count(b"^DF") == 2
+        print("✅ Formato regravado após mudança de versão")
+    finally:
+        format_registry._registry = None
+        printer.close()
+    return True
+
+
+def test_volatile_memory_per_session():
+    """Formato em E: vale entre sessões; em R: é regravado na sessão seguinte e após falha de envio"""
+    print("🧪 Testando memória flash x RAM da impressora...")
+    temp_dir = tempfile.mkdtemp()
+    path = os.path.join(temp_dir, 'formats.json')
+    try:
+        gen = ZplGenerator()
+        flash = gen.stored_formats['label']
+        assert flash.path.startswith('E:')
+        gen.defaults['stored_format_device'] = 'R:'
+        gen.invalidate_templates()
+        ram = gen.stored_formats['consolidator']
+
+        registry = StoredFormatRegistry(path)
+        registry.record('zebra-1', flash.name, flash.version, flash.path)
+        registry.record('zebra-1', ram.name, ram.version, ram.path)
+        assert registry.is_current('zebra-1', ram.name, ram.version)
+
+        # Nova sessão (a impressora pode ter sido desligada entretanto)
+        reloaded = StoredFormatRegistry(path)
+        assert reloaded.is_current('zebra-1', flash.name, flash.version)
+        assert not reloaded.is_current('zebra-1', ram.name, ram.version)
+
+        # Chamada ^XF que falha (conexão perdida) descarta o registro
+        format_registry._registry = reloaded
+        label_printer = LabelPrinter(config={'output_mode': 'printer', 'printer_host': '127.0.0.1',
+                                             'printer_port': 1, 'timeout': 1})
+        reloaded.record('127.0.0.1:1', flash.name, flash.version, flash.path)
+        try:
+            label_printer.send_stored_format_job(flash, gen.build_zpl_recall('80000001'))
+            assert False, "envio para porta fechada deveria falhar"
+        except RuntimeError:
+            pass
+        assert not reloaded.is_current('127.0.0.1:1', flash.name, flash.version)
+        print("✅ E: mantido entre sessões; R: e falhas de envio forçam novo ^DF")
+    finally:
+        format_registry._registry = None
+        shutil.rmtree(temp_dir)
+    return True
+
+
+if __name__ == "__main__":
+    test_recall_matches_full_label()
+    test_download_once_per_printer()
+    test_stale_version_redownloads()
+    test_volatile_memory_per_session()
+    print("\n🎉 Todos os testes de formatos armazenados passaram!")
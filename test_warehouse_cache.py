@@ -0,0 +1,125 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Teste do cache em disco da estrutura de galpões
+Usa um cliente de API falso que responde 304 quando o ETag confere
+"""
+
+import sys
+import os
+import json
+import shutil
+import tempfile
+import time
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), 'src'))
+
+from fake_api import FakeResponse
+from api.warehouse_cache import WarehouseCache
+
+
+def _warehouse_json(floors=40, positions=1000):
+    """Resposta da API /warehouses/{id} com floors x positions paletes (alguns MiB de JSON)"""
+    floor_list = [{'id': f + 1, 'code': f"{f:02d}", 'name': f"Andar {f}", 'floor_number': f,
+                   'pallets': [{'id': f * positions + p + 1, 'code': f"{p + 1:02d}", 'name': f"Palete {p + 1:02d}",
+                                'full_address': f"COT001-A-{f:02d}-{p + 1:04d}",
+                                'short_address': f"A-{f:02d}-{p + 1:04d}", 'status': 'LIVRE'}
+                               for p in range(positions)]}
+                  for f in range(floors)]
+    building = {'id': 100, 'code': 'A', 'name': 'Prédio A', 'total_floors': floors, 'floors': floor_list}
+    return json.dumps({'success': True, 'data': {'id': 3, 'code': 'COT001', 'name': 'Cotia 1',
+                                                 'buildings': [building]}})
+
+
+class _FakeApi:
+    """API de galpões com ETag (ou só campo de versão) e contagem de bytes enviados"""
+
+    def __init__(self, text, etag='"v1"', offline=False):
+        self.text = text
+        self.etag = etag
+        self.offline = offline
+        self.requests = []
+        self.bytes_sent = 0
+
+    def get(self, endpoint, headers=None):
+        if self.offline:
+            raise Exception("Erro de conexão - verifique a conectividade com a API")
+        self.requests.append((endpoint, dict(headers or {})))
+        if self.etag and (headers or {}).get('If-None-Match') == self.etag:
+            return FakeResponse(304)
+        self.bytes_sent += len(self.text)
+        return FakeResponse(200, text=self.text, headers={'ETag': self.etag} if self.etag else {})
+
+
+def test_revalidation_with_etag():
+    """Segunda abertura deve revalidar com If-None-Match e não baixar de novo"""
+    print("🧪 Testando revalidação com ETag...")
+    cache_dir = tempfile.mkdtemp()
+    try:
+        text = _warehouse_json()
+        api = _FakeApi(text)
+        cache = WarehouseCache(cache_dir)
+
+        start = time.perf_counter()
+        status, result, source = cache.fetch(api, 3, company_id=1, headers={'Authorization': 'Bearer x'})
+        first = time.perf_counter() - start
+        assert (status, source) == (200, 'network') and result['data']['code'] == 'COT001'
+
+        start = time.perf_counter()
+        status, cached, source = cache.fetch(api, 3, company_id=1, headers={'Authorization': 'Bearer x'})
+        second = time.perf_counter() - start
+        assert (status, source) == (200, 'not_modified') and cached == result
+        assert api.requests[1][1]['If-None-Match'] == '"v1"'
+        assert api.requests[1][1]['Authorization'] == 'Bearer x'
+        assert api.bytes_sent == len(text)
+
+        # Outra empresa não compartilha a cópia
+        assert cache.fetch(api, 3, company_id=2)[2] == 'network'
+
+        # Estrutura alterada na API: novo ETag baixa de novo
+        api.etag = '"v2"'
+        assert cache.fetch(api, 3, company_id=1)[2] == 'network'
+        print(f"✅ {len(text) / 2**20:.1f} MiB: download+JSON {first * 1000:.0f} ms, revalidação 304 {second * 1000:.0f} ms")
+    finally:
+        shutil.rmtree(cache_dir)
+    return True
+
+
+def test_version_field_and_offline():
+    """Sem ETag, o campo de versão mantém a cópia; API fora do ar usa a cópia antiga"""
+    print("🧪 Testando campo de versão e modo offline...")
+    cache_dir = tempfile.mkdtemp()
+    try:
+        payload = {'success': True, 'data': {'id': 7, 'code': 'X', 'name': 'Galpão X',
+                                             'updated_at': '2026-10-01T10:00:00', 'buildings': []}}
+        api = _FakeApi(json.dumps(payload), etag=None)
+        cache = WarehouseCache(cache_dir)
+        assert cache.fetch(api, 7)[2] == 'network'
+        assert cache.fetch(api, 7)[2] == 'not_modified'
+
+        api.offline = True
+        status, result, source = cache.fetch(api, 7)
+        assert (status, source) == (200, 'stale') and result == payload
+
+        cache.invalidate(7)
+        try:
+            cache.fetch(api, 7)
+            assert False, "sem cópia e sem API deveria falhar"
+        except Exception:
+            pass
+
+        api.offline = False
+        fresh = WarehouseCache(cache_dir, fresh_for=60)
+        fresh.fetch(api, 7)
+        count = len(api.requests)
+        assert fresh.fetch(api, 7)[2] == 'cache' and len(api.requests) == count
+        print("✅ Versão, modo offline e janela sem revalidação funcionando")
+    finally:
+        shutil.rmtree(cache_dir)
+    return True
+
+
+if __name__ == "__main__":
+    test_revalidation_with_etag()
+    test_version_field_and_offline()
+    print("\n🎉 Todos os testes do cache de galpões passaram!")
@@ -0,0 +1,67 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Teste da serialização de lotes na impressora (^SN/^PQ)
+Verifica que o formato único imprime os mesmos códigos do modo etiqueta a etiqueta
+"""
+
+import sys
+import os
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), 'src'))
+
+from printer.zpl_generator import ZplGenerator, expand_serialized_zpl
+
+
+def test_same_code_set():
+    """Os dois modos devem imprimir os mesmos códigos, na mesma ordem"""
+    print("🧪 Testando equivalência dos modos...")
+    generator = ZplGenerator()
+    for start, quantity in [(1, 1), (80000001, 5000), (99990000, 9999)]:
+        assert generator.verify_serialized_batch(start, quantity), (start, quantity)
+
+    serialized = generator.build_batch_zpl(80000001, 5000, serialize=True)
+    per_label = generator.build_batch_zpl(80000001, 5000, serialize=False)
+    assert serialized.count("^XA") == 1 and "^PQ5000," in serialized
+    assert ''.join(expand_serialized_zpl(serialized)) == per_label
+    print(f"✅ 5.000 etiquetas: {len(serialized)} bytes serializado x {len(per_label)} bytes etiqueta a etiqueta")
+    return True
+
+
+def test_fallback_when_width_changes():
+    """Faixa que ganha dígitos deve seguir no modo etiqueta a etiqueta"""
+    print("🧪 Testando fallback para faixa que muda de largura...")
+    generator = ZplGenerator()
+    assert not generator.can_serialize(99999990, 20)
+    assert not generator.verify_serialized_batch(99999990, 20)
+    zpl = generator.build_batch_zpl(99999990, 20, serialize=True)
+    assert zpl == generator.build_batch_zpl(99999990, 20, serialize=False)
+    assert "^SN" not in zpl and zpl.count("^XA") == 20
+    try:
+        generator.build_serialized_batch_zpl(99999990, 20)
+        assert False, "faixa inválida deveria falhar"
+    except ValueError:
+        pass
+    print("✅ Fallback para o modo etiqueta a etiqueta")
+    return True
+
+
+def test_default_and_streaming():
+    """O padrão vem de batch_serialization e vale também para o streaming"""
+    print("🧪 Testando configuração padrão e streaming...")
+    generator = ZplGenerator()
+    assert b''.join(generator.iter_batch_zpl(1, 100)).count(b"^XA") == 100
+
+    generator.defaults['batch_serialization'] = True
+    chunks = list(generator.iter_batch_zpl(1, 100))
+    assert len(chunks) == 1 and chunks[0] == generator.build_batch_zpl(1, 100).encode('utf-8')
+    assert b"^SN00000001,1,Y^FS" in chunks[0]
+    print("✅ Lote enviado como um único formato")
+    return True
+
+
+if __name__ == "__main__":
+    test_same_code_set()
+    test_fallback_when_width_changes()
+    test_default_and_streaming()
+    print("\n🎉 Todos os testes de serialização ZPL passaram!")
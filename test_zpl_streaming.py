@@ -0,0 +1,89 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Teste da geração de ZPL em streaming para lotes sequenciais
+Verifica conteúdo idêntico ao modo string, blocos com etiquetas completas
+e memória constante independente da quantidade
+"""
+
+import sys
+import os
+import shutil
+import tempfile
+import tracemalloc
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), 'src'))
+
+from printer.zpl_generator import ZplGenerator
+from printer.label_printer import LabelPrinter
+
+
+def test_same_output_as_string_mode():
+    """Os blocos concatenados devem ser idênticos ao build_batch_zpl"""
+    print("🧪 Testando equivalência com o modo string...")
+    generator = ZplGenerator()
+    chunks = list(generator.iter_batch_zpl(80000001, 1000, chunk_size=16 * 1024))
+    expected = generator.build_batch_zpl(80000001, 1000).encode('utf-8')
+
+    assert b''.join(chunks) == expected
+    for chunk in chunks:
+        assert chunk.startswith(b"^XA") and chunk.endswith(b"^XZ\n")
+    assert all(len(chunk) >= 16 * 1024 for chunk in chunks[:-1])
+    print(f"✅ {len(chunks)} blocos, {len(expected)} bytes, todos com etiquetas completas")
+    return True
+
+
+def _peak_kib(func):
+    tracemalloc.start()
+    func()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return peak / 1024
+
+
+def test_flat_memory():
+    """O pico de memória do streaming não deve crescer com a quantidade"""
+    print("🧪 Medindo pico de memória...")
+    generator = ZplGenerator()
+
+    def consume(quantity):
+        def run():
+            for _ in generator.iter_batch_zpl(1, quantity):
+                pass
+        return run
+
+    small = _peak_kib(consume(1000))
+    large = _peak_kib(consume(20000))
+    string_mode = _peak_kib(lambda: generator.build_batch_zpl(1, 20000))
+    print(f"   streaming 1.000: {small:.0f} KiB | streaming 20.000: {large:.0f} KiB | "
+          f"string 20.000: {string_mode:.0f} KiB")
+    assert large < small * 1.5 + 64
+    assert large < string_mode / 10
+    print("✅ Memória constante no streaming")
+    return True
+
+
+def test_label_printer_accepts_iterable():
+    """LabelPrinter deve gravar um iterável de blocos à medida que consome"""
+    print("🧪 Testando LabelPrinter com iterável...")
+    output_dir = tempfile.mkdtemp()
+    try:
+        printer = LabelPrinter(config={'output_mode': 'file', 'output_path': output_dir})
+        generator = ZplGenerator()
+        assert printer.send_print_job(generator.iter_batch_zpl(80000001, 500), 500)
+
+        files = os.listdir(output_dir)
+        assert len(files) == 1
+        with open(os.path.join(output_dir, files[0]), 'rb') as f:
+            assert f.read() == generator.build_batch_zpl(80000001, 500).encode('utf-8')
+        print("✅ Arquivo gravado em streaming com conteúdo idêntico")
+    finally:
+        shutil.rmtree(output_dir)
+    return True
+
+
+if __name__ == "__main__":
+    test_same_output_as_string_mode()
+    test_flat_memory()
+    test_label_printer_accepts_iterable()
+    print("\n🎉 Todos os testes de streaming ZPL passaram!")
@@ -0,0 +1,79 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Teste dos templates ZPL pré-compilados
+Verifica que a renderização é idêntica à montagem campo a campo
+"""
+
+import sys
+import os
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), 'src'))
+
+from printer.zpl_generator import ZplGenerator
+from printer.zpl_template import ZplTemplate, slot
+
+
+def test_template_render():
+    """Campos substituídos, '%' preservado e campo ausente reportado"""
+    print("🧪 Testando ZplTemplate...")
+    template = ZplTemplate('teste', f"^XA^FD{slot('a')}^FS^FD100%^FS^FD{slot('b')}^FS^XZ")
+    assert template.slots == ['a', 'b']
+    assert template.render(a='x%s', b='Térreo') == "^XA^FDx%s^FS^FD100%^FS^FDTérreo^FS^XZ"
+    assert template.render_bytes(a=1, b='é') == "^XA^FD1^FS^FD100%^FS^FDé^FS^XZ".encode('utf-8')
+    try:
+        template.render(a='x')
+        assert False, "campo ausente deveria falhar"
+    except KeyError:
+        pass
+    print("✅ Renderização correta")
+    return True
+
+
+def test_layouts_match_composed():
+    """Todos os layouts devem sair iguais byte a byte à montagem sem template"""
+    print("🧪 Testando equivalência dos layouts...")
+    gen = ZplGenerator()
+    addresses = [{'full_address': f"COT001-A-01-{n:02d}-01", 'floor_name': f"Andar {n}"} for n in range(8)]
+
+    assert gen.build_zpl('80000001') == gen._compose_label_zpl('80000001')
+    cargo = {'priority': 'urgent', 'special_handling': 'fragile'}
+    assert gen.build_zpl('80000001', cargo) == gen._compose_label_zpl(
+        '80000001', gen._add_special_indicators(cargo))
+    assert gen.build_batch_zpl(1, 3) == ''.join(gen._compose_label_zpl(gen.pad8(n)) for n in (1, 2, 3))
+    assert gen.build_consolidator_zpl('900001') == gen._compose_consolidator_zpl('900001')
+    assert gen.build_single_address_zpl('COT001-A-01-01-01', 'Palete 100%', 'Prédio A', 'Térreo') == \
+        gen._compose_single_address_zpl('COT001-A-01-01-01', 'Palete 100%', 'Prédio A', 'Térreo')
+
+    for count in (1, 3, 8, 10):
+        floor = gen._compose_address_header("Cotia 1 (COT001) - Prédio A - Térreo")
+        block = gen._compose_address_header("Cotia 1 (COT001) - Prédio A")
+        for idx, addr in enumerate(addresses[:count]):
+            floor += gen._compose_floor_cell(idx, addr['full_address'])
+            block += gen._compose_block_cell(idx, addr['full_address'], addr['floor_name'])
+        assert gen.build_floor_addresses_zpl('COT001', 'Cotia 1', 'Prédio A', 'Térreo',
+                                             addresses[:count]) == floor + "^XZ\n"
+        assert gen.build_block_addresses_zpl('COT001', 'Cotia 1', 'Prédio A',
+                                             addresses[:count]) == block + "^XZ\n"
+    print("✅ Layouts idênticos")
+    return True
+
+
+def test_invalidate_after_defaults_change():
+    """Alterar defaults e invalidar deve recompilar os templates"""
+    print("🧪 Testando invalidação dos templates...")
+    gen = ZplGenerator()
+    before = gen.build_zpl('80000001')
+    gen.defaults['width_mm'] = gen.defaults.get('width_mm', 100) + 10
+    gen.invalidate_templates()
+    assert gen.build_zpl('80000001') == gen._compose_label_zpl('80000001')
+    assert gen.build_zpl('80000001') != before
+    print("✅ Templates recompilados")
+    return True
+
+
+if __name__ == "__main__":
+    test_template_render()
+    test_layouts_match_composed()
+    test_invalidate_after_defaults_change()
+    print("\n🎉 Todos os testes de templates ZPL passaram!")